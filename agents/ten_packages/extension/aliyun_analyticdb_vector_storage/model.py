@@ -51,8 +51,10 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = await self.get_client().init_vector_database_with_options_async(
-                request, runtime
+            response = await self.client.run(
+                self.get_client().init_vector_database_with_options_async(
+                    request, runtime
+                )
             )
             self.ten_env.log_debug(
                 f"init_vector_database response code: {response.status_code}, body:{response.body}"
@@ -99,8 +101,8 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = await self.get_client().create_namespace_with_options_async(
-                request, runtime
+            response = await self.client.run(
+                self.get_client().create_namespace_with_options_async(request, runtime)
             )
             self.ten_env.log_debug(
                 f"create_namespace response code: {response.status_code}, body:{response.body}"
@@ -185,8 +187,8 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = await self.get_client().create_collection_with_options_async(
-                request, runtime
+            response = await self.client.run(
+                self.get_client().create_collection_with_options_async(request, runtime)
             )
             self.ten_env.log_debug(
                 f"create_document_collection response code: {response.status_code}, body:{response.body}"
@@ -231,8 +233,8 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = await self.get_client().delete_collection_with_options_async(
-                request, runtime
+            response = await self.client.run(
+                self.get_client().delete_collection_with_options_async(request, runtime)
             )
             self.ten_env.log_info(
                 f"delete_collection response code: {response.status_code}, body:{response.body}"
@@ -321,8 +323,8 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = (
-                await self.get_client().upsert_collection_data_with_options_async(
+            response = await self.client.run(
+                self.get_client().upsert_collection_data_with_options_async(
                     upsert_collection_data_request, runtime
                 )
             )
@@ -420,8 +422,10 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = await self.get_client().query_collection_data_with_options_async(
-                query_collection_data_request, runtime
+            response = await self.client.run(
+                self.get_client().query_collection_data_with_options_async(
+                    query_collection_data_request, runtime
+                )
             )
             self.ten_env.log_debug(
                 f"query_collection response code: {response.status_code}"
@@ -483,8 +487,8 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = await self.get_client().list_collections_with_options_async(
-                request, runtime
+            response = await self.client.run(
+                self.get_client().list_collections_with_options_async(request, runtime)
             )
             self.ten_env.log_debug(
                 f"list_collections response code: {response.status_code}, body:{response.body}"
@@ -539,8 +543,10 @@ class Model:
             runtime = util_models.RuntimeOptions(
                 read_timeout=self.read_timeout, connect_timeout=self.connect_timeout
             )
-            response = await self.get_client().create_vector_index_with_options_async(
-                request, runtime
+            response = await self.client.run(
+                self.get_client().create_vector_index_with_options_async(
+                    request, runtime
+                )
             )
             self.ten_env.log_debug(
                 f"create_vector_index response code: {response.status_code}, body:{response.body}"
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+from typing import Coroutine, Optional
+
+
+class RequestLimiter:
+    """Bounds the SDK calls awaited on the caller's event loop.
+
+    At most max_concurrency calls run at once, the others wait for a slot
+    without polling. A call running longer than its timeout is cancelled
+    and raises TimeoutError. There is no thread of its own: the call runs
+    on the loop that awaits run().
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 30.0) -> None:
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(self, coro: Coroutine, timeout: Optional[float] = None):
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            coro.close()
+            raise
+        try:
+            return await asyncio.wait_for(coro, timeout or self.timeout)
+        finally:
+            self._slots.release()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Latency added to each query_vector by the way its SDK call is awaited.
+
+Usage:
+    python tests/bench_request_limiter.py [queries]
+
+query_vector awaits the SDK call from the extension's event loop; here the
+call is a 20 ms sleep and queries (default 200) arrive every 7 ms, about
+three in flight at once. The added latency is the time to the result
+minus those 20 ms, for:
+
+- direct: the SDK coroutine awaited as is, as the model always did (the
+  polling thread of the previous AliGPDBClient was never handed a call);
+- limiter: RequestLimiter, a semaphore and wait_for on the same loop;
+- hop: the call handed to an event loop on another thread and awaited
+  back, what a client with an executor thread of its own costs.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from request_limiter import RequestLimiter  # noqa: E402
+
+SDK_CALL = 0.02
+
+
+async def sdk_call():
+    await asyncio.sleep(SDK_CALL)
+    return "matches"
+
+
+async def measure(call, queries):
+    added = []
+
+    async def query_vector():
+        start = time.perf_counter()
+        await call()
+        added.append((time.perf_counter() - start - SDK_CALL) * 1000)
+
+    tasks = []
+    for _ in range(queries):
+        tasks.append(asyncio.create_task(query_vector()))
+        await asyncio.sleep(0.007)
+    await asyncio.gather(*tasks)
+    return added
+
+
+def main() -> None:
+    queries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    async def direct():
+        return await sdk_call()
+
+    limiter = RequestLimiter(max_concurrency=8)
+
+    async def limited():
+        return await limiter.run(sdk_call())
+
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+
+    async def hop():
+        future = asyncio.run_coroutine_threadsafe(sdk_call(), other_loop)
+        return await asyncio.wrap_future(future)
+
+    print(f"{queries} queries, SDK call {SDK_CALL * 1000:.0f} ms")
+    for name, call in (("direct", direct), ("limiter", limited), ("hop", hop)):
+        added = sorted(asyncio.run(measure(call, queries)))
+        print(
+            f"{name:<8} added latency mean {statistics.mean(added):6.2f} ms "
+            f"p50 {statistics.median(added):6.2f} ms "
+            f"p99 {added[int(0.99 * len(added))]:6.2f} ms"
+        )
+    other_loop.call_soon_threadsafe(other_loop.stop)
+    thread.join()
+    other_loop.close()
+
+
+if __name__ == "__main__":
+    main()
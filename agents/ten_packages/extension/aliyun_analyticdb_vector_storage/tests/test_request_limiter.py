@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from request_limiter import RequestLimiter  # noqa: E402
+
+
+async def echo(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return value
+
+
+def test_results_errors_and_timeouts():
+    limiter = RequestLimiter(max_concurrency=2, timeout=0.2)
+
+    async def fail():
+        raise ValueError("bad request")
+
+    async def caller():
+        return await asyncio.gather(
+            limiter.run(echo("ok")),
+            limiter.run(fail()),
+            limiter.run(echo("slow", 1.0)),
+            limiter.run(echo("slow but allowed", 0.3), timeout=1.0),
+            return_exceptions=True,
+        )
+
+    ok, failed, timed_out, allowed = asyncio.run(caller())
+    assert ok == "ok" and allowed == "slow but allowed"
+    assert isinstance(failed, ValueError)
+    assert isinstance(timed_out, TimeoutError)
+
+
+def test_concurrency_is_bounded():
+    limiter = RequestLimiter(max_concurrency=3)
+    running = peak = 0
+
+    async def task():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    async def caller():
+        start = time.perf_counter()
+        await asyncio.gather(*(limiter.run(task()) for _ in range(9)))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(caller())
+    assert peak == 3
+    assert elapsed == pytest.approx(0.06, abs=0.05)
+
+
+def test_cancel_while_waiting_keeps_the_bound():
+    limiter = RequestLimiter(max_concurrency=1)
+
+    async def caller():
+        running = asyncio.create_task(limiter.run(echo("first", 0.05)))
+        waiting = asyncio.create_task(limiter.run(echo("never")))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        return await asyncio.gather(running, limiter.run(echo("next")))
+
+    assert asyncio.run(caller()) == ["first", "next"]
@@ -16,6 +16,8 @@ from ten import (
 import threading
 from datetime import datetime
 
+from .vector_codec import unpack_vectors
+
 
 class AliPGDBExtension(Extension):
     def __init__(self, name):
@@ -32,6 +34,9 @@ class AliPGDBExtension(Extension):
         self.account_password = os.environ.get("ADBPG_ACCOUNT_PASSWORD")
         self.namespace = os.environ.get("ADBPG_NAMESPACE")
         self.namespace_password = os.environ.get("ADBPG_NAMESPACE_PASSWORD")
+        # SDK calls in flight at once, and how long each may take
+        self.max_concurrent_requests = 8
+        self.request_timeout_ms = 30000
 
     async def __thread_routine(self, ten_env: TenEnv):
         ten_env.log_info("__thread_routine start")
@@ -66,6 +71,12 @@ class AliPGDBExtension(Extension):
         self.namespace_password = self.get_property_string(
             ten, "ADBPG_NAMESPACE_PASSWORD", self.namespace_password
         )
+        self.max_concurrent_requests = self.get_property_int(
+            ten, "max_concurrent_requests", self.max_concurrent_requests
+        )
+        self.request_timeout_ms = self.get_property_int(
+            ten, "request_timeout_ms", self.request_timeout_ms
+        )
 
         if self.region_id in (
             "cn-beijing",
@@ -88,7 +99,12 @@ class AliPGDBExtension(Extension):
         from .model import Model
 
         client = AliGPDBClient(
-            ten, self.access_key_id, self.access_key_secret, self.endpoint
+            ten,
+            self.access_key_id,
+            self.access_key_secret,
+            self.endpoint,
+            max_concurrency=self.max_concurrent_requests,
+            timeout=self.request_timeout_ms / 1000,
         )
         self.model = Model(ten, self.region_id, self.dbinstance_id, client)
         self.thread = threading.Thread(
@@ -165,7 +181,18 @@ class AliPGDBExtension(Extension):
         file = cmd.get_property_string("file_name")
         content = cmd.get_property_string("content")
         obj = json.loads(content)
-        rows = [(file, item["text"], item["embedding"]) for item in obj]
+        try:
+            # packed float32, content then only has the texts
+            embeddings = unpack_vectors(cmd.get_property_buf("embeddings_buf"))
+        except Exception:
+            embeddings = [item["embedding"] for item in obj]
+        if len(embeddings) != len(obj):
+            ten.log_error(
+                f"upsert_vector {len(obj)} texts but {len(embeddings)} embeddings"
+            )
+            ten.return_result(CmdResult.create(StatusCode.ERROR), cmd)
+            return
+        rows = [(file, item["text"], e) for item, e in zip(obj, embeddings)]
 
         err = await self.model.upsert_collection_data_async(
             collection, self.namespace, self.namespace_password, rows
@@ -181,14 +208,16 @@ class AliPGDBExtension(Extension):
     async def async_query_vector(self, ten: TenEnv, cmd: Cmd):
         start_time = datetime.now()
         collection = cmd.get_property_string("collection_name")
-        embedding = cmd.get_property_to_json("embedding")
         top_k = cmd.get_property_int("top_k")
-        vector = json.loads(embedding)
+        try:
+            (vector,) = unpack_vectors(cmd.get_property_buf("embedding_buf"))
+        except Exception:
+            vector = json.loads(cmd.get_property_to_json("embedding"))
         response, error = await self.model.query_collection_data_async(
             collection, self.namespace, self.namespace_password, vector, top_k=top_k
         )
         ten.log_info(
-            f"query_vector finished for collection {collection}, embedding len {len(embedding)}, err {error}, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms"
+            f"query_vector finished for collection {collection}, embedding len {len(vector)}, err {error}, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms"
         )
 
         if error:
@@ -216,3 +245,10 @@ class AliPGDBExtension(Extension):
         except Exception as e:
             ten.log_error(f"Error: {e}")
             return default
+
+    def get_property_int(self, ten: TenEnv, key: str, default: int) -> int:
+        try:
+            return ten.get_property_int(key.lower())
+        except Exception as e:
+            ten.log_warn(f"Error: {e}")
+            return default
@@ -0,0 +1,165 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import collections
+import time
+from typing import Awaitable, Callable, List
+
+Embed = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+class EmbeddingBatcher:
+    """Merge the inputs of concurrent embed cmds into provider sized batches.
+
+    An input waits at most max_wait_ms for its batch to fill up to
+    max_batch_size. Up to max_concurrency batches are in flight, started at
+    most max_requests_per_second per second (0 for no limit); while they are
+    all busy inputs keep queueing, so batches grow with the load. Urgent
+    inputs (single queries) are put into batches before bulk ones.
+
+    submit returns one future per input, resolved with its embedding or the
+    error of its batch.
+    """
+
+    def __init__(
+        self,
+        embed: Embed,
+        max_batch_size: int = 6,
+        max_wait_ms: int = 5,
+        max_concurrency: int = 10,
+        max_requests_per_second: float = 0,
+        clock=time.monotonic,
+    ) -> None:
+        self._embed = embed
+        self._max_batch_size = max(max_batch_size, 1)
+        self._max_wait = max_wait_ms / 1000
+        self._interval = (
+            1 / max_requests_per_second if max_requests_per_second > 0 else 0
+        )
+        self._clock = clock
+        self._slots = asyncio.Semaphore(max(max_concurrency, 1))
+        self._next_start = 0.0
+
+        # (text, future, queued_at)
+        self._urgent: collections.deque = collections.deque()
+        self._bulk: collections.deque = collections.deque()
+        self._wakeup = asyncio.Event()
+        self._inflight: set[asyncio.Task] = set()
+        self._closed = False
+
+        self._requests = 0
+        self._inputs = 0
+        self._max_queued = 0
+
+    def submit(self, texts: List[str], urgent: bool = False) -> List[asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        lane = self._urgent if urgent else self._bulk
+        now = self._clock()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            if self._closed:
+                future.cancel()
+            else:
+                lane.append((text, future, now))
+            futures.append(future)
+        self._max_queued = max(self._max_queued, self.queued)
+        self._wakeup.set()
+        return futures
+
+    @property
+    def queued(self) -> int:
+        return len(self._urgent) + len(self._bulk)
+
+    def metrics(self) -> dict:
+        return {
+            "requests": self._requests,
+            "inputs": self._inputs,
+            "avg_batch_size": (
+                round(self._inputs / self._requests, 2) if self._requests else 0
+            ),
+            "queued": self.queued,
+            "max_queued": self._max_queued,
+            "inflight": len(self._inflight),
+        }
+
+    def close(self) -> None:
+        self._closed = True
+        for lane in (self._urgent, self._bulk):
+            while lane:
+                lane.popleft()[1].cancel()
+        for task in self._inflight:
+            task.cancel()
+        self._wakeup.set()
+
+    async def run(self) -> None:
+        while not self._closed:
+            if not self.queued:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            if self.queued < self._max_batch_size:
+                oldest = min(lane[0][2] for lane in (self._urgent, self._bulk) if lane)
+                delay = oldest + self._max_wait - self._clock()
+                if delay > 0:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+            await self._slots.acquire()
+            if self._interval:
+                now = self._clock()
+                start = max(now, self._next_start)
+                self._next_start = start + self._interval
+                if start > now:
+                    await asyncio.sleep(start - now)
+
+            # Taken only now: inputs that came in while waiting for a slot
+            # join this batch.
+            batch = self._take()
+            if not batch:
+                self._slots.release()
+                continue
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    def _take(self) -> list:
+        batch = []
+        for lane in (self._urgent, self._bulk):
+            while lane and len(batch) < self._max_batch_size:
+                item = lane.popleft()
+                if not item[1].done():  # cancelled by its cmd
+                    batch.append(item)
+        return batch
+
+    async def _dispatch(self, batch: list) -> None:
+        self._requests += 1
+        self._inputs += len(batch)
+        try:
+            embeddings = await self._embed([text for text, _, _ in batch])
+            if len(embeddings) != len(batch):
+                raise ValueError(
+                    f"{len(embeddings)} embeddings for {len(batch)} inputs"
+                )
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future, _), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        finally:
+            self._slots.release()
@@ -0,0 +1,296 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import collections
+import fcntl
+import hashlib
+import mmap
+import os
+import re
+import struct
+from array import array
+from typing import List, Optional
+
+KEY_SIZE = 16
+
+# magic, dimension, capacity in slots, next slot to write
+_HEADER = struct.Struct("<8sIIQ")
+_HEADER_SIZE = 32
+_MAGIC = b"TENEMB01"
+
+
+class _DiskTier:
+    """Fixed size slots of key + float32 vector in a memory-mapped file.
+
+    Slots are written round robin, so the oldest entry is evicted once the
+    file is full. The key -> slot index is rebuilt from the file on open.
+
+    The file may be mapped by several processes. Writers take an flock and
+    continue at the next slot of the header, and a read checks the key in
+    the slot, which another process may have written over since.
+    """
+
+    def __init__(self, path: str, dimension: int, max_bytes: int) -> None:
+        self.dimension = dimension
+        self.slot_size = KEY_SIZE + 4 * dimension
+        self.capacity = max(1, (max_bytes - _HEADER_SIZE) // self.slot_size)
+        self.index: dict[bytes, int] = {}
+        self.evictions = 0
+
+        size = _HEADER_SIZE + self.capacity * self.slot_size
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            header = os.pread(self.fd, _HEADER.size, 0)
+            reuse = (
+                os.fstat(self.fd).st_size == size
+                and header[:16]
+                == _HEADER.pack(_MAGIC, dimension, self.capacity, 0)[:16]
+            )
+            if not reuse:
+                # Sparse and zeroed: every slot is empty.
+                os.ftruncate(self.fd, 0)
+                os.ftruncate(self.fd, size)
+            self.mm = mmap.mmap(self.fd, size)
+            if not reuse:
+                _HEADER.pack_into(self.mm, 0, _MAGIC, dimension, self.capacity, 0)
+        except BaseException:
+            os.close(self.fd)  # and with it the lock
+            raise
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+        if not reuse:
+            return
+
+        empty = bytes(KEY_SIZE)
+        for slot in range(self.capacity):
+            key = self._key(slot)
+            if key != empty:
+                self.index[key] = slot
+
+    def _offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * self.slot_size
+
+    def _key(self, slot: int) -> bytes:
+        offset = self._offset(slot)
+        return self.mm[offset : offset + KEY_SIZE]
+
+    def get(self, key: bytes) -> Optional[array]:
+        slot = self.index.get(key)
+        if slot is None:
+            return None
+        offset = self._offset(slot) + KEY_SIZE
+        vector = array("f")
+        if self._key(slot) == key:
+            vector.frombytes(self.mm[offset : offset + 4 * self.dimension])
+            # Checked again, the slot may be written over while it is read.
+            if self._key(slot) == key:
+                return vector
+        # Another process reused the slot.
+        del self.index[key]
+        return None
+
+    def put(self, key: bytes, vector: array) -> None:
+        slot = self.index.get(key)
+        if slot is not None and self._key(slot) == key:
+            return
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+        try:
+            # Other processes move the next slot on as well.
+            slot = _HEADER.unpack_from(self.mm, 0)[3] % self.capacity
+            offset = self._offset(slot)
+            old = self._key(slot)
+            if self.index.get(old) == slot:
+                del self.index[old]
+                self.evictions += 1
+            # The key goes last, a slot with a key always has its vector.
+            self.mm[offset : offset + KEY_SIZE] = bytes(KEY_SIZE)
+            self.mm[offset + KEY_SIZE : offset + self.slot_size] = vector.tobytes()
+            self.mm[offset : offset + KEY_SIZE] = key
+            _HEADER.pack_into(
+                self.mm,
+                0,
+                _MAGIC,
+                self.dimension,
+                self.capacity,
+                (slot + 1) % self.capacity,
+            )
+        finally:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        self.index[key] = slot
+
+    def close(self) -> None:
+        self.mm.flush()
+        self.mm.close()
+        os.close(self.fd)
+
+
+class EmbeddingCache:
+    """Embeddings by (model, text) in a memory LRU and an on-disk tier.
+
+    Vectors are kept as packed float32. The memory tier holds up to
+    max_memory_bytes of them; the disk tier is a file of up to max_disk_bytes
+    per model and dimension in directory, left out if directory is empty or
+    max_disk_bytes is 0. A disk hit is promoted to the memory tier.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_memory_bytes: int = 64 << 20,
+        directory: str = "",
+        max_disk_bytes: int = 256 << 20,
+    ) -> None:
+        self.model = model
+        self._max_memory_bytes = max_memory_bytes
+        self._memory: collections.OrderedDict[bytes, array] = collections.OrderedDict()
+        self._memory_bytes = 0
+        self._directory = directory if max_disk_bytes > 0 else ""
+        self._max_disk_bytes = max_disk_bytes
+        self._disk: Optional[_DiskTier] = None
+        self._disk_found = False
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+
+    def key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=KEY_SIZE)
+        digest.update(self.model.encode())
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return digest.digest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector.tolist()
+        disk = self._find_disk_tier()
+        if disk is not None:
+            vector = disk.get(key)
+            if vector is not None:
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector.tolist()
+        self.misses += 1
+        return None
+
+    def put(self, text: str, embedding: List[float]) -> None:
+        key = self.key(text)
+        vector = array("f", embedding)
+        self._remember(key, vector)
+        disk = self._disk_tier(len(vector))
+        if disk is not None:
+            disk.put(key, vector)
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def metrics(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_evictions": self.memory_evictions,
+            "disk_entries": len(self._disk.index) if self._disk else 0,
+            "disk_evictions": self._disk.evictions if self._disk else 0,
+        }
+
+    def _remember(self, key: bytes, vector: array) -> None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += 4 * len(vector)
+        while self._memory_bytes > self._max_memory_bytes and self._memory:
+            _, old = self._memory.popitem(last=False)
+            self._memory_bytes -= 4 * len(old)
+            self.memory_evictions += 1
+
+    def _path(self, dimension: int) -> str:
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", self.model) or "default"
+        return os.path.join(self._directory, f"{name}-{dimension}.vec")
+
+    def _find_disk_tier(self) -> Optional[_DiskTier]:
+        # Before the first put the dimension is unknown, use the file a
+        # previous run left for the model.
+        if self._disk is None and self._directory and not self._disk_found:
+            self._disk_found = True
+            prefix = os.path.basename(self._path(0))[: -len("0.vec")]
+            try:
+                names = sorted(os.listdir(self._directory))
+            except OSError:
+                names = []
+            for name in names:
+                dimension = name[len(prefix) : -len(".vec")]
+                if name.startswith(prefix) and dimension.isdigit():
+                    return self._disk_tier(int(dimension))
+        return self._disk
+
+    def _disk_tier(self, dimension: int) -> Optional[_DiskTier]:
+        if not self._directory:
+            return None
+        if self._disk is None or self._disk.dimension != dimension:
+            if self._disk is not None:
+                self._disk.close()
+            os.makedirs(self._directory, exist_ok=True)
+            self._disk = _DiskTier(
+                self._path(dimension), dimension, self._max_disk_bytes
+            )
+        return self._disk
+
+
+class CachedBatcher:
+    """submit of an EmbeddingBatcher behind an EmbeddingCache.
+
+    Cached texts are answered right away, a text already in flight shares
+    its future, and only the rest goes to the batcher.
+    """
+
+    def __init__(self, cache: EmbeddingCache, batcher) -> None:
+        self.cache = cache
+        self.batcher = batcher
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def submit(self, texts: List[str], urgent: bool = False) -> List[asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        futures: List[Optional[asyncio.Future]] = []
+        missing = {}
+        for text in texts:
+            future = self._inflight.get(text)
+            if future is None:
+                embedding = self.cache.get(text)
+                if embedding is not None:
+                    future = loop.create_future()
+                    future.set_result(embedding)
+                else:
+                    missing[text] = None
+            futures.append(future)
+
+        if missing:
+            submitted = self.batcher.submit(list(missing), urgent)
+            for text, future in zip(missing, submitted):
+                self._inflight[text] = future
+                future.add_done_callback(lambda f, text=text: self._done(text, f))
+        return [
+            future if future is not None else self._inflight[text]
+            for future, text in zip(futures, texts)
+        ]
+
+    def _done(self, text: str, future: asyncio.Future) -> None:
+        if self._inflight.get(text) is future:
+            del self._inflight[text]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(text, future.result())
@@ -7,41 +7,95 @@ from ten import (
 )
 
 import json
-from typing import Generator, List
+from typing import List
 from http import HTTPStatus
-import threading, queue
+import asyncio
+import concurrent.futures
+import os
+import tempfile
+import threading
 from datetime import datetime
 
+from .embedding_batcher import EmbeddingBatcher
+from .embedding_cache import CachedBatcher, EmbeddingCache
+from .vector_codec import VECTOR_FORMAT_F32, pack_vectors
+
 CMD_EMBED = "embed"
 CMD_EMBED_BATCH = "embed_batch"
 
 FIELD_KEY_EMBEDDING = "embedding"
 FIELD_KEY_EMBEDDINGS = "embeddings"
+FIELD_KEY_EMBEDDING_BUF = "embedding_buf"
+FIELD_KEY_EMBEDDINGS_BUF = "embeddings_buf"
+FIELD_KEY_TEXT_INDEXES = "text_indexes"
+FIELD_KEY_VECTOR_FORMAT = "vector_format"
 FIELD_KEY_MESSAGE = "message"
 FIELD_KEY_CODE = "code"
 
 DASHSCOPE_MAX_BATCH_SIZE = 6
 
 
+class EmbeddingError(Exception):
+    def __init__(self, code, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+
 class EmbeddingExtension(Extension):
     def __init__(self, name: str):
         super().__init__(name)
         self.api_key = ""
         self.model = ""
 
-        self.stop = False
-        self.queue = queue.Queue()
-        self.threads = []
-
+        # inputs of concurrent cmds are merged into batches of up to
+        # max_batch_size, waiting at most batch_window_ms for a batch to fill
+        self.max_batch_size = DASHSCOPE_MAX_BATCH_SIZE
+        self.batch_window_ms = 5
         # workaround to speed up the embedding process,
         # should be replace by https://help.aliyun.com/zh/model-studio/developer-reference/text-embedding-batch-api?spm=a2c4g.11186623.0.0.24cb7453KSjdhC
         # once v3 models supported
         self.parallel = 10
+        self.max_requests_per_second = 0
+        # embeddings by (model, text), in memory and in cache_dir
+        self.cache_memory_mb = 64
+        self.cache_disk_mb = 256
+        self.cache_dir = ""
+
+        self.loop = None
+        self.executor = None
+        self.batcher = None
+        self.batcher_future = None
+        self.cache = None
+        self.embedder = None
 
     def on_start(self, ten: TenEnv) -> None:
         ten.log_info("on_start")
         self.api_key = self.get_property_string(ten, "api_key", self.api_key)
         self.model = self.get_property_string(ten, "model", self.api_key)
+        self.max_batch_size = self.get_property_int(
+            ten, "max_batch_size", self.max_batch_size
+        )
+        self.batch_window_ms = self.get_property_int(
+            ten, "batch_window_ms", self.batch_window_ms
+        )
+        self.parallel = self.get_property_int(
+            ten, "max_concurrent_requests", self.parallel
+        )
+        self.max_requests_per_second = self.get_property_int(
+            ten, "max_requests_per_second", self.max_requests_per_second
+        )
+        self.cache_memory_mb = self.get_property_int(
+            ten, "cache_memory_mb", self.cache_memory_mb
+        )
+        self.cache_disk_mb = self.get_property_int(
+            ten, "cache_disk_mb", self.cache_disk_mb
+        )
+        self.cache_dir = self.get_property_string(ten, "cache_dir", self.cache_dir)
+        if not self.cache_dir:
+            self.cache_dir = os.path.join(
+                tempfile.gettempdir(), "aliyun_text_embedding_cache"
+            )
 
         # lazy import packages which requires long time to load
         global dashscope  # pylint: disable=global-statement
@@ -49,98 +103,134 @@ class EmbeddingExtension(Extension):
 
         dashscope.api_key = self.api_key
 
-        for i in range(self.parallel):
-            thread = threading.Thread(target=self.async_handler, args=[i, ten])
-            thread.start()
-            self.threads.append(thread)
+        # dashscope calls are blocking, one thread per batch in flight
+        self.executor = concurrent.futures.ThreadPoolExecutor(self.parallel)
+        self.loop = asyncio.new_event_loop()
+
+        def start_loop():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_forever()
+
+        threading.Thread(target=start_loop, args=[]).start()
+
+        self.batcher = EmbeddingBatcher(
+            self.embed,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.batch_window_ms,
+            max_concurrency=self.parallel,
+            max_requests_per_second=self.max_requests_per_second,
+        )
+        self.batcher_future = asyncio.run_coroutine_threadsafe(
+            self.batcher.run(), self.loop
+        )
+        self.cache = EmbeddingCache(
+            self.model,
+            max_memory_bytes=self.cache_memory_mb << 20,
+            directory=self.cache_dir,
+            max_disk_bytes=self.cache_disk_mb << 20,
+        )
+        self.embedder = CachedBatcher(self.cache, self.batcher)
 
         ten.on_start_done()
 
-    def async_handler(self, index: int, ten: TenEnv):
-        ten.log_info(f"async_handler {index} statend")
-
-        while not self.stop:
-            cmd = self.queue.get()
-            if cmd is None:
-                break
-
-            cmd_name = cmd.get_name()
-            start_time = datetime.now()
-            ten.log_info(f"async_handler {index} processing cmd {cmd_name}")
-
-            if cmd_name == CMD_EMBED:
-                cmd_result = self.call_with_str(cmd.get_property_string("input"), ten)
-                ten.return_result(cmd_result, cmd)
-            elif cmd_name == CMD_EMBED_BATCH:
-                inputs_list = json.loads(cmd.get_property_to_json("inputs"))
-                cmd_result = self.call_with_strs(inputs_list, ten)
-                ten.return_result(cmd_result, cmd)
-            else:
-                ten.log_warn("unknown cmd {cmd_name}")
+    async def embed(self, inputs: List[str]) -> List[List[float]]:
+        response = await self.loop.run_in_executor(
+            self.executor, self.call_dashscope, inputs
+        )
+        if response.status_code != HTTPStatus.OK:
+            raise EmbeddingError(response.status_code, response.message)
+        embeddings = sorted(
+            response.output["embeddings"], key=lambda e: e["text_index"]
+        )
+        return [e["embedding"] for e in embeddings]
 
-            ten.log_info(
-                f"async_handler {index} finished processing cmd {cmd_name}, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms"
+    def call_dashscope(self, inputs: List[str]):
+        # pylint: disable=undefined-variable
+        return dashscope.TextEmbedding.call(model=self.model, input=inputs)
+
+    async def handle_cmd(self, ten: TenEnv, cmd: Cmd) -> None:
+        cmd_name = cmd.get_name()
+        start_time = datetime.now()
+
+        # packed float32 buffers if the sender asks for them, JSON otherwise
+        packed = False
+        try:
+            packed = (
+                cmd.get_property_string(FIELD_KEY_VECTOR_FORMAT) == VECTOR_FORMAT_F32
             )
+        except Exception:
+            pass
 
-        ten.log_info(f"async_handler {index} stopped")
+        if cmd_name == CMD_EMBED:
+            cmd_result = await self.call_with_str(
+                cmd.get_property_string("input"), ten, packed
+            )
+        else:
+            inputs_list = json.loads(cmd.get_property_to_json("inputs"))
+            cmd_result = await self.call_with_strs(inputs_list, ten, packed)
+        ten.return_result(cmd_result, cmd)
 
-    def call_with_str(self, message: str, ten: TenEnv) -> CmdResult:
-        start_time = datetime.now()
-        # pylint: disable=undefined-variable
-        response = dashscope.TextEmbedding.call(model=self.model, input=message)
         ten.log_info(
-            f"embedding call finished for input [{message}], status_code {response.status_code}, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms"
+            f"finished processing cmd {cmd_name}, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms, batcher {self.batcher.metrics()}, cache {self.cache.metrics()}"
         )
 
-        if response.status_code == HTTPStatus.OK:
-            cmd_result = CmdResult.create(StatusCode.OK)
-            cmd_result.set_property_from_json(
-                FIELD_KEY_EMBEDDING,
-                json.dumps(response.output["embeddings"][0]["embedding"]),
-            )
-            return cmd_result
-        else:
+    async def call_with_str(
+        self, message: str, ten: TenEnv, packed: bool = False
+    ) -> CmdResult:
+        # a query is waited for, it goes into the next batch before bulk inputs
+        (future,) = self.embedder.submit([message], urgent=True)
+        try:
+            embedding = await future
+        except Exception as e:
+            ten.log_error(f"embedding call failed for input [{message}], err: {e}")
             cmd_result = CmdResult.create(StatusCode.ERROR)
-            cmd_result.set_property_string(FIELD_KEY_CODE, response.status_code)
-            cmd_result.set_property_string(FIELD_KEY_MESSAGE, response.message)
+            cmd_result.set_property_string(FIELD_KEY_CODE, str(getattr(e, "code", "")))
+            cmd_result.set_property_string(
+                FIELD_KEY_MESSAGE, getattr(e, "message", str(e))
+            )
             return cmd_result
 
-    def batched(
-        self, inputs: List, batch_size: int = DASHSCOPE_MAX_BATCH_SIZE
-    ) -> Generator[List, None, None]:
-        for i in range(0, len(inputs), batch_size):
-            yield inputs[i : i + batch_size]
+        cmd_result = CmdResult.create(StatusCode.OK)
+        if packed:
+            cmd_result.set_property_buf(
+                FIELD_KEY_EMBEDDING_BUF, pack_vectors([embedding])
+            )
+        else:
+            cmd_result.set_property_from_json(
+                FIELD_KEY_EMBEDDING, json.dumps(embedding)
+            )
+        return cmd_result
 
-    def call_with_strs(self, messages: List[str], ten: TenEnv) -> CmdResult:
-        start_time = datetime.now()
-        result = None  # merge the results.
-        batch_counter = 0
-        for batch in self.batched(messages):
-            # pylint: disable=undefined-variable
-            response = dashscope.TextEmbedding.call(model=self.model, input=batch)
-            # ten.log_info("%s Received %s", batch, response)
-            if response.status_code == HTTPStatus.OK:
-                if result is None:
-                    result = response.output
-                else:
-                    for emb in response.output["embeddings"]:
-                        emb["text_index"] += batch_counter
-                        result["embeddings"].append(emb)
+    async def call_with_strs(
+        self, messages: List[str], ten: TenEnv, packed: bool = False
+    ) -> CmdResult:
+        results = await asyncio.gather(
+            *self.embedder.submit(messages), return_exceptions=True
+        )
+        embeddings = []  # merge the results.
+        for i, result in enumerate(results):
+            if isinstance(result, BaseException):
+                ten.log_error(f"call [{messages[i]}] failed, errmsg: {result}")
             else:
-                ten.log_error("call %s failed, errmsg: %s", batch, response)
-            batch_counter += len(batch)
+                embeddings.append({FIELD_KEY_EMBEDDING: result, "text_index": i})
 
-        ten.log_info(
-            f"embedding call finished for inputs len {len(messages)}, batch_counter {batch_counter}, results len {len(result['embeddings'])}, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms "
-        )
-        if result is not None:
+        if embeddings and packed:
+            cmd_result = CmdResult.create(StatusCode.OK)
+            cmd_result.set_property_buf(
+                FIELD_KEY_EMBEDDINGS_BUF,
+                pack_vectors([e[FIELD_KEY_EMBEDDING] for e in embeddings]),
+            )
+            cmd_result.set_property_from_json(
+                FIELD_KEY_TEXT_INDEXES,
+                json.dumps([e["text_index"] for e in embeddings]),
+            )
+            return cmd_result
+        elif embeddings:
             cmd_result = CmdResult.create(StatusCode.OK)
 
             # too slow `set_property_to_json`, so use `set_property_string` at the moment as workaround
             # will be replaced once `set_property_to_json` improved
-            cmd_result.set_property_string(
-                FIELD_KEY_EMBEDDINGS, json.dumps(result["embeddings"])
-            )
+            cmd_result.set_property_string(FIELD_KEY_EMBEDDINGS, json.dumps(embeddings))
             return cmd_result
         else:
             cmd_result = CmdResult.create(StatusCode.ERROR)
@@ -150,16 +240,16 @@ class EmbeddingExtension(Extension):
 
     def on_stop(self, ten: TenEnv) -> None:
         ten.log_info("on_stop")
-        self.stop = True
-        # clear queue
-        while not self.queue.empty():
-            self.queue.get()
-        # put enough None to stop all threads
-        for thread in self.threads:
-            self.queue.put(None)
-        for thread in self.threads:
-            thread.join()
-        self.threads = []
+
+        if self.loop:
+            ten.log_info(f"batcher metrics: {self.batcher.metrics()}")
+            ten.log_info(f"cache metrics: {self.cache.metrics()}")
+            self.batcher_future.add_done_callback(
+                lambda _: self.loop.call_soon_threadsafe(self.loop.stop)
+            )
+            self.loop.call_soon_threadsafe(self.batcher.close)
+            self.loop.call_soon_threadsafe(self.cache.close)
+            self.executor.shutdown(wait=False, cancel_futures=True)
 
         ten.on_stop_done()
 
@@ -179,7 +269,7 @@ class EmbeddingExtension(Extension):
             #     "inputs": ["hello", ...]
             # }
 
-            self.queue.put(cmd)
+            asyncio.run_coroutine_threadsafe(self.handle_cmd(ten, cmd), self.loop)
         else:
             ten.log_warn(f"unknown cmd {cmd_name}")
             cmd_result = CmdResult.create(StatusCode.ERROR)
@@ -191,3 +281,10 @@ class EmbeddingExtension(Extension):
         except Exception as e:
             ten.log_warn(f"err: {e}")
             return default
+
+    def get_property_int(self, ten: TenEnv, key, default):
+        try:
+            return ten.get_property_int(key)
+        except Exception as e:
+            ten.log_warn(f"err: {e}")
+            return default
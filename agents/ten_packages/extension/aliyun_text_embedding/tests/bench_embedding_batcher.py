@@ -0,0 +1,207 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Throughput and latency of mixed query/ingest load, per cmd thread vs batcher.
+
+Usage:
+    python tests/bench_embedding_batcher.py [ingest_cmds] [queries]
+
+The dashscope SDK is pointed at a local stub of the text embedding API. It
+takes 40 ms plus 2 ms per input, serves 8 requests at a time and rejects
+more than 6 inputs per request. The load is a file being ingested
+(ingest_cmds embed_batch cmds of 5 chunks, default 120, sent at once as
+file_chunker does) while a user asks questions (queries embed cmds, default
+60, one every 50 ms). Throughput is that of the ingestion, up to its last
+embed_batch result. The legacy flow is the extension's previous 10 cmd
+threads, each calling dashscope batch by batch; the batcher runs with the
+extension's defaults.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+from http import HTTPStatus
+
+from aiohttp import web
+import dashscope
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from embedding_batcher import EmbeddingBatcher  # noqa: E402
+
+MAX_BATCH_SIZE = 6
+DIMENSION = 1024
+
+
+class StubServer:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.port = 0
+
+    async def embed(self, request: web.Request) -> web.Response:
+        texts = (await request.json())["input"]["texts"]
+        if len(texts) > MAX_BATCH_SIZE:
+            return web.json_response(
+                {"code": "InvalidParameter", "message": "batch size"}, status=400
+            )
+        async with self.slots:
+            self.requests += 1
+            await asyncio.sleep(0.04 + 0.002 * len(texts))
+        return web.json_response(
+            {
+                "output": {
+                    "embeddings": [
+                        {"text_index": i, "embedding": [0.01] * DIMENSION}
+                        for i in range(len(texts))
+                    ]
+                },
+                "usage": {"total_tokens": 10 * len(texts)},
+                "request_id": "bench",
+            }
+        )
+
+    def start(self) -> None:
+        started = threading.Event()
+
+        async def serve():
+            self.slots = asyncio.Semaphore(8)
+            app = web.Application()
+            app.router.add_post(
+                "/api/v1/services/embeddings/text-embedding/text-embedding",
+                self.embed,
+            )
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+            started.set()
+            await asyncio.Event().wait()
+
+        threading.Thread(target=asyncio.run, args=[serve()], daemon=True).start()
+        started.wait()
+
+
+def call(inputs):
+    response = dashscope.TextEmbedding.call(model="text-embedding-v1", input=inputs)
+    if response.status_code != HTTPStatus.OK:
+        raise RuntimeError(response.message)
+    return [e["embedding"] for e in response.output["embeddings"]]
+
+
+def workload(ingest_cmds: int, queries: int) -> list:
+    # (send_at, kind, inputs)
+    cmds = [
+        (0.0, "embed_batch", [f"chunk {i}-{j}" for j in range(5)])
+        for i in range(ingest_cmds)
+    ]
+    cmds += [(0.05 * i, "embed", [f"question {i}"]) for i in range(queries)]
+    return sorted(cmds, key=lambda c: c[0])
+
+
+def run_legacy(cmds) -> dict:
+    latencies = {"embed": [], "embed_batch": []}
+    work = queue.Queue()
+
+    def handler():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            sent, kind, inputs = item
+            for i in range(0, len(inputs), MAX_BATCH_SIZE):
+                call(inputs[i : i + MAX_BATCH_SIZE])
+            latencies[kind].append(time.perf_counter() - sent)
+            if kind == "embed_batch":
+                ingested.append(time.perf_counter())
+
+    ingested = []
+    threads = [threading.Thread(target=handler) for _ in range(10)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    for at, kind, inputs in cmds:
+        time.sleep(max(0.0, start + at - time.perf_counter()))
+        work.put((time.perf_counter(), kind, inputs))
+    for _ in threads:
+        work.put(None)
+    for t in threads:
+        t.join()
+    return {"ingest_seconds": max(ingested) - start, **latencies}
+
+
+def run_batcher(cmds) -> dict:
+    latencies = {"embed": [], "embed_batch": []}
+    executor = concurrent.futures.ThreadPoolExecutor(10)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        batcher = EmbeddingBatcher(
+            lambda inputs: loop.run_in_executor(executor, call, inputs),
+            max_batch_size=MAX_BATCH_SIZE,
+            max_wait_ms=5,
+            max_concurrency=10,
+        )
+        runner = asyncio.create_task(batcher.run())
+
+        async def handle(kind, inputs):
+            sent = time.perf_counter()
+            futures = batcher.submit(inputs, urgent=kind == "embed")
+            await asyncio.gather(*futures)
+            latencies[kind].append(time.perf_counter() - sent)
+            if kind == "embed_batch":
+                ingested.append(time.perf_counter())
+
+        ingested = []
+        start = time.perf_counter()
+        tasks = []
+        for at, kind, inputs in cmds:
+            await asyncio.sleep(max(0.0, start + at - time.perf_counter()))
+            tasks.append(asyncio.create_task(handle(kind, inputs)))
+        await asyncio.gather(*tasks)
+        batcher.close()
+        await runner
+        return max(ingested) - start
+
+    ingest_seconds = asyncio.run(main())
+    executor.shutdown()
+    return {"ingest_seconds": ingest_seconds, **latencies}
+
+
+def p(values, q) -> float:
+    return statistics.quantiles(values, n=100)[q - 1] * 1000 if values else 0
+
+
+def main() -> None:
+    ingest_cmds = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    server = StubServer()
+    server.start()
+    dashscope.api_key = "sk-bench"
+    dashscope.base_http_api_url = f"http://127.0.0.1:{server.port}/api/v1"
+
+    cmds = workload(ingest_cmds, queries)
+    chunks = sum(len(c[2]) for c in cmds if c[1] == "embed_batch")
+    print(f"{ingest_cmds} embed_batch cmds ({chunks} chunks) + {queries} embed cmds")
+    for name, run in (("legacy", run_legacy), ("batcher", run_batcher)):
+        before = server.requests
+        r = run(cmds)
+        print(
+            f"{name:<8} ingest {chunks / r['ingest_seconds']:6.1f} chunks/s  "
+            f"{server.requests - before:4d} requests  "
+            f"embed p50 {p(r['embed'], 50):6.0f} ms p99 {p(r['embed'], 99):6.0f} ms  "
+            f"embed_batch p50 {p(r['embed_batch'], 50):6.0f} ms "
+            f"p99 {p(r['embed_batch'], 99):6.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Replay a query log without cache, with the memory LRU, and across a restart.
+
+Usage:
+    python tests/bench_embedding_cache.py [queries.txt]
+
+A query log has one query per line. Without one, 3000 queries are drawn
+from 600 distinct questions with a Zipf (s=1.1) popularity, as FAQ traffic
+looks, and a 40 chunk document is uploaded three times along the way.
+Queries arrive every 2 ms and go through the batcher to a simulated
+provider: 40 ms plus 2 ms per input. Cost is counted in provider inputs and
+characters. In the restart run the process is "restarted" halfway: the
+memory tier is lost and only the disk tier is kept; its hit rate is that
+of the second half.
+"""
+
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from embedding_batcher import EmbeddingBatcher  # noqa: E402
+from embedding_cache import CachedBatcher, EmbeddingCache  # noqa: E402
+
+DIMENSION = 1536
+TOPICS = (
+    "refund policy,shipping time,reset password,change address,cancel order,"
+    "warranty claim,student discount,gift card balance,store hours,invoice copy"
+).split(",")
+
+
+def synthetic_log(count: int = 3000, distinct: int = 600) -> list:
+    rng = random.Random(7)
+    questions = [
+        f"how do I {rng.choice(TOPICS)} for order type {i}?" for i in range(distinct)
+    ]
+    weights = [1 / (rank + 1) ** 1.1 for rank in range(distinct)]
+    log = [("embed", q) for q in rng.choices(questions, weights, k=count)]
+    document = [f"section {i}: terms and conditions paragraph {i}" for i in range(40)]
+    for at in (count // 5, count // 2, count * 4 // 5):
+        log[at:at] = [("embed_batch", document[i : i + 5]) for i in range(0, 40, 5)]
+    return log
+
+
+class Provider:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.inputs = 0
+        self.chars = 0
+
+    async def embed(self, texts):
+        self.requests += 1
+        self.inputs += len(texts)
+        self.chars += sum(len(t) for t in texts)
+        await asyncio.sleep(0.04 + 0.002 * len(texts))
+        return [[random.random() for _ in range(DIMENSION)] for _ in texts]
+
+
+async def replay(log, make_cache, restart_at=None) -> dict:
+    provider = Provider()
+    batcher = EmbeddingBatcher(provider.embed, max_wait_ms=5)
+    runner = asyncio.create_task(batcher.run())
+    cache = make_cache()
+    embedder = CachedBatcher(cache, batcher) if cache else batcher
+    latencies = []
+
+    async def send(kind, payload):
+        start = time.perf_counter()
+        if kind == "embed":
+            await embedder.submit([payload], urgent=True)[0]
+            latencies.append(time.perf_counter() - start)
+        else:
+            await asyncio.gather(*embedder.submit(payload))
+
+    tasks = []
+    for i, (kind, payload) in enumerate(log):
+        if i == restart_at:
+            await asyncio.gather(*tasks)
+            cache.close()
+            cache = make_cache()
+            embedder = CachedBatcher(cache, batcher)
+        tasks.append(asyncio.create_task(send(kind, payload)))
+        await asyncio.sleep(0.002)
+    await asyncio.gather(*tasks)
+    batcher.close()
+    await runner
+    if cache:
+        cache.close()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p99": statistics.quantiles(latencies, n=100)[98] * 1000,
+        "requests": provider.requests,
+        "inputs": provider.inputs,
+        "chars": provider.chars,
+        "cache": cache.metrics() if cache else None,
+    }
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            log = [("embed", line.strip()) for line in f if line.strip()]
+    else:
+        log = synthetic_log()
+    queries = sum(1 for kind, _ in log if kind == "embed")
+    print(f"{queries} queries, {len({p for k, p in log if k == 'embed'})} distinct")
+
+    with tempfile.TemporaryDirectory() as root:
+        runs = (
+            ("no cache", lambda: None, None),
+            ("memory", lambda: EmbeddingCache("text-embedding-v2"), None),
+            (
+                "restart",
+                lambda: EmbeddingCache("text-embedding-v2", directory=root),
+                len(log) // 2,
+            ),
+        )
+        for name, make_cache, restart_at in runs:
+            r = asyncio.run(replay(log, make_cache, restart_at))
+            hits = ""
+            if r["cache"]:
+                c = r["cache"]
+                hits = (
+                    f"  hit rate {c['hit_rate']:.2f} "
+                    f"(memory {c['memory_hits']}, disk {c['disk_hits']})"
+                )
+            print(
+                f"{name:<9} query p50 {r['p50']:6.1f} ms p99 {r['p99']:6.1f} ms  "
+                f"{r['requests']:5d} requests {r['inputs']:5d} inputs "
+                f"{r['chars']:7d} chars billed{hits}"
+            )
+
+
+if __name__ == "__main__":
+    main()
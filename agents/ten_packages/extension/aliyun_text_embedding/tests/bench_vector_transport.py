@@ -0,0 +1,101 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Serialization cost and payload size of vectors, JSON vs packed float32.
+
+Usage:
+    python tests/bench_vector_transport.py [dimension] [rounds]
+
+Replays the encode/decode work done per embed_batch of 5 chunks on its way
+from aliyun_text_embedding through file_chunker to the vector storage, and
+per query_vector sent by llama_index_chat_engine, with the extensions' code
+paths:
+
+- json: the embedding extension dumps the records, file_chunker loads them
+  and dumps them into the upsert content, the storage loads it; the query
+  vector is dumped and loaded.
+- f32: the embedding extension packs the vectors, file_chunker checks the
+  header and passes the buffer on, the storage unpacks it; the query vector
+  is packed and unpacked.
+
+The copy of the properties made by the TEN runtime is not included; it is
+proportional to the payload size, which is reported.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vector_codec import pack_vectors, unpack_vectors, vectors_shape  # noqa: E402
+
+BATCH = 5
+
+
+def ingest_json(texts, vectors):
+    records = [{"embedding": v, "text_index": i} for i, v in enumerate(vectors)]
+    embeddings = json.dumps(records)
+    received = [r["embedding"] for r in json.loads(embeddings)]
+    content = json.dumps([{"text": t, "embedding": e} for t, e in zip(texts, received)])
+    rows = [(item["text"], item["embedding"]) for item in json.loads(content)]
+    return rows, len(embeddings) + len(content)
+
+
+def ingest_f32(texts, vectors):
+    buf = pack_vectors(vectors)
+    count, _ = vectors_shape(buf)
+    assert count == len(texts)
+    content = json.dumps([{"text": t} for t in texts])
+    rows = list(
+        zip((item["text"] for item in json.loads(content)), unpack_vectors(buf))
+    )
+    return rows, 2 * len(buf) + len(content)
+
+
+def query_json(vector):
+    embedding = json.dumps(vector)
+    return json.loads(embedding), 2 * len(embedding)
+
+
+def query_f32(vector):
+    buf = pack_vectors([vector])
+    (received,) = unpack_vectors(buf)
+    return received, 2 * len(buf)
+
+
+def measure(fn, args, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        _, size = fn(*args)
+    return (time.perf_counter() - start) / rounds, size
+
+
+def main() -> None:
+    dimension = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rng = random.Random(1)
+    # float64 values as returned by the embedding API
+    vectors = [[rng.uniform(-0.1, 0.1) for _ in range(dimension)] for _ in range(BATCH)]
+    texts = [f"chunk {i} " * 20 for i in range(BATCH)]
+
+    print(f"dimension {dimension}, embed_batch of {BATCH}, {rounds} rounds")
+    for name, fn, args, per in (
+        ("ingest json", ingest_json, (texts, vectors), BATCH),
+        ("ingest f32", ingest_f32, (texts, vectors), BATCH),
+        ("query json", query_json, (vectors[0],), 1),
+        ("query f32", query_f32, (vectors[0],), 1),
+    ):
+        seconds, size = measure(fn, args, rounds)
+        print(
+            f"{name:<12} {seconds / per * 1e6:8.1f} us/vector  "
+            f"{size / per / 1024:6.1f} KB/vector on the wire"
+        )
+
+
+if __name__ == "__main__":
+    main()
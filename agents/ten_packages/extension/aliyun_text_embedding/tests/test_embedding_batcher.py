@@ -0,0 +1,98 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from embedding_batcher import EmbeddingBatcher  # noqa: E402
+
+
+class Provider:
+    def __init__(self, latency: float = 0.01, fail_on: str = "") -> None:
+        self.latency = latency
+        self.fail_on = fail_on
+        self.batches = []
+        self.inflight = 0
+        self.max_inflight = 0
+
+    async def embed(self, texts):
+        self.batches.append(list(texts))
+        self.inflight += 1
+        self.max_inflight = max(self.max_inflight, self.inflight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.fail_on in texts:
+                raise RuntimeError("quota exceeded")
+            return [[float(len(t))] for t in texts]
+        finally:
+            self.inflight -= 1
+
+
+async def run_batcher(provider, scenario, **kwargs):
+    batcher = EmbeddingBatcher(provider.embed, **kwargs)
+    runner = asyncio.create_task(batcher.run())
+    try:
+        return await scenario(batcher), batcher.metrics()
+    finally:
+        batcher.close()
+        await runner
+
+
+def test_concurrent_cmds_share_batches():
+    provider = Provider()
+
+    async def scenario(batcher):
+        futures = [batcher.submit([f"doc{i}-{j}" for j in range(3)]) for i in range(4)]
+        futures.append(batcher.submit(["query"], urgent=True))
+        return [await asyncio.gather(*f) for f in futures]
+
+    results, metrics = asyncio.run(
+        run_batcher(provider, scenario, max_batch_size=6, max_wait_ms=20)
+    )
+    assert results[-1] == [[5.0]]
+    assert results[0] == [[float(len(f"doc0-{j}"))] for j in range(3)]
+    # 13 inputs in 3 full-ish batches, the query first.
+    assert [len(b) for b in provider.batches] == [6, 6, 1]
+    assert provider.batches[0][0] == "query"
+    assert metrics["requests"] == 3 and metrics["inputs"] == 13
+
+
+def test_window_and_concurrency_limit():
+    provider = Provider(latency=0.05)
+
+    async def scenario(batcher):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await batcher.submit(["a"])[0]
+        single = loop.time() - start
+        await asyncio.gather(*batcher.submit([str(i) for i in range(20)]))
+        return single
+
+    single, _ = asyncio.run(
+        run_batcher(
+            provider, scenario, max_batch_size=4, max_wait_ms=10, max_concurrency=2
+        )
+    )
+    # A lone input goes out after the window, not before.
+    assert 0.06 <= single < 0.12
+    assert provider.max_inflight == 2
+    assert all(len(b) <= 4 for b in provider.batches)
+
+
+def test_errors_reach_only_their_batch():
+    provider = Provider(fail_on="bad")
+
+    async def scenario(batcher):
+        first = batcher.submit(["ok1", "bad"])
+        await asyncio.sleep(0.05)
+        second = batcher.submit(["ok2"])
+        return await asyncio.gather(*first, *second, return_exceptions=True)
+
+    (ok1, bad, ok2), _ = asyncio.run(run_batcher(provider, scenario, max_wait_ms=5))
+    assert isinstance(ok1, RuntimeError) and isinstance(bad, RuntimeError)
+    assert ok2 == [3.0]
@@ -0,0 +1,109 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from embedding_batcher import EmbeddingBatcher  # noqa: E402
+from embedding_cache import CachedBatcher, EmbeddingCache  # noqa: E402
+
+DIMENSION = 8
+
+
+def vector(text: str) -> list:
+    return [float(len(text) + i) / 4 for i in range(DIMENSION)]
+
+
+def test_memory_lru_by_size():
+    cache = EmbeddingCache("v1", max_memory_bytes=3 * 4 * DIMENSION)
+    for text in ("a", "b", "c"):
+        cache.put(text, vector(text))
+    assert cache.get("a") == vector("a")  # a is now the most recent
+    cache.put("d", vector("d"))
+
+    assert cache.get("b") is None
+    assert [cache.get(t) for t in "acd"] == [vector(t) for t in "acd"]
+    m = cache.metrics()
+    assert (m["memory_hits"], m["misses"], m["memory_evictions"]) == (4, 1, 1)
+    assert m["memory_entries"] == 3
+
+
+def test_model_is_part_of_the_key():
+    v1, v2 = EmbeddingCache("v1"), EmbeddingCache("v2")
+    v1.put("hello", vector("hello"))
+    assert v2.get("hello") is None
+    assert v1.key("hello") != v2.key("hello")
+
+
+def test_disk_tier_survives_restart_and_evicts_oldest(tmp_path):
+    slot = 16 + 4 * DIMENSION
+    kwargs = dict(max_memory_bytes=0, directory=str(tmp_path))
+    cache = EmbeddingCache("text-embedding-v3", max_disk_bytes=32 + 4 * slot, **kwargs)
+    for i in range(6):
+        cache.put(f"t{i}", vector(f"t{i}"))
+    assert cache.metrics()["disk_evictions"] == 2
+    cache.close()
+    assert os.listdir(tmp_path) == [f"text-embedding-v3-{DIMENSION}.vec"]
+
+    restarted = EmbeddingCache(
+        "text-embedding-v3", max_disk_bytes=32 + 4 * slot, **kwargs
+    )
+    assert restarted.get("t0") is None and restarted.get("t1") is None
+    assert restarted.get("t5") == vector("t5")
+    restarted.put("t6", vector("t6"))  # goes over t2, the oldest
+    assert restarted.get("t2") is None
+    assert restarted.get("t3") == vector("t3")
+    assert restarted.metrics()["disk_hits"] == 2
+
+    # A different size does not read the old layout.
+    resized = EmbeddingCache("text-embedding-v3", max_disk_bytes=1 << 20, **kwargs)
+    assert resized.get("t5") is None
+
+
+def test_cached_batcher_sends_each_text_once():
+    calls = []
+
+    async def embed(texts):
+        calls.append(list(texts))
+        await asyncio.sleep(0.01)
+        return [vector(t) for t in texts]
+
+    async def scenario():
+        batcher = EmbeddingBatcher(embed, max_wait_ms=1)
+        runner = asyncio.create_task(batcher.run())
+        embedder = CachedBatcher(EmbeddingCache("v1"), batcher)
+
+        first = embedder.submit(["q", "x", "q"], urgent=True)
+        second = embedder.submit(["x", "y"])  # x is in flight
+        results = await asyncio.gather(*first, *second)
+        again = await asyncio.gather(*embedder.submit(["y", "q"]))
+        batcher.close()
+        await runner
+        return results, again
+
+    results, again = asyncio.run(scenario())
+    assert results == [vector(t) for t in ("q", "x", "q", "x", "y")]
+    assert again == [vector("y"), vector("q")]
+    assert sorted(t for call in calls for t in call) == ["q", "x", "y"]
+
+
+def test_disk_tier_shared_by_two_caches(tmp_path):
+    slot = 16 + 4 * DIMENSION
+    kwargs = dict(max_memory_bytes=0, directory=str(tmp_path))
+    first = EmbeddingCache("v1", max_disk_bytes=32 + 2 * slot, **kwargs)
+    second = EmbeddingCache("v1", max_disk_bytes=32 + 2 * slot, **kwargs)
+    first.put("a", vector("a"))
+    second.put("bb", vector("bb"))  # the next slot, not over a
+    assert first.get("a") == vector("a")
+
+    second.put("ccc", vector("ccc"))  # over a, the oldest
+    assert first.get("a") is None
+    assert first.metrics()["disk_entries"] == 0
+    assert second.get("ccc") == vector("ccc")
+    first.close()
+    second.close()
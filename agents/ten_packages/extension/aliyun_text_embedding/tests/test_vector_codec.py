@@ -0,0 +1,39 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import struct
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vector_codec import pack_vectors, unpack_vectors, vectors_shape  # noqa: E402
+
+
+def test_round_trip_is_float32():
+    vectors = [[0.5, -1.25, 3.0], [0.1, 0.2, 0.3]]
+    buf = pack_vectors(vectors)
+
+    assert len(buf) == 12 + 4 * 6
+    assert vectors_shape(buf) == (2, 3)
+    assert buf[12:16] == struct.pack("<f", 0.5)  # little-endian on any host
+    unpacked = unpack_vectors(bytes(buf))
+    assert unpacked[0] == [0.5, -1.25, 3.0]
+    assert unpacked[1] == [
+        struct.unpack("<f", struct.pack("<f", v))[0] for v in vectors[1]
+    ]
+    assert unpack_vectors(pack_vectors([])) == []
+
+
+def test_rejects_bad_buffers():
+    with pytest.raises(ValueError):
+        pack_vectors([[1.0, 2.0], [1.0]])
+    buf = pack_vectors([[1.0, 2.0]])
+    with pytest.raises(ValueError):
+        vectors_shape(buf[:-1])
+    with pytest.raises(ValueError):
+        unpack_vectors(b"[1.0, 2.0]" + bytes(8))
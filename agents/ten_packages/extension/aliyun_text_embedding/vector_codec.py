@@ -0,0 +1,65 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Packed float32 vectors for cmd buf properties.
+
+A buffer is a 12 byte header (magic, count, dimension) followed by count *
+dimension little-endian float32 values. Cmds carrying vectors this way use
+a `*_buf` property next to the JSON one; JSON stays the fallback for peers
+that do not ask for the `vector_format` "f32".
+
+The same module is copied in aliyun_text_embedding, file_chunker,
+aliyun_analyticdb_vector_storage, local_vector_storage and
+llama_index_chat_engine, keep them equal.
+"""
+
+import struct
+import sys
+from array import array
+from typing import List, Sequence, Tuple
+
+VECTOR_FORMAT_JSON = "json"
+VECTOR_FORMAT_F32 = "f32"
+
+_HEADER = struct.Struct("<4sII")
+_MAGIC = b"VF32"
+
+
+def pack_vectors(vectors: Sequence[Sequence[float]]) -> bytearray:
+    dimension = len(vectors[0]) if vectors else 0
+    values = array("f")
+    for vector in vectors:
+        if len(vector) != dimension:
+            raise ValueError(f"vector of {len(vector)} values, expected {dimension}")
+        values.extend(vector)
+    if sys.byteorder == "big":
+        values.byteswap()
+    buf = bytearray(_HEADER.pack(_MAGIC, len(vectors), dimension))
+    buf += values.tobytes()
+    return buf
+
+
+def vectors_shape(buf) -> Tuple[int, int]:
+    """(count, dimension) of a packed buffer, checking its size."""
+    if len(buf) < _HEADER.size:
+        raise ValueError(f"vector buffer of {len(buf)} bytes has no header")
+    magic, count, dimension = _HEADER.unpack_from(buf, 0)
+    if magic != _MAGIC:
+        raise ValueError(f"not a vector buffer, magic {magic!r}")
+    if len(buf) != _HEADER.size + 4 * count * dimension:
+        raise ValueError(
+            f"vector buffer of {len(buf)} bytes for {count}x{dimension} values"
+        )
+    return count, dimension
+
+
+def unpack_vectors(buf) -> List[List[float]]:
+    count, dimension = vectors_shape(buf)
+    values = array("f")
+    values.frombytes(memoryview(buf)[_HEADER.size :])
+    if sys.byteorder == "big":
+        values.byteswap()
+    flat = values.tolist()
+    return [flat[i * dimension : (i + 1) * dimension] for i in range(count)]
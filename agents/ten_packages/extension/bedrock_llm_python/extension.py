@@ -7,8 +7,9 @@
 import asyncio
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Optional, List, Dict
+from typing import Optional, List
 
 import boto3
 from ten import (
@@ -29,6 +30,7 @@ from .utils import (
     get_greeting_text,
     merge_images,
 )
+from .stream_bridge import ThreadedStream
 
 # Constants
 MAX_IMAGE_COUNT = 20
@@ -79,6 +81,8 @@ class BedrockLLMConfig(BaseConfig):
     is_memory_enabled: bool = False
     is_enable_video: bool = False
     greeting: str = "Hello, I'm here to help you. How can I assist you today?"
+    # Threads running blocking boto3 calls, i.e. concurrent model responses
+    stream_workers: int = 2
 
     def build_ctx(self) -> dict:
         """Build context dictionary from configuration."""
@@ -105,6 +109,10 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
         self.processing_times = []
         self.ten_env = None
         self.ctx = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        # Responses are generated one at a time, in input order
+        self.chat_lock = asyncio.Lock()
+        self.chat_tasks: set[asyncio.Task] = set()
 
     async def on_init(self, ten_env: AsyncTenEnv) -> None:
         """Initialize the extension."""
@@ -137,6 +145,9 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
         self.memory = []
         self.ctx = self.config.build_ctx()
         self.ten_env = ten_env
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.config.stream_workers, thread_name_prefix="bedrock"
+        )
 
         self.loop = asyncio.get_event_loop()
         self.loop.create_task(self._on_video(ten_env))
@@ -147,6 +158,11 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
         ten_env.log_info("BedrockV2VExtension stopping")
         self.stopped = True
 
+        await self._flush()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
     async def on_data(self, ten_env: AsyncTenEnv, data) -> None:
         """Handle incoming data."""
         ten_env.log_info("on_data receive begin...")
@@ -167,7 +183,11 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
 
             ten_env.log_info(f"OnData input text: [{input_text}]")
             self.text_buffer = input_text
-            await self._handle_input_truncation("is_final")
+            # Don't hold up on_data for the whole response, so flush and
+            # other commands are handled while the model is streaming.
+            task = asyncio.create_task(self._handle_input_truncation("is_final"))
+            self.chat_tasks.add(task)
+            task.add_done_callback(self.chat_tasks.discard)
 
         except Exception as err:
             ten_env.log_info(f"Error processing data: {err}")
@@ -215,6 +235,7 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
 
         try:
             if cmd_name == CMD_IN_FLUSH:
+                await self._flush()
                 await ten_env.send_cmd(Cmd.create(CMD_OUT_FLUSH))
             elif cmd_name == CMD_IN_ON_USER_JOINED:
                 await self._handle_user_joined()
@@ -250,16 +271,28 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
         if self.users_count == 1:
             await self._greeting()
 
+    async def _flush(self) -> None:
+        """Cancel the response being streamed and any queued input."""
+        tasks = list(self.chat_tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.ten_env.log_info(f"flushed {len(tasks)} pending responses")
+
     async def _handle_input_truncation(self, reason: str):
         """Handle input truncation events."""
         try:
             self.ten_env.log_info(f"Input truncated due to: {reason}")
 
-            if self.text_buffer:
-                await self._call_nova_model(self.text_buffer, self.image_buffers)
-
+            # Take the input now, frames keep arriving while we wait our turn
+            text_buffer, image_buffers = self.text_buffer, self.image_buffers
             self._reset_state()
 
+            async with self.chat_lock:
+                if text_buffer:
+                    await self._call_nova_model(text_buffer, image_buffers)
+
         except Exception as e:
             traceback.print_exc()
             self.ten_env.log_error(f"Error handling input truncation: {e}")
@@ -274,11 +307,14 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
         """Initialize AWS clients."""
         try:
             if not self.bedrock_client:
-                self.bedrock_client = boto3.client(
-                    "bedrock-runtime",
-                    aws_access_key_id=self.config.access_key_id,
-                    aws_secret_access_key=self.config.secret_access_key,
-                    region_name=self.config.region,
+                self.bedrock_client = await self.loop.run_in_executor(
+                    self.executor,
+                    lambda: boto3.client(
+                        "bedrock-runtime",
+                        aws_access_key_id=self.config.access_key_id,
+                        aws_secret_access_key=self.config.secret_access_key,
+                        region_name=self.config.region,
+                    ),
                 )
         except Exception as e:
             traceback.print_exc()
@@ -355,16 +391,21 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
 
             system = [{"text": self.config.prompt}]
 
-            # Make API call
+            # Make API call, the request and the event stream both block so
+            # they run on the executor
+            def open_stream():
+                response = self.bedrock_client.converse_stream(
+                    modelId=self.config.model_id,
+                    system=system,
+                    messages=messages,
+                    inferenceConfig=inf_params,
+                    additionalModelRequestFields=additional_config,
+                )
+                return response.get("stream")
+
             start_time = time.time()
-            response = self.bedrock_client.converse_stream(
-                modelId=self.config.model_id,
-                system=system,
-                messages=messages,
-                inferenceConfig=inf_params,
-                additionalModelRequestFields=additional_config,
-            )
-            full_content = await self._process_stream_response(response, start_time)
+            async with ThreadedStream(open_stream, self.executor) as stream:
+                full_content = await self._process_stream_response(stream, start_time)
 
             # async append memory
             async def async_append_memory():
@@ -387,13 +428,13 @@ class BedrockLLMExtension(AsyncLLMBaseExtension):
             traceback.print_exc()
             self.ten_env.log_error(f"Error calling Nova model: {e}")
 
-    async def _process_stream_response(self, response: Dict, start_time: float):
+    async def _process_stream_response(self, stream: ThreadedStream, start_time: float):
         """Process streaming response from Nova model."""
         sentence = ""
         full_content = ""
         first_sentence_sent = False
 
-        for event in response.get("stream"):
+        async for event in stream:
             if "contentBlockDelta" in event:
                 if "text" in event["contentBlockDelta"]["delta"]:
                     content = event["contentBlockDelta"]["delta"]["text"]
@@ -0,0 +1,250 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import os
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def stub_ten_runtime() -> None:
+    """Just enough of ten and ten_ai_base to import the extension outside
+    the runtime; the real modules are used when they are installed."""
+    try:
+        import ten  # noqa: F401
+        import ten_ai_base.llm  # noqa: F401
+
+        return
+    except ImportError:
+        pass
+
+    class Msg:
+        def __init__(self, name: str) -> None:
+            self.name = name
+            self.properties = {}
+
+        @classmethod
+        def create(cls, name: str):
+            return cls(name)
+
+        def get_name(self) -> str:
+            return self.name
+
+        def set_property_string(self, key: str, value: str) -> None:
+            self.properties[key] = value
+
+        set_property_bool = set_property_string
+
+    class CmdResult(Msg):
+        @classmethod
+        def create(cls, status_code):
+            result = cls("result")
+            result.status_code = status_code
+            return result
+
+    ten = types.ModuleType("ten")
+    ten.Addon = ten.AsyncTenEnv = ten.TenEnv = object
+    ten.Cmd, ten.Data, ten.CmdResult = type("Cmd", (Msg,), {}), Msg, CmdResult
+    ten.StatusCode = types.SimpleNamespace(OK=0, ERROR=1)
+    ten.register_addon_as_extension = lambda name: lambda cls: cls
+
+    config = types.ModuleType("ten_ai_base.config")
+    config.BaseConfig = dataclass(type("BaseConfig", (), {}))
+    llm = types.ModuleType("ten_ai_base.llm")
+
+    class AsyncLLMBaseExtension:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+    llm.AsyncLLMBaseExtension = AsyncLLMBaseExtension
+    base = types.ModuleType("ten_ai_base")
+    base.config, base.llm = config, llm
+    sys.modules.update(
+        {
+            "ten": ten,
+            "ten_ai_base": base,
+            "ten_ai_base.config": config,
+            "ten_ai_base.llm": llm,
+        }
+    )
+
+
+stub_ten_runtime()
+pytest.importorskip("boto3")
+pytest.importorskip("PIL")
+
+from ten import Cmd, StatusCode  # noqa: E402
+from bedrock_llm_python.extension import (  # noqa: E402
+    BedrockLLMConfig,
+    BedrockLLMExtension,
+)
+from bedrock_llm_python.stream_bridge import ThreadedStream  # noqa: E402
+
+
+class FakeSlowStream:
+    """Stands in for boto3's EventStream: blocking reads, close() unblocks."""
+
+    def __init__(self, events: int = 100, interval: float = 0.05) -> None:
+        self.events = events
+        self.interval = interval
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for i in range(self.events):
+            # A blocking socket read that close() interrupts.
+            if self.closed.wait(self.interval):
+                return
+            self.produced += 1
+            yield {"contentBlockDelta": {"delta": {"text": f"token{i}. "}}}
+
+    def close(self) -> None:
+        self.closed.set()
+
+
+class FakeBedrockClient:
+    def __init__(self, stream: FakeSlowStream) -> None:
+        self.stream = stream
+        self.requests = []
+
+    def converse_stream(self, **kwargs) -> dict:
+        self.requests.append(kwargs)
+        return {"stream": self.stream}
+
+
+class FakeTenEnv:
+    def __init__(self) -> None:
+        self.sent_cmds = []
+        self.sent_data = []
+        self.results = []
+        self.first_data = asyncio.Event()
+
+    def log_info(self, msg: str) -> None:
+        pass
+
+    log_warn = log_error = log_debug = log_info
+
+    async def send_cmd(self, cmd):
+        self.sent_cmds.append(cmd.get_name())
+
+    async def send_data(self, data) -> None:
+        self.sent_data.append(data)
+        self.first_data.set()
+
+    async def return_result(self, result, cmd) -> None:
+        self.results.append((cmd.get_name(), result))
+
+
+class FakeTextData:
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def get_name(self) -> str:
+        return "text_data"
+
+    def get_property_bool(self, key: str) -> bool:
+        return True
+
+    def get_property_string(self, key: str) -> str:
+        return self.text
+
+
+def create_extension(stream: FakeSlowStream, executor: ThreadPoolExecutor):
+    ten_env = FakeTenEnv()
+    ext = BedrockLLMExtension("bedrock_llm_python")
+    ext.config = BedrockLLMConfig(access_key_id="x", secret_access_key="x")
+    ext.ctx = ext.config.build_ctx()
+    ext.ten_env = ten_env
+    ext.executor = executor
+    ext.loop = asyncio.get_running_loop()
+    ext.bedrock_client = FakeBedrockClient(stream)
+    return ext, ten_env
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def test_events_arrive_in_order(executor):
+    async def run():
+        stream = FakeSlowStream(events=5, interval=0.001)
+        async with ThreadedStream(lambda: stream, executor) as events:
+            return [e["contentBlockDelta"]["delta"]["text"] async for e in events]
+
+    assert asyncio.run(run()) == [f"token{i}. " for i in range(5)]
+
+
+def test_flush_is_serviced_while_streaming(executor):
+    async def run():
+        stream = FakeSlowStream()
+        ext, ten_env = create_extension(stream, executor)
+        await ext.on_data(ten_env, FakeTextData("what do you see?"))
+        # Queued behind the first response.
+        await ext.on_data(ten_env, FakeTextData("and now?"))
+        assert len(ext.chat_tasks) == 2
+        await ten_env.first_data.wait()
+
+        # The loop is not blocked by the stream: a command gets through.
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        tick = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await ext.on_cmd(ten_env, Cmd.create("flush"))
+        flush = time.perf_counter() - start
+
+        # The worker stops reading instead of draining the whole response.
+        await asyncio.sleep(stream.interval * 3)
+        return stream, ext, ten_env, tick, flush
+
+    stream, ext, ten_env, tick, flush = asyncio.run(run())
+    assert tick < 0.005
+    assert flush < 0.05
+    assert not ext.chat_tasks
+    assert ten_env.sent_cmds == ["flush"]
+    assert [(name, r.status_code) for name, r in ten_env.results] == [
+        ("flush", StatusCode.OK)
+    ]
+    # Only the first input reached the model.
+    assert len(ext.bedrock_client.requests) == 1
+    assert stream.closed.is_set()
+    assert stream.produced < stream.events
+    assert len(ten_env.sent_data) <= stream.produced
+
+
+def test_stream_error_is_raised_to_consumer(executor):
+    def open_stream():
+        raise RuntimeError("throttled")
+
+    async def run():
+        async with ThreadedStream(open_stream, executor) as events:
+            async for _ in events:
+                pass
+
+    with pytest.raises(RuntimeError, match="throttled"):
+        asyncio.run(run())
+
+
+def test_queue_is_bounded(executor):
+    async def run():
+        stream = FakeSlowStream(events=1000, interval=0)
+        async with ThreadedStream(lambda: stream, executor, max_queue=8) as events:
+            async for _ in events:
+                await asyncio.sleep(0.01)
+                return stream.produced
+
+    # One item may be in flight between the iterator and the queue.
+    assert asyncio.run(run()) <= 8 + 2
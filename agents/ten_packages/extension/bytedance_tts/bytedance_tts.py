@@ -20,8 +20,10 @@ import uuid
 import json
 import gzip
 import asyncio
-import threading
+from collections import deque
 from datetime import datetime
+from websockets.asyncio.client import ClientConnection
+from websockets.protocol import State
 
 
 MESSAGE_TYPES = {
@@ -40,6 +42,11 @@ MESSAGE_COMPRESSIONS = {0: "no compression", 1: "gzip", 15: "custom compression
 
 LATENCY_SAMPLE_INTERVAL_MS = 5
 
+# Placeholders spliced into the pre-serialised request.
+_UID = "\0uid"
+_REQID = "\0reqid"
+_TEXT = "\0text"
+
 
 @dataclass
 class TTSConfig(BaseConfig):
@@ -53,11 +60,17 @@ class TTSConfig(BaseConfig):
     api_url: str = "wss://openspeech.bytedance.com/api/v1/tts/ws_binary"
     cluster: str = "volcano_tts"
 
+    # Connections kept open, the one serving the current request included.
+    # A cancelled request retires its connection and a replacement is warmed
+    # in the background, so the next sentence skips the handshake.
+    pool_size: int = 2
+    # Log every response header at debug level.
+    verbose: bool = False
+
 
 class TTSClient:
     def __init__(self, config: TTSConfig, ten_env: AsyncTenEnv) -> None:
         self.config = config
-        self.websocket = None
         self.ten_env = ten_env
 
         # Refer to: https://www.volcengine.com/docs/6561/79823.
@@ -92,31 +105,50 @@ class TTSClient:
         # message compression: b0001 (gzip) (4bits)
         # reserved data: 0x00 (1 byte)
         self.default_header = bytearray(b"\x11\x10\x11\x00")
-        self._cancel = threading.Event()
+        self._request_parts = self._split_request_template()
+
+        # Connection pool.
+        self._active: ClientConnection | None = None
+        self._idle: deque[ClientConnection] = deque()
+        self._warming: set[asyncio.Task] = set()
+        self._closing: set[asyncio.Task] = set()
+        self._closed = False
 
         # Latency.
         self._latest_record_time = None
 
-    def is_cancelled(self) -> bool:
-        return self._cancel.is_set()
-
     async def cancel(self) -> None:
-        self._cancel.set()
+        """Drop the current request.
+
+        The server does not stop sending audio for a submitted request, so its
+        connection is retired and a replacement is warmed right away.
+        """
+        ws, self._active = self._active, None
+        if ws is not None:
+            self._retire(ws)
+            self._fill()
 
     async def connect(self) -> None:
-        header = {"Authorization": f"Bearer; {self.config.token}"}
-        self.websocket = await websockets.connect(
-            self.config.api_url,
-            additional_headers=header,
-            ping_interval=None,
-            close_timeout=1,  # Fast close, as the `flush` cmd will close the connection.
-        )
-        self.ten_env.log_info("Websocket connection established.")
+        """Open the first connection and warm the rest of the pool."""
+        self._closed = False
+        self._idle.append(await self._open())
+        self._fill()
 
     async def close(self) -> None:
-        if self.websocket is not None:
-            await self.websocket.close()
-            self.websocket = None
+        self._closed = True
+        for task in self._warming:
+            task.cancel()
+
+        sockets = list(self._idle)
+        self._idle.clear()
+        if self._active is not None:
+            sockets.append(self._active)
+            self._active = None
+
+        if sockets:
+            await asyncio.gather(
+                *(ws.close() for ws in sockets), return_exceptions=True
+            )
             self.ten_env.log_info("Websocket connection closed.")
         else:
             self.ten_env.log_info("Websocket is not connected.")
@@ -125,53 +157,110 @@ class TTSClient:
         await self.close()
         await self.connect()
 
+    async def _open(self) -> ClientConnection:
+        header = {"Authorization": f"Bearer; {self.config.token}"}
+        ws = await websockets.connect(
+            self.config.api_url,
+            additional_headers=header,
+            ping_interval=None,
+            close_timeout=1,  # Fast close, as the `flush` cmd will close the connection.
+        )
+        self.ten_env.log_info("Websocket connection established.")
+        return ws
+
+    def _fill(self) -> None:
+        """Start warming connections until the pool is full again."""
+        if self._closed:
+            return
+        self._idle = deque(ws for ws in self._idle if ws.state is State.OPEN)
+        opened = len(self._idle) + len(self._warming) + (self._active is not None)
+        for _ in range(self.config.pool_size - opened):
+            task = asyncio.create_task(self._open())
+            self._warming.add(task)
+            task.add_done_callback(self._on_warmed)
+
+    def _on_warmed(self, task: asyncio.Task) -> None:
+        self._warming.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.ten_env.log_warn(f"Failed to warm connection: {task.exception()}")
+            return
+        if self._closed:
+            self._retire(task.result())
+        else:
+            self._idle.append(task.result())
+
+    async def _acquire(self) -> ClientConnection:
+        while True:
+            while self._idle:
+                ws = self._idle.popleft()
+                if ws.state is State.OPEN:
+                    return ws
+            if not self._warming:
+                return await self._open()
+            await asyncio.wait(self._warming, return_when=asyncio.FIRST_COMPLETED)
+
+    def _retire(self, ws: ClientConnection) -> None:
+        task = asyncio.create_task(ws.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _split_request_template(self) -> Tuple[str, str, str, str]:
+        request = copy.deepcopy(self.request_template)
+        request["user"]["uid"] = _UID
+        request["request"]["reqid"] = _REQID
+        request["request"]["text"] = _TEXT
+
+        parts = []
+        rest = json.dumps(request)
+        for placeholder in (_UID, _REQID, _TEXT):
+            head, rest = rest.split(json.dumps(placeholder), 1)
+            parts.append(head)
+        parts.append(rest)
+        return tuple(parts)
+
+    def build_request(self, request_id: str, uid: str, text: str) -> bytes:
+        """Full client request for text.
+
+        The JSON is the same as request_template filled in. The gzip payload
+        is not byte for byte the same as before, it is compressed at level 1.
+        """
+        head, after_uid, after_reqid, tail = self._request_parts
+        request = "".join(
+            (
+                head,
+                f'"{uid}"',
+                after_uid,
+                f'"{request_id}"',
+                after_reqid,
+                json.dumps(text),
+                tail,
+            )
+        )
+        payload = gzip.compress(request.encode(), compresslevel=1)
+        return bytes(self.default_header) + len(payload).to_bytes(4, "big") + payload
+
     def parse_response(self, response: websockets.Data) -> Tuple[bytes, bool]:
-        protocol_version = response[0] >> 4
         header_size = response[0] & 0x0F
         message_type = response[1] >> 4
         message_type_specific_flags = response[1] & 0x0F
-        serialization_method = response[2] >> 4
         message_compression = response[2] & 0x0F
-        reserved = response[3]
-        header_extensions = response[4 : header_size * 4]
         payload = response[header_size * 4 :]
-        self.ten_env.log_debug(
-            f"Protocol version: {protocol_version:#x} - version {protocol_version}"
-        )
-        self.ten_env.log_debug(
-            f"Header size: {header_size:#x} - {header_size * 4} bytes"
-        )
-        self.ten_env.log_debug(
-            f"Message type: {message_type:#x} - {MESSAGE_TYPES[message_type]}"
-        )
-        self.ten_env.log_debug(
-            f"Message type specific flags: {message_type_specific_flags:#x} - {MESSAGE_TYPE_SPECIFIC_FLAGS[message_type_specific_flags]}"
-        )
-        self.ten_env.log_debug(
-            f"Message serialization method: {serialization_method:#x} - {MESSAGE_SERIALIZATION_METHODS[serialization_method]}"
-        )
-        self.ten_env.log_debug(
-            f"Message compression: {message_compression:#x} - {MESSAGE_COMPRESSIONS[message_compression]}"
-        )
-        self.ten_env.log_debug(f"Reserved: {reserved:#04x}")
-
-        if header_size != 1:
-            self.ten_env.log_debug(f"Header extensions: {header_extensions}")
+        if self.config.verbose:
+            self._log_header(response)
 
         if message_type == 0xB:  # audio-only server response
             if message_type_specific_flags == 0:  # no sequence number as ACK
-                self.ten_env.log_debug("Payload size: 0")
+                if self.config.verbose:
+                    self.ten_env.log_debug("Payload size: 0")
                 return None, False
-            else:
-                sequence_number = int.from_bytes(payload[:4], "big", signed=True)
+            sequence_number = int.from_bytes(payload[:4], "big", signed=True)
+            if self.config.verbose:
                 payload_size = int.from_bytes(payload[4:8], "big", signed=False)
-                payload = payload[8:]
                 self.ten_env.log_debug(f"Sequence number: {sequence_number}")
                 self.ten_env.log_debug(f"Payload size: {payload_size} bytes")
-            if sequence_number < 0:
-                return payload, True
-            else:
-                return payload, False
+            return payload[8:], sequence_number < 0
         elif message_type == 0xF:
             code = int.from_bytes(payload[:4], "big", signed=False)
             msg_size = int.from_bytes(payload[4:8], "big", signed=False)
@@ -184,15 +273,48 @@ class TTSClient:
             self.ten_env.log_error(f"Error message: {error_msg}")
             return None, True
         elif message_type == 0xC:
-            msg_size = int.from_bytes(payload[:4], "big", signed=False)
-            payload = payload[4:]
-            if message_compression == 1:
-                payload = gzip.decompress(payload)
-            self.ten_env.log_debug(f"Frontend message: {payload}")
+            if self.config.verbose:
+                payload = payload[4:]
+                if message_compression == 1:
+                    payload = gzip.decompress(payload)
+                self.ten_env.log_debug(f"Frontend message: {payload}")
+            return None, False
         else:
             self.ten_env.log_error("undefined message type!")
             return None, True
 
+    def _log_header(self, response: websockets.Data) -> None:
+        protocol_version = response[0] >> 4
+        header_size = response[0] & 0x0F
+        message_type = response[1] >> 4
+        message_type_specific_flags = response[1] & 0x0F
+        serialization_method = response[2] >> 4
+        message_compression = response[2] & 0x0F
+        reserved = response[3]
+        header_extensions = response[4 : header_size * 4]
+        self.ten_env.log_debug(
+            f"Protocol version: {protocol_version:#x} - version {protocol_version}"
+        )
+        self.ten_env.log_debug(
+            f"Header size: {header_size:#x} - {header_size * 4} bytes"
+        )
+        self.ten_env.log_debug(
+            f"Message type: {message_type:#x} - {MESSAGE_TYPES.get(message_type)}"
+        )
+        self.ten_env.log_debug(
+            f"Message type specific flags: {message_type_specific_flags:#x} - {MESSAGE_TYPE_SPECIFIC_FLAGS[message_type_specific_flags]}"
+        )
+        self.ten_env.log_debug(
+            f"Message serialization method: {serialization_method:#x} - {MESSAGE_SERIALIZATION_METHODS.get(serialization_method)}"
+        )
+        self.ten_env.log_debug(
+            f"Message compression: {message_compression:#x} - {MESSAGE_COMPRESSIONS.get(message_compression)}"
+        )
+        self.ten_env.log_debug(f"Reserved: {reserved:#04x}")
+
+        if header_size != 1:
+            self.ten_env.log_debug(f"Header extensions: {header_extensions}")
+
     def record_latency(self, request_id: str, start: datetime) -> None:
         end_time = datetime.now()
 
@@ -206,48 +328,30 @@ class TTSClient:
         self.ten_env.log_info(f"Request ({request_id}), ttfb {latency}ms.")
 
     async def text_to_speech_stream(self, text: str) -> AsyncIterator[bytes]:
-        ws = self.websocket
-        if ws is None:
-            await self.connect()
-            ws = self.websocket
-
         start_ms = datetime.now()
         request_id = str(uuid.uuid4())
+        full_request = self.build_request(request_id, str(uuid.uuid4()), text)
 
-        request = copy.deepcopy(self.request_template)
-        request["request"]["reqid"] = request_id
-        request["request"]["text"] = text
-        request["user"]["uid"] = str(uuid.uuid4())
-
-        request_bytes = str.encode(json.dumps(request))
-        request_bytes = gzip.compress(request_bytes)
-        full_request = bytearray(self.default_header)
-
-        # payload size(4 bytes)
-        full_request.extend((len(request_bytes)).to_bytes(4, "big"))
-
-        # payload
-        full_request.extend(request_bytes)
+        ws = await self._acquire()
+        self._active = ws
+        self._fill()
+        done = False
+        first = True
 
         try:
             await ws.send(full_request)
-            self.ten_env.log_info(f"Sent: {request}")
-
-            while True:
-                if self.is_cancelled():
-                    self.ten_env.log_info(f"Request ({request_id}) has been cancelled.")
-
-                    # Current connection should be closed, as the server will not drop the remain data.
-                    await self.close()
-                    self._cancel.clear()
-                    break
+            self.ten_env.log_info(f"Sent request ({request_id}): {text}")
 
+            # cancel() takes the connection away from this request.
+            while self._active is ws:
                 resp = await ws.recv()
                 payload, done = self.parse_response(resp)
 
                 if payload:
+                    if first:
+                        first = False
+                        self.record_latency(request_id, start_ms)
                     yield payload
-                    self.record_latency(request_id, start_ms)
 
                 if done:
                     self.ten_env.log_info(
@@ -255,10 +359,22 @@ class TTSClient:
                     )
                     break
 
-        except websockets.exceptions.ConnectionClosedError as e:
-            self.ten_env.log_error(
-                f"Connection is closed with error: {e}, request: {request_id}."
-            )
-            await self.connect()
+        except websockets.exceptions.ConnectionClosed as e:
+            if self._active is ws:
+                self.ten_env.log_error(
+                    f"Connection is closed with error: {e}, request: {request_id}."
+                )
         except asyncio.TimeoutError:
             self.ten_env.log_error("Timeout waiting for response.")
+        finally:
+            if self._active is ws:
+                self._active = None
+                if done:
+                    self._idle.append(ws)
+                else:
+                    # Failed, or the consumer went away mid-response: the
+                    # rest of the audio is still on its way, don't reuse.
+                    self._retire(ws)
+                self._fill()
+            else:
+                self.ten_env.log_info(f"Request ({request_id}) has been cancelled.")
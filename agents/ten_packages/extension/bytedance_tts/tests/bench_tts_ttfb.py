@@ -0,0 +1,151 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Time to first audio byte per sentence across cancel storms.
+
+Usage (ten_runtime_python and ten_ai_base must be importable):
+    python tests/bench_tts_ttfb.py
+
+A local websocket server speaks the binary TTS protocol with an artificial
+HANDSHAKE delay per connection. Most sentences are cancelled right after
+their first audio chunk, like a user barging in repeatedly. pool_size=0 is
+the former behaviour: the cancelled connection is closed and the next
+sentence reconnects.
+
+Also compares request building and response parsing with the former
+implementation.
+"""
+
+import asyncio
+import copy
+import gzip
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import websockets
+from websockets.asyncio.server import serve
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from bytedance_tts.bytedance_tts import TTSClient, TTSConfig  # noqa: E402
+
+HANDSHAKE = 0.08
+FIRST_AUDIO = 0.04
+FRAME_INTERVAL = 0.01
+FRAMES = 30
+SENTENCES = 40
+
+
+class NullTenEnv:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def audio_frame(seq: int, audio: bytes) -> bytes:
+    flags = 0x2 if seq < 0 else 0x1
+    return (
+        bytes((0x11, 0xB0 | flags, 0x10, 0x00))
+        + seq.to_bytes(4, "big", signed=True)
+        + len(audio).to_bytes(4, "big")
+        + audio
+    )
+
+
+async def process_request(connection, request):
+    await asyncio.sleep(HANDSHAKE)
+
+
+async def handler(ws) -> None:
+    audio = bytes(3200)
+    try:
+        async for message in ws:
+            size = int.from_bytes(message[4:8], "big")
+            json.loads(gzip.decompress(message[8 : 8 + size]))
+            await asyncio.sleep(FIRST_AUDIO)
+            for seq in range(1, FRAMES + 1):
+                await ws.send(audio_frame(seq if seq < FRAMES else -seq, audio))
+                await asyncio.sleep(FRAME_INTERVAL)
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
+
+async def run_storm(pool_size: int, url: str) -> list[float]:
+    config = TTSConfig(appid="x", token="x", api_url=url, pool_size=pool_size)
+    client = TTSClient(config, NullTenEnv())
+    await client.connect()
+    await asyncio.sleep(HANDSHAKE * 2)
+
+    ttfb = []
+    for i in range(SENTENCES):
+        start = time.perf_counter()
+        async for _ in client.text_to_speech_stream(f"sentence {i}"):
+            if len(ttfb) == i:
+                ttfb.append(time.perf_counter() - start)
+                # Three sentences out of four are interrupted.
+                if i % 4:
+                    await client.cancel()
+    await client.close()
+    return ttfb
+
+
+def legacy_request(client: TTSClient, text: str) -> bytearray:
+    request = copy.deepcopy(client.request_template)
+    request["request"]["reqid"] = str(uuid.uuid4())
+    request["request"]["text"] = text
+    request["user"]["uid"] = str(uuid.uuid4())
+    request_bytes = gzip.compress(str.encode(json.dumps(request)))
+    full_request = bytearray(client.default_header)
+    full_request.extend((len(request_bytes)).to_bytes(4, "big"))
+    full_request.extend(request_bytes)
+    return full_request
+
+
+def bench_cpu() -> None:
+    text = "Hello there, this is a sentence of moderate length."
+    n = 20000
+    for verbose in (True, False):
+        client = TTSClient(TTSConfig(verbose=verbose), NullTenEnv())
+        frame = audio_frame(3, bytes(3200))
+        start = time.perf_counter()
+        for _ in range(n):
+            client.parse_response(frame)
+        elapsed = time.perf_counter() - start
+        print(f"parse_response verbose={verbose!s:<5} {elapsed / n * 1e6:6.2f} us")
+
+    start = time.perf_counter()
+    for _ in range(n):
+        legacy_request(client, text)
+    elapsed = time.perf_counter() - start
+    print(f"request legacy               {elapsed / n * 1e6:6.2f} us")
+    start = time.perf_counter()
+    for _ in range(n):
+        client.build_request(str(uuid.uuid4()), str(uuid.uuid4()), text)
+    elapsed = time.perf_counter() - start
+    print(f"request build_request        {elapsed / n * 1e6:6.2f} us")
+
+
+async def main() -> None:
+    # Warming handshakes aborted by close() are expected.
+    logging.getLogger("websockets.server").setLevel(logging.CRITICAL)
+    async with serve(handler, "127.0.0.1", 0, process_request=process_request) as s:
+        port = s.sockets[0].getsockname()[1]
+        url = f"ws://127.0.0.1:{port}"
+        for pool_size in (0, 1, 2, 3):
+            ttfb = sorted(await run_storm(pool_size, url))
+            print(
+                f"pool_size={pool_size} ttfb p50 {statistics.median(ttfb) * 1000:6.1f} ms"
+                f"  p95 {ttfb[int(len(ttfb) * 0.95)] * 1000:6.1f} ms"
+                f"  max {ttfb[-1] * 1000:6.1f} ms"
+            )
+    bench_cpu()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
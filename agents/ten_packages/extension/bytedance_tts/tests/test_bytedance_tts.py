@@ -0,0 +1,111 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import copy
+import gzip
+import json
+import os
+import sys
+
+import websockets
+from websockets.asyncio.server import serve
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from bytedance_tts.bytedance_tts import TTSClient, TTSConfig  # noqa: E402
+
+FRAMES = 20
+
+
+class NullTenEnv:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def audio_frame(seq: int, audio: bytes) -> bytes:
+    flags = 0x2 if seq < 0 else 0x1
+    return (
+        bytes((0x11, 0xB0 | flags, 0x10, 0x00))
+        + seq.to_bytes(4, "big", signed=True)
+        + len(audio).to_bytes(4, "big")
+        + audio
+    )
+
+
+def test_build_request_fills_in_the_template():
+    client = TTSClient(TTSConfig(appid="app", voice_type="v1"), NullTenEnv())
+    text = 'Say "hi", then 你好\n'
+    request = client.build_request("req-1", "user-1", text)
+
+    assert request[:4] == bytes(client.default_header)
+    size = int.from_bytes(request[4:8], "big")
+    assert size == len(request) - 8
+    expected = copy.deepcopy(client.request_template)
+    expected["user"]["uid"] = "user-1"
+    expected["request"]["reqid"] = "req-1"
+    expected["request"]["text"] = text
+    assert json.loads(gzip.decompress(request[8:])) == expected
+
+
+def test_parse_response():
+    client = TTSClient(TTSConfig(), NullTenEnv())
+    assert client.parse_response(audio_frame(3, b"pcm")) == (b"pcm", False)
+    assert client.parse_response(audio_frame(-4, b"end")) == (b"end", True)
+    # ACK without a sequence number
+    assert client.parse_response(bytes((0x11, 0xB0, 0x10, 0x00))) == (None, False)
+    error = b"quota"
+    frame = (
+        bytes((0x11, 0xF0, 0x10, 0x00))
+        + (3001).to_bytes(4, "big")
+        + len(error).to_bytes(4, "big")
+        + error
+    )
+    assert client.parse_response(frame) == (None, True)
+
+
+def test_cancel_retires_the_connection_and_keeps_the_pool_warm():
+    connections = []
+
+    async def handler(ws) -> None:
+        connections.append(ws)
+        try:
+            async for _ in ws:
+                for seq in range(1, FRAMES + 1):
+                    await ws.send(audio_frame(seq if seq < FRAMES else -seq, b"a"))
+                    await asyncio.sleep(0.005)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def sentence(client: TTSClient, cancel: bool) -> int:
+        chunks = 0
+        async for _ in client.text_to_speech_stream("hello"):
+            chunks += 1
+            if cancel:
+                await client.cancel()
+        return chunks
+
+    async def run():
+        async with serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            config = TTSConfig(api_url=f"ws://127.0.0.1:{port}", pool_size=2)
+            client = TTSClient(config, NullTenEnv())
+            await client.connect()
+            await asyncio.sleep(0.1)
+            opened = len(connections)
+
+            full = await sentence(client, cancel=False)
+            cancelled = await sentence(client, cancel=True)
+            await asyncio.sleep(0.1)
+            idle = len(client._idle)
+            await client.close()
+            return opened, full, cancelled, len(connections), idle
+
+    opened, full, cancelled, total, idle = asyncio.run(run())
+    assert opened == 2
+    assert (full, cancelled) == (FRAMES, 1)
+    # The finished connection was reused, the cancelled one was replaced.
+    assert total == 3
+    assert idle == 2
@@ -5,7 +5,6 @@
 #
 import asyncio
 import traceback
-import aiohttp
 import json
 import copy
 
@@ -36,6 +35,9 @@ from ten_ai_base.llm import (
     AsyncLLMBaseExtension,
 )
 
+from .http_session_pool import HttpSessionPool
+from .sentence_segmenter import SentenceSegmenter
+
 CMD_IN_FLUSH = "flush"
 CMD_IN_ON_USER_JOINED = "on_user_joined"
 CMD_IN_ON_USER_LEFT = "on_user_left"
@@ -51,27 +53,6 @@ DATA_OUT_TEXT_DATA_PROPERTY_END_OF_SEGMENT = "end_of_segment"
 CMD_PROPERTY_RESULT = "tool_result"
 
 
-def is_punctuation(char):
-    if char in [",", "，", ".", "。", "?", "？", "!", "！"]:
-        return True
-    return False
-
-
-def parse_sentences(sentence_fragment, content):
-    sentences = []
-    current_sentence = sentence_fragment
-    for char in content:
-        current_sentence += char
-        if is_punctuation(char):
-            stripped_sentence = current_sentence
-            if any(c.isalnum() for c in stripped_sentence):
-                sentences.append(stripped_sentence)
-            current_sentence = ""
-
-    remain = current_sentence
-    return sentences, remain
-
-
 @dataclass
 class CozeConfig(BaseConfig):
     base_url: str = "https://api.acoze.com"
@@ -80,11 +61,16 @@ class CozeConfig(BaseConfig):
     user_id: str = "TenAgent"
     greeting: str = ""
     max_history: int = 32
+    http_pool_size: int = 8
+    http_keepalive_timeout: int = 60
+    http_warm_up: bool = False
+    # Release the first sentence of a turn at a space once it is this long,
+    # 0 waits for punctuation
+    first_chunk_min_len: int = 0
 
 
 class AsyncCozeExtension(AsyncLLMBaseExtension):
     config: CozeConfig = None
-    sentence_fragment: str = ""
     ten_env: AsyncTenEnv = None
     loop: asyncio.AbstractEventLoop = None
     stopped: bool = False
@@ -92,6 +78,7 @@ class AsyncCozeExtension(AsyncLLMBaseExtension):
     memory: ChatMemory = None
 
     acoze: AsyncCoze = None
+    http: HttpSessionPool = None
     # conversation: str = ""
 
     async def on_init(self, ten_env: AsyncTenEnv) -> None:
@@ -126,6 +113,12 @@ class AsyncCozeExtension(AsyncLLMBaseExtension):
 
         self.ten_env = ten_env
 
+        self.http = HttpSessionPool(
+            self.config.http_pool_size, self.config.http_keepalive_timeout
+        )
+        if self.config.http_warm_up:
+            self.loop.create_task(self._warm_up(f"{self.config.base_url}/v3/chat"))
+
     async def on_stop(self, ten_env: AsyncTenEnv) -> None:
         await super().on_stop(ten_env)
         ten_env.log_debug("on_stop")
@@ -136,6 +129,9 @@ class AsyncCozeExtension(AsyncLLMBaseExtension):
         await super().on_deinit(ten_env)
         ten_env.log_debug("on_deinit")
 
+        if self.http:
+            await self.http.close()
+
     async def on_cmd(self, ten_env: AsyncTenEnv, cmd: Cmd) -> None:
         cmd_name = cmd.get_name()
         ten_env.log_debug("on_cmd name {}".format(cmd_name))
@@ -186,10 +182,11 @@ class AsyncCozeExtension(AsyncLLMBaseExtension):
                 self.memory.put(i)
 
         total_output = ""
-        sentence_fragment = ""
+        segmenter = SentenceSegmenter(
+            first_chunk_min_len=self.config.first_chunk_min_len
+        )
         calls = {}
 
-        sentences = []
         self.ten_env.log_info(f"messages: {messages}")
         response = self._stream_chat(messages=messages)
         async for message in response:
@@ -197,12 +194,10 @@ class AsyncCozeExtension(AsyncLLMBaseExtension):
             try:
                 if message.event == ChatEventType.CONVERSATION_MESSAGE_DELTA:
                     total_output += message.message.content
-                    sentences, sentence_fragment = parse_sentences(
-                        sentence_fragment, message.message.content
-                    )
-                    for s in sentences:
+                    for s in segmenter.push(message.message.content):
                         await self._send_text(s, False)
                 elif message.event == ChatEventType.CONVERSATION_MESSAGE_COMPLETED:
+                    sentence_fragment = segmenter.flush()
                     if sentence_fragment:
                         await self._send_text(sentence_fragment, True)
                     else:
@@ -272,6 +267,13 @@ class AsyncCozeExtension(AsyncLLMBaseExtension):
     ) -> None:
         pass
 
+    async def _warm_up(self, url: str) -> None:
+        try:
+            await self.http.warm_up(url)
+            self.ten_env.log_info(f"http warm up done {self.http.metrics()}")
+        except Exception as e:
+            self.ten_env.log_warn(f"http warm up failed {e}")
+
     async def _send_text(self, text: str, end_of_segment: bool) -> None:
         data = Data.create("text_data")
         data.set_property_string(DATA_OUT_TEXT_DATA_PROPERTY_TEXT, text)
@@ -317,57 +319,59 @@ class AsyncCozeExtension(AsyncLLMBaseExtension):
             else:
                 raise ValueError(f"invalid chat.event: {event}, {event_data}")
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                url = f"{self.config.base_url}/v3/chat"
-                headers = {
-                    "Authorization": f"Bearer {self.config.token}",
-                }
-                params = {
-                    "bot_id": self.config.bot_id,
-                    "user_id": self.config.user_id,
-                    "additional_messages": additionals,
-                    "stream": True,
-                    "auto_save_history": True,
-                    # "conversation_id": self.conversation.id
-                }
-                event = ""
-                async with session.post(url, json=params, headers=headers) as response:
-                    async for line in response.content:
-                        if line:
-                            try:
-                                self.ten_env.log_info(f"line: {line}")
-                                decoded_line = line.decode("utf-8").strip()
-                                if decoded_line:
-                                    if decoded_line.startswith("data:"):
-                                        data = decoded_line[5:].strip()
-                                        yield chat_stream_handler(
-                                            event=event, event_data=data.strip()
+        session = await self.http.get()
+        try:
+            url = f"{self.config.base_url}/v3/chat"
+            headers = {
+                "Authorization": f"Bearer {self.config.token}",
+            }
+            params = {
+                "bot_id": self.config.bot_id,
+                "user_id": self.config.user_id,
+                "additional_messages": additionals,
+                "stream": True,
+                "auto_save_history": True,
+                # "conversation_id": self.conversation.id
+            }
+            event = ""
+            async with session.post(url, json=params, headers=headers) as response:
+                self.ten_env.log_info(f"http {self.http.metrics()}")
+                async for line in response.content:
+                    if line:
+                        try:
+                            self.ten_env.log_info(f"line: {line}")
+                            decoded_line = line.decode("utf-8").strip()
+                            if decoded_line:
+                                if decoded_line.startswith("data:"):
+                                    data = decoded_line[5:].strip()
+                                    yield chat_stream_handler(
+                                        event=event, event_data=data.strip()
+                                    )
+                                elif decoded_line.startswith("event:"):
+                                    event = decoded_line[6:]
+                                    self.ten_env.log_info(f"event: {event}")
+                                    if event == "done":
+                                        # read on to EOF, a response released early
+                                        # closes its connection instead of pooling it
+                                        await response.read()
+                                        break
+                                else:
+                                    result = json.loads(decoded_line)
+                                    code = result.get("code", 0)
+                                    if code == 4000:
+                                        await self._send_text(
+                                            "Coze bot is not published.", True
                                         )
-                                    elif decoded_line.startswith("event:"):
-                                        event = decoded_line[6:]
-                                        self.ten_env.log_info(f"event: {event}")
-                                        if event == "done":
-                                            break
                                     else:
-                                        result = json.loads(decoded_line)
-                                        code = result.get("code", 0)
-                                        if code == 4000:
-                                            await self._send_text(
-                                                "Coze bot is not published.", True
-                                            )
-                                        else:
-                                            self.ten_env.log_error(
-                                                f"Failed to stream chat: {result['code']}"
-                                            )
-                                            await self._send_text(
-                                                "Coze bot is not connected. Please check your configuration.",
-                                                True,
-                                            )
-                            except Exception as e:
-                                self.ten_env.log_error(f"Failed to stream chat: {e}")
-            except Exception as e:
-                traceback.print_exc()
-                self.ten_env.log_error(f"Failed to stream chat: {e}")
-            finally:
-                await session.close()
+                                        self.ten_env.log_error(
+                                            f"Failed to stream chat: {result['code']}"
+                                        )
+                                        await self._send_text(
+                                            "Coze bot is not connected. Please check your configuration.",
+                                            True,
+                                        )
+                        except Exception as e:
+                            self.ten_env.log_error(f"Failed to stream chat: {e}")
+        except Exception as e:
+            traceback.print_exc()
+            self.ten_env.log_error(f"Failed to stream chat: {e}")
@@ -0,0 +1,268 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import re
+
+# Sentence boundaries shared by every language, kept identical to the
+# punctuation list the extensions have always split on.
+DEFAULT_PUNCTUATION = ",，.。?？!！"
+
+_CJK_PUNCTUATION = DEFAULT_PUNCTUATION + "；…"
+
+_EN_ABBREVIATIONS = frozenset(
+    [
+        "mr",
+        "mrs",
+        "ms",
+        "dr",
+        "prof",
+        "sr",
+        "jr",
+        "st",
+        "vs",
+        "etc",
+        "e.g",
+        "i.e",
+    ]
+)
+
+# Language prefix -> (punctuation, abbreviations that never end a sentence)
+_LANGUAGE_RULES = {
+    "en": (DEFAULT_PUNCTUATION, _EN_ABBREVIATIONS),
+    "zh": (_CJK_PUNCTUATION, frozenset()),
+    "ja": (_CJK_PUNCTUATION, frozenset()),
+    "ko": (_CJK_PUNCTUATION, frozenset()),
+}
+
+# Equivalent to str.isalnum() on a single character.
+_ALNUM_RE = re.compile(r"[^\W_]")
+_SOFT_BREAK_RE = re.compile(r"\s")
+_WORD_TAIL_RE = re.compile(r"[A-Za-z][A-Za-z.]*$")
+
+# Longest abbreviation we ever need to look back for, plus the dot.
+_TAIL_LEN = 8
+
+
+def _letter_dot_is_boundary(letter: str, rest: str) -> bool | None:
+    """Whether the dot after a single letter ends the sentence, given the
+    text that follows it; None if rest does not tell yet."""
+    if rest[:1].isalpha():
+        return False  # the first dot of "e.g." or "U.S."
+    if letter == "I":
+        return True  # the pronoun, not an initial
+    if not rest:
+        return None
+    if not letter.isupper():
+        return True
+    # An initial is followed by another capitalised name: "J. R. R. Tolkien"
+    following = rest.lstrip()
+    if not following:
+        return None
+    return not following[0].isupper()
+
+
+class SentenceSegmenter:
+    """Incrementally split a stream of LLM token deltas into sentences.
+
+    Each call to push() only scans the newly arrived content, so the cost is
+    linear in the total length of the stream regardless of how the text is
+    chunked. A sentence is emitted after a punctuation mark as long as it
+    contains at least one alphanumeric character; punctuation-only fragments
+    are dropped, just like the former parse_sentences helper.
+
+    language selects per-language rules (extra CJK marks, abbreviations such
+    as "Mr." that must not end a sentence). With decimals enabled a dot
+    between two digits ("3.14") is not treated as a boundary. When
+    first_chunk_min_len is set, the first sentence of a turn is released at
+    the first whitespace once it reaches that many characters, so TTS can
+    start before the first punctuation mark arrives.
+    """
+
+    def __init__(
+        self,
+        language: str = "",
+        first_chunk_min_len: int = 0,
+        decimals: bool = True,
+    ) -> None:
+        prefix = language.split("-")[0].lower()
+        punctuation, abbreviations = _LANGUAGE_RULES.get(
+            prefix, (DEFAULT_PUNCTUATION, frozenset())
+        )
+        self._punct_re = re.compile("[" + re.escape(punctuation) + "]")
+        self._abbreviations = abbreviations
+        self._decimals = decimals
+        self._first_chunk_min_len = first_chunk_min_len
+
+        self._parts: list[str] = []
+        self._pending_len = 0
+        self._has_alnum = False
+        self._deferred = False
+        self._deferred_letter = ""
+        self._first_sent = False
+
+    @property
+    def remain(self) -> str:
+        """Text received after the last emitted sentence."""
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def reset(self) -> None:
+        """Drop pending text and start a new turn."""
+        self._parts = []
+        self._pending_len = 0
+        self._has_alnum = False
+        self._deferred = False
+        self._deferred_letter = ""
+        self._first_sent = False
+
+    def flush(self) -> str:
+        """Return pending text and start a new turn."""
+        remain = self.remain
+        self.reset()
+        return remain
+
+    def push(self, content: str) -> list[str]:
+        """Feed a delta and return the sentences it completed."""
+        sentences: list[str] = []
+        if not content:
+            return sentences
+
+        start = 0
+        if self._deferred:
+            # A dot right after a digit or a single letter ended the previous
+            # delta; now we know whether it was a decimal point or an initial.
+            self._deferred = False
+            if self._deferred_letter:
+                letter, tail = self._deferred_letter[0], self._deferred_letter[1:]
+                self._deferred_letter = ""
+                boundary = _letter_dot_is_boundary(letter, tail + content)
+                if boundary is None:
+                    # Only whitespace after the dot so far.
+                    self._append(content)
+                    self._defer_letter(letter + tail + content)
+                    return sentences
+                if boundary:
+                    self._emit(sentences)
+            elif not content[0].isdigit():
+                self._emit(sentences)
+
+        m = self._punct_re.search(content)
+        if m is None:
+            # Most deltas are a word or two without any punctuation.
+            self._append(content)
+            if (
+                self._first_chunk_min_len
+                and not self._first_sent
+                and self._pending_len >= self._first_chunk_min_len
+            ):
+                self._emit_first_chunk(sentences)
+            return sentences
+
+        for m in self._punct_re.finditer(content, m.start()):
+            end = m.end()
+            boundary = self._is_boundary(content, start, m.start())
+            if boundary is None:
+                self._defer_letter(
+                    self._char_before(content, m.start()) + content[end:]
+                )
+                break
+            if not boundary:
+                continue
+            if (
+                self._decimals
+                and end == len(content)
+                and self._ends_with_digit_dot(content, m.start())
+            ):
+                # Can't tell "3." from "3.14" until the next delta arrives.
+                self._deferred = True
+                break
+            self._append(content[start:end])
+            start = end
+            self._emit(sentences)
+
+        if start < len(content):
+            self._append(content[start:])
+            if (
+                not self._deferred
+                and self._first_chunk_min_len
+                and not self._first_sent
+                and self._pending_len >= self._first_chunk_min_len
+            ):
+                self._emit_first_chunk(sentences)
+
+        return sentences
+
+    def _defer_letter(self, letter_and_tail: str) -> None:
+        self._deferred = True
+        self._deferred_letter = letter_and_tail
+
+    def _append(self, text: str) -> None:
+        self._parts.append(text)
+        self._pending_len += len(text)
+        if not self._has_alnum and _ALNUM_RE.search(text):
+            self._has_alnum = True
+
+    def _emit(self, sentences: list[str]) -> None:
+        if self._has_alnum:
+            sentences.append("".join(self._parts))
+            self._first_sent = True
+        self._parts = []
+        self._pending_len = 0
+        self._has_alnum = False
+
+    def _emit_first_chunk(self, sentences: list[str]) -> None:
+        pending = self.remain
+        cut = None
+        for m in _SOFT_BREAK_RE.finditer(pending, self._first_chunk_min_len - 1):
+            cut = m.end()
+            break
+        if cut is None:
+            return
+        head, rest = pending[:cut], pending[cut:]
+        self._parts = [head]
+        self._pending_len = len(head)
+        self._has_alnum = bool(_ALNUM_RE.search(head))
+        self._emit(sentences)
+        if rest:
+            self._append(rest)
+
+    def _char_before(self, content: str, pos: int) -> str:
+        if pos > 0:
+            return content[pos - 1]
+        return self._parts[-1][-1] if self._parts else ""
+
+    def _lookbehind(self, content: str, start: int, pos: int) -> str:
+        # Only look at the sentence being built, never at emitted ones.
+        if pos - start >= _TAIL_LEN or start > 0:
+            return content[max(start, pos - _TAIL_LEN) : pos]
+        text = content[:pos]
+        for part in reversed(self._parts):
+            text = part + text
+            if len(text) >= _TAIL_LEN:
+                break
+        return text[-_TAIL_LEN:]
+
+    def _ends_with_digit_dot(self, content: str, pos: int) -> bool:
+        return content[pos] == "." and self._char_before(content, pos).isdigit()
+
+    def _is_boundary(self, content: str, start: int, pos: int) -> bool | None:
+        if content[pos] != ".":
+            return True
+
+        if self._decimals and pos + 1 < len(content):
+            if self._char_before(content, pos).isdigit() and content[pos + 1].isdigit():
+                return False
+
+        if self._abbreviations:
+            before = self._lookbehind(content, start, pos)
+            m = _WORD_TAIL_RE.search(before)
+            word = m.group() if m else ""
+            if word.lower() in self._abbreviations:
+                return False
+            if len(word) == 1:
+                return _letter_dot_is_boundary(word, content[pos + 1 :])
+
+        return True
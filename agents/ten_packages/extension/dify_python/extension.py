@@ -10,7 +10,6 @@ import traceback
 from dataclasses import dataclass
 from typing import AsyncGenerator
 
-import aiohttp
 from ten import AsyncTenEnv, AudioFrame, Cmd, CmdResult, Data, StatusCode, VideoFrame
 from ten_ai_base.config import BaseConfig
 from ten_ai_base.types import LLMChatCompletionUserMessageParam, LLMDataCompletionArgs
@@ -18,6 +17,9 @@ from ten_ai_base.llm import (
     AsyncLLMBaseExtension,
 )
 
+from .http_session_pool import HttpSessionPool
+from .sentence_segmenter import SentenceSegmenter
+
 CMD_IN_FLUSH = "flush"
 CMD_IN_ON_USER_JOINED = "on_user_joined"
 CMD_IN_ON_USER_LEFT = "on_user_left"
@@ -33,27 +35,6 @@ DATA_OUT_TEXT_DATA_PROPERTY_END_OF_SEGMENT = "end_of_segment"
 CMD_PROPERTY_RESULT = "tool_result"
 
 
-def is_punctuation(char):
-    if char in [",", "，", ".", "。", "?", "？", "!", "！"]:
-        return True
-    return False
-
-
-def parse_sentences(sentence_fragment, content):
-    sentences = []
-    current_sentence = sentence_fragment
-    for char in content:
-        current_sentence += char
-        if is_punctuation(char):
-            stripped_sentence = current_sentence
-            if any(c.isalnum() for c in stripped_sentence):
-                sentences.append(stripped_sentence)
-            current_sentence = ""
-
-    remain = current_sentence
-    return sentences, remain
-
-
 @dataclass
 class DifyConfig(BaseConfig):
     base_url: str = "https://api.dify.ai/v1"
@@ -62,6 +43,12 @@ class DifyConfig(BaseConfig):
     greeting: str = ""
     failure_info: str = ""
     max_history: int = 32
+    http_pool_size: int = 8
+    http_keepalive_timeout: int = 60
+    http_warm_up: bool = False
+    # Release the first sentence of a turn at a space once it is this long,
+    # 0 waits for punctuation
+    first_chunk_min_len: int = 0
 
 
 class DifyExtension(AsyncLLMBaseExtension):
@@ -71,6 +58,7 @@ class DifyExtension(AsyncLLMBaseExtension):
     stopped: bool = False
     users_count = 0
     conversational_id = ""
+    http: HttpSessionPool = None
 
     async def on_init(self, ten_env: AsyncTenEnv) -> None:
         await super().on_init(ten_env)
@@ -90,6 +78,14 @@ class DifyExtension(AsyncLLMBaseExtension):
 
         self.ten_env = ten_env
 
+        self.http = HttpSessionPool(
+            self.config.http_pool_size, self.config.http_keepalive_timeout
+        )
+        if self.config.http_warm_up:
+            self.loop.create_task(
+                self._warm_up(f"{self.config.base_url}/chat-messages")
+            )
+
     async def on_stop(self, ten_env: AsyncTenEnv) -> None:
         await super().on_stop(ten_env)
         ten_env.log_debug("on_stop")
@@ -100,6 +96,9 @@ class DifyExtension(AsyncLLMBaseExtension):
         await super().on_deinit(ten_env)
         ten_env.log_debug("on_deinit")
 
+        if self.http:
+            await self.http.close()
+
     async def on_cmd(self, ten_env: AsyncTenEnv, cmd: Cmd) -> None:
         cmd_name = cmd.get_name()
         ten_env.log_debug("on_cmd name {}".format(cmd_name))
@@ -183,10 +182,11 @@ class DifyExtension(AsyncLLMBaseExtension):
             ten_env.log_warn("No message in data")
 
         total_output = ""
-        sentence_fragment = ""
+        segmenter = SentenceSegmenter(
+            first_chunk_min_len=self.config.first_chunk_min_len
+        )
         calls = {}
 
-        sentences = []
         self.ten_env.log_info(f"messages: {input_messages}")
         response = self._stream_chat(query=input_messages[0]["content"])
         async for message in response:
@@ -198,10 +198,7 @@ class DifyExtension(AsyncLLMBaseExtension):
                     ten_env.log_info(f"conversation_id: {self.conversational_id}")
 
                 total_output += message.get("answer", "")
-                sentences, sentence_fragment = parse_sentences(
-                    sentence_fragment, message.get("answer", "")
-                )
-                for s in sentences:
+                for s in segmenter.push(message.get("answer", "")):
                     await self._send_text(s, False)
             elif message_type == "message_end":
                 metadata = message.get("metadata", {})
@@ -234,55 +231,64 @@ class DifyExtension(AsyncLLMBaseExtension):
             # except Exception as e:
             #     self.ten_env.log_error(f"Failed to parse response: {message} {e}")
             #     traceback.print_exc()
-        await self._send_text(sentence_fragment, True)
+        await self._send_text(segmenter.flush(), True)
         self.ten_env.log_info(f"total_output: {total_output} {calls}")
 
     async def _stream_chat(self, query: str) -> AsyncGenerator[dict, None]:
-        async with aiohttp.ClientSession() as session:
-            try:
-                payload = {
-                    "inputs": {},
-                    "query": query,
-                    "response_mode": "streaming",
-                }
-                if self.conversational_id:
-                    payload["conversation_id"] = self.conversational_id
-                if self.config.user_id:
-                    payload["user"] = self.config.user_id
-                self.ten_env.log_info(f"payload before sending: {json.dumps(payload)}")
-                headers = {
-                    "Authorization": f"Bearer {self.config.api_key}",
-                    "Content-Type": "application/json",
-                }
-                url = f"{self.config.base_url}/chat-messages"
-                start_time = time.time()
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status != 200:
-                        r = await response.json()
-                        self.ten_env.log_error(
-                            f"Received unexpected status {r} from the server."
-                        )
-                        if self.config.failure_info:
-                            await self._send_text(self.config.failure_info, True)
-                        return
-                    end_time = time.time()
-                    self.ten_env.log_info(f"connect time {end_time - start_time} s")
-
-                    async for line in response.content:
-                        if line:
-                            l = line.decode("utf-8").strip()
-                            if l.startswith("data:"):
-                                content = l[5:].strip()
-                                if content == "[DONE]":
-                                    break
-                                self.ten_env.log_debug(f"content: {content}")
-                                yield json.loads(content)
-            except Exception as e:
-                traceback.print_exc()
-                self.ten_env.log_error(f"Failed to handle {e}")
-            finally:
-                await session.close()
-                session = None
+        session = await self.http.get()
+        try:
+            payload = {
+                "inputs": {},
+                "query": query,
+                "response_mode": "streaming",
+            }
+            if self.conversational_id:
+                payload["conversation_id"] = self.conversational_id
+            if self.config.user_id:
+                payload["user"] = self.config.user_id
+            self.ten_env.log_info(f"payload before sending: {json.dumps(payload)}")
+            headers = {
+                "Authorization": f"Bearer {self.config.api_key}",
+                "Content-Type": "application/json",
+            }
+            url = f"{self.config.base_url}/chat-messages"
+            start_time = time.time()
+            async with session.post(url, json=payload, headers=headers) as response:
+                if response.status != 200:
+                    r = await response.json()
+                    self.ten_env.log_error(
+                        f"Received unexpected status {r} from the server."
+                    )
+                    if self.config.failure_info:
+                        await self._send_text(self.config.failure_info, True)
+                    return
+                end_time = time.time()
+                self.ten_env.log_info(
+                    f"connect time {end_time - start_time} s, http {self.http.metrics()}"
+                )
+
+                async for line in response.content:
+                    if line:
+                        l = line.decode("utf-8").strip()
+                        if l.startswith("data:"):
+                            content = l[5:].strip()
+                            if content == "[DONE]":
+                                # read on to EOF, a response released early
+                                # closes its connection instead of pooling it
+                                await response.read()
+                                break
+                            self.ten_env.log_debug(f"content: {content}")
+                            yield json.loads(content)
+        except Exception as e:
+            traceback.print_exc()
+            self.ten_env.log_error(f"Failed to handle {e}")
+
+    async def _warm_up(self, url: str) -> None:
+        try:
+            await self.http.warm_up(url)
+            self.ten_env.log_info(f"http warm up done {self.http.metrics()}")
+        except Exception as e:
+            self.ten_env.log_warn(f"http warm up failed {e}")
 
     async def _send_text(self, text: str, end_of_segment: bool) -> None:
         data = Data.create("text_data")
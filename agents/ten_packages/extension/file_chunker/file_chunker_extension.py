@@ -12,11 +12,18 @@ from ten import (
     StatusCode,
     CmdResult,
 )
-from typing import List, Any
+from typing import List
 import json
-from datetime import datetime
-import uuid, math
-import queue, threading
+import uuid
+import asyncio
+import concurrent.futures
+import functools
+import multiprocessing
+import threading
+
+from .file_splitter import close_pdf_readers, plan_windows, split_window
+from .ingest_pipeline import IngestJob, IngestPipeline
+from .vector_codec import VECTOR_FORMAT_F32, VECTOR_FORMAT_JSON, vectors_shape
 
 CMD_FILE_CHUNK = "file_chunk"
 UPSERT_VECTOR_CMD = "upsert_vector"
@@ -25,31 +32,34 @@ FILE_CHUNKED_CMD = "file_chunked"
 CHUNK_SIZE = 200
 CHUNK_OVERLAP = 20
 BATCH_SIZE = 5
+PAGES_PER_WINDOW = 8
+SPLIT_WORKER_START_TIMEOUT = 30  # seconds
 
-
-def batch(nodes, size):
-    batch_texts = []
-    for n in nodes:
-        batch_texts.append(n.text)
-        if len(batch_texts) == size:
-            yield batch_texts[:]
-            batch_texts.clear()
-    if batch_texts:
-        yield batch_texts
+PROPERTY_SPLIT_WORKERS = "split_workers"  # Optional, 0 splits on a thread
+PROPERTY_SPLIT_AHEAD = "split_ahead"  # Optional, windows of a file in flight
+PROPERTY_MAX_CONCURRENT_FILES = "max_concurrent_files"  # Optional
+PROPERTY_EMBED_CONCURRENCY = "embed_concurrency"  # Optional
+PROPERTY_UPSERT_CONCURRENCY = "upsert_concurrency"  # Optional
+PROPERTY_MAX_PENDING_BATCHES = "max_pending_batches"  # Optional
+PROPERTY_VECTOR_FORMAT = "vector_format"  # Optional, "json" or "f32"
 
 
 class FileChunkerExtension(Extension):
     def __init__(self, name: str):
         super().__init__(name)
 
-        self.counters = {}
-        self.expected = {}
-        self.new_collection_name = ""
-        self.file_chunked_event = threading.Event()
-
-        self.thread = None
-        self.queue = queue.Queue()
-        self.stop = False
+        self.config = {
+            PROPERTY_SPLIT_WORKERS: 2,
+            PROPERTY_SPLIT_AHEAD: 2,
+            PROPERTY_MAX_CONCURRENT_FILES: 2,
+            PROPERTY_EMBED_CONCURRENCY: 4,
+            PROPERTY_UPSERT_CONCURRENCY: 2,
+            PROPERTY_MAX_PENDING_BATCHES: 16,
+        }
+        self.vector_format = VECTOR_FORMAT_JSON
+        self.loop = None
+        self.pipeline = None
+        self.split_executor = None
 
     def generate_collection_name(self) -> str:
         """
@@ -58,90 +68,113 @@ class FileChunkerExtension(Extension):
 
         return "coll_" + uuid.uuid1().hex.lower()
 
-    def split(self, ten: TenEnv, path: str) -> List[Any]:
-        # lazy import packages which requires long time to load
-        from llama_index.core import SimpleDirectoryReader
-        from llama_index.core.node_parser import SentenceSplitter
-
-        # load pdf file by path
-        documents = SimpleDirectoryReader(
-            input_files=[path], filename_as_id=True
-        ).load_data()
-
-        # split pdf file into chunks
-        splitter = SentenceSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP,
-        )
-        nodes = splitter.get_nodes_from_documents(documents)
-        ten.log_info(f"file {path} pages count {documents}, chunking count {nodes}")
-        return nodes
-
-    def create_collection(self, ten: TenEnv, collection_name: str, wait: bool):
+    def create_split_executor(self, ten: TenEnv) -> concurrent.futures.Executor:
+        workers = self.config[PROPERTY_SPLIT_WORKERS]
+        if workers > 0:
+            # Not fork: this process runs the ten runtime threads, a forked
+            # child would inherit their locks in whatever state they are.
+            method = (
+                "forkserver"
+                if "forkserver" in multiprocessing.get_all_start_methods()
+                else "spawn"
+            )
+            executor = None
+            try:
+                executor = concurrent.futures.ProcessPoolExecutor(
+                    workers, mp_context=multiprocessing.get_context(method)
+                )
+                # A worker imports file_splitter, and with it this package,
+                # as split_window does. Wait for the first one to tell.
+                executor.submit(close_pdf_readers).result(SPLIT_WORKER_START_TIMEOUT)
+                return executor
+            except Exception as e:
+                if executor is not None:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                ten.log_warn(f"split process pool unavailable, use a thread: {e}")
+        return concurrent.futures.ThreadPoolExecutor(1)
+
+    def send_cmd(self, ten: TenEnv, cmd: Cmd) -> asyncio.Future:
+        future = self.loop.create_future()
+
+        def callback(_, result: CmdResult, error):
+            def resolve():
+                if future.done():
+                    return
+                if error is not None:
+                    future.set_exception(RuntimeError(str(error)))
+                else:
+                    future.set_result(result)
+
+            self.loop.call_soon_threadsafe(resolve)
+
+        ten.send_cmd(cmd, callback)
+        return future
+
+    async def create_collection(self, ten: TenEnv, collection_name: str):
         cmd_out = Cmd.create("create_collection")
         cmd_out.set_property_string("collection_name", collection_name)
+        await self.send_cmd(ten, cmd_out)
+        ten.log_info(f"collection {collection_name} created")
 
-        wait_event = threading.Event()
-        ten.send_cmd(
-            cmd_out,
-            lambda ten, result, _: wait_event.set(),
-        )
-        if wait:
-            wait_event.wait()
-
-    def embedding(self, ten: TenEnv, path: str, texts: List[str]):
-        ten.log_info(
-            f"generate embeddings for the file: {path}, with batch size: {len(texts)}"
-        )
-
+    async def embedding(self, ten: TenEnv, texts: List[str]):
         cmd_out = Cmd.create("embed_batch")
         cmd_out.set_property_from_json("inputs", json.dumps(texts))
-        ten.send_cmd(
-            cmd_out, lambda ten, result, _: self.vector_store(ten, path, texts, result)
-        )
+        cmd_out.set_property_string(PROPERTY_VECTOR_FORMAT, self.vector_format)
+        result = await self.send_cmd(ten, cmd_out)
 
-    def vector_store(self, ten: TenEnv, path: str, texts: List[str], result: CmdResult):
-        ten.log_info(f"vector store start for one splitting of the file {path}")
-        file_name = path.split("/")[-1]
-        embed_output_json = result.get_property_string("embeddings")
-        embed_output = json.loads(embed_output_json)
+        if self.vector_format == VECTOR_FORMAT_F32:
+            try:
+                buf = result.get_property_buf("embeddings_buf")
+            except Exception:
+                buf = None  # an embedding extension without buf support
+            if buf is not None:
+                # passed on to upsert_vector as is
+                count, _ = vectors_shape(buf)
+                if count != len(texts):
+                    raise RuntimeError(f"embedded {count} of {len(texts)} chunks")
+                return buf
+
+        embed_output = json.loads(result.get_property_string("embeddings"))
+        return [record["embedding"] for record in embed_output]
+
+    async def vector_store(
+        self,
+        ten: TenEnv,
+        job: IngestJob,
+        texts: List[str],
+        embeddings: List[List[float]],
+    ):
         cmd_out = Cmd.create(UPSERT_VECTOR_CMD)
-        cmd_out.set_property_string("collection_name", self.new_collection_name)
-        cmd_out.set_property_string("file_name", file_name)
-        embeddings = [record["embedding"] for record in embed_output]
-        content = []
-        for text, embedding in zip(texts, embeddings):
-            content.append({"text": text, "embedding": embedding})
+        cmd_out.set_property_string("collection_name", job.collection)
+        cmd_out.set_property_string("file_name", job.file_name)
+        if isinstance(embeddings, (bytes, bytearray)):
+            content = [{"text": text} for text in texts]
+            cmd_out.set_property_buf("embeddings_buf", embeddings)
+        else:
+            content = []
+            for text, embedding in zip(texts, embeddings):
+                content.append({"text": text, "embedding": embedding})
         cmd_out.set_property_string("content", json.dumps(content))
-        # ten.log_info(json.dumps(content))
-        ten.send_cmd(cmd_out, lambda ten, result, _: self.file_chunked(ten, path))
-
-    def file_chunked(self, ten: TenEnv, path: str):
-        if path in self.counters and path in self.expected:
-            self.counters[path] += 1
-            ten.log_info(
-                "complete vector store for one splitting of the file: %s, current counter: %i, expected: %i",
-                path,
-                self.counters[path],
-                self.expected[path],
+        await self.send_cmd(ten, cmd_out)
+
+    def file_chunked(self, ten: TenEnv, job: IngestJob):
+        if job.errors:
+            ten.log_error(
+                f"file {job.path}: {len(job.errors)} errors, first: {job.errors[0]}"
             )
-            if self.counters[path] == self.expected[path]:
-                chunks_count = self.counters[path]
-                del self.counters[path]
-                del self.expected[path]
-                ten.log_info(
-                    f"complete chunk for the file: {path}, chunks_count {chunks_count}"
-                )
-                cmd_out = Cmd.create(FILE_CHUNKED_CMD)
-                cmd_out.set_property_string("path", path)
-                cmd_out.set_property_string("collection", self.new_collection_name)
-                ten.send_cmd(
-                    cmd_out,
-                    lambda ten, result, _: ten.log_info("send_cmd done"),
-                )
-                self.file_chunked_event.set()
-        else:
-            ten.log_error("missing counter for the file path: %s", path)
+        ten.log_info(
+            f"finished processing {job.path}, collection {job.collection}, "
+            f"pages {job.pages}, chunks {job.chunks}, cost {job.elapsed_ms}ms, "
+            f"first upsert {job.first_upsert_ms}ms, "
+            f"stages {self.pipeline.metrics()}"
+        )
+        cmd_out = Cmd.create(FILE_CHUNKED_CMD)
+        cmd_out.set_property_string("path", job.path)
+        cmd_out.set_property_string("collection", job.collection)
+        ten.send_cmd(
+            cmd_out,
+            lambda ten, result, _: ten.log_info("send_cmd done"),
+        )
 
     def on_cmd(self, ten: TenEnv, cmd: Cmd) -> None:
         cmd_name = cmd.get_name()
@@ -154,7 +187,11 @@ class FileChunkerExtension(Extension):
             except Exception:
                 ten.log_warn(f"missing collection property in cmd {cmd_name}")
 
-            self.queue.put((path, collection))  # make sure files are processed in order
+            if not collection:
+                collection = self.generate_collection_name()
+                ten.log_info(f"collection {collection} generated")
+            ten.log_info(f"start processing {path}, collection {collection}")
+            self.loop.call_soon_threadsafe(self.pipeline.submit, path, collection)
         else:
             ten.log_info(f"unknown cmd {cmd_name}")
 
@@ -162,62 +199,62 @@ class FileChunkerExtension(Extension):
         cmd_result.set_property_string("detail", "ok")
         ten.return_result(cmd_result, cmd)
 
-    def async_handler(self, ten: TenEnv) -> None:
-        while not self.stop:
-            value = self.queue.get()
-            if value is None:
-                break
-            path, collection = value
-
-            # start processing the file
-            start_time = datetime.now()
-            if collection is None:
-                collection = self.generate_collection_name()
-                ten.log_info(f"collection {collection} generated")
-            ten.log_info(f"start processing {path}, collection {collection}")
-
-            # create collection
-            self.create_collection(ten, collection, True)
-            ten.log_info(f"collection {collection} created")
-
-            # split
-            nodes = self.split(ten, path)
-
-            # reset counters and events
-            self.new_collection_name = collection
-            self.expected[path] = math.ceil(len(nodes) / BATCH_SIZE)
-            self.counters[path] = 0
-            self.file_chunked_event.clear()
-
-            # trigger embedding and vector storing in parallel
-            for texts in list(batch(nodes, BATCH_SIZE)):
-                self.embedding(ten, path, texts)
-
-            # wait for all chunks to be processed
-            self.file_chunked_event.wait()
-
-            ten.log_info(
-                f"finished processing {path}, collection {collection}, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms"
-            )
-
     def on_start(self, ten: TenEnv) -> None:
         ten.log_info("on_start")
 
-        self.stop = False
-        self.thread = threading.Thread(target=self.async_handler, args=[ten])
-        self.thread.start()
+        for name in self.config:
+            try:
+                self.config[name] = ten.get_property_int(name)
+            except Exception as err:
+                ten.log_warn(f"get {name} property failed, err: {err}")
+        try:
+            self.vector_format = ten.get_property_string(PROPERTY_VECTOR_FORMAT)
+        except Exception as err:
+            ten.log_warn(f"get {PROPERTY_VECTOR_FORMAT} property failed, err: {err}")
+
+        self.split_executor = self.create_split_executor(ten)
+        self.pipeline = IngestPipeline(
+            functools.partial(plan_windows, pages_per_window=PAGES_PER_WINDOW),
+            functools.partial(
+                split_window, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+            ),
+            lambda name: self.create_collection(ten, name),
+            lambda texts: self.embedding(ten, texts),
+            lambda job, texts, embeddings: self.vector_store(
+                ten, job, texts, embeddings
+            ),
+            lambda job: self.file_chunked(ten, job),
+            self.split_executor,
+            batch_size=BATCH_SIZE,
+            split_ahead=self.config[PROPERTY_SPLIT_AHEAD],
+            max_files=self.config[PROPERTY_MAX_CONCURRENT_FILES],
+            embed_concurrency=self.config[PROPERTY_EMBED_CONCURRENCY],
+            upsert_concurrency=self.config[PROPERTY_UPSERT_CONCURRENCY],
+            max_pending_batches=self.config[PROPERTY_MAX_PENDING_BATCHES],
+        )
+        self.loop = asyncio.new_event_loop()
+
+        def start_loop():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_forever()
+
+        threading.Thread(target=start_loop, args=[]).start()
+        self.loop.call_soon_threadsafe(self.pipeline.start)
 
         ten.on_start_done()
 
     def on_stop(self, ten: TenEnv) -> None:
         ten.log_info("on_stop")
 
-        self.stop = True
-        if self.thread is not None:
-            while not self.queue.empty():
-                self.queue.get()
-            self.queue.put(None)
-            self.thread.join()
-            self.thread = None
+        if self.loop:
+            ten.log_info(f"ingest metrics: {self.pipeline.metrics()}")
+            future = asyncio.run_coroutine_threadsafe(self.pipeline.close(), self.loop)
+            future.add_done_callback(
+                lambda _: self.loop.call_soon_threadsafe(self.loop.stop)
+            )
+            future.result()
+            self.split_executor.shutdown(wait=True, cancel_futures=True)
+            # A split thread in this process keeps its last PDF open.
+            close_pdf_readers()
 
         ten.on_stop_done()
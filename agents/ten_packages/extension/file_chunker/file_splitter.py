@@ -0,0 +1,197 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import threading
+import time
+from typing import Any, Iterator, List, NamedTuple, Tuple
+
+# Text files are read in sections of about this size, cut after a newline.
+TEXT_PAGE_BYTES = 16 * 1024
+TEXT_SUFFIXES = (".txt", ".text")
+
+# As SimpleDirectoryReader does, only file_path goes into the chunk text
+# the splitter measures.
+EXCLUDED_METADATA_KEYS = [
+    "file_name",
+    "file_type",
+    "file_size",
+    "creation_date",
+    "last_modified_date",
+    "last_accessed_date",
+]
+
+Window = Tuple[int, int]
+
+# The PDF last read by this worker, see _pdf_reader.
+_local = threading.local()
+# The open PDF files of all workers in this process, see close_pdf_readers.
+_open_pdfs = set()
+_open_pdfs_lock = threading.Lock()
+
+
+class SplitResult(NamedTuple):
+    texts: List[str]
+    pages: int
+    load_seconds: float
+    split_seconds: float
+
+
+def _kind(path: str) -> str:
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".pdf":
+        return "pdf"
+    if suffix in TEXT_SUFFIXES:
+        return "text"
+    return "file"
+
+
+def _text_boundary(f, offset: int) -> int:
+    # The first position after a newline at or after offset, so that the
+    # windows of one file tile it without overlap whatever their size.
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    return offset - 1 + len(f.readline())
+
+
+def _pdf_reader(path: str):
+    # Opening a PDF reads its whole page tree, so the reader is kept for the
+    # next window of the same file. The pages are read from the open file.
+    import pypdf
+
+    key = (path, os.stat(path).st_mtime_ns)
+    pdf = getattr(_local, "pdf", None)
+    if pdf is None or pdf[0] != key or pdf[1].closed:
+        if pdf is not None:
+            _local.pdf = None
+            _close_pdf(pdf[1])
+        f = open(path, "rb")
+        with _open_pdfs_lock:
+            _open_pdfs.add(f)
+        try:
+            pdf = _local.pdf = (key, f, pypdf.PdfReader(f))
+        except BaseException:
+            _close_pdf(f)
+            raise
+    return pdf[2]
+
+
+def _close_pdf(f) -> None:
+    with _open_pdfs_lock:
+        _open_pdfs.discard(f)
+    f.close()
+
+
+def close_pdf_readers() -> None:
+    """Close the PDF files kept open by the workers of this process.
+
+    Call it once no window is being split, when the pipeline is done.
+    """
+    with _open_pdfs_lock:
+        files = list(_open_pdfs)
+        _open_pdfs.clear()
+    for f in files:
+        f.close()
+
+
+def plan_windows(path: str, pages_per_window: int) -> List[Window]:
+    """Cut a file into windows of pages that can be split independently.
+
+    Pages are PDF pages, TEXT_PAGE_BYTES sections of text files, and a whole
+    file for any other type, which is loaded by SimpleDirectoryReader.
+    """
+    kind = _kind(path)
+    if kind == "pdf":
+        count = len(_pdf_reader(path).pages)
+    elif kind == "text":
+        count = os.path.getsize(path)
+        pages_per_window *= TEXT_PAGE_BYTES
+    else:
+        return [(0, 1)]
+    return [
+        (start, min(start + pages_per_window, count))
+        for start in range(0, count, pages_per_window)
+    ]
+
+
+def iter_pages(path: str, start: int, stop: int) -> Iterator[Any]:
+    """Yield the documents of a window one page at a time."""
+    from llama_index.core import Document, SimpleDirectoryReader
+    from llama_index.core.readers.file.base import default_file_metadata_func
+
+    kind = _kind(path)
+    if kind == "file":
+        yield from SimpleDirectoryReader(
+            input_files=[path], filename_as_id=True
+        ).load_data()
+        return
+
+    # The same metadata as SimpleDirectoryReader, it counts against the
+    # chunk size.
+    metadata = default_file_metadata_func(path)
+
+    def document(text: str, **extra) -> Document:
+        return Document(
+            text=text,
+            metadata={**extra, **metadata},
+            excluded_embed_metadata_keys=list(EXCLUDED_METADATA_KEYS),
+            excluded_llm_metadata_keys=list(EXCLUDED_METADATA_KEYS),
+        )
+
+    if kind == "pdf":
+        pdf = _pdf_reader(path)
+        labels = pdf.page_labels
+        try:
+            for page in range(start, stop):
+                yield document(
+                    pdf.pages[page].extract_text(),
+                    page_label=labels[page],
+                    file_name=os.path.basename(path),
+                )
+        finally:
+            # Parsed objects are cached by the reader, drop those of the
+            # pages just read.
+            pdf.resolved_objects.clear()
+        return
+
+    with open(path, "rb") as f:
+        end = _text_boundary(f, stop)
+        offset = _text_boundary(f, start)
+        while offset < end:
+            section_end = min(_text_boundary(f, offset + TEXT_PAGE_BYTES), end)
+            f.seek(offset)
+            text = f.read(section_end - offset).decode("utf-8", errors="ignore")
+            yield document(text)
+            offset = section_end
+
+
+def split_window(
+    path: str, window: Window, chunk_size: int, chunk_overlap: int
+) -> SplitResult:
+    """Load a window of a file page by page and split it into chunk texts.
+
+    Runs in a worker process, so only plain strings are sent back.
+    """
+    # lazy import packages which requires long time to load
+    from llama_index.core.node_parser import SentenceSplitter
+
+    splitter = SentenceSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+    texts, pages, load_seconds, split_seconds = [], 0, 0.0, 0.0
+    pages_iter = iter_pages(path, *window)
+    while True:
+        start = time.perf_counter()
+        document = next(pages_iter, None)
+        loaded = time.perf_counter()
+        load_seconds += loaded - start
+        if document is None:
+            break
+        pages += 1
+        texts += [n.text for n in splitter.get_nodes_from_documents([document])]
+        split_seconds += time.perf_counter() - loaded
+    return SplitResult(texts, pages, load_seconds, split_seconds)
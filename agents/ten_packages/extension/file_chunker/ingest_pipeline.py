@@ -0,0 +1,263 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import collections
+import concurrent.futures
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List
+
+from .file_splitter import SplitResult, Window
+
+Planner = Callable[[str], List[Window]]
+Splitter = Callable[[str, Window], SplitResult]
+Embedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    busy: float = 0.0
+    first: float = 0.0
+    last: float = 0.0
+
+    def add(self, items: int, started: float, seconds: float) -> None:
+        if not self.first:
+            self.first = started
+        self.items += items
+        self.busy += seconds
+        self.last = max(self.last, started + seconds)
+
+    def to_dict(self) -> dict:
+        wall = self.last - self.first
+        return {
+            "items": self.items,
+            "busy_ms": int(self.busy * 1000),
+            "per_second": round(self.items / wall, 1) if wall > 0 else None,
+        }
+
+
+@dataclass(eq=False)
+class IngestJob:
+    """State of one file, nothing is shared between files."""
+
+    path: str
+    collection: str
+    started: float = field(default_factory=time.perf_counter)
+    collection_ready: asyncio.Future | None = None
+    pages: int = 0
+    chunks: int = 0
+    batches: int = 0
+    batches_done: int = 0
+    split_done: bool = False
+    first_upsert_ms: int | None = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def file_name(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def finished(self) -> bool:
+        return self.split_done and self.batches_done == self.batches
+
+    @property
+    def elapsed_ms(self) -> int:
+        return int((time.perf_counter() - self.started) * 1000)
+
+
+class IngestPipeline:
+    """load/split -> embed -> upsert, with bounded concurrency per stage.
+
+    Up to max_files files are split at the same time on split_executor (a
+    process pool, so parsing does not hold the loop's GIL). planner cuts a
+    file into windows of pages and splitter loads and splits one window, so
+    a file is never loaded as a whole: at most split_ahead windows of a file
+    are read ahead, and the chunks of the first window are embedded while
+    later pages are still being read. Chunk batches go through a queue of
+    max_pending_batches to embed_concurrency embed workers, and from there
+    through another bounded queue to upsert_concurrency upsert workers. A
+    full queue stops the stage before it, so memory stays bounded however
+    large the file is.
+
+    The collection of a file is created while it is being split; its batches
+    are upserted once that is done. on_done is called for every file, also
+    when some of its batches failed (see IngestJob.errors).
+    """
+
+    def __init__(
+        self,
+        planner: Planner,
+        splitter: Splitter,
+        create_collection: Callable[[str], Awaitable[None]],
+        embed: Embedder,
+        upsert: Callable[[IngestJob, List[str], List[List[float]]], Awaitable[None]],
+        on_done: Callable[[IngestJob], None],
+        split_executor: concurrent.futures.Executor,
+        batch_size: int = 5,
+        split_ahead: int = 2,
+        max_files: int = 2,
+        embed_concurrency: int = 4,
+        upsert_concurrency: int = 2,
+        max_pending_batches: int = 16,
+    ) -> None:
+        self._planner = planner
+        self._splitter = splitter
+        self._split_ahead = max(split_ahead, 1)
+        self._create_collection = create_collection
+        self._embed = embed
+        self._upsert = upsert
+        self._on_done = on_done
+        self._split_executor = split_executor
+        self._batch_size = batch_size
+        self._concurrency = (max_files, embed_concurrency, upsert_concurrency)
+
+        self._files: asyncio.Queue = asyncio.Queue()
+        self._to_embed: asyncio.Queue = asyncio.Queue(max_pending_batches)
+        self._to_upsert: asyncio.Queue = asyncio.Queue(max_pending_batches)
+        self._workers: List[asyncio.Task] = []
+        self._active: set[IngestJob] = set()
+
+        self.stats = {
+            name: StageStats() for name in ("load", "split", "embed", "upsert")
+        }
+
+    def start(self) -> None:
+        max_files, embed_concurrency, upsert_concurrency = self._concurrency
+        for worker, count in (
+            (self._split_worker, max_files),
+            (self._embed_worker, embed_concurrency),
+            (self._upsert_worker, upsert_concurrency),
+        ):
+            self._workers += [asyncio.create_task(worker()) for _ in range(count)]
+
+    def submit(self, path: str, collection: str) -> IngestJob:
+        job = IngestJob(path, collection)
+        self._files.put_nowait(job)
+        return job
+
+    async def close(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def metrics(self) -> dict:
+        return {
+            "files_queued": self._files.qsize(),
+            "files_active": len(self._active),
+            "batches_to_embed": self._to_embed.qsize(),
+            "batches_to_upsert": self._to_upsert.qsize(),
+            **{name: stats.to_dict() for name, stats in self.stats.items()},
+        }
+
+    async def _split_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job: IngestJob = await self._files.get()
+            self._active.add(job)
+            job.started = time.perf_counter()
+            job.collection_ready = asyncio.ensure_future(
+                self._create_collection(job.collection)
+            )
+            pending = collections.deque()
+            try:
+                windows = await loop.run_in_executor(
+                    self._split_executor, self._planner, job.path
+                )
+                for window in windows:
+                    pending.append(
+                        (
+                            time.perf_counter(),
+                            loop.run_in_executor(
+                                self._split_executor,
+                                self._splitter,
+                                job.path,
+                                window,
+                            ),
+                        )
+                    )
+                    if len(pending) >= self._split_ahead:
+                        await self._emit(job, *pending.popleft())
+                while pending:
+                    await self._emit(job, *pending.popleft())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.errors.append(f"split: {e}")
+            for _, future in pending:
+                future.cancel()
+            if not job.batches:
+                # Nothing to upsert, still report the file after its
+                # collection exists.
+                try:
+                    await job.collection_ready
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    job.errors.append(f"create_collection: {e}")
+            job.split_done = True
+            self._maybe_done(job)
+
+    async def _emit(
+        self, job: IngestJob, started: float, future: asyncio.Future
+    ) -> None:
+        result: SplitResult = await future
+        self.stats["load"].add(result.pages, started, result.load_seconds)
+        self.stats["split"].add(
+            len(result.texts),
+            started + result.load_seconds,
+            result.split_seconds,
+        )
+        job.pages += result.pages
+        job.chunks += len(result.texts)
+        texts = result.texts
+        for i in range(0, len(texts), self._batch_size):
+            job.batches += 1
+            await self._to_embed.put((job, texts[i : i + self._batch_size]))
+
+    async def _embed_worker(self) -> None:
+        while True:
+            job, texts = await self._to_embed.get()
+            started = time.perf_counter()
+            try:
+                embeddings = await self._embed(texts)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.errors.append(f"embed: {e}")
+                self._batch_done(job)
+                continue
+            self.stats["embed"].add(len(texts), started, time.perf_counter() - started)
+            await self._to_upsert.put((job, texts, embeddings))
+
+    async def _upsert_worker(self) -> None:
+        while True:
+            job, texts, embeddings = await self._to_upsert.get()
+            started = time.perf_counter()
+            try:
+                await job.collection_ready
+                await self._upsert(job, texts, embeddings)
+                if job.first_upsert_ms is None:
+                    job.first_upsert_ms = job.elapsed_ms
+                self.stats["upsert"].add(
+                    len(texts), started, time.perf_counter() - started
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.errors.append(f"upsert: {e}")
+            self._batch_done(job)
+
+    def _batch_done(self, job: IngestJob) -> None:
+        job.batches_done += 1
+        self._maybe_done(job)
+
+    def _maybe_done(self, job: IngestJob) -> None:
+        if job.finished and job in self._active:
+            self._active.discard(job)
+            self._on_done(job)
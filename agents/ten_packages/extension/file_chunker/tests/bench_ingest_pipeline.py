@@ -0,0 +1,191 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Ingest one large document plus a folder of small files, legacy vs pipeline.
+
+Usage:
+    python tests/bench_ingest_pipeline.py [large.pdf] [small_files_dir]
+
+Without arguments a 300 page text document and 40 small text files are
+generated. The embedding and vector storage extensions are simulated: embed
+takes 80 ms per batch with 4 batches in flight and returns 1024 dimension
+vectors, upsert takes 20 ms with 2 in flight. The legacy flow handles one
+file at a time, splits on the handler thread and fires all batches of the
+file at once; the pipeline runs with the extension's default properties.
+Peak memory is the tracemalloc peak of this process, from a second run.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from file_chunker.file_chunker_extension import (  # noqa: E402
+    BATCH_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    PAGES_PER_WINDOW,
+)
+from file_chunker.file_splitter import plan_windows, split_window  # noqa: E402
+from file_chunker.ingest_pipeline import IngestPipeline  # noqa: E402
+
+DIMENSION = 1024
+
+
+class Services:
+    def __init__(self) -> None:
+        self.embed_slots = asyncio.Semaphore(4)
+        self.upsert_slots = asyncio.Semaphore(2)
+        self.upserted = 0
+
+    async def create_collection(self, _name: str) -> None:
+        await asyncio.sleep(0.05)
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        async with self.embed_slots:
+            await asyncio.sleep(0.08)
+            vector = [random.random() for _ in range(DIMENSION)]
+            return json.loads(json.dumps([{"embedding": vector}] * len(texts)))
+
+    async def upsert(self, texts: list[str], embeddings: list) -> None:
+        content = json.dumps(
+            [{"text": t, "embedding": e} for t, e in zip(texts, embeddings)]
+        )
+        async with self.upsert_slots:
+            await asyncio.sleep(0.02)
+        self.upserted += len(content) > 0
+
+
+def generate(root: str) -> list[str]:
+    rng = random.Random(3)
+    words = (
+        "the quarterly report shows revenue growth across all regions while "
+        "operating costs remained flat and the board approved new hiring"
+    ).split()
+
+    def paragraph() -> str:
+        return " ".join(rng.choice(words) for _ in range(rng.randint(40, 90))) + "."
+
+    large = os.path.join(root, "large.txt")
+    with open(large, "w") as f:
+        for page in range(300):
+            f.write(f"Page {page + 1}\n\n")
+            f.write("\n\n".join(paragraph() for _ in range(6)) + "\n\f")
+    small = []
+    for i in range(40):
+        path = os.path.join(root, f"note_{i:02d}.txt")
+        with open(path, "w") as f:
+            f.write("\n\n".join(paragraph() for _ in range(rng.randint(1, 4))))
+        small.append(path)
+    return [large] + small
+
+
+def legacy_nodes(path: str) -> list:
+    from llama_index.core import SimpleDirectoryReader
+    from llama_index.core.node_parser import SentenceSplitter
+
+    documents = SimpleDirectoryReader(
+        input_files=[path], filename_as_id=True
+    ).load_data()
+    splitter = SentenceSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return splitter.get_nodes_from_documents(documents)
+
+
+async def run_legacy(files: list[str]) -> dict[str, float]:
+    services, done, start = Services(), {}, time.perf_counter()
+
+    async def embed_then_upsert(texts):
+        await services.upsert(texts, await services.embed(texts))
+
+    for path in files:
+        await services.create_collection(path)
+        nodes = await asyncio.to_thread(legacy_nodes, path)
+        batches = [
+            [n.text for n in nodes[i : i + BATCH_SIZE]]
+            for i in range(0, len(nodes), BATCH_SIZE)
+        ]
+        await asyncio.gather(*(embed_then_upsert(b) for b in batches))
+        done[path] = time.perf_counter() - start
+    return done
+
+
+async def run_pipeline(files: list[str]) -> dict[str, float]:
+    services, done, start = Services(), {}, time.perf_counter()
+    finished = asyncio.Event()
+
+    def on_done(job):
+        done[job.path] = time.perf_counter() - start
+        if len(done) == len(files):
+            finished.set()
+
+    with concurrent.futures.ProcessPoolExecutor(
+        2, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        pipeline = IngestPipeline(
+            functools.partial(plan_windows, pages_per_window=PAGES_PER_WINDOW),
+            functools.partial(
+                split_window, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+            ),
+            services.create_collection,
+            services.embed,
+            lambda job, texts, embeddings: services.upsert(texts, embeddings),
+            on_done,
+            executor,
+            batch_size=BATCH_SIZE,
+            split_ahead=2,
+        )
+        pipeline.start()
+        for path in files:
+            pipeline.submit(path, "coll")
+        await finished.wait()
+        if not tracemalloc.is_tracing():
+            print(f"  pipeline stages {pipeline.metrics()}")
+        await pipeline.close()
+    return done
+
+
+def measure(name: str, runner, files: list[str]) -> None:
+    done = asyncio.run(runner(files))
+    # A second run for memory, tracemalloc slows down the splitting.
+    tracemalloc.start()
+    asyncio.run(runner(files))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    small = [done[p] for p in files[1:]]
+    print(
+        f"{name:<8} total {max(done.values()):6.2f} s  "
+        f"large file {done[files[0]]:6.2f} s  "
+        f"small files p50 {statistics.median(small) if small else 0:6.2f} s  "
+        f"peak {peak / 2**20:6.1f} MB"
+    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as root:
+        if len(sys.argv) > 1:
+            files = [sys.argv[1]]
+            if len(sys.argv) > 2:
+                files += sorted(
+                    os.path.join(sys.argv[2], n) for n in os.listdir(sys.argv[2])
+                )
+        else:
+            files = generate(root)
+        print(f"{len(files)} files, {os.path.getsize(files[0]) // 1024} KB large")
+        measure("legacy", run_legacy, files)
+        measure("pipeline", run_pipeline, files)
+
+
+if __name__ == "__main__":
+    main()
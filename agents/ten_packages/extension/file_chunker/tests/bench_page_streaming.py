@@ -0,0 +1,207 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Peak RSS and time to first upsert vs PDF size, whole file vs page windows.
+
+Usage:
+    python tests/bench_page_streaming.py [file.pdf ...]
+
+Without arguments PDFs of 100, 400 and 1200 pages (about 5 KB of text per
+page) are generated. Each file is ingested in a fresh process by the
+pipeline with a simulated embedding (10 ms per batch, 4 in flight) and
+storage, once with the whole file loaded by SimpleDirectoryReader and split
+in one go as before, once with page windows. Splitting runs on a thread so
+that the RSS of that process covers it.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from file_chunker.file_chunker_extension import (  # noqa: E402
+    BATCH_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_SIZE,
+    PAGES_PER_WINDOW,
+)
+from file_chunker.file_splitter import (  # noqa: E402
+    SplitResult,
+    plan_windows,
+    split_window,
+)
+from file_chunker.ingest_pipeline import IngestPipeline  # noqa: E402
+
+WORDS = (
+    "the pump assembly must be inspected every six months and the seals "
+    "replaced whenever pressure drops below the rated operating threshold"
+).split()
+
+
+def write_pdf(path: str, pages: int) -> None:
+    rng = random.Random(pages)
+    count = 3 + 2 * pages
+    offsets = []
+    with open(path, "wb") as f:
+
+        def add(body: bytes) -> None:
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (len(offsets), body))
+
+        f.write(b"%PDF-1.4\n")
+        add(b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(pages))
+        add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages))
+        add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for i in range(pages):
+            add(
+                b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                % (5 + 2 * i)
+            )
+            lines = [
+                " ".join(rng.choice(WORDS) for _ in range(14)) + "." for _ in range(60)
+            ]
+            stream = (
+                b"BT /F1 9 Tf 11 TL 40 760 Td "
+                + b" ".join(b"(%s) Tj T*" % line.encode() for line in lines)
+                + b" ET"
+            )
+            add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (count + 1))
+        f.write(b"".join(b"%010d 00000 n \n" % o for o in offsets))
+        f.write(
+            b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (count + 1, xref)
+        )
+
+
+def whole_file(path: str, _window, chunk_size: int, chunk_overlap: int):
+    from llama_index.core import SimpleDirectoryReader
+    from llama_index.core.node_parser import SentenceSplitter
+
+    start = time.perf_counter()
+    documents = SimpleDirectoryReader(
+        input_files=[path], filename_as_id=True
+    ).load_data()
+    loaded = time.perf_counter()
+    splitter = SentenceSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    nodes = splitter.get_nodes_from_documents(documents)
+    return SplitResult(
+        [n.text for n in nodes],
+        len(documents),
+        loaded - start,
+        time.perf_counter() - loaded,
+    )
+
+
+async def ingest(mode: str, path: str) -> dict:
+    embed_slots = asyncio.Semaphore(4)
+    finished = asyncio.Event()
+    jobs = []
+
+    async def embed(texts):
+        async with embed_slots:
+            await asyncio.sleep(0.01)
+        return [[0.0] * 1024 for _ in texts]
+
+    async def create_collection(_name):
+        await asyncio.sleep(0.05)
+
+    async def upsert(_job, texts, embeddings):
+        await asyncio.sleep(0.005)
+
+    def on_done(job):
+        jobs.append(job)
+        finished.set()
+
+    if mode == "whole":
+        planner, splitter = (lambda _: [(0, 1)]), whole_file
+    else:
+        planner = functools.partial(plan_windows, pages_per_window=PAGES_PER_WINDOW)
+        splitter = split_window
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        pipeline = IngestPipeline(
+            planner,
+            functools.partial(
+                splitter, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP
+            ),
+            create_collection,
+            embed,
+            upsert,
+            on_done,
+            executor,
+            batch_size=BATCH_SIZE,
+            split_ahead=2,
+            max_files=1,
+        )
+        pipeline.start()
+        pipeline.submit(path, "coll")
+        await finished.wait()
+        await pipeline.close()
+    job = jobs[0]
+    return {
+        "pages": job.pages,
+        "chunks": job.chunks,
+        "first_upsert_ms": job.first_upsert_ms,
+        "total_ms": job.elapsed_ms,
+    }
+
+
+def run_one(mode: str, path: str) -> None:
+    # Import everything first, the baseline RSS is taken after that.
+    from llama_index.core import SimpleDirectoryReader  # noqa: F401
+    from llama_index.core.node_parser import SentenceSplitter  # noqa: F401
+    import pypdf  # noqa: F401
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result = asyncio.run(ingest(mode, path))
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({**result, "rss_mb": (peak - baseline) / 1024}))
+
+
+def main() -> None:
+    if sys.argv[1:2] == ["--run"]:
+        run_one(sys.argv[2], sys.argv[3])
+        return
+
+    with tempfile.TemporaryDirectory() as root:
+        paths = sys.argv[1:]
+        if not paths:
+            for pages in (100, 400, 1200):
+                paths.append(os.path.join(root, f"manual_{pages}.pdf"))
+                write_pdf(paths[-1], pages)
+
+        for path in paths:
+            size = os.path.getsize(path) / 2**20
+            for mode in ("whole", "windows"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--run", mode, path],
+                    check=True,
+                    capture_output=True,
+                    text=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(
+                    f"{os.path.basename(path):<18} {size:6.1f} MB {mode:<8} "
+                    f"pages {r['pages']:5d} chunks {r['chunks']:6d}  "
+                    f"first upsert {r['first_upsert_ms']:6d} ms  "
+                    f"total {r['total_ms']:6d} ms  "
+                    f"peak RSS +{r['rss_mb']:6.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from file_chunker import file_splitter  # noqa: E402
+from file_chunker.file_splitter import (  # noqa: E402
+    TEXT_PAGE_BYTES,
+    close_pdf_readers,
+    iter_pages,
+    plan_windows,
+    split_window,
+)
+
+
+def write_text(path, lines: int) -> str:
+    rng = random.Random(1)
+    words = "alpha beta gamma delta epsilon zeta eta theta ñandú 数据".split()
+    text = "".join(
+        " ".join(rng.choice(words) for _ in range(rng.randint(0, 400))) + "\n"
+        for _ in range(lines)
+    )
+    path.write_text(text, encoding="utf-8")
+    return text
+
+
+def test_text_windows_tile_the_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    text = write_text(path, 600)
+
+    windows = plan_windows(str(path), 2)
+    assert len(windows) == -(-len(text.encode()) // (2 * TEXT_PAGE_BYTES))
+
+    pages = [doc.text for w in windows for doc in iter_pages(str(path), *w)]
+    assert "".join(pages) == text
+    # Sections are cut after a newline and stay near the page size.
+    assert all(p.endswith("\n") for p in pages)
+    assert max(len(p.encode()) for p in pages) < 2 * TEXT_PAGE_BYTES
+
+
+def test_split_window_reports_pages_and_chunks(tmp_path):
+    path = tmp_path / "notes.txt"
+    text = write_text(path, 200)
+
+    results = [split_window(str(path), w, 200, 20) for w in plan_windows(str(path), 1)]
+    assert sum(r.pages for r in results) == len(results)
+    chunks = [t for r in results for t in r.texts]
+    assert chunks and all(t in text for t in chunks)
+
+
+def write_pdf(path, pages: int) -> None:
+    import pypdf
+
+    writer = pypdf.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_pdf_reader_is_kept_per_file_and_closed(tmp_path):
+    first, second = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    write_pdf(first, 5)
+    write_pdf(second, 3)
+
+    assert plan_windows(str(first), 2) == [(0, 2), (2, 4), (4, 5)]
+    f = file_splitter._local.pdf[1]
+    assert len(list(iter_pages(str(first), 2, 4))) == 2
+    assert file_splitter._local.pdf[1] is f and not f.closed
+
+    # The previous file is closed when the next one is read.
+    assert plan_windows(str(second), 2) == [(0, 2), (2, 3)]
+    assert f.closed
+    f = file_splitter._local.pdf[1]
+
+    close_pdf_readers()
+    assert f.closed and not file_splitter._open_pdfs
+    # Read again from a new file object.
+    assert len(list(iter_pages(str(second), 0, 3))) == 3
+    close_pdf_readers()
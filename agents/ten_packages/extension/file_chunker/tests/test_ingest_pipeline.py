@@ -0,0 +1,88 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import concurrent.futures
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from file_chunker.file_splitter import SplitResult  # noqa: E402
+from file_chunker.ingest_pipeline import IngestPipeline  # noqa: E402
+
+
+def planner(path: str) -> list:
+    if path == "broken.pdf":
+        raise ValueError("not a pdf")
+    count = int(path.split(".")[0])
+    return [(start, min(start + 4, count)) for start in range(0, count, 4)]
+
+
+def splitter(path: str, window) -> SplitResult:
+    texts = [f"{path}:{i}" for i in range(*window)]
+    return SplitResult(texts, 1, 0.0, 0.0)
+
+
+async def ingest(paths: list[str], embed_fails_on: str = "") -> tuple[list, dict]:
+    done, upserted, created = [], {}, set()
+
+    async def create_collection(name):
+        await asyncio.sleep(0.01)
+        created.add(name)
+
+    async def embed(texts):
+        if embed_fails_on in texts:
+            raise RuntimeError("embedding failed")
+        await asyncio.sleep(0.001)
+        return [[float(len(t))] for t in texts]
+
+    async def upsert(job, texts, embeddings):
+        assert job.collection in created
+        assert embeddings == [[float(len(t))] for t in texts]
+        upserted.setdefault(job.path, []).extend(texts)
+
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        pipeline = IngestPipeline(
+            planner,
+            splitter,
+            create_collection,
+            embed,
+            upsert,
+            done.append,
+            executor,
+            batch_size=3,
+            split_ahead=2,
+            max_pending_batches=2,
+        )
+        pipeline.start()
+        for path in paths:
+            pipeline.submit(path, f"coll_{path}")
+        while len(done) < len(paths):
+            await asyncio.sleep(0.01)
+        await pipeline.close()
+    return done, upserted
+
+
+def test_every_chunk_is_upserted_per_file():
+    done, upserted = asyncio.run(ingest(["40.pdf", "0.txt", "7.txt"]))
+
+    assert sorted(j.path for j in done) == ["0.txt", "40.pdf", "7.txt"]
+    for job in done:
+        assert job.errors == []
+        assert job.batches == job.batches_done
+        assert job.chunks == int(job.path.split(".")[0])
+        assert sorted(upserted.get(job.path, [])) == sorted(
+            f"{job.path}:{i}" for i in range(job.chunks)
+        )
+
+
+def test_failures_still_complete_the_file():
+    done, upserted = asyncio.run(ingest(["broken.pdf", "9.txt"], "9.txt:4"))
+    jobs = {j.path: j for j in done}
+
+    assert jobs["broken.pdf"].errors == ["split: not a pdf"]
+    assert jobs["9.txt"].errors == ["embed: embedding failed"]
+    assert len(upserted["9.txt"]) == 6
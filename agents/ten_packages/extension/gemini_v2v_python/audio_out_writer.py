@@ -0,0 +1,142 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import binascii
+from typing import BinaryIO
+
+
+class AudioOutWriter:
+    """Reassemble model output audio into PCM frame payloads.
+
+    Decoded audio is copied into one pooled bytearray and handed back as
+    memoryview slices of it, so a delta costs a single decode and a single
+    copy into the outgoing AudioFrame. Partial samples (or, with frame_ms set,
+    partial frames) stay in the pool until more audio arrives instead of being
+    concatenated with the next delta.
+
+    frame_ms = 0 emits every complete sample as soon as it arrives, which is
+    what the extensions used to do. 10/20/40 coalesces output into fixed
+    frames of that duration; call flush() at the end of a response to emit the
+    tail.
+
+    The returned views are only valid until the next call on the writer, so
+    they must be copied (e.g. into AudioFrame.lock_buf()) right away.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 24000,
+        bytes_per_sample: int = 2,
+        number_of_channels: int = 1,
+        frame_ms: int = 0,
+        dump_path: str = "",
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.bytes_per_sample = bytes_per_sample
+        self.number_of_channels = number_of_channels
+        self.sample_bytes = bytes_per_sample * number_of_channels
+        self.frame_bytes = (
+            sample_rate * frame_ms // 1000 * self.sample_bytes if frame_ms else 0
+        )
+
+        # A second of audio covers every delta size the vendors send.
+        capacity = max(sample_rate * self.sample_bytes, self.frame_bytes * 2)
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+
+        self.dump_path = dump_path
+        self._dump_file: BinaryIO | None = None
+
+        # Number of pool buffers allocated so far, for metrics and benchmarks.
+        self.allocations = 1
+
+    @property
+    def pending(self) -> int:
+        """Bytes held back waiting for a complete sample or frame."""
+        return self._end - self._start
+
+    def samples_per_channel(self, frame: memoryview) -> int:
+        return len(frame) // self.sample_bytes
+
+    def write_base64(self, data: str | bytes) -> list[memoryview]:
+        """Decode a base64 delta and return the complete frames."""
+        return self.write(binascii.a2b_base64(data))
+
+    def write(self, data: bytes | bytearray | memoryview) -> list[memoryview]:
+        """Append raw PCM and return the complete frames."""
+        self._compact()
+        n = len(data)
+        if self._end + n > len(self._buf):
+            self._grow(self._end + n)
+        self._view[self._end : self._end + n] = data
+        self._end += n
+
+        if self.dump_path:
+            self._dump(self._view[self._end - n : self._end])
+
+        return self._take(final=False)
+
+    def flush(self) -> list[memoryview]:
+        """Return whatever complete samples are left, e.g. at response end."""
+        self._compact()
+        frames = self._take(final=True)
+        # A dangling half sample can never be played.
+        self._start = self._end
+        return frames
+
+    def reset(self) -> None:
+        """Drop pending audio, e.g. when the response is interrupted."""
+        self._start = 0
+        self._end = 0
+
+    def close(self) -> None:
+        self.reset()
+        if self._dump_file:
+            self._dump_file.close()
+            self._dump_file = None
+
+    def _take(self, final: bool) -> list[memoryview]:
+        available = self._end - self._start
+        if self.frame_bytes and not final:
+            size = self.frame_bytes
+            count = available // size
+        else:
+            size = available - available % self.sample_bytes
+            count = 1 if size else 0
+
+        frames = []
+        for _ in range(count):
+            frames.append(self._view[self._start : self._start + size])
+            self._start += size
+        return frames
+
+    def _compact(self) -> None:
+        # Move the held-back tail to the front. It is smaller than one frame,
+        # so this is cheap, and it keeps the pool from creeping forward.
+        if self._start == 0:
+            return
+        remain = self._end - self._start
+        if remain:
+            self._view[:remain] = self._view[self._start : self._end]
+        self._start = 0
+        self._end = remain
+
+    def _grow(self, size: int) -> None:
+        # Views handed out earlier may still be alive, so never resize the
+        # exported bytearray in place.
+        buf = bytearray(max(size, len(self._buf) * 2))
+        buf[: self._end] = self._view[: self._end]
+        self._buf = buf
+        self._view = memoryview(buf)
+        self.allocations += 1
+
+    def _dump(self, data: memoryview) -> None:
+        if self._dump_file is None or self._dump_file.name != self.dump_path:
+            if self._dump_file:
+                self._dump_file.close()
+            self._dump_file = open(self.dump_path, "ab")
+        self._dump_file.write(data)
@@ -60,6 +60,9 @@ from google.genai.types import (
     PrebuiltVoiceConfig,
 )
 from google.genai.live import AsyncSession
+from .sentence_segmenter import SentenceSegmenter
+from .audio_in_buffer import AudioInBuffer
+from .audio_out_writer import AudioOutWriter
 from PIL import Image
 from io import BytesIO
 from base64 import b64encode
@@ -152,9 +155,14 @@ class GeminiRealtimeConfig(BaseConfig):
     audio_out: bool = True
     input_transcript: bool = True
     sample_rate: int = 24000
+    # Coalesce output audio into frames of this duration, 0 to pass through
+    audio_frame_ms: int = 0
     stream_id: int = 0
     dump: bool = False
     greeting: str = ""
+    # Release the first sentence of a turn at a space once it is this long,
+    # 0 waits for punctuation
+    first_chunk_min_len: int = 0
 
     def build_ctx(self) -> dict:
         return {
@@ -183,13 +191,13 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
         self.connect_times = []
         self.first_token_times = []
 
-        self.buff: bytearray = b""
-        self.transcript: str = ""
+        self.audio_in: AudioInBuffer = AudioInBuffer(self.audio_len_threshold)
+        self.segmenter: SentenceSegmenter = SentenceSegmenter()
         self.ctx: dict = {}
         self.input_end = time.time()
         self.client = None
         self.session: AsyncSession = None
-        self.leftover_bytes = b""
+        self.audio_writer: AudioOutWriter = AudioOutWriter()
         self.video_task = None
         self.image_queue = asyncio.Queue()
         self.video_buff: str = ""
@@ -209,6 +217,10 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
 
         self.config = await GeminiRealtimeConfig.create_async(ten_env=ten_env)
         ten_env.log_info(f"config: {self.config}")
+        self.segmenter = SentenceSegmenter(
+            self.config.language, self.config.first_chunk_min_len
+        )
+        self.audio_writer = AudioOutWriter(frame_ms=self.config.audio_frame_ms)
 
         if not self.config.api_key:
             ten_env.log_error("api_key is required")
@@ -258,6 +270,7 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
                                     if response.server_content:
                                         if response.server_content.interrupted:
                                             ten_env.log_info("Interrupted")
+                                            self.segmenter.reset()
                                             await self._flush()
                                             continue
                                         elif (
@@ -278,6 +291,16 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
                                                 )
                                         elif response.server_content.turn_complete:
                                             ten_env.log_info("Turn complete")
+                                            # Don't carry a held back sentence
+                                            # over into the next turn.
+                                            if self.segmenter.remain:
+                                                self._send_transcript(
+                                                    "", Role.Assistant, True
+                                                )
+                                            for frame in self.audio_writer.flush():
+                                                await self._send_audio_frame(
+                                                    ten_env, frame
+                                                )
                                     elif response.setup_complete:
                                         ten_env.log_info("Setup complete")
                                     elif response.tool_call:
@@ -305,43 +328,45 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
         bytes_per_sample = args.get("bytes_per_sample", 2)
         number_of_channels = args.get("number_of_channels", 1)
         try:
-            # Combine leftover bytes with new audio data
-            combined_data = self.leftover_bytes + audio_data
-
-            # Check if combined_data length is odd
-            if len(combined_data) % (bytes_per_sample * number_of_channels) != 0:
-                # Save the last incomplete frame
-                valid_length = len(combined_data) - (
-                    len(combined_data) % (bytes_per_sample * number_of_channels)
-                )
-                self.leftover_bytes = combined_data[valid_length:]
-                combined_data = combined_data[:valid_length]
-            else:
-                self.leftover_bytes = b""
-
-            if combined_data:
-                f = AudioFrame.create("pcm_frame")
-                f.set_sample_rate(sample_rate)
-                f.set_bytes_per_sample(bytes_per_sample)
-                f.set_number_of_channels(number_of_channels)
-                f.set_data_fmt(AudioFrameDataFmt.INTERLEAVE)
-                f.set_samples_per_channel(
-                    len(combined_data) // (bytes_per_sample * number_of_channels)
+            writer = self.audio_writer
+            if (
+                writer.sample_rate != sample_rate
+                or writer.bytes_per_sample != bytes_per_sample
+                or writer.number_of_channels != number_of_channels
+            ):
+                writer = self.audio_writer = AudioOutWriter(
+                    sample_rate,
+                    bytes_per_sample,
+                    number_of_channels,
+                    frame_ms=self.config.audio_frame_ms,
                 )
-                f.alloc_buf(len(combined_data))
-                buff = f.lock_buf()
-                buff[:] = combined_data
-                f.unlock_buf(buff)
-                await ten_env.send_audio_frame(f)
+
+            # Odd trailing bytes are held back by the writer until the next part
+            for frame in writer.write(audio_data):
+                await self._send_audio_frame(ten_env, frame)
         except Exception:
             pass
             # ten_env.log_error(f"error send audio frame, {traceback.format_exc()}")
 
+    async def _send_audio_frame(self, ten_env: AsyncTenEnv, frame: memoryview) -> None:
+        f = AudioFrame.create("pcm_frame")
+        f.set_sample_rate(self.audio_writer.sample_rate)
+        f.set_bytes_per_sample(self.audio_writer.bytes_per_sample)
+        f.set_number_of_channels(self.audio_writer.number_of_channels)
+        f.set_data_fmt(AudioFrameDataFmt.INTERLEAVE)
+        f.set_samples_per_channel(self.audio_writer.samples_per_channel(frame))
+        f.alloc_buf(len(frame))
+        buff = f.lock_buf()
+        buff[:] = frame
+        f.unlock_buf(buff)
+        await ten_env.send_audio_frame(f)
+
     async def on_stop(self, ten_env: AsyncTenEnv) -> None:
         await super().on_stop(ten_env)
         ten_env.log_info("on_stop")
 
         self.stopped = True
+        self.audio_writer.close()
         if self.session:
             await self.session.close()
 
@@ -434,23 +459,24 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
 
     # Direction: IN
     async def _on_audio(self, buff: bytearray):
-        self.buff += buff
         # Buffer audio
-        if self.connected and len(self.buff) >= self.audio_len_threshold:
-            # await self.conn.send_audio_data(self.buff)
+        self.audio_in.write(buff)
+        if not self.connected:
+            return
+        while (chunk := self.audio_in.pop()) is not None:
             try:
                 media_chunks = [
                     {
-                        "data": base64.b64encode(self.buff).decode(),
+                        "data": base64.b64encode(chunk).decode(),
                         "mime_type": "audio/pcm",
                     }
                 ]
                 # await self.session.send(LiveClientRealtimeInput(media_chunks=media_chunks))
                 await self.session.send(media_chunks)
-                self.buff = b""
             except Exception as e:
                 # pass
                 self.ten_env.log_error(f"Failed to send audio {e}")
+                break
 
     def _get_session_config(self) -> LiveConnectConfigDict:
         def tool_dict(tool: LLMToolMetadata):
@@ -521,26 +547,6 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
         return result
 
     def _send_transcript(self, content: str, role: Role, is_final: bool) -> None:
-        def is_punctuation(char):
-            if char in [",", "，", ".", "。", "?", "？", "!", "！"]:
-                return True
-            return False
-
-        def parse_sentences(sentence_fragment, content):
-            sentences = []
-            current_sentence = sentence_fragment
-            for char in content:
-                current_sentence += char
-                if is_punctuation(char):
-                    # Check if the current sentence contains non-punctuation characters
-                    stripped_sentence = current_sentence
-                    if any(c.isalnum() for c in stripped_sentence):
-                        sentences.append(stripped_sentence)
-                    current_sentence = ""  # Reset for the next sentence
-
-            remain = current_sentence  # Any remaining characters form the incomplete sentence
-            return sentences, remain
-
         def send_data(
             ten_env: AsyncTenEnv,
             sentence: str,
@@ -566,12 +572,19 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
         stream_id = self.remote_stream_id if role == Role.User else 0
         try:
             if role == Role.Assistant and not is_final:
-                sentences, self.transcript = parse_sentences(self.transcript, content)
-                for s in sentences:
+                for s in self.segmenter.push(content):
                     asyncio.create_task(
                         send_data(self.ten_env, s, stream_id, role, is_final)
                     )
             else:
+                if role == Role.Assistant:
+                    # End of the turn: the last sentence may still be held
+                    # back, "42." could have been the start of a decimal.
+                    held = self.segmenter.flush()
+                    if held:
+                        asyncio.create_task(
+                            send_data(self.ten_env, held, stream_id, role, False)
+                        )
                 asyncio.create_task(
                     send_data(self.ten_env, content, stream_id, role, is_final)
                 )
@@ -674,6 +687,8 @@ class GeminiRealtimeExtension(AsyncLLMBaseExtension):
             await self.session.send(text, end_of_turn=True)
 
     async def _flush(self) -> None:
+        # Whatever is left of the interrupted turn must not be played
+        self.audio_writer.reset()
         try:
             c = Cmd.create("flush")
             await self.ten_env.send_cmd(c)
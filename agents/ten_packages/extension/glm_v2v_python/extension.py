@@ -6,7 +6,6 @@
 #
 #
 import asyncio
-import base64
 import io
 import json
 from enum import Enum
@@ -45,6 +44,10 @@ from ten_ai_base.types import (
     LLMChatCompletionContentPartParam,
 )
 from ten_ai_base.llm import AsyncLLMBaseExtension
+from .sentence_segmenter import SentenceSegmenter
+from .audio_in_buffer import AudioInBuffer
+from .audio_out_writer import AudioOutWriter
+from .interruption_state import InterruptionState
 from .realtime.connection import RealtimeApiConnection
 from .realtime.struct import (
     AudioFormats,
@@ -101,6 +104,8 @@ class GLMRealtimeConfig(BaseConfig):
     audio_out: bool = True
     input_transcript: bool = True
     sample_rate: int = 24000
+    # Coalesce output audio into frames of this duration, 0 to pass through
+    audio_frame_ms: int = 0
 
     stream_id: int = 0
     dump: bool = False
@@ -108,6 +113,9 @@ class GLMRealtimeConfig(BaseConfig):
     enable_storage: bool = False
     greeting: str = ""
     language: str = "en-US"
+    # Release the first sentence of a turn at a space once it is this long,
+    # 0 waits for punctuation
+    first_chunk_min_len: int = 0
 
     def build_ctx(self) -> dict:
         return {}
@@ -139,10 +147,13 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
         self.connect_times = []
         self.first_token_times = []
 
-        self.transcript: str = ""
+        self.segmenter: SentenceSegmenter = SentenceSegmenter()
+        self.audio_writer: AudioOutWriter = AudioOutWriter()
+        self.interruption: InterruptionState = InterruptionState()
         self.ctx: dict = {}
         self.input_end = time.time()
         self.input_audio_queue = asyncio.Queue()
+        self.audio_in: AudioInBuffer = AudioInBuffer(self.audio_len_threshold)
 
     async def on_init(self, ten_env: AsyncTenEnv) -> None:
         await super().on_init(ten_env)
@@ -158,6 +169,14 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
 
         self.config = await GLMRealtimeConfig.create_async(ten_env=ten_env)
         ten_env.log_info(f"config: {self.config}")
+        self.segmenter = SentenceSegmenter(
+            self.config.language, self.config.first_chunk_min_len
+        )
+        self.audio_writer = AudioOutWriter(
+            sample_rate=self.config.sample_rate,
+            frame_ms=self.config.audio_frame_ms,
+            dump_path=self._dump_path(Role.Assistant) if self.config.dump else "",
+        )
 
         if not self.config.api_key:
             ten_env.log_error("api_key is required")
@@ -167,7 +186,10 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
             self.memory = ChatMemory(self.config.max_history)
 
             if self.config.enable_storage:
-                [result, _] = await ten_env.send_cmd(Cmd.create("retrieve"))
+                retrieve_cmd = Cmd.create("retrieve")
+                # only the last max_history entries are kept
+                retrieve_cmd.set_property_int("limit", self.config.max_history)
+                [result, _] = await ten_env.send_cmd(retrieve_cmd)
                 if result.get_status_code() == StatusCode.OK:
                     try:
                         history = json.loads(result.get_property_string("response"))
@@ -203,12 +225,15 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
 
         self.input_audio_queue.put_nowait(None)
         self.stopped = True
+        self.audio_writer.close()
 
     async def on_audio_frame(self, _: AsyncTenEnv, audio_frame: AudioFrame) -> None:
         try:
             stream_id = audio_frame.get_property_int("stream_id")
             if self.channel_name == "":
                 self.channel_name = audio_frame.get_property_string("channel")
+                if self.config.dump:
+                    self.audio_writer.dump_path = self._dump_path(Role.Assistant)
 
             if self.remote_stream_id == 0:
                 self.remote_stream_id = stream_id
@@ -263,8 +288,11 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                     break
 
                 self._dump_audio_if_need(audio_frame, Role.User)
-                if self.connected:
-                    wav_buff = self.convert_to_wav_in_memory(audio_frame)
+                self.audio_in.write(audio_frame)
+                if not self.connected:
+                    continue
+                while (chunk := self.audio_in.pop()) is not None:
+                    wav_buff = self.convert_to_wav_in_memory(chunk)
                     await self.conn.send_audio_data(wav_buff)
             except Exception as e:
                 traceback.print_exc()
@@ -279,11 +307,9 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
             start_time = time.time()
             await self.conn.connect()
             self.connect_times.append(time.time() - start_time)
-            item_id = ""  # For truncate
-            response_id = ""
-            # content_index = 0
+            state = self.interruption
+            state.reset()
             relative_start_ms = get_time_ms()
-            flushed = set()
 
             self.ten_env.log_info("Client loop started")
             async for message in self.conn.listen():
@@ -351,19 +377,19 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                         case ItemCreated():
                             self.ten_env.log_info(f"On item created {message.item}")
                         case ResponseCreated():
-                            response_id = message.response.id
-                            self.ten_env.log_info(f"On response created {response_id}")
+                            state.on_response_created(message.response.id)
+                            self.ten_env.log_info(
+                                f"On response created {message.response.id}"
+                            )
                         case ResponseDone():
                             msg_resp_id = message.response.id
                             status = message.response.status
-                            if msg_resp_id == response_id:
-                                response_id = ""
+                            state.on_response_done(msg_resp_id)
                             self.ten_env.log_info(
                                 f"On response done {msg_resp_id} {status} {message.response.usage}"
                             )
 
                             # workaround as GLM does not have responseAudioTranscriptDone
-                            self.transcript = ""
                             self._send_transcript("", Role.Assistant, True)
 
                             if message.response.usage:
@@ -373,7 +399,7 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                             self.ten_env.log_info(
                                 f"On response transcript delta {message.output_index} {message.content_index} {message.delta}"
                             )
-                            if message.response_id in flushed:
+                            if state.is_flushed(message.response_id):
                                 self.ten_env.log_warn(
                                     f"On flushed transcript delta {message.output_index} {message.content_index} {message.delta}"
                                 )
@@ -399,7 +425,7 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                             self.ten_env.log_info(
                                 f"On response transcript done {message.output_index} {message.content_index} {message.transcript}"
                             )
-                            if message.response_id in flushed:
+                            if state.is_flushed(message.response_id):
                                 self.ten_env.log_warn("On flushed transcript done")
                                 continue
                             self.memory.put(
@@ -409,7 +435,6 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                                     # "id": message.item_id,
                                 }
                             )
-                            self.transcript = ""
                             self._send_transcript("", Role.Assistant, True)
                         case ResponseTextDone():
                             self.ten_env.log_info(
@@ -421,7 +446,6 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                             #     )
                             #     continue
                             self.completion_times.append(time.time() - self.input_end)
-                            self.transcript = ""
                             self._send_transcript("", Role.Assistant, True)
                         case ResponseOutputItemDone():
                             self.ten_env.log_info(f"Output item done {message.item}")
@@ -443,10 +467,12 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                             # content_index = message.content_index
                             await self._on_audio_delta(message.delta)
                         case ResponseAudioDone():
+                            for frame in self.audio_writer.flush():
+                                await self._send_audio_frame(frame)
                             self.completion_times.append(time.time() - self.input_end)
                         case InputAudioBufferSpeechStarted():
                             self.ten_env.log_info(
-                                f"On server listening, in response {response_id}, last item {item_id}"
+                                f"On server listening, in response {state.response_id}, last item {state.item_id}"
                             )
                             # Tuncate the on-going audio stream
                             # end_ms = get_time_ms() - relative_start_ms
@@ -459,13 +485,14 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
                             #     await self.conn.send_request(truncate)
                             if self.config.server_vad:
                                 await self._flush()
-                            if response_id and self.transcript:
-                                transcript = self.transcript + "[interrupted]"
+                            if state.response_id and self.segmenter.remain:
+                                transcript = self.segmenter.remain + "[interrupted]"
+                                self.segmenter.reset()
                                 self._send_transcript(transcript, Role.Assistant, True)
-                                self.transcript = ""
-                                # memory leak, change to lru later
-                                flushed.add(response_id)
-                            item_id = ""
+                            state.interrupt()
+                            self.ten_env.log_info(
+                                f"Interruption state {state.metrics()}"
+                            )
                         case InputAudioBufferSpeechStopped():
                             # Only for server vad
                             self.input_end = time.time()
@@ -627,46 +654,24 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
         return result
 
     # Direction: OUT
-    async def _on_audio_delta(self, delta: bytes) -> None:
-        audio_data = base64.b64decode(delta)
-        self.ten_env.log_debug(
-            f"on_audio_delta audio_data len {len(audio_data)} samples {len(audio_data) // 2}"
-        )
-        self._dump_audio_if_need(audio_data, Role.Assistant)
+    async def _on_audio_delta(self, delta: str) -> None:
+        for frame in self.audio_writer.write_base64(delta):
+            await self._send_audio_frame(frame)
 
+    async def _send_audio_frame(self, frame: memoryview) -> None:
         f = AudioFrame.create("pcm_frame")
-        f.set_sample_rate(self.config.sample_rate)
-        f.set_bytes_per_sample(2)
-        f.set_number_of_channels(1)
+        f.set_sample_rate(self.audio_writer.sample_rate)
+        f.set_bytes_per_sample(self.audio_writer.bytes_per_sample)
+        f.set_number_of_channels(self.audio_writer.number_of_channels)
         f.set_data_fmt(AudioFrameDataFmt.INTERLEAVE)
-        f.set_samples_per_channel(len(audio_data) // 2)
-        f.alloc_buf(len(audio_data))
+        f.set_samples_per_channel(self.audio_writer.samples_per_channel(frame))
+        f.alloc_buf(len(frame))
         buff = f.lock_buf()
-        buff[:] = audio_data
+        buff[:] = frame
         f.unlock_buf(buff)
         await self.ten_env.send_audio_frame(f)
 
     def _send_transcript(self, content: str, role: Role, is_final: bool) -> None:
-        def is_punctuation(char):
-            if char in [",", "，", ".", "。", "?", "？", "!", "！"]:
-                return True
-            return False
-
-        def parse_sentences(sentence_fragment, content):
-            sentences = []
-            current_sentence = sentence_fragment
-            for char in content:
-                current_sentence += char
-                if is_punctuation(char):
-                    # Check if the current sentence contains non-punctuation characters
-                    stripped_sentence = current_sentence
-                    if any(c.isalnum() for c in stripped_sentence):
-                        sentences.append(stripped_sentence)
-                    current_sentence = ""  # Reset for the next sentence
-
-            remain = current_sentence  # Any remaining characters form the incomplete sentence
-            return sentences, remain
-
         def send_data(
             ten_env: AsyncTenEnv,
             sentence: str,
@@ -692,21 +697,29 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
         stream_id = self.remote_stream_id if role == Role.User else 0
         try:
             if role == Role.Assistant and not is_final:
-                sentences, self.transcript = parse_sentences(self.transcript, content)
-                for s in sentences:
+                for s in self.segmenter.push(content):
                     send_data(self.ten_env, s, stream_id, role, is_final)
             else:
+                if role == Role.Assistant:
+                    # End of the turn: the last sentence may still be held
+                    # back, "42." could have been the start of a decimal.
+                    held = self.segmenter.flush()
+                    if held:
+                        send_data(self.ten_env, held, stream_id, role, False)
                 send_data(self.ten_env, content, stream_id, role, is_final)
         except Exception as e:
             self.ten_env.log_error(
                 f"Error send text data {role}: {content} {is_final} {e}"
             )
 
+    def _dump_path(self, role: Role) -> str:
+        return "{}_{}.pcm".format(role, self.channel_name)
+
     def _dump_audio_if_need(self, buf: bytearray, role: Role) -> None:
         if not self.config.dump:
             return
 
-        with open("{}_{}.pcm".format(role, self.channel_name), "ab") as dump_file:
+        with open(self._dump_path(role), "ab") as dump_file:
             dump_file.write(buf)
 
     async def _handle_tool_call(self, name: str, arguments: str) -> None:
@@ -792,6 +805,8 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
             # await self.conn.send_request(ResponseCreate())
 
     async def _flush(self) -> None:
+        # Whatever is left of the interrupted response must not be played
+        self.audio_writer.reset()
         try:
             c = Cmd.create("flush")
             await self.ten_env.send_cmd(c)
@@ -830,6 +845,9 @@ class GLMRealtimeExtension(AsyncLLMBaseExtension):
 
         data = Data.create("llm_stat")
         data.set_property_from_json("usage", json.dumps(self.total_usage.model_dump()))
+        data.set_property_from_json(
+            "interruption", json.dumps(self.interruption.metrics())
+        )
         if self.connect_times and self.completion_times and self.first_token_times:
             data.set_property_from_json(
                 "latency",
@@ -1,5 +1,4 @@
 import asyncio
-import base64
 import json
 import os
 import aiohttp
@@ -8,9 +7,9 @@ from ten import AsyncTenEnv
 
 from typing import Any, AsyncGenerator
 from .struct import (
-    InputAudioBufferAppend,
     ClientToServerMessage,
     ServerToClientMessage,
+    input_audio_buffer_append_json,
     parse_server_message,
     to_json,
 )
@@ -72,15 +71,15 @@ class RealtimeApiConnection:
             headers=headers,
         )
 
-    async def send_audio_data(self, audio_data: bytes):
+    async def send_audio_data(self, audio_data: bytes | memoryview):
         """audio_data is assumed to be pcm16 24kHz mono little-endian"""
-        base64_audio_data = base64.b64encode(audio_data).decode("utf-8")
-        message = InputAudioBufferAppend(audio=base64_audio_data)
-        await self.send_request(message)
+        await self._send_str(input_audio_buffer_append_json(audio_data))
 
     async def send_request(self, message: ClientToServerMessage):
+        await self._send_str(to_json(message))
+
+    async def _send_str(self, message_str: str):
         assert self.websocket is not None
-        message_str = to_json(message)
         if self.verbose:
             self.ten_env.log_info(f"-> {smart_str(message_str)}")
         await self.websocket.send_str(message_str)
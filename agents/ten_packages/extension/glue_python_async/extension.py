@@ -5,7 +5,6 @@
 #
 import asyncio
 import traceback
-import aiohttp
 import json
 import time
 import re
@@ -46,6 +45,10 @@ from ten_ai_base.llm import (
     AsyncLLMBaseExtension,
 )
 
+from .http_session_pool import HttpSessionPool
+from .sentence_segmenter import SentenceSegmenter
+from .sse_decoder import ChunkView, aiter_sse_response
+
 CMD_IN_FLUSH = "flush"
 CMD_IN_ON_USER_JOINED = "on_user_joined"
 CMD_IN_ON_USER_LEFT = "on_user_left"
@@ -61,27 +64,6 @@ DATA_OUT_TEXT_DATA_PROPERTY_END_OF_SEGMENT = "end_of_segment"
 CMD_PROPERTY_RESULT = "tool_result"
 
 
-def is_punctuation(char):
-    if char in [",", "，", ".", "。", "?", "？", "!", "！"]:
-        return True
-    return False
-
-
-def parse_sentences(sentence_fragment, content):
-    sentences = []
-    current_sentence = sentence_fragment
-    for char in content:
-        current_sentence += char
-        if is_punctuation(char):
-            stripped_sentence = current_sentence
-            if any(c.isalnum() for c in stripped_sentence):
-                sentences.append(stripped_sentence)
-            current_sentence = ""
-
-    remain = current_sentence
-    return sentences, remain
-
-
 class ToolCallFunction(BaseModel):
     name: str | None = None
     arguments: str | None = None
@@ -100,22 +82,6 @@ class ToolCallResponse(BaseModel):
     error: str | None = None
 
 
-class Delta(BaseModel):
-    content: str | None = None
-    tool_calls: List[ToolCall] = None
-
-
-class Choice(BaseModel):
-    delta: Delta = None
-    index: int
-    finish_reason: str | None
-
-
-class ResponseChunk(BaseModel):
-    choices: List[Choice]
-    usage: LLMUsage | None = None
-
-
 @dataclass
 class GlueConfig(BaseConfig):
     api_url: str = "http://localhost:8000/chat/completions"
@@ -130,6 +96,12 @@ class GlueConfig(BaseConfig):
     context_enabled: bool = False
     extra_context: dict = field(default_factory=dict)
     enable_storage: bool = False
+    http_pool_size: int = 8
+    http_keepalive_timeout: int = 60
+    http_warm_up: bool = False
+    # Release the first sentence of a turn at a space once it is this long,
+    # 0 waits for punctuation
+    first_chunk_min_len: int = 0
 
 
 class AsyncGlueExtension(AsyncLLMBaseExtension):
@@ -141,6 +113,8 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
         self.loop: asyncio.AbstractEventLoop = None
         self.stopped: bool = False
         self.memory: ChatMemory = None
+        # retrieve of the stored history, joined by the first completion
+        self.history_ready: asyncio.Task = None
         self.total_usage: LLMUsage = LLMUsage()
         self.users_count = 0
 
@@ -149,6 +123,7 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
         self.first_token_times = []
 
         self.remote_stream_id: int = 999
+        self.http: HttpSessionPool = HttpSessionPool()
 
     async def on_init(self, ten_env: AsyncTenEnv) -> None:
         await super().on_init(ten_env)
@@ -164,23 +139,39 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
         ten_env.log_info(f"config: {self.config}")
 
         self.memory = ChatMemory(self.config.max_history)
+        self.ten_env = ten_env
 
-        if self.config.enable_storage:
-            [result, _] = await ten_env.send_cmd(Cmd.create("retrieve"))
-            if result.get_status_code() == StatusCode.OK:
-                try:
-                    history = json.loads(result.get_property_string("response"))
-                    for i in history:
-                        self.memory.put(i)
-                    ten_env.log_info(f"on retrieve context {history}")
-                except Exception:
-                    ten_env.log_error("Failed to handle retrieve result {e}")
-            else:
-                ten_env.log_warn("Failed to retrieve content")
-
-        self.memory.on(EVENT_MEMORY_APPENDED, self._on_memory_appended)
+        self.http = HttpSessionPool(
+            self.config.http_pool_size, self.config.http_keepalive_timeout
+        )
+        if self.config.http_warm_up:
+            self.loop.create_task(self._warm_up(self.config.api_url))
 
-        self.ten_env = ten_env
+        # start is done without waiting for the storage
+        self.history_ready = self.loop.create_task(self._retrieve_history(ten_env))
+
+    async def _retrieve_history(self, ten_env: AsyncTenEnv) -> None:
+        try:
+            if self.config.enable_storage:
+                retrieve_cmd = Cmd.create("retrieve")
+                # only the last max_history entries are kept
+                retrieve_cmd.set_property_int("limit", self.config.max_history)
+                [result, _] = await ten_env.send_cmd(retrieve_cmd)
+                if result.get_status_code() == StatusCode.OK:
+                    try:
+                        history = json.loads(result.get_property_string("response"))
+                        for i in history:
+                            self.memory.put(i)
+                        ten_env.log_info(f"on retrieve context {history}")
+                    except Exception as e:
+                        ten_env.log_error(f"Failed to handle retrieve result {e}")
+                else:
+                    ten_env.log_warn("Failed to retrieve content")
+        except Exception as e:
+            ten_env.log_error(f"Failed to retrieve history {e}")
+        finally:
+            # the retrieved entries are not stored again
+            self.memory.on(EVENT_MEMORY_APPENDED, self._on_memory_appended)
 
     async def on_stop(self, ten_env: AsyncTenEnv) -> None:
         await super().on_stop(ten_env)
@@ -193,6 +184,8 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
         await super().on_deinit(ten_env)
         ten_env.log_debug("on_deinit")
 
+        await self.http.close()
+
     async def on_cmd(self, ten_env: AsyncTenEnv, cmd: Cmd) -> None:
         cmd_name = cmd.get_name()
         ten_env.log_debug("on_cmd name {}".format(cmd_name))
@@ -233,6 +226,8 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
         if self.config.prompt:
             messages.append({"role": "system", "content": self.config.prompt})
 
+        if self.history_ready is not None:
+            await self.history_ready
         history = self.memory.get()
         while history:
             if history[0].get("role") == "tool":
@@ -288,55 +283,52 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
             tools.append(tool_dict(tool))
 
         total_output = ""
-        sentence_fragment = ""
+        segmenter = SentenceSegmenter(
+            first_chunk_min_len=self.config.first_chunk_min_len
+        )
         calls = {}
 
-        sentences = []
         start_time = time.time()
         first_token_time = None
         response = self._stream_chat(messages=messages, tools=tools)
         async for message in response:
             self.ten_env.log_debug(f"content: {message}")
             try:
-                c = ResponseChunk(**message)
-                if c.choices:
-                    if c.choices[0].delta.content:
-                        if first_token_time is None:
-                            first_token_time = time.time()
-                            self.first_token_times.append(first_token_time - start_time)
-
-                        content = c.choices[0].delta.content
-                        if self.config.ssml_enabled and content.startswith("<speak>"):
-                            content = trim_xml(content)
-                        total_output += content
-                        sentences, sentence_fragment = parse_sentences(
-                            sentence_fragment, content
-                        )
-                        for s in sentences:
-                            await self._send_text(s)
-                    if c.choices[0].delta.tool_calls:
-                        self.ten_env.log_info(
-                            f"tool_calls: {c.choices[0].delta.tool_calls}"
-                        )
-                        for call in c.choices[0].delta.tool_calls:
-                            if call.index not in calls:
-                                calls[call.index] = ToolCall(
-                                    id=call.id,
-                                    index=call.index,
-                                    function=ToolCallFunction(name="", arguments=""),
-                                )
-                            if call.function.name:
-                                calls[call.index].function.name += call.function.name
-                            if call.function.arguments:
-                                calls[
-                                    call.index
-                                ].function.arguments += call.function.arguments
+                c = ChunkView(message)
+                content = c.content
+                if content:
+                    if first_token_time is None:
+                        first_token_time = time.time()
+                        self.first_token_times.append(first_token_time - start_time)
+
+                    if self.config.ssml_enabled and content.startswith("<speak>"):
+                        content = trim_xml(content)
+                    total_output += content
+                    for s in segmenter.push(content):
+                        await self._send_text(s)
+                if c.tool_calls:
+                    self.ten_env.log_info(f"tool_calls: {c.tool_calls}")
+                    for call in c.tool_calls:
+                        index = call["index"]
+                        function = call.get("function") or {}
+                        if index not in calls:
+                            calls[index] = ToolCall(
+                                id=call.get("id"),
+                                index=index,
+                                function=ToolCallFunction(name="", arguments=""),
+                            )
+                        if function.get("name"):
+                            calls[index].function.name += function["name"]
+                        if function.get("arguments"):
+                            calls[index].function.arguments += function["arguments"]
                 if c.usage:
-                    self.ten_env.log_info(f"usage: {c.usage}")
-                    await self._update_usage(c.usage)
+                    usage = LLMUsage.model_validate(c.usage)
+                    self.ten_env.log_info(f"usage: {usage}")
+                    await self._update_usage(usage)
             except Exception as e:
                 self.ten_env.log_error(f"Failed to parse response: {message} {e}")
                 traceback.print_exc()
+        sentence_fragment = segmenter.flush()
         if sentence_fragment:
             await self._send_text(sentence_fragment)
         end_time = time.time()
@@ -449,55 +441,52 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
     async def _stream_chat(
         self, messages: List[Any], tools: List[Any]
     ) -> AsyncGenerator[dict, None]:
-        async with aiohttp.ClientSession() as session:
-            try:
-                payload = {
-                    "messages": messages,
-                    "tools": tools,
-                    "tools_choice": "auto" if tools else "none",
-                    "model": "gpt-3.5-turbo",
-                    "stream": True,
-                    "stream_options": {"include_usage": True},
-                    "ssml_enabled": self.config.ssml_enabled,
-                }
-                if self.config.context_enabled:
-                    payload["context"] = {**self.config.extra_context}
-                self.ten_env.log_info(f"payload before sending: {json.dumps(payload)}")
-                headers = {
-                    "Authorization": f"Bearer {self.config.token}",
-                    "Content-Type": "application/json",
-                }
+        session = await self.http.get()
+        try:
+            payload = {
+                "messages": messages,
+                "tools": tools,
+                "tools_choice": "auto" if tools else "none",
+                "model": "gpt-3.5-turbo",
+                "stream": True,
+                "stream_options": {"include_usage": True},
+                "ssml_enabled": self.config.ssml_enabled,
+            }
+            if self.config.context_enabled:
+                payload["context"] = {**self.config.extra_context}
+            self.ten_env.log_info(f"payload before sending: {json.dumps(payload)}")
+            headers = {
+                "Authorization": f"Bearer {self.config.token}",
+                "Content-Type": "application/json",
+            }
 
-                start_time = time.time()
-                async with session.post(
-                    self.config.api_url, json=payload, headers=headers
-                ) as response:
-                    if response.status != 200:
-                        r = await response.json()
-                        self.ten_env.log_error(
-                            f"Received unexpected status {r} from the server."
-                        )
-                        if self.config.failure_info:
-                            await self._send_text(self.config.failure_info)
-                        return
-                    end_time = time.time()
-                    self.connect_times.append(end_time - start_time)
-
-                    async for line in response.content:
-                        if line:
-                            l = line.decode("utf-8").strip()
-                            if l.startswith("data:"):
-                                content = l[5:].strip()
-                                if content == "[DONE]":
-                                    break
-                                self.ten_env.log_debug(f"content: {content}")
-                                yield json.loads(content)
-            except Exception as e:
-                traceback.print_exc()
-                self.ten_env.log_error(f"Failed to handle {e}")
-            finally:
-                await session.close()
-                session = None
+            start_time = time.time()
+            async with session.post(
+                self.config.api_url, json=payload, headers=headers
+            ) as response:
+                if response.status != 200:
+                    r = await response.json()
+                    self.ten_env.log_error(
+                        f"Received unexpected status {r} from the server."
+                    )
+                    if self.config.failure_info:
+                        await self._send_text(self.config.failure_info)
+                    return
+                end_time = time.time()
+                self.connect_times.append(end_time - start_time)
+
+                async for event in aiter_sse_response(response):
+                    yield event.json()
+        except Exception as e:
+            traceback.print_exc()
+            self.ten_env.log_error(f"Failed to handle {e}")
+
+    async def _warm_up(self, url: str) -> None:
+        try:
+            await self.http.warm_up(url)
+            self.ten_env.log_info(f"http warm up done {self.http.metrics()}")
+        except Exception as e:
+            self.ten_env.log_warn(f"http warm up failed {e}")
 
     async def _update_usage(self, usage: LLMUsage) -> None:
         if not self.config.rtm_enabled:
@@ -538,6 +527,7 @@ class AsyncGlueExtension(AsyncLLMBaseExtension):
 
         data = Data.create("llm_stat")
         data.set_property_from_json("usage", json.dumps(self.total_usage.model_dump()))
+        data.set_property_from_json("http", json.dumps(self.http.metrics()))
         if self.connect_times and self.completion_times and self.first_token_times:
             data.set_property_from_json(
                 "latency",
@@ -0,0 +1,92 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+from types import SimpleNamespace
+
+import aiohttp
+
+
+class HttpSessionPool:
+    """A long-lived aiohttp session shared by every request of an extension.
+
+    Creating a ClientSession per utterance pays DNS, TCP and TLS setup before
+    the first token can arrive. Keeping one session keeps its connector, so
+    later requests go out on an idle keep-alive connection instead.
+
+    The session is created lazily because it has to be bound to the running
+    event loop. Connection reuse is counted through aiohttp tracing and
+    reported by metrics().
+    """
+
+    def __init__(
+        self,
+        limit: int = 8,
+        keepalive_timeout: float = 60,
+    ) -> None:
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self._session: aiohttp.ClientSession | None = None
+
+        # Metrics
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+
+    async def get(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(self._on_request_start)
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, trace_configs=[trace_config]
+            )
+        return self._session
+
+    async def warm_up(self, url: str, headers: dict | None = None) -> None:
+        """Open a keep-alive connection to url ahead of the first request.
+
+        The response status is irrelevant (a chat endpoint usually rejects
+        HEAD), what matters is the connection left idle in the pool.
+        """
+        session = await self.get()
+        async with session.head(url, headers=headers) as response:
+            await response.read()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def metrics(self) -> dict:
+        connections = self.new_connections + self.reused_connections
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_ratio": (
+                self.reused_connections / connections if connections else 0.0
+            ),
+        }
+
+    async def _on_request_start(
+        self, _session: aiohttp.ClientSession, _ctx: SimpleNamespace, _params
+    ) -> None:
+        self.requests += 1
+
+    async def _on_connection_create(
+        self, _session: aiohttp.ClientSession, _ctx: SimpleNamespace, _params
+    ) -> None:
+        self.new_connections += 1
+
+    async def _on_connection_reuse(
+        self, _session: aiohttp.ClientSession, _ctx: SimpleNamespace, _params
+    ) -> None:
+        self.reused_connections += 1
@@ -0,0 +1,143 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Measure SSE chunk throughput of the glue streaming path.
+
+Usage:
+    python tests/bench_sse_decoder.py [recorded_body.txt]
+
+The optional recording is a raw text/event-stream body as returned by the
+chat completions endpoint. Without it a synthetic OpenAI style stream is
+generated. The body is cut into 1-1500 byte pieces to mimic socket reads.
+
+Compared paths:
+    legacy      readline, decode().strip(), json.loads, pydantic ResponseChunk
+    decoder     SSEDecoder over raw chunks, json_loads, ChunkView
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from typing import List
+
+from pydantic import BaseModel
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sse_decoder import JSON_BACKEND, ChunkView, SSEDecoder  # noqa: E402
+
+
+class ToolCallFunction(BaseModel):
+    name: str | None = None
+    arguments: str | None = None
+
+
+class ToolCall(BaseModel):
+    index: int
+    type: str = "function"
+    id: str | None = None
+    function: ToolCallFunction
+
+
+class Delta(BaseModel):
+    content: str | None = None
+    tool_calls: List[ToolCall] = None
+
+
+class Choice(BaseModel):
+    delta: Delta = None
+    index: int
+    finish_reason: str | None
+
+
+class ResponseChunk(BaseModel):
+    choices: List[Choice]
+    usage: dict | None = None
+
+
+def synthetic_body(chunks: int = 20000) -> bytes:
+    rng = random.Random(7)
+    words = ["the", "agent", "streams", "tokens", "quickly", "，", "。", "!"]
+    out = []
+    for i in range(chunks):
+        chunk = {
+            "id": "chatcmpl-123",
+            "object": "chat.completion.chunk",
+            "created": 1700000000,
+            "model": "gpt-4o",
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {"content": " " + rng.choice(words)},
+                    "finish_reason": None,
+                }
+            ],
+        }
+        out.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+    out.append("data: [DONE]\n\n")
+    return "".join(out).encode()
+
+
+def split_reads(body: bytes) -> list[bytes]:
+    rng = random.Random(11)
+    reads, i = [], 0
+    while i < len(body):
+        n = rng.randint(1, 1500)
+        reads.append(body[i : i + n])
+        i += n
+    return reads
+
+
+def run_legacy(body: bytes) -> tuple[float, int]:
+    lines = body.splitlines(keepends=True)
+    count = 0
+    start = time.perf_counter()
+    for line in lines:
+        if line:
+            l = line.decode("utf-8").strip()
+            if l.startswith("data:"):
+                content = l[5:].strip()
+                if content == "[DONE]":
+                    break
+                c = ResponseChunk(**json.loads(content))
+                if c.choices and c.choices[0].delta.content:
+                    count += 1
+    return time.perf_counter() - start, count
+
+
+def run_decoder(reads: list[bytes]) -> tuple[float, int]:
+    count = 0
+    start = time.perf_counter()
+    decoder = SSEDecoder()
+    for read in reads:
+        for event in decoder.feed(read):
+            if event.data == b"[DONE]":
+                break
+            if ChunkView(event.json()).content:
+                count += 1
+    return time.perf_counter() - start, count
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "rb") as f:
+            body = f.read()
+    else:
+        body = synthetic_body()
+    reads = split_reads(body)
+    print(f"{len(body)} bytes in {len(reads)} reads, json backend {JSON_BACKEND}")
+
+    for name, fn in [
+        ("legacy", lambda: run_legacy(body)),
+        ("SSEDecoder + ChunkView", lambda: run_decoder(reads)),
+    ]:
+        elapsed, count = fn()
+        print(f"{name:<24} {count / elapsed:12.0f} chunks/s  {count} chunks")
+
+
+if __name__ == "__main__":
+    main()
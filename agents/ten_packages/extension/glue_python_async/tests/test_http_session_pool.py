@@ -0,0 +1,57 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import os
+import sys
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from http_session_pool import HttpSessionPool  # noqa: E402
+from sse_decoder import aiter_sse_response  # noqa: E402
+
+CHUNK = b'data: {"choices":[{"delta":{"content":"hi"}}]}\n\n'
+
+
+async def stream(request):
+    response = web.StreamResponse()
+    await response.prepare(request)
+    for _ in range(3):
+        await response.write(CHUNK)
+    await response.write(b"data: [DONE]\n\n")
+    # as servers do, the body ends a little after [DONE]
+    await asyncio.sleep(0.05)
+    await response.write_eof()
+    return response
+
+
+async def run(requests: int) -> dict:
+    app = web.Application()
+    app.router.add_post("/", stream)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    pool = HttpSessionPool()
+    try:
+        for _ in range(requests):
+            session = await pool.get()
+            async with session.post(f"http://127.0.0.1:{port}/", json={}) as r:
+                events = [e.json() async for e in aiter_sse_response(r)]
+                assert len(events) == 3
+        return pool.metrics()
+    finally:
+        await pool.close()
+        await runner.cleanup()
+
+
+def test_streamed_responses_reuse_the_connection():
+    metrics = asyncio.run(run(5))
+    assert metrics["new_connections"] == 1
+    assert metrics["reused_connections"] == 4
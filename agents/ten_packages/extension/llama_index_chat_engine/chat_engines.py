@@ -0,0 +1,66 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+from typing import Any, Optional
+
+SYSTEM_PROMPT = (
+    "You are a voice assistant who talks in a conversational way and can chat with me like my friends. \n"
+    "I will speak to you in English or Chinese, and you will answer in the corrected and improved version of my text with the language I use. \n"
+    "Don’t talk like a robot, instead I would like you to talk like a real human with emotions. \n"
+    "I will use your answer for text-to-speech, so don’t return me any meaningless characters. \n"
+    "I want you to be helpful, when I’m asking you for advice, give me precise, practical and useful advice instead of being vague. \n"
+    "When giving me a list of options, express the options in a narrative way instead of bullet points.\n"
+)
+
+RAG_SYSTEM_PROMPT = (
+    # "You are an expert Q&A system that is trusted around the world.\n"
+    SYSTEM_PROMPT + "Always answer the query using the provided context information, "
+    "and not prior knowledge.\n"
+    "Some rules to follow:\n"
+    "1. Never directly reference the given context in your answer.\n"
+    "2. Avoid statements like 'Based on the context, ...' or "
+    "'The context information ...' or anything along "
+    "those lines."
+)
+
+
+def warm_up() -> None:
+    """Import the llama_index modules a chat turn needs, they take seconds."""
+    # pylint: disable=unused-import,import-outside-toplevel
+    import llama_index.core.chat_engine  # noqa: F401
+    import llama_index.core.memory  # noqa: F401
+    import llama_index.core.retrievers  # noqa: F401
+    import llama_index.core.storage.chat_store  # noqa: F401
+
+
+def create_chat_memory(token_limit: int) -> Any:
+    from llama_index.core.storage.chat_store import SimpleChatStore
+    from llama_index.core.memory import ChatMemoryBuffer
+
+    return ChatMemoryBuffer.from_defaults(
+        token_limit=token_limit,
+        chat_store=SimpleChatStore(),
+    )
+
+
+def build_chat_engine(llm: Any, memory: Any, retriever: Optional[Any] = None) -> Any:
+    """A ContextChatEngine over retriever, or a SimpleChatEngine without one."""
+    if retriever is not None:
+        from llama_index.core.chat_engine import ContextChatEngine
+
+        return ContextChatEngine.from_defaults(
+            llm=llm,
+            retriever=retriever,
+            memory=memory,
+            system_prompt=RAG_SYSTEM_PROMPT,
+        )
+
+    from llama_index.core.chat_engine import SimpleChatEngine
+
+    return SimpleChatEngine.from_defaults(
+        llm=llm,
+        system_prompt=SYSTEM_PROMPT,
+        memory=memory,
+    )
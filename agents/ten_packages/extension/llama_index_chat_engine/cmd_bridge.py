@@ -0,0 +1,92 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, Set
+
+
+class RetrievalCancelled(Exception):
+    """The retrieval of a turn was cancelled by a flush."""
+
+
+class CmdBridge:
+    """An event loop thread for the extension's cmd round trips.
+
+    send_cmd turns a TEN cmd callback into an awaitable result. Coroutines
+    are handed over with submit from any thread; cancel_inflight cancels
+    the cancellable ones, which is what a flush does to a retrieval.
+    """
+
+    def __init__(self, ten: Any) -> None:
+        self.ten = ten
+        self.loop = asyncio.new_event_loop()
+        self._inflight: Set[concurrent.futures.Future] = set()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="llama_index_cmds")
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self.cancel_inflight()
+        asyncio.run_coroutine_threadsafe(self._cancel_tasks(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+    def send_cmd(self, cmd: Any) -> asyncio.Future:
+        """Must be called on the loop. Resolves with the first result."""
+        future = self.loop.create_future()
+
+        def callback(_, result, error):
+            def resolve():
+                if future.done():
+                    return
+                if error is not None:
+                    future.set_exception(RuntimeError(str(error)))
+                else:
+                    future.set_result(result)
+
+            try:
+                self.loop.call_soon_threadsafe(resolve)
+            except RuntimeError:
+                pass  # closed, nothing waits for the result any more
+
+        self.ten.send_cmd(cmd, callback)
+        return future
+
+    def submit(
+        self, coro: Coroutine, cancellable: bool = True
+    ) -> concurrent.futures.Future:
+        if not cancellable:
+            return asyncio.run_coroutine_threadsafe(coro, self.loop)
+        # listed before cancel_inflight can look, even if the coroutine has
+        # already started on the loop
+        with self._lock:
+            future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+            self._inflight.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def cancel_inflight(self) -> int:
+        with self._lock:
+            inflight, self._inflight = self._inflight, set()
+        return sum(future.cancel() for future in inflight)
+
+    def _forget(self, future: concurrent.futures.Future) -> None:
+        with self._lock:
+            self._inflight.discard(future)
+
+    async def _cancel_tasks(self) -> None:
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
@@ -13,11 +13,17 @@ from ten import (
     StatusCode,
     CmdResult,
 )
+import concurrent.futures
 import queue, threading
 from datetime import datetime
 
+from .cmd_bridge import CmdBridge, RetrievalCancelled
+from .query_embedding import QueryEmbeddingCache
+from .vector_codec import VECTOR_FORMAT_JSON
+
 PROPERTY_CHAT_MEMORY_TOKEN_LIMIT = "chat_memory_token_limit"
 PROPERTY_GREETING = "greeting"
+PROPERTY_VECTOR_FORMAT = "vector_format"  # "json" or "f32"
 
 TASK_TYPE_CHAT_REQUEST = "chat_request"
 TASK_TYPE_GREETING = "greeting"
@@ -36,6 +42,17 @@ class LlamaIndexExtension(Extension):
         self.collection_name = ""
         self.chat_memory_token_limit = 3000
         self.chat_memory = None
+        # (collection, engine), replaced as a whole when the collection changes
+        self.chat_engine = None
+        self.chat_engine_lock = threading.Lock()
+        # warm-up, then engines built ahead for a new collection
+        self.prepare_executor = None
+        self.warm_up_future = None
+        self.vector_format = VECTOR_FORMAT_JSON
+        # embed and query_vector run on the bridge's loop, the chat engine
+        # on self.thread
+        self.bridge = None
+        self.query_cache = QueryEmbeddingCache()
 
     def _send_text_data(self, ten: TenEnv, text: str, end_of_segment: bool):
         try:
@@ -67,17 +84,19 @@ class LlamaIndexExtension(Extension):
                 f"get {PROPERTY_CHAT_MEMORY_TOKEN_LIMIT} property failed, err: {err}"
             )
 
+        try:
+            self.vector_format = ten.get_property_string(PROPERTY_VECTOR_FORMAT)
+        except Exception as err:
+            ten.log_warn(f"get {PROPERTY_VECTOR_FORMAT} property failed, err: {err}")
+
+        self.bridge = CmdBridge(ten)
+        self.bridge.start()
         self.thread = threading.Thread(target=self.async_handle, args=[ten])
         self.thread.start()
 
-        # enable chat memory
-        from llama_index.core.storage.chat_store import SimpleChatStore
-        from llama_index.core.memory import ChatMemoryBuffer
-
-        self.chat_memory = ChatMemoryBuffer.from_defaults(
-            token_limit=self.chat_memory_token_limit,
-            chat_store=SimpleChatStore(),
-        )
+        # llama_index takes seconds to import, load it while the user connects
+        self.prepare_executor = concurrent.futures.ThreadPoolExecutor(1)
+        self.warm_up_future = self.prepare_executor.submit(self.warm_up, ten)
 
         # Send greeting if available
         if greeting is not None:
@@ -94,6 +113,14 @@ class LlamaIndexExtension(Extension):
         if self.thread is not None:
             self.thread.join()
             self.thread = None
+        if self.prepare_executor is not None:
+            self.prepare_executor.shutdown(wait=True, cancel_futures=True)
+            self.prepare_executor = None
+        if self.bridge is not None:
+            self.bridge.close()
+            self.bridge = None
+        self.chat_engine = None
+        ten.log_info(f"query embedding cache: {self.query_cache.metrics()}")
         self.chat_memory = None
 
         ten.on_stop_done()
@@ -111,6 +138,7 @@ class LlamaIndexExtension(Extension):
                     f"collection for querying has been updated from {self.collection_name} to {coll}"
                 )
                 self.collection_name = coll
+                self.prepare_chat_engine(ten, coll)
             else:
                 ten.log_info(
                     f"new collection {coll} incoming but won't change current collection_name {self.collection_name}"
@@ -122,6 +150,7 @@ class LlamaIndexExtension(Extension):
             self.queue.put((file_chunked_text, datetime.now(), TASK_TYPE_GREETING))
         elif cmd_name == "file_chunk":
             self.collection_name = ""  # clear current collection
+            self.prepare_chat_engine(ten, "")
 
             # notify user
             file_chunk_text = "Your document has been received. Please wait a moment while we process it for you.  "
@@ -133,6 +162,7 @@ class LlamaIndexExtension(Extension):
                 f"collection for querying has been updated from {self.collection_name} to {coll}"
             )
             self.collection_name = coll
+            self.prepare_chat_engine(ten, coll)
 
             # notify user
             update_querying_collection_text = "Your document has been updated. "
@@ -168,6 +198,19 @@ class LlamaIndexExtension(Extension):
 
         ten.log_info("on_data text [%s], ts [%s]", inputText, ts)
         self.queue.put((inputText, ts, TASK_TYPE_CHAT_REQUEST))
+        if len(self.collection_name) > 0:
+            # embed the query now, while the previous turn may still stream
+            self.bridge.submit(self.prefetch_embedding(ten, inputText), False)
+
+    async def prefetch_embedding(self, ten: TenEnv, text: str):
+        from .llama_embedding import embed_query
+
+        try:
+            await self.query_cache.get(
+                text, lambda t: embed_query(self.bridge, t, self.vector_format)
+            )
+        except Exception as e:
+            ten.log_warn(f"query embedding prefetch failed, err: {e}")
 
     def async_handle(self, ten: TenEnv):
         ten.log_info("async_handle started")
@@ -191,51 +234,9 @@ class LlamaIndexExtension(Extension):
 
                 ten.log_info("process input text [%s] ts [%s]", input_text, ts)
 
-                # lazy import packages which requires long time to load
-                from .llama_llm import LlamaLLM
-                from .llama_retriever import LlamaRetriever
-
-                # prepare chat engine
-                chat_engine = None
-                if len(self.collection_name) > 0:
-                    from llama_index.core.chat_engine import ContextChatEngine
-
-                    chat_engine = ContextChatEngine.from_defaults(
-                        llm=LlamaLLM(ten=ten),
-                        retriever=LlamaRetriever(ten=ten, coll=self.collection_name),
-                        memory=self.chat_memory,
-                        system_prompt=(
-                            # "You are an expert Q&A system that is trusted around the world.\n"
-                            "You are a voice assistant who talks in a conversational way and can chat with me like my friends. \n"
-                            "I will speak to you in English or Chinese, and you will answer in the corrected and improved version of my text with the language I use. \n"
-                            "Don’t talk like a robot, instead I would like you to talk like a real human with emotions. \n"
-                            "I will use your answer for text-to-speech, so don’t return me any meaningless characters. \n"
-                            "I want you to be helpful, when I’m asking you for advice, give me precise, practical and useful advice instead of being vague. \n"
-                            "When giving me a list of options, express the options in a narrative way instead of bullet points.\n"
-                            "Always answer the query using the provided context information, "
-                            "and not prior knowledge.\n"
-                            "Some rules to follow:\n"
-                            "1. Never directly reference the given context in your answer.\n"
-                            "2. Avoid statements like 'Based on the context, ...' or "
-                            "'The context information ...' or anything along "
-                            "those lines."
-                        ),
-                    )
-                else:
-                    from llama_index.core.chat_engine import SimpleChatEngine
-
-                    chat_engine = SimpleChatEngine.from_defaults(
-                        llm=LlamaLLM(ten=ten),
-                        system_prompt=(
-                            "You are a voice assistant who talks in a conversational way and can chat with me like my friends. \n"
-                            "I will speak to you in English or Chinese, and you will answer in the corrected and improved version of my text with the language I use. \n"
-                            "Don’t talk like a robot, instead I would like you to talk like a real human with emotions. \n"
-                            "I will use your answer for text-to-speech, so don’t return me any meaningless characters. \n"
-                            "I want you to be helpful, when I’m asking you for advice, give me precise, practical and useful advice instead of being vague. \n"
-                            "When giving me a list of options, express the options in a narrative way instead of bullet points.\n"
-                        ),
-                        memory=self.chat_memory,
-                    )
+                # imports and chat memory come from the warm-up
+                self.warm_up_future.result()
+                chat_engine = self.chat_engine_for(ten, self.collection_name)
 
                 resp = chat_engine.stream_chat(input_text)
                 for cur_token in resp.response_gen:
@@ -255,13 +256,60 @@ class LlamaIndexExtension(Extension):
 
                 # send out end_of_segment
                 self._send_text_data(ten, "", True)
+            except RetrievalCancelled:
+                ten.log_info(f"text [{input_text}] ts [{ts}] retrieval cancelled")
             except Exception as e:
                 ten.log_error(str(e))
         ten.log_info("async_handle stoped")
 
+    def warm_up(self, ten: TenEnv) -> None:
+        start = datetime.now()
+        from .chat_engines import create_chat_memory, warm_up
+
+        warm_up()
+        self.chat_memory = create_chat_memory(self.chat_memory_token_limit)
+        self.chat_engine_for(ten, self.collection_name)
+        ten.log_info(
+            f"chat engine warmed up, cost {int((datetime.now() - start).total_seconds() * 1000)}ms"
+        )
+
+    def prepare_chat_engine(self, ten: TenEnv, collection: str) -> None:
+        if self.prepare_executor is not None:
+            self.prepare_executor.submit(self.chat_engine_for, ten, collection)
+
+    def chat_engine_for(self, ten: TenEnv, collection: str):
+        current = self.chat_engine
+        if current is not None and current[0] == collection:
+            return current[1]
+
+        with self.chat_engine_lock:
+            current = self.chat_engine
+            if current is not None and current[0] == collection:
+                return current[1]
+
+            from .chat_engines import build_chat_engine
+            from .llama_llm import LlamaLLM
+            from .llama_retriever import LlamaRetriever
+
+            retriever = None
+            if len(collection) > 0:
+                retriever = LlamaRetriever(
+                    ten=ten,
+                    coll=collection,
+                    bridge=self.bridge,
+                    vector_format=self.vector_format,
+                    cache=self.query_cache,
+                )
+            engine = build_chat_engine(LlamaLLM(ten=ten), self.chat_memory, retriever)
+            self.chat_engine = (collection, engine)
+            ten.log_info(f"chat engine built for collection [{collection}]")
+            return engine
+
     def flush(self):
         with self.outdate_ts_lock:
             self.outdate_ts = datetime.now()
+        if self.bridge is not None:
+            self.bridge.cancel_inflight()
 
         while not self.queue.empty():
             self.queue.get()
@@ -1,58 +1,75 @@
 from typing import Any, List
-import threading
 from llama_index.core.embeddings import BaseEmbedding
 import json
 from ten import (
     Cmd,
     CmdResult,
+    StatusCode,
     TenEnv,
 )
 
+from .cmd_bridge import CmdBridge
+from .vector_codec import VECTOR_FORMAT_JSON, unpack_vectors
+
 EMBED_CMD = "embed"
 
 
 def embed_from_resp(cmd_result: CmdResult) -> List[float]:
+    if cmd_result.get_status_code() != StatusCode.OK:
+        raise RuntimeError("embed failed")
+    try:
+        (embedding,) = unpack_vectors(cmd_result.get_property_buf("embedding_buf"))
+        return embedding
+    except Exception:
+        pass  # not asked for, or an embedding extension without buf support
     embedding_output_json = cmd_result.get_property_to_json("embedding")
     return json.loads(embedding_output_json)
 
 
+async def embed_query(bridge: CmdBridge, query: str, vector_format: str) -> List[float]:
+    cmd_out = Cmd.create(EMBED_CMD)
+    cmd_out.set_property_string("input", query)
+    cmd_out.set_property_string("vector_format", vector_format)
+    return embed_from_resp(await bridge.send_cmd(cmd_out))
+
+
 class LlamaEmbedding(BaseEmbedding):
     ten: Any
-
-    def __init__(self, ten: TenEnv):
+    vector_format: str = VECTOR_FORMAT_JSON
+    bridge: Any = None
+    # a QueryEmbeddingCache shared by the turns, or None
+    cache: Any = None
+
+    def __init__(
+        self,
+        ten: TenEnv,
+        bridge: CmdBridge,
+        vector_format: str = VECTOR_FORMAT_JSON,
+        cache: Any = None,
+    ):
         """Creates a new Llama embedding interface."""
-        super().__init__()
-        self.ten = ten
+        super().__init__(
+            ten=ten, bridge=bridge, vector_format=vector_format, cache=cache
+        )
 
     @classmethod
     def class_name(cls) -> str:
         return "llama_embedding"
 
     async def _aget_query_embedding(self, query: str) -> List[float]:
-        return self._get_query_embedding(query)
+        self.ten.log_info(f"LlamaEmbedding generate embeddings for the query: {query}")
+        if self.cache is None:
+            return await embed_query(self.bridge, query, self.vector_format)
+        return await self.cache.get(
+            query, lambda text: embed_query(self.bridge, text, self.vector_format)
+        )
 
     async def _aget_text_embedding(self, text: str) -> List[float]:
-        return self._get_text_embedding(text)
+        return await self._aget_query_embedding(text)
 
     def _get_query_embedding(self, query: str) -> List[float]:
-        self.ten.log_info(f"LlamaEmbedding generate embeddings for the query: {query}")
-        wait_event = threading.Event()
-        resp: List[float]
-
-        def callback(_, result, __):
-            nonlocal resp
-            nonlocal wait_event
-
-            self.ten.log_debug("LlamaEmbedding embedding received")
-            resp = embed_from_resp(result)
-            wait_event.set()
-
-        cmd_out = Cmd.create(EMBED_CMD)
-        cmd_out.set_property_string("input", query)
-
-        self.ten.send_cmd(cmd_out, callback)
-        wait_event.wait()
-        return resp
+        # from a thread other than the bridge's
+        return self.bridge.submit(self._aget_query_embedding(query)).result()
 
     def _get_text_embedding(self, text: str) -> List[float]:
         return self._get_query_embedding(text)
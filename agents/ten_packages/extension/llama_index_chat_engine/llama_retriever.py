@@ -1,10 +1,13 @@
-import json, threading
+import concurrent.futures
+import json
 from typing import Any, List
 from llama_index.core.schema import QueryBundle, TextNode
 from llama_index.core.schema import NodeWithScore
 from llama_index.core.retrievers import BaseRetriever
 
+from .cmd_bridge import CmdBridge, RetrievalCancelled
 from .llama_embedding import LlamaEmbedding
+from .vector_codec import VECTOR_FORMAT_F32, VECTOR_FORMAT_JSON, pack_vectors
 from ten import (
     TenEnv,
     Cmd,
@@ -48,38 +51,51 @@ class LlamaRetriever(BaseRetriever):
     ten: Any
     embed_model: LlamaEmbedding
 
-    def __init__(self, ten: TenEnv, coll: str):
+    def __init__(
+        self,
+        ten: TenEnv,
+        coll: str,
+        bridge: CmdBridge,
+        vector_format: str = VECTOR_FORMAT_JSON,
+        cache: Any = None,
+    ):
         super().__init__()
         try:
             self.ten = ten
-            self.embed_model = LlamaEmbedding(ten=ten)
+            self.bridge = bridge
+            self.embed_model = LlamaEmbedding(
+                ten=ten, bridge=bridge, vector_format=vector_format, cache=cache
+            )
             self.collection_name = coll
         except Exception as e:
             ten.log_error(f"Failed to initialize LlamaRetriever: {e}")
 
-    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+    async def _aretrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
         self.ten.log_info(f"LlamaRetriever retrieve: {query_bundle.to_json}")
 
-        wait_event = threading.Event()
-        resp: List[NodeWithScore] = []
-
-        def cmd_callback(_, result, __):
-            nonlocal resp
-            nonlocal wait_event
-            resp = format_node_result(self.ten, result)
-            wait_event.set()
-            self.ten.log_debug("LlamaRetriever callback done")
-
-        embedding = self.embed_model.get_query_embedding(query=query_bundle.query_str)
+        embedding = await self.embed_model.aget_query_embedding(
+            query=query_bundle.query_str
+        )
 
         query_cmd = Cmd.create("query_vector")
         query_cmd.set_property_string("collection_name", self.collection_name)
         query_cmd.set_property_int("top_k", 3)
-        query_cmd.set_property_from_json("embedding", json.dumps(embedding))
+        if self.embed_model.vector_format == VECTOR_FORMAT_F32:
+            query_cmd.set_property_buf("embedding_buf", pack_vectors([embedding]))
+        else:
+            query_cmd.set_property_from_json("embedding", json.dumps(embedding))
         self.ten.log_info(
             f"LlamaRetriever send_cmd, collection_name: {self.collection_name}, embedding len: {len(embedding)}"
         )
-        self.ten.send_cmd(query_cmd, cmd_callback)
+        result = await self.bridge.send_cmd(query_cmd)
+        self.ten.log_debug("LlamaRetriever callback done")
+        return format_node_result(self.ten, result)
 
-        wait_event.wait()
-        return resp
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        # the chat engine's thread waits, the cmds run on the bridge's loop;
+        # a flush cancels the wait right away
+        future = self.bridge.submit(self._aretrieve(query_bundle))
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            raise RetrievalCancelled(query_bundle.query_str) from None
@@ -0,0 +1,68 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import collections
+from typing import Awaitable, Callable, Dict, List
+
+_TRAILING = " .?!,;:。？！，；："
+
+
+def normalize_query(text: str) -> str:
+    """Case, runs of whitespace and trailing punctuation do not change the key."""
+    return " ".join(text.split()).casefold().rstrip(_TRAILING)
+
+
+class QueryEmbeddingCache:
+    """Query embeddings by normalized text, least recently used first out.
+
+    Lookups of a text whose embedding is on its way share that embed call.
+    A waiter being cancelled does not cancel the call, so a flushed turn
+    still leaves its embedding for the next one.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: collections.OrderedDict[str, List[float]] = (
+            collections.OrderedDict()
+        )
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self, text: str, embed: Callable[[str], Awaitable[List[float]]]
+    ) -> List[float]:
+        key = normalize_query(text)
+        embedding = self._entries.get(key)
+        if embedding is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+        task = self._pending.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(embed(text))
+            self._pending[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    def metrics(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+    def _done(self, key: str, task: asyncio.Future) -> None:
+        self._pending.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._entries[key] = task.result()
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,113 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Turn overhead with a chat engine built per turn and with a pre-warmed one.
+
+Usage:
+    python tests/bench_chat_engine.py [turns]
+
+Each mode runs in a fresh interpreter so llama_index is imported cold, as
+when the extension starts. "per turn" imports llama_index on the first
+question and builds a ContextChatEngine for every turn, as the extension
+did. "warmed" imports it on a background thread from on_start, builds the
+engine once and reuses it. The first question comes right after on_start
+or after a 3 s pause (the user connecting and speaking). Overhead is the
+time from the question to the first streamed token, with MockLLM and a
+retriever returning fixed nodes standing in for the cmd round trips; the
+part spent getting an engine is shown next to it.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def run_mode(mode: str, delay: float, turns: int) -> dict:
+    import concurrent.futures
+
+    started = time.perf_counter()
+    if mode == "warmed":
+        executor = concurrent.futures.ThreadPoolExecutor(1)
+
+        def warm():
+            from chat_engines import create_chat_memory, warm_up
+
+            warm_up()
+            memory = create_chat_memory(3072)
+            return build(memory)
+
+        warm_future = executor.submit(warm)
+    on_start = time.perf_counter() - started
+    time.sleep(delay)
+
+    overheads, builds = [], []
+    memory = None
+    for turn in range(turns):
+        question = time.perf_counter()
+        if mode == "warmed":
+            engine = warm_future.result()
+        else:
+            from chat_engines import create_chat_memory
+
+            memory = memory or create_chat_memory(3072)
+            engine = build(memory)
+        builds.append(time.perf_counter() - question)
+        resp = engine.stream_chat(f"what does section {turn} say?")
+        next(iter(resp.response_gen))
+        overheads.append(time.perf_counter() - question)
+        for _ in resp.response_gen:
+            pass
+    return {"on_start": on_start, "overheads": overheads, "builds": builds}
+
+
+def build(memory):
+    from llama_index.core.llms import MockLLM
+    from llama_index.core.retrievers import BaseRetriever
+    from llama_index.core.schema import NodeWithScore, TextNode
+
+    from chat_engines import build_chat_engine
+
+    class FixedRetriever(BaseRetriever):
+        def _retrieve(self, query_bundle):
+            return [
+                NodeWithScore(node=TextNode(text=f"section {i} text"), score=0.5)
+                for i in range(3)
+            ]
+
+    return build_chat_engine(MockLLM(max_tokens=8), memory, FixedRetriever())
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        mode, delay, turns = sys.argv[2], float(sys.argv[3]), int(sys.argv[4])
+        print(json.dumps(run_mode(mode, delay, turns)))
+        return
+
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    for delay in (0.0, 3.0):
+        for mode in ("per turn", "warmed"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", mode, str(delay), str(turns)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            r = json.loads(out.splitlines()[-1])
+            steady = sorted(r["overheads"][1:])
+            steady_build = sorted(r["builds"][1:])
+            print(
+                f"{mode:<8} question at {delay:.0f}s  on_start {r['on_start'] * 1000:6.1f} ms  "
+                f"first turn {r['overheads'][0] * 1000:7.1f} ms  "
+                f"steady p50 {steady[len(steady) // 2] * 1000:5.2f} ms "
+                f"(engine {steady_build[len(steady_build) // 2] * 1000:5.2f} ms)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Per-turn retrieval latency and flush cancellation, blocking vs async.
+
+Usage:
+    python tests/bench_retrieval.py [turns]
+
+A simulated TEN env answers embed in 60 ms and query_vector in 40 ms from
+a timer thread; the LLM takes 300 ms to its first token and streams for
+500 ms more. A user turn (default 40) arrives 200 ms after the previous
+one started streaming, and one in four repeats an earlier question with
+different case or punctuation. Retrieval latency is measured on the chat
+engine's thread, from the start of its retrieval to the nodes.
+
+- blocking: the previous adapters, embed then query_vector, each waiting
+  on a threading.Event.
+- async: CmdBridge with QueryEmbeddingCache, the embedding prefetched when
+  the text arrives as the extension does.
+
+Cancellation is a flush 20 ms into a retrieval: the time until the chat
+engine's thread is free for the next turn. A blocking retrieval is not
+interruptible, so the turn goes on to the LLM and stops at its first token.
+"""
+
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from cmd_bridge import CmdBridge, RetrievalCancelled  # noqa: E402
+from query_embedding import QueryEmbeddingCache  # noqa: E402
+
+LATENCY = {"embed": 0.06, "query_vector": 0.04}
+FIRST_TOKEN = 0.3
+STREAM = 0.5
+
+
+class Ten:
+    def send_cmd(self, cmd, callback):
+        threading.Timer(
+            LATENCY[cmd], callback, args=(self, f"{cmd} result", None)
+        ).start()
+
+
+def blocking_send(ten, cmd):
+    done = threading.Event()
+    ten.send_cmd(cmd, lambda *_: done.set())
+    done.wait()
+
+
+def blocking_retrieve(ten, text):
+    blocking_send(ten, "embed")
+    blocking_send(ten, "query_vector")
+
+
+class AsyncRetrieval:
+    def __init__(self, ten):
+        self.bridge = CmdBridge(ten)
+        self.bridge.start()
+        self.cache = QueryEmbeddingCache()
+
+    async def embed(self, text):
+        return await self.bridge.send_cmd("embed")
+
+    def prefetch(self, text):
+        self.bridge.submit(self.cache.get(text, self.embed), False)
+
+    async def aretrieve(self, text):
+        await self.cache.get(text, self.embed)
+        return await self.bridge.send_cmd("query_vector")
+
+    def retrieve(self, text):
+        try:
+            return self.bridge.submit(self.aretrieve(text)).result()
+        except Exception as e:
+            raise RetrievalCancelled(text) from e
+
+
+def questions(turns):
+    rng = random.Random(3)
+    asked = []
+    for i in range(turns):
+        if asked and rng.random() < 0.25:
+            asked.append(rng.choice(asked).upper() + "?")
+        else:
+            asked.append(f"question number {i}")
+    return asked
+
+
+def conversation(turns, retrieve, prefetch=None):
+    latencies = []
+    for text in questions(turns):
+        if prefetch:
+            prefetch(text)  # on_data, while the previous turn streams
+        time.sleep(STREAM - 0.2)
+        start = time.perf_counter()
+        retrieve(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(FIRST_TOKEN)
+        time.sleep(0.2)
+    return latencies
+
+
+def cancellation(retrieve, flush, rounds=10):
+    waits = []
+    for i in range(rounds):
+
+        def turn():
+            try:
+                retrieve(f"cancelled question {i}")
+                # not cancelled: the LLM call starts, its first token shows
+                # the turn is outdated
+                time.sleep(FIRST_TOKEN)
+            except RetrievalCancelled:
+                pass
+
+        worker = threading.Thread(target=turn)
+        worker.start()
+        time.sleep(0.02)
+        start = time.perf_counter()
+        flush()
+        worker.join()
+        waits.append((time.perf_counter() - start) * 1000)
+    return waits
+
+
+def main() -> None:
+    turns = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    ten = Ten()
+    retrieval = AsyncRetrieval(ten)
+
+    print(f"{turns} turns, embed 60 ms, query_vector 40 ms")
+    for name, latencies, waits in (
+        (
+            "blocking",
+            conversation(turns, lambda t: blocking_retrieve(ten, t)),
+            cancellation(lambda t: blocking_retrieve(ten, t), lambda: None),
+        ),
+        (
+            "async",
+            conversation(turns, retrieval.retrieve, retrieval.prefetch),
+            cancellation(retrieval.retrieve, retrieval.bridge.cancel_inflight),
+        ),
+    ):
+        print(
+            f"{name:<9} retrieval p50 {statistics.median(latencies):6.1f} ms "
+            f"max {max(latencies):6.1f} ms  "
+            f"flush to idle {statistics.mean(waits):6.1f} ms"
+        )
+    print(f"query embedding cache {retrieval.cache.metrics()}")
+    retrieval.bridge.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from query_embedding import QueryEmbeddingCache, normalize_query  # noqa: E402
+
+
+def test_normalize_query():
+    assert normalize_query("  What is  TEN?\n") == "what is ten"
+    assert normalize_query("你好吗？") == normalize_query("你好吗")
+    assert normalize_query("what is ten") != normalize_query("what is tea")
+
+
+def test_shared_calls_lru_and_cancel():
+    calls = []
+
+    async def embed(text):
+        calls.append(text)
+        await asyncio.sleep(0.02)
+        return [float(len(text))]
+
+    async def scenario():
+        cache = QueryEmbeddingCache(max_entries=2)
+        first, second = await asyncio.gather(
+            cache.get("Hello there", embed), cache.get("hello there!", embed)
+        )
+        assert first == second == [11.0]
+
+        # a cancelled waiter leaves the embedding for the next turn
+        waiter = asyncio.ensure_future(cache.get("flushed", embed))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0.05)
+        assert await cache.get("Flushed", embed) == [7.0]
+
+        await cache.get("third", embed)  # "hello there" is the oldest
+        await cache.get("hello there", embed)
+        return cache.metrics()
+
+    metrics = asyncio.run(scenario())
+    assert calls == ["Hello there", "flushed", "third", "hello there"]
+    assert metrics == {"hits": 2, "misses": 4, "entries": 2}
@@ -0,0 +1,69 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from llama_index_chat_engine.cmd_bridge import (  # noqa: E402
+    CmdBridge,
+    RetrievalCancelled,
+)
+from llama_index_chat_engine.llama_retriever import LlamaRetriever  # noqa: E402
+
+
+class SilentTenEnv:
+    """Cmds are sent and never answered, like an embed stuck in flight."""
+
+    def __init__(self):
+        self.sent = threading.Event()
+
+    def send_cmd(self, cmd, callback):
+        self.sent.set()
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def test_flush_cancels_an_inflight_retrieve():
+    ten = SilentTenEnv()
+    bridge = CmdBridge(ten)
+    bridge.start()
+    retriever = LlamaRetriever(ten, "coll", bridge)
+    outcome = []
+
+    def chat_engine_turn():
+        try:
+            outcome.append(retriever.retrieve("what is ten"))
+        except RetrievalCancelled as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=chat_engine_turn)
+    thread.start()
+    try:
+        assert ten.sent.wait(5)
+        # what flush does
+        assert bridge.cancel_inflight() == 1
+        thread.join(5)
+        assert not thread.is_alive()
+        assert isinstance(outcome[0], RetrievalCancelled)
+        assert str(outcome[0]) == "what is ten"
+
+        async def pending():
+            await asyncio.sleep(0.01)
+            return asyncio.all_tasks() - {asyncio.current_task()}
+
+        # the retrieval on the bridge's loop is cancelled too
+        assert not asyncio.run_coroutine_threadsafe(pending(), bridge.loop).result(5)
+        assert bridge.cancel_inflight() == 0
+    finally:
+        bridge.close()
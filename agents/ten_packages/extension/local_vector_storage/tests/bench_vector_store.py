@@ -0,0 +1,102 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""query_vector latency vs collection size, exact and IVF, and IVF recall.
+
+Usage:
+    python tests/bench_vector_store.py [dimension] [size ...]
+
+Defaults to dimension 256 and 10k, 100k and 1M vectors (1 GB on disk at the
+largest). Rows are drawn around 2000 topic centers, as embeddings of
+document chunks cluster; queries are 100 rows with noise added. For each
+size the collection is filled through upsert in batches of 5000, then
+queried exactly (NumPy dot product over the memory-mapped matrix) and
+through an IVF index of sqrt(size) lists at several nprobe. Recall@10 is
+the share of the exact top 10 found by the IVF query.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vector_store import VectorStore  # noqa: E402
+
+TOP_K = 10
+QUERIES = 100
+BATCH = 5000
+
+
+def rows(rng, centers, count):
+    picked = centers[rng.integers(len(centers), size=count)]
+    return (picked + 0.5 * rng.standard_normal(picked.shape)).astype(np.float32)
+
+
+def latencies(collection, queries, nprobe):
+    results, times = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results.append({c for c, _ in collection.query(q, TOP_K, nprobe)})
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return (
+        results,
+        statistics.median(times) * 1000,
+        times[int(0.99 * len(times))] * 1000,
+    )
+
+
+def main() -> None:
+    dimension = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    sizes = [int(s) for s in sys.argv[2:]] or [10_000, 100_000, 1_000_000]
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((2000, dimension)).astype(np.float32)
+
+    print(f"dimension {dimension}, top {TOP_K}, {QUERIES} queries")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as root:
+            store = VectorStore(root, ivf_min_vectors=0)
+            store.create("bench", dimension)
+            data_rng = np.random.default_rng(size)
+            start = time.perf_counter()
+            for offset in range(0, size, BATCH):
+                count = min(BATCH, size - offset)
+                texts = [str(offset + i) for i in range(count)]
+                store.upsert("bench", "f", texts, rows(data_rng, centers, count))
+            upsert_s = time.perf_counter() - start
+            collection = store.get("bench")
+            picked = collection.vectors[data_rng.integers(size, size=QUERIES)]
+            queries = picked + 0.1 * data_rng.standard_normal(picked.shape)
+
+            exact, p50, p99 = latencies(collection, queries, 0)
+            print(
+                f"{size:>8} vectors  upsert {size / upsert_s:8.0f} rows/s  "
+                f"exact      p50 {p50:7.2f} ms p99 {p99:7.2f} ms"
+            )
+            start = time.perf_counter()
+            index = collection.build_index()
+            print(
+                f"{'':>8}          ivf {len(index.centroids)} lists built in "
+                f"{time.perf_counter() - start:.1f} s"
+            )
+            for nprobe in (4, 16, 64):
+                approx, p50, p99 = latencies(collection, queries, nprobe)
+                recall = sum(len(a & e) for a, e in zip(approx, exact)) / (
+                    TOP_K * QUERIES
+                )
+                print(
+                    f"{'':>8}          ivf nprobe {nprobe:<3} p50 {p50:7.2f} ms "
+                    f"p99 {p99:7.2f} ms  recall@{TOP_K} {recall:.3f}"
+                )
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vector_store import LOG_FILE, VectorStore  # noqa: E402
+
+
+def clustered(count: int, dimension: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(32, dimension))
+    rows = centers[rng.integers(32, size=count)] + 0.3 * rng.normal(
+        size=(count, dimension)
+    )
+    return rows.astype(np.float32)
+
+
+def test_exact_top_k_and_reopen(tmp_path):
+    store = VectorStore(str(tmp_path), ivf_min_vectors=0)
+    store.create("coll_a")  # dimension from the first upsert
+    store.upsert("coll_a", "a.txt", ["x", "y"], [[1.0, 0.0, 0.0], [0.0, 2.0, 0.0]])
+    store.upsert("coll_a", "b.txt", ["xy"], [[1.0, 1.0, 0.0]])
+
+    matches = store.query("coll_a", [3.0, 0.1, 0.0], top_k=2)
+    assert [c for c, _ in matches] == ["x", "xy"]
+    assert matches[0][1] == pytest.approx(3 / np.hypot(3, 0.1), rel=1e-6)
+    with pytest.raises(ValueError):
+        store.upsert("coll_a", "c.txt", ["z"], [[1.0, 0.0]])
+    store.close()
+
+    # a line cut short by a crash is dropped on open
+    with open(tmp_path / "coll_a" / LOG_FILE, "a", encoding="utf-8") as f:
+        f.write('{"file_name": "c.txt", "cont')
+    reopened = VectorStore(str(tmp_path), ivf_min_vectors=0)
+    assert [c for c, _ in reopened.query("coll_a", [0.0, 1.0, 0.0], 5)] == [
+        "y",
+        "xy",
+        "x",
+    ]
+    reopened.upsert("coll_a", "c.txt", ["z"], [[0.0, 0.0, 1.0]])
+    assert reopened.query("coll_a", [0.0, 0.0, 1.0], 1)[0][0] == "z"
+
+    reopened.delete("coll_a")
+    with pytest.raises(KeyError):
+        reopened.query("coll_a", [1.0, 0.0, 0.0], 1)
+    with pytest.raises(ValueError):
+        reopened.create("../escape")
+
+
+def test_ivf_recall_and_growth(tmp_path):
+    dimension = 32
+    rows = clustered(4000, dimension)
+    store = VectorStore(str(tmp_path), ivf_min_vectors=2000, ivf_nprobe=8)
+    store.create("coll_b", dimension)
+    for start in range(0, 2000, 500):
+        chunk = rows[start : start + 500]
+        store.upsert("coll_b", "f", [str(start + i) for i in range(500)], chunk)
+    store.wait_index("coll_b")
+    collection = store.get("coll_b")
+    assert collection.index is not None and collection.index.trained == 2000
+
+    # rows after training are listed too
+    store.upsert("coll_b", "f", [str(i) for i in range(2000, 3000)], rows[2000:3000])
+    assert len(collection.index) == 3000 and collection.index.trained == 2000
+    store.upsert("coll_b", "f", [str(i) for i in range(3000, 4000)], rows[3000:])
+    store.wait_index("coll_b")
+    assert len(collection.index) == 4000 and collection.index.trained == 4000
+
+    queries = rows[::97] + 0.05
+    hits = 0
+    for q in queries:
+        exact = collection.query(q, 10, nprobe=0)
+        approx = collection.query(q, 10, nprobe=8)
+        hits += len({c for c, _ in exact} & {c for c, _ in approx})
+    assert hits / (10 * len(queries)) >= 0.9
+    store.close()
+
+
+def test_training_does_not_hold_up_upsert_and_query(tmp_path):
+    dimension = 16
+    rows = clustered(1500, dimension)
+    store = VectorStore(str(tmp_path), ivf_min_vectors=1000, ivf_nprobe=4)
+    store.create("coll_c", dimension)
+
+    # the trainer is busy until released
+    release = threading.Event()
+    store._trainer.submit(release.wait)
+    store.upsert("coll_c", "f", [str(i) for i in range(1000)], rows[:1000])
+    store.upsert("coll_c", "f", [str(i) for i in range(1000, 1500)], rows[1000:])
+    collection = store.get("coll_c")
+    assert collection.index is None
+    assert store.query("coll_c", rows[1200], 1)[0][0] == "1200"
+
+    release.set()
+    store.wait_index("coll_c")
+    # trained on the rows at the time, rows upserted since are listed too
+    assert len(collection.index) == 1500
+    assert store.query("coll_c", rows[1200], 1)[0][0] == "1200"
+    store.close()
@@ -0,0 +1,14 @@
+from ten import (
+    Addon,
+    register_addon_as_extension,
+    TenEnv,
+)
+
+
+@register_addon_as_extension("local_vector_storage")
+class LocalVectorStorageExtensionAddon(Addon):
+    def on_create_instance(self, ten: TenEnv, addon_name: str, context) -> None:
+        from .vector_storage_extension import LocalVectorStorageExtension
+
+        ten.log_info("on_create_instance")
+        ten.on_create_instance_done(LocalVectorStorageExtension(addon_name), context)
@@ -0,0 +1,146 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import concurrent.futures
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from ten import (
+    Extension,
+    TenEnv,
+    Cmd,
+    Data,
+    StatusCode,
+    CmdResult,
+)
+
+from .vector_codec import unpack_vectors
+from .vector_store import VectorStore
+
+PROPERTY_DIRECTORY = "directory"  # Optional, a temp dir if empty
+PROPERTY_IVF_MIN_VECTORS = "ivf_min_vectors"  # Optional, 0 is exact search only
+PROPERTY_IVF_NPROBE = "ivf_nprobe"  # Optional
+
+
+class LocalVectorStorageExtension(Extension):
+    """create_collection, upsert_vector, query_vector and delete_collection of
+    aliyun_analyticdb_vector_storage, served from files on this host."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.directory = ""
+        self.ivf_min_vectors = 100000
+        self.ivf_nprobe = 16
+        self.store = None
+        # one worker: the cmds on a collection run in the order received
+        self.executor = None
+
+    def on_start(self, ten: TenEnv) -> None:
+        ten.log_info("on_start")
+        try:
+            self.directory = ten.get_property_string(PROPERTY_DIRECTORY)
+        except Exception as err:
+            ten.log_warn(f"get {PROPERTY_DIRECTORY} property failed, err: {err}")
+        if not self.directory:
+            self.directory = os.path.join(tempfile.gettempdir(), "local_vector_storage")
+        try:
+            self.ivf_min_vectors = ten.get_property_int(PROPERTY_IVF_MIN_VECTORS)
+        except Exception as err:
+            ten.log_warn(f"get {PROPERTY_IVF_MIN_VECTORS} property failed, err: {err}")
+        try:
+            self.ivf_nprobe = ten.get_property_int(PROPERTY_IVF_NPROBE)
+        except Exception as err:
+            ten.log_warn(f"get {PROPERTY_IVF_NPROBE} property failed, err: {err}")
+
+        self.store = VectorStore(self.directory, self.ivf_min_vectors, self.ivf_nprobe)
+        self.executor = concurrent.futures.ThreadPoolExecutor(1)
+        ten.log_info(f"collections in {self.directory}")
+        ten.on_start_done()
+
+    def on_stop(self, ten: TenEnv) -> None:
+        ten.log_info("on_stop")
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+            self.store.close()
+        ten.on_stop_done()
+
+    def on_data(self, ten: TenEnv, data: Data) -> None:
+        pass
+
+    def on_cmd(self, ten: TenEnv, cmd: Cmd) -> None:
+        cmd_name = cmd.get_name()
+        ten.log_info(f"on_cmd [{cmd_name}]")
+        handler = {
+            "create_collection": self.create_collection,
+            "delete_collection": self.delete_collection,
+            "upsert_vector": self.upsert_vector,
+            "query_vector": self.query_vector,
+        }.get(cmd_name)
+        if handler is None:
+            ten.return_result(CmdResult.create(StatusCode.ERROR), cmd)
+            return
+        self.executor.submit(self.handle_cmd, ten, cmd, handler)
+
+    def handle_cmd(self, ten: TenEnv, cmd: Cmd, handler) -> None:
+        start_time = datetime.now()
+        try:
+            cmd_result = handler(ten, cmd)
+        except Exception as e:
+            ten.log_error(f"{cmd.get_name()} failed, err: {e}")
+            cmd_result = CmdResult.create(StatusCode.ERROR)
+        ten.return_result(cmd_result, cmd)
+        ten.log_info(
+            f"{cmd.get_name()} finished, cost {int((datetime.now() - start_time).total_seconds() * 1000)}ms"
+        )
+
+    def create_collection(self, ten: TenEnv, cmd: Cmd) -> CmdResult:
+        collection = cmd.get_property_string("collection_name")
+        dimension = 0  # known from the first upsert
+        try:
+            dimension = cmd.get_property_int("dimension")
+        except Exception:
+            pass
+        self.store.create(collection, dimension)
+        return CmdResult.create(StatusCode.OK)
+
+    def delete_collection(self, ten: TenEnv, cmd: Cmd) -> CmdResult:
+        self.store.delete(cmd.get_property_string("collection_name"))
+        return CmdResult.create(StatusCode.OK)
+
+    def upsert_vector(self, ten: TenEnv, cmd: Cmd) -> CmdResult:
+        collection = cmd.get_property_string("collection_name")
+        file = cmd.get_property_string("file_name")
+        items = json.loads(cmd.get_property_string("content"))
+        try:
+            embeddings = unpack_vectors(cmd.get_property_buf("embeddings_buf"))
+        except Exception:
+            embeddings = [item["embedding"] for item in items]
+        if len(embeddings) != len(items):
+            raise ValueError(f"{len(items)} texts but {len(embeddings)} embeddings")
+
+        self.store.upsert(collection, file, [i["text"] for i in items], embeddings)
+        ten.log_info(
+            f"upsert_vector for file {file}, collection {collection}, rows {len(items)}"
+        )
+        return CmdResult.create(StatusCode.OK)
+
+    def query_vector(self, ten: TenEnv, cmd: Cmd) -> CmdResult:
+        collection = cmd.get_property_string("collection_name")
+        top_k = cmd.get_property_int("top_k")
+        try:
+            (vector,) = unpack_vectors(cmd.get_property_buf("embedding_buf"))
+        except Exception:
+            vector = json.loads(cmd.get_property_to_json("embedding"))
+
+        matches = self.store.query(collection, vector, top_k)
+        cmd_result = CmdResult.create(StatusCode.OK)
+        cmd_result.set_property_from_json(
+            "response",
+            json.dumps([{"content": c, "score": s} for c, s in matches]),
+        )
+        return cmd_result
@@ -0,0 +1,332 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import concurrent.futures
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+META_FILE = "collection.json"
+VECTORS_FILE = "vectors.f32"
+LOG_FILE = "rows.jsonl"
+
+_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+_ASSIGN_CHUNK = 16384
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if k < len(scores):
+        best = np.argpartition(-scores, k)[:k]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def _nearest(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    labels = np.empty(len(rows), dtype=np.int32)
+    for start in range(0, len(rows), _ASSIGN_CHUNK):
+        chunk = np.asarray(rows[start : start + _ASSIGN_CHUNK])
+        labels[start : start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+class IvfIndex:
+    """Inverted file index: rows are listed under their nearest centroid.
+
+    A query is compared to the rows listed under its nprobe nearest
+    centroids only. Centroids come from spherical k-means on a sample of
+    the rows; rows added later are listed without retraining.
+    """
+
+    def __init__(self, centroids: np.ndarray) -> None:
+        self.centroids = centroids
+        self.trained = 0  # rows the centroids were trained on
+        self.labels = np.empty(0, dtype=np.int32)
+        self._order: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    @classmethod
+    def train(
+        cls, rows: np.ndarray, nlist: int, iterations: int = 8, seed: int = 0
+    ) -> "IvfIndex":
+        rng = np.random.default_rng(seed)
+        nlist = max(1, min(nlist, len(rows)))
+        sample_size = min(len(rows), nlist * 64)
+        sample = np.asarray(rows[np.sort(rng.choice(len(rows), sample_size, False))])
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = _nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            # an empty list restarts from a random row
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        index = cls(centroids)
+        index.trained = len(rows)
+        index.add(rows)
+        index._build_lists()
+        return index
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def add(self, rows: np.ndarray) -> None:
+        self.labels = np.concatenate([self.labels, _nearest(rows, self.centroids)])
+        self._order = None
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        if self._order is None:
+            self._build_lists()
+        probes = _top_k(self.centroids @ query, nprobe)
+        return np.concatenate(
+            [self._order[self._offsets[p] : self._offsets[p + 1]] for p in probes]
+        )
+
+    def _build_lists(self) -> None:
+        # rows sorted by list, and where each list starts
+        self._order = np.argsort(self.labels, kind="stable")
+        self._offsets = np.searchsorted(
+            self.labels[self._order], np.arange(len(self.centroids) + 1)
+        )
+
+
+class Collection:
+    """Rows of one collection in a directory.
+
+    The vectors, normalized, are a float32 matrix in a memory-mapped file
+    that grows by doubling; the texts are an append log of JSON lines. The
+    log is written after the vectors, so its length is the row count.
+    """
+
+    def __init__(self, path: str, dimension: int = 0) -> None:
+        self.path = path
+        self.dimension = dimension
+        self.contents: List[str] = []
+        self.index: Optional[IvfIndex] = None
+        self._matrix: Optional[np.memmap] = None
+        # upsert against an index trained on another thread
+        self._lock = threading.Lock()
+
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                self.dimension = json.load(f)["dimension"]
+            self._read_log()
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._write_meta()
+        if self.dimension:
+            self._map(max(len(self), 1024))
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        if self._matrix is None:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return self._matrix[: len(self)]
+
+    def upsert(
+        self, file_name: str, contents: Sequence[str], vectors: Sequence
+    ) -> None:
+        rows = np.asarray(vectors, dtype=np.float32).reshape(len(contents), -1)
+        if not self.dimension:
+            # create_collection does not always say, the first rows do
+            self.dimension = rows.shape[1]
+            self._write_meta()
+            self._map(1024)
+        if rows.shape[1] != self.dimension:
+            raise ValueError(
+                f"vectors of dimension {rows.shape[1]}, collection has {self.dimension}"
+            )
+        rows = _normalize(rows)
+
+        with self._lock:
+            start = len(self)
+            if start + len(rows) > len(self._matrix):
+                self._map(max(2 * len(self._matrix), start + len(rows)))
+            self._matrix[start : start + len(rows)] = rows
+            self._matrix.flush()
+            with open(os.path.join(self.path, LOG_FILE), "a", encoding="utf-8") as f:
+                for content in contents:
+                    f.write(json.dumps({"file_name": file_name, "content": content}))
+                    f.write("\n")
+            self.contents.extend(contents)
+            if self.index is not None:
+                self.index.add(rows)
+
+    def query(
+        self, vector: Sequence[float], top_k: int, nprobe: int = 0
+    ) -> List[Tuple[str, float]]:
+        if not len(self):
+            return []
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        if self.index is not None and nprobe > 0:
+            rows = self.index.candidates(query, nprobe)
+            scores = self._matrix[rows] @ query
+            order = _top_k(scores, top_k)
+            best, scores = rows[order], scores[order]
+        else:
+            scores = self.vectors @ query
+            best = _top_k(scores, top_k)
+            scores = scores[best]
+        return [(self.contents[i], float(s)) for i, s in zip(best, scores)]
+
+    def build_index(self, nlist: int = 0) -> IvfIndex:
+        self.index = IvfIndex.train(self.vectors, nlist or int(np.sqrt(len(self))))
+        return self.index
+
+    def train_index(self) -> None:
+        """build_index that can run beside upsert and query.
+
+        Trains on the rows there are now, then lists the rows upserted in
+        the meantime and swaps the new index in. Until then queries use
+        the previous index, or no index.
+        """
+        with self._lock:
+            if self._matrix is None:
+                return
+            rows = self.vectors
+        index = IvfIndex.train(rows, int(np.sqrt(len(rows))))
+        with self._lock:
+            if self._matrix is None:
+                return  # closed while training
+            if len(self) > len(index):
+                index.add(self._matrix[len(index) : len(self)])
+            index._build_lists()
+            self.index = index
+
+    def close(self) -> None:
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+
+    def _write_meta(self) -> None:
+        with open(os.path.join(self.path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"dimension": self.dimension}, f)
+
+    def _read_log(self) -> None:
+        log_path = os.path.join(self.path, LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, "rb") as f:
+            data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            # a write cut short, its vectors were never counted
+            os.truncate(log_path, complete)
+        for line in data[:complete].splitlines():
+            row = json.loads(line)
+            self.contents.append(row["content"])
+
+    def _map(self, capacity: int) -> None:
+        vectors_path = os.path.join(self.path, VECTORS_FILE)
+        size = capacity * self.dimension * 4
+        with open(vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = np.memmap(
+            vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension)
+        )
+
+
+class VectorStore:
+    """Collections under a directory, opened on first use.
+
+    A collection of ivf_min_vectors rows or more gets an IVF index, trained
+    again whenever it has doubled since; queries then look at ivf_nprobe
+    lists. ivf_min_vectors 0 keeps every query exact. Training runs on a
+    thread of its own, so upserts and queries do not wait for it.
+    """
+
+    def __init__(
+        self, directory: str, ivf_min_vectors: int = 100000, ivf_nprobe: int = 16
+    ) -> None:
+        self.directory = directory
+        self.ivf_min_vectors = ivf_min_vectors
+        self.ivf_nprobe = ivf_nprobe
+        self._collections: Dict[str, Collection] = {}
+        self._training: Dict[str, concurrent.futures.Future] = {}
+        self._trainer = concurrent.futures.ThreadPoolExecutor(1)
+        os.makedirs(directory, exist_ok=True)
+
+    def create(self, name: str, dimension: int = 0) -> Collection:
+        if not os.path.isdir(self._path(name)):
+            self._collections[name] = Collection(self._path(name), dimension)
+        return self.get(name)
+
+    def get(self, name: str) -> Collection:
+        collection = self._collections.get(name)
+        if collection is None:
+            if not os.path.isdir(self._path(name)):
+                raise KeyError(f"collection {name} does not exist")
+            collection = Collection(self._path(name))
+            self._collections[name] = collection
+            self._maintain_index(name, collection)
+        return collection
+
+    def delete(self, name: str) -> None:
+        self._training.pop(name, None)
+        collection = self._collections.pop(name, None)
+        if collection is not None:
+            collection.close()
+        shutil.rmtree(self._path(name), ignore_errors=True)
+
+    def upsert(
+        self, name: str, file_name: str, contents: Sequence[str], vectors: Sequence
+    ) -> None:
+        collection = self.get(name)
+        collection.upsert(file_name, contents, vectors)
+        self._maintain_index(name, collection)
+
+    def query(
+        self, name: str, vector: Sequence[float], top_k: int
+    ) -> List[Tuple[str, float]]:
+        return self.get(name).query(vector, top_k, self.ivf_nprobe)
+
+    def wait_index(self, name: str) -> None:
+        """Block until the index of name in training, if any, is in use."""
+        training = self._training.get(name)
+        if training is not None:
+            training.result()
+
+    def close(self) -> None:
+        self._trainer.shutdown(wait=True)
+        for collection in self._collections.values():
+            collection.close()
+        self._collections.clear()
+        self._training.clear()
+
+    def _path(self, name: str) -> str:
+        if not _NAME.match(name):
+            raise ValueError(f"invalid collection name {name!r}")
+        return os.path.join(self.directory, name)
+
+    def _maintain_index(self, name: str, collection: Collection) -> None:
+        if self.ivf_min_vectors <= 0 or len(collection) < self.ivf_min_vectors:
+            return
+        training = self._training.get(name)
+        if training is not None and not training.done():
+            return
+        index = collection.index
+        if index is None or len(collection) >= 2 * index.trained:
+            self._training[name] = self._trainer.submit(collection.train_index)
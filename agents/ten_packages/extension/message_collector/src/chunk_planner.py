@@ -0,0 +1,83 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import base64
+
+FRAMING_BASE64 = "base64"
+FRAMING_RAW = "raw"
+
+
+def plan_parts(payload_len: int, msg_id_len: int, max_size: int) -> list[int]:
+    """Payload bytes of each `msg_id|part|total|payload` chunk.
+
+    Every chunk but the last is exactly max_size bytes. The header takes
+    msg_id, three separators and the decimal part and total counters, whose
+    widths are known once the number of digits of total is; that is found by
+    trying one digit first, then two, and so on.
+    """
+    if payload_len <= 0:
+        return []
+
+    fixed = msg_id_len + 3
+    total_digits = 1
+    while True:
+        sizes = []
+        remaining = payload_len
+        part_digits, next_width_at = 1, 10
+        while remaining > 0:
+            part = len(sizes) + 1
+            if part == next_width_at:
+                part_digits += 1
+                next_width_at *= 10
+            capacity = max_size - fixed - part_digits - total_digits
+            if capacity <= 0:
+                raise ValueError(f"max_size {max_size} leaves no room for payload")
+            size = min(capacity, remaining)
+            sizes.append(size)
+            remaining -= size
+        if len(sizes) < 10**total_digits:
+            return sizes
+        total_digits += 1
+
+
+def text_to_chunks(
+    text: str, msg_id: str, max_size: int = 1024, framing: str = FRAMING_BASE64
+) -> list[bytearray]:
+    """Split text into `msg_id|part|total|payload` chunks of at most max_size.
+
+    With the default base64 framing the payload is the base64 encoded UTF-8
+    text, as clients expect it. Raw framing carries the UTF-8 bytes as they
+    are, a quarter smaller; the cut may fall inside a character, so a client
+    must split each chunk at its first three separators only and decode the
+    payloads after joining them.
+    """
+    if len(msg_id) > 36:
+        raise ValueError("msg_id cannot exceed 36 characters.")
+
+    payload = text.encode("utf-8")
+    if framing == FRAMING_BASE64:
+        payload = base64.b64encode(payload)
+    elif framing != FRAMING_RAW:
+        raise ValueError(f"unknown framing {framing}")
+
+    msg_id_bytes = msg_id.encode("utf-8")
+    if payload and len(msg_id_bytes) + 5 + len(payload) <= max_size:
+        # Most messages fit in one chunk: msg_id|1|1|payload.
+        return [bytearray(b"%s|1|1|%s" % (msg_id_bytes, payload))]
+
+    sizes = plan_parts(len(payload), len(msg_id_bytes), max_size)
+    total = len(sizes)
+    source = memoryview(payload)
+
+    chunks = []
+    position = 0
+    for part, size in enumerate(sizes, 1):
+        header = b"%s|%d|%d|" % (msg_id_bytes, part, total)
+        chunk = bytearray(len(header) + size)
+        chunk[: len(header)] = header
+        chunk[len(header) :] = source[position : position + size]
+        chunks.append(chunk)
+        position += size
+    return chunks
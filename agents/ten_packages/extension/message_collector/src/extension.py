@@ -5,7 +5,6 @@
 # Copyright (c) 2024 Agora IO. All rights reserved.
 #
 #
-import base64
 import json
 import threading
 import time
@@ -22,8 +21,9 @@ from ten import (
 )
 import asyncio
 
-MAX_SIZE = 800  # 1 KB limit
-OVERHEAD_ESTIMATE = 200  # Estimate for the overhead of metadata in the JSON
+from .chunk_planner import FRAMING_BASE64, text_to_chunks
+from .pacer import Pacer
+from .transcript_delta import MODE_DELTA, TranscriptDeltaEncoder
 
 CMD_NAME_FLUSH = "flush"
 
@@ -34,74 +34,28 @@ TEXT_DATA_END_OF_SEGMENT_FIELD = "end_of_segment"
 
 MAX_CHUNK_SIZE_BYTES = 1024
 
+PROPERTY_MAX_SEND_RATE = "max_send_rate"
+PROPERTY_MAX_SEND_BURST = "max_send_burst"
+PROPERTY_MAX_SEND_BYTES_PER_SECOND = "max_send_bytes_per_second"
+PROPERTY_CHUNK_FRAMING = "chunk_framing"
+PROPERTY_TRANSCRIPT_MODE = "transcript_mode"
+PROPERTY_TRANSCRIPT_SNAPSHOT_INTERVAL_MS = "transcript_snapshot_interval_ms"
 
-def _text_to_base64_chunks(_: TenEnv, text: str, msg_id: str) -> list:
-    # Ensure msg_id does not exceed 50 characters
-    if len(msg_id) > 36:
-        raise ValueError("msg_id cannot exceed 36 characters.")
-
-    # Convert text to bytearray
-    byte_array = bytearray(text, "utf-8")
-
-    # Encode the bytearray into base64
-    base64_encoded = base64.b64encode(byte_array).decode("utf-8")
-
-    # Initialize list to hold the final chunks
-    chunks = []
-
-    # We'll split the base64 string dynamically based on the final byte size
-    part_index = 0
-    total_parts = (
-        None  # We'll calculate total parts once we know how many chunks we create
-    )
-
-    # Process the base64-encoded content in chunks
-    current_position = 0
-    total_length = len(base64_encoded)
-
-    while current_position < total_length:
-        part_index += 1
-
-        # Start guessing the chunk size by limiting the base64 content part
-        estimated_chunk_size = MAX_CHUNK_SIZE_BYTES  # We'll reduce this dynamically
-        content_chunk = ""
-        count = 0
-        while True:
-            # Create the content part of the chunk
-            content_chunk = base64_encoded[
-                current_position : current_position + estimated_chunk_size
-            ]
-
-            # Format the chunk
-            formatted_chunk = f"{msg_id}|{part_index}|{total_parts if total_parts else '???'}|{content_chunk}"
-
-            # Check if the byte length of the formatted chunk exceeds the max allowed size
-            if len(bytearray(formatted_chunk, "utf-8")) <= MAX_CHUNK_SIZE_BYTES:
-                break
-            else:
-                # Reduce the estimated chunk size if the formatted chunk is too large
-                estimated_chunk_size -= 100  # Reduce content size gradually
-                count += 1
-
-        # ten_env.log_debug(f"chunk estimate guess: {count}")
-
-        # Add the current chunk to the list
-        chunks.append(formatted_chunk)
-        # Move to the next part of the content
-        current_position += estimated_chunk_size
-
-    # Now that we know the total number of parts, update the chunks with correct total_parts
-    total_parts = len(chunks)
-    updated_chunks = [chunk.replace("???", str(total_parts)) for chunk in chunks]
-
-    return updated_chunks
+# RTC data stream limits are 60 packets and 30 KB per second; rate + burst
+# stays within them over any one second window.
+DEFAULT_MAX_SEND_RATE = 50
+DEFAULT_MAX_SEND_BURST = 10
+DEFAULT_MAX_SEND_BYTES_PER_SECOND = 24 * 1024
 
 
 class MessageCollectorExtension(Extension):
     def __init__(self, name: str):
         super().__init__(name)
-        self.queue = asyncio.Queue()
         self.loop = None
+        self.pacer = None
+        self.pacer_future = None
+        self.chunk_framing = FRAMING_BASE64
+        self.transcript = None
         self.cached_text_map = {}
 
     def on_init(self, ten_env: TenEnv) -> None:
@@ -111,7 +65,47 @@ class MessageCollectorExtension(Extension):
     def on_start(self, ten_env: TenEnv) -> None:
         ten_env.log_info("on_start")
 
-        # TODO: read properties, initialize resources
+        limits = {
+            PROPERTY_MAX_SEND_RATE: DEFAULT_MAX_SEND_RATE,
+            PROPERTY_MAX_SEND_BURST: DEFAULT_MAX_SEND_BURST,
+            PROPERTY_MAX_SEND_BYTES_PER_SECOND: DEFAULT_MAX_SEND_BYTES_PER_SECOND,
+        }
+        for name in limits:
+            try:
+                limits[name] = ten_env.get_property_int(name)
+            except Exception as err:
+                ten_env.log_warn(f"get {name} property failed, err: {err}")
+
+        try:
+            self.chunk_framing = ten_env.get_property_string(PROPERTY_CHUNK_FRAMING)
+        except Exception as err:
+            ten_env.log_warn(
+                f"get {PROPERTY_CHUNK_FRAMING} property failed, err: {err}"
+            )
+
+        transcript_mode = None
+        snapshot_interval_ms = 15000
+        try:
+            transcript_mode = ten_env.get_property_string(PROPERTY_TRANSCRIPT_MODE)
+            snapshot_interval_ms = ten_env.get_property_int(
+                PROPERTY_TRANSCRIPT_SNAPSHOT_INTERVAL_MS
+            )
+        except Exception as err:
+            ten_env.log_warn(f"get transcript properties failed, err: {err}")
+        if transcript_mode == MODE_DELTA:
+            self.transcript = TranscriptDeltaEncoder(snapshot_interval_ms)
+
+        rate = limits[PROPERTY_MAX_SEND_RATE]
+        burst = limits[PROPERTY_MAX_SEND_BURST]
+        bytes_rate = limits[PROPERTY_MAX_SEND_BYTES_PER_SECOND]
+        self.pacer = Pacer(
+            lambda chunk: self._send_chunk(ten_env, chunk),
+            rate=rate,
+            burst=burst,
+            bytes_rate=bytes_rate,
+            # The same share of a second as the packet burst.
+            bytes_burst=bytes_rate * burst / max(rate, 1),
+        )
         self.loop = asyncio.new_event_loop()
 
         def start_loop():
@@ -120,14 +114,21 @@ class MessageCollectorExtension(Extension):
 
         threading.Thread(target=start_loop, args=[]).start()
 
-        self.loop.create_task(self._process_queue(ten_env))
+        self.pacer_future = asyncio.run_coroutine_threadsafe(
+            self.pacer.run(), self.loop
+        )
 
         ten_env.on_start_done()
 
     def on_stop(self, ten_env: TenEnv) -> None:
         ten_env.log_info("on_stop")
 
-        # TODO: clean up resources
+        if self.loop:
+            ten_env.log_info(f"send metrics: {self.pacer.metrics()}")
+            self.pacer_future.add_done_callback(
+                lambda _: self.loop.call_soon_threadsafe(self.loop.stop)
+            )
+            self.loop.call_soon_threadsafe(self.pacer.close)
 
         ten_env.on_stop_done()
 
@@ -188,9 +189,21 @@ class MessageCollectorExtension(Extension):
                 f"on_data {TEXT_DATA_TEXT_FIELD}: {text} {TEXT_DATA_FINAL_FIELD}: {final} {TEXT_DATA_STREAM_ID_FIELD}: {stream_id} {TEXT_DATA_END_OF_SEGMENT_FIELD}: {end_of_segment}"
             )
 
+            # A newer update of a stream's segment replaces the last one
+            # on the client, so one still queued can be replaced too.
+            coalesce = not end_of_segment
+            delta_fields = {}
+            if self.transcript:
+                # Only the appended text, see TranscriptDeltaEncoder.
+                update = self.transcript.update(stream_id, text, final, end_of_segment)
+                if update is None:
+                    return
+                text = update.text
+                coalesce = update.coalesce
+                delta_fields = update.fields()
             # We cache all final text data and append the non-final text data to the cached data
             # until the end of the segment.
-            if end_of_segment:
+            elif end_of_segment:
                 if stream_id in self.cached_text_map:
                     text = self.cached_text_map[stream_id] + text
                     del self.cached_text_map[stream_id]
@@ -212,16 +225,19 @@ class MessageCollectorExtension(Extension):
                 "data_type": "transcribe",
                 "text_ts": int(time.time() * 1000),  # Convert to milliseconds
                 "text": text,
+                **delta_fields,
             }
 
             try:
-                chunks = _text_to_base64_chunks(
-                    ten_env, json.dumps(base_msg_data), message_id
+                chunks = text_to_chunks(
+                    json.dumps(base_msg_data),
+                    message_id,
+                    MAX_CHUNK_SIZE_BYTES,
+                    self.chunk_framing,
+                )
+                self.loop.call_soon_threadsafe(
+                    self.pacer.put, chunks, stream_id, coalesce
                 )
-                for chunk in chunks:
-                    asyncio.run_coroutine_threadsafe(
-                        self._queue_message(chunk), self.loop
-                    )
 
             except Exception as e:
                 ten_env.log_warn(f"on_data new_data error: {e}")
@@ -256,13 +272,13 @@ class MessageCollectorExtension(Extension):
             }
 
             try:
-                chunks = _text_to_base64_chunks(
-                    ten_env, json.dumps(base_msg_data), message_id
+                chunks = text_to_chunks(
+                    json.dumps(base_msg_data),
+                    message_id,
+                    MAX_CHUNK_SIZE_BYTES,
+                    self.chunk_framing,
                 )
-                for chunk in chunks:
-                    asyncio.run_coroutine_threadsafe(
-                        self._queue_message(chunk), self.loop
-                    )
+                self.loop.call_soon_threadsafe(self.pacer.put, chunks)
 
             except Exception as e:
                 ten_env.log_warn(f"on_data new_data error: {e}")
@@ -275,17 +291,10 @@ class MessageCollectorExtension(Extension):
         # TODO: process image frame
         pass
 
-    async def _queue_message(self, data: str):
-        await self.queue.put(data)
-
-    async def _process_queue(self, ten_env: TenEnv):
-        while True:
-            data = await self.queue.get()
-            if data is None:
-                break
-            # process data
+    def _send_chunk(self, ten_env: TenEnv, chunk: bytearray) -> None:
+        try:
             ten_data = Data.create("data")
-            ten_data.set_property_buf("data", data.encode())
+            ten_data.set_property_buf("data", chunk)
             ten_env.send_data(ten_data)
-            self.queue.task_done()
-            await asyncio.sleep(0.04)
+        except Exception as e:
+            ten_env.log_warn(f"send_data error: {e}")
@@ -0,0 +1,165 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import inspect
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `burst` saved up. rate <= 0 disables."""
+
+    def __init__(self, rate: float, burst: float, clock=time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._last = clock()
+
+    def delay(self, tokens: float) -> float:
+        """Seconds until `tokens` are available, 0 if they are now."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        # Something larger than the bucket goes out once it is full.
+        missing = min(tokens, self.burst) - self._tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, tokens: float) -> None:
+        if self.rate > 0:
+            self._refill()
+            self._tokens -= tokens
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+
+class _Entry:
+    __slots__ = ("packets", "key", "queued_at")
+
+    def __init__(self, packets: list, key: Hashable, queued_at: float) -> None:
+        self.packets = packets
+        self.key = key
+        self.queued_at = queued_at
+
+
+class Pacer:
+    """Send queued messages as fast as the rate limits allow.
+
+    Each message is a list of packets (e.g. the chunks of one transcript
+    message) sent back to back. Packets go out immediately while both
+    buckets have credit, so a burst drains at once instead of one packet per
+    fixed sleep, and the pacer only waits when a limit would be exceeded.
+
+    A message put with coalesce=True replaces the message still waiting in
+    the queue for the same key, if any, keeping its place in the queue. Use
+    it for updates that supersede each other, like the non-final text of a
+    stream; a message put with coalesce=False for that key is never replaced
+    and later updates queue behind it.
+
+    put() and close() must be called on the loop running run(). send must not
+    raise; it may be a coroutine function.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[Any], Awaitable[None] | None],
+        rate: float,
+        burst: float,
+        bytes_rate: float = 0,
+        bytes_burst: float = 0,
+        size: Callable[[Any], int] = len,
+    ) -> None:
+        self._send = send
+        self._size = size
+        self._packets = TokenBucket(rate, burst)
+        self._bytes = TokenBucket(bytes_rate, bytes_burst)
+
+        self._queue: deque[_Entry] = deque()
+        self._pending: dict[Hashable, _Entry] = {}
+        self._wakeup = asyncio.Event()
+        self._closed = False
+
+        # Metrics.
+        self._max_depth = 0
+        self._sent = 0
+        self._coalesced = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_count = 0
+
+    def put(self, packets: list, key: Hashable = None, coalesce: bool = False) -> None:
+        if self._closed or not packets:
+            return
+        if coalesce:
+            entry = self._pending.get(key)
+            if entry is not None:
+                entry.packets = packets
+                self._coalesced += 1
+                return
+
+        entry = _Entry(packets, key, time.monotonic())
+        self._queue.append(entry)
+        if coalesce:
+            self._pending[key] = entry
+        elif key is not None:
+            self._pending.pop(key, None)
+        self._max_depth = max(self._max_depth, len(self._queue))
+        self._wakeup.set()
+
+    def close(self) -> None:
+        """Stop run(), dropping what is still queued."""
+        self._closed = True
+        self._queue.clear()
+        self._pending.clear()
+        self._wakeup.set()
+
+    def metrics(self) -> dict:
+        return {
+            "depth": len(self._queue),
+            "max_depth": self._max_depth,
+            "sent": self._sent,
+            "coalesced": self._coalesced,
+            "lag_avg_ms": int(self._lag_total / max(self._lag_count, 1) * 1000),
+            "lag_max_ms": int(self._lag_max * 1000),
+        }
+
+    async def run(self) -> None:
+        while not self._closed:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            entry = self._queue.popleft()
+            if self._pending.get(entry.key) is entry:
+                del self._pending[entry.key]
+
+            for packet in entry.packets:
+                await self._acquire(self._size(packet) if self._bytes.rate > 0 else 0)
+                if self._closed:
+                    return
+                result = self._send(packet)
+                if inspect.isawaitable(result):
+                    await result
+                self._sent += 1
+
+            lag = time.monotonic() - entry.queued_at
+            self._lag_total += lag
+            self._lag_max = max(self._lag_max, lag)
+            self._lag_count += 1
+
+    async def _acquire(self, size: int) -> None:
+        while True:
+            delay = max(self._packets.delay(1), self._bytes.delay(size))
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        self._packets.take(1)
+        self._bytes.take(size)
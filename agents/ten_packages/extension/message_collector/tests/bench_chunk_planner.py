@@ -0,0 +1,92 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Throughput of transcript chunking.
+
+Usage:
+    python tests/bench_chunk_planner.py
+
+Compared paths:
+    legacy      the former _text_to_base64_chunks: shrink-by-100 retries,
+                "???" replace pass, str chunks encoded before sending
+    base64      text_to_chunks, exact sizes, default framing
+    raw         text_to_chunks with raw framing
+"""
+
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from chunk_planner import FRAMING_RAW, text_to_chunks  # noqa: E402
+
+MAX_CHUNK_SIZE_BYTES = 1024
+
+
+def legacy_text_to_base64_chunks(text: str, msg_id: str) -> list:
+    base64_encoded = base64.b64encode(bytearray(text, "utf-8")).decode("utf-8")
+    chunks = []
+    part_index = 0
+    current_position = 0
+    while current_position < len(base64_encoded):
+        part_index += 1
+        estimated_chunk_size = MAX_CHUNK_SIZE_BYTES
+        while True:
+            content_chunk = base64_encoded[
+                current_position : current_position + estimated_chunk_size
+            ]
+            formatted_chunk = f"{msg_id}|{part_index}|???|{content_chunk}"
+            if len(bytearray(formatted_chunk, "utf-8")) <= MAX_CHUNK_SIZE_BYTES:
+                break
+            estimated_chunk_size -= 100
+        chunks.append(formatted_chunk)
+        current_position += estimated_chunk_size
+    total_parts = len(chunks)
+    return [chunk.replace("???", str(total_parts)).encode() for chunk in chunks]
+
+
+def message(text_len: int) -> str:
+    return json.dumps(
+        {
+            "is_final": False,
+            "stream_id": 0,
+            "message_id": "1a2b3c4d",
+            "data_type": "transcribe",
+            "text_ts": 1700000000000,
+            "text": ("The quick brown fox 你好 " * (text_len // 24 + 1))[:text_len],
+        }
+    )
+
+
+def main() -> None:
+    paths = [
+        ("legacy", legacy_text_to_base64_chunks),
+        ("base64", lambda text, msg_id: text_to_chunks(text, msg_id)),
+        (
+            "raw",
+            lambda text, msg_id: text_to_chunks(text, msg_id, framing=FRAMING_RAW),
+        ),
+    ]
+    for text_len in (40, 400, 4000, 40000):
+        text = message(text_len)
+        n = max(200, 2_000_000 // len(text))
+        for name, fn in paths:
+            start = time.perf_counter()
+            for _ in range(n):
+                chunks = fn(text, "1a2b3c4d")
+            elapsed = time.perf_counter() - start
+            size = sum(len(c) for c in chunks)
+            print(
+                f"text {text_len:>6}  {name:<7} {n / elapsed:10.0f} msg/s"
+                f"  {len(text) * n / elapsed / 1e6:7.1f} MB/s"
+                f"  {len(chunks):3d} chunks {size:7d} bytes"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""End-to-end delivery lag of transcript fragments.
+
+Usage:
+    python tests/bench_pacer.py [fragments] [fragments_per_second]
+
+An LLM answer is streamed as text_data fragments (default 1000 at 100/s),
+50 per segment; every update carries the segment's text so far and is cut
+into 1 KB chunks like _text_to_base64_chunks does. The lag of a fragment is
+the time from on_data until the client has it, either in its own message or
+in a later update of the same segment that replaced it in the queue.
+
+Compared paths:
+    legacy      asyncio.Queue, one chunk then asyncio.sleep(0.04)
+    pacer       Pacer with the default RTC data stream limits
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from pacer import Pacer  # noqa: E402
+
+SEGMENT = 50
+CHUNK = 1024
+
+
+def fragment_chunks(index: int, text_len: int) -> list:
+    # JSON envelope + base64 grows the text by about 4/3.
+    size = 160 + text_len * 4 // 3
+    count = -(-size // CHUNK)
+    return [
+        (index, part == count - 1, min(CHUNK, size - part * CHUNK))
+        for part in range(count)
+    ]
+
+
+class Delivery:
+    def __init__(self, fragments: int) -> None:
+        self.produced = [0.0] * fragments
+        self.lag = [None] * fragments
+        self.delivered = -1
+
+    def send(self, chunk) -> None:
+        index, last, _ = chunk
+        if not last:
+            return
+        now = time.perf_counter()
+        for k in range(self.delivered + 1, index + 1):
+            self.lag[k] = now - self.produced[k]
+        self.delivered = max(self.delivered, index)
+
+
+async def produce(fragments: int, per_second: float, delivery: Delivery, put):
+    text_len = 0
+    for i in range(fragments):
+        text_len = 0 if i % SEGMENT == 0 else text_len
+        text_len += 12
+        end_of_segment = i % SEGMENT == SEGMENT - 1
+        delivery.produced[i] = time.perf_counter()
+        put(fragment_chunks(i, text_len), end_of_segment)
+        await asyncio.sleep(1 / per_second)
+
+
+async def run_legacy(fragments: int, per_second: float) -> Delivery:
+    delivery = Delivery(fragments)
+    queue = asyncio.Queue()
+
+    async def process_queue():
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            delivery.send(chunk)
+            await asyncio.sleep(0.04)
+
+    def put(chunks, end_of_segment):
+        for chunk in chunks:
+            queue.put_nowait(chunk)
+
+    task = asyncio.create_task(process_queue())
+    await produce(fragments, per_second, delivery, put)
+    queue.put_nowait(None)
+    await task
+    return delivery
+
+
+async def run_pacer(fragments: int, per_second: float) -> Delivery:
+    delivery = Delivery(fragments)
+    pacer = Pacer(
+        delivery.send,
+        rate=50,
+        burst=10,
+        bytes_rate=24 * 1024,
+        bytes_burst=24 * 1024 * 10 / 50,
+        size=lambda chunk: chunk[2],
+    )
+
+    def put(chunks, end_of_segment):
+        pacer.put(chunks, 0, not end_of_segment)
+
+    task = asyncio.create_task(pacer.run())
+    await produce(fragments, per_second, delivery, put)
+    while delivery.delivered < fragments - 1:
+        await asyncio.sleep(0.01)
+    pacer.close()
+    await task
+    print(f"  metrics {pacer.metrics()}")
+    return delivery
+
+
+def report(name: str, delivery: Delivery) -> None:
+    lag = sorted(delivery.lag)
+    print(
+        f"{name:<8} lag p50 {statistics.median(lag) * 1000:8.1f} ms"
+        f"  p95 {lag[int(len(lag) * 0.95)] * 1000:8.1f} ms"
+        f"  max {lag[-1] * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    fragments = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    per_second = float(sys.argv[2]) if len(sys.argv) > 2 else 100
+    print(f"{fragments} fragments at {per_second:.0f}/s")
+    report("pacer", asyncio.run(run_pacer(fragments, per_second)))
+    report("legacy", asyncio.run(run_legacy(fragments, per_second)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Bytes on the wire for a 5 minute conversation, cumulative vs delta mode.
+
+Usage:
+    python tests/bench_transcript_bytes.py [recording.jsonl]
+
+A recording has one text_data per line as received by message_collector:
+    {"ts": 12.3, "stream_id": 0, "text": "...", "is_final": true,
+     "end_of_segment": false}
+Without one, a 5 minute conversation is generated: the user speaks with
+interim ASR results every 200 ms, the agent answers sentence by sentence,
+and one agent answer is a long monologue; then a 5 minute monologue in one
+segment. Messages are built and chunked as message_collector does; pacer
+coalescing is left out, it applies to both modes.
+"""
+
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from chunk_planner import text_to_chunks  # noqa: E402
+from transcript_delta import TranscriptDeltaEncoder  # noqa: E402
+
+USER, AGENT = 1001, 0
+WORDS = (
+    "so the thing is we could probably ship the new onboarding flow next week "
+    "if the translations land in time and nobody objects to the pricing page"
+).split()
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def sentence(rng: random.Random, words: int) -> list[str]:
+    return [rng.choice(WORDS) for _ in range(words)]
+
+
+def synthetic_conversation(seconds: float = 300) -> list[dict]:
+    rng = random.Random(5)
+    events, ts, turn = [], 0.0, 0
+
+    def emit(stream_id, text, final, end_of_segment):
+        events.append(
+            {
+                "ts": ts,
+                "stream_id": stream_id,
+                "text": text,
+                "is_final": final,
+                "end_of_segment": end_of_segment,
+            }
+        )
+
+    while ts < seconds:
+        # User: 1-3 sentences, interim results every 200 ms (~0.5 word).
+        sentences = rng.randint(1, 3)
+        for s in range(sentences):
+            words = sentence(rng, rng.randint(4, 16))
+            for n in range(1, len(words) + 1):
+                ts += 0.2
+                if n % 2 == 0:
+                    emit(USER, " ".join(words[:n]), False, False)
+            emit(USER, " ".join(words) + ". ", True, s == sentences - 1)
+        ts += 0.8
+
+        # Agent: 2-8 sentences, the fifth answer is a long monologue.
+        turn += 1
+        count = 30 if turn == 5 else rng.randint(2, 8)
+        for s in range(count):
+            words = sentence(rng, rng.randint(6, 18))
+            emit(AGENT, " ".join(words).capitalize() + ". ", True, s == count - 1)
+            ts += len(words) / 2.5
+        ts += 0.5
+    return events
+
+
+def synthetic_monologue(seconds: float = 300) -> list[dict]:
+    rng = random.Random(6)
+    events, ts = [], 0.0
+    while ts < seconds:
+        words = sentence(rng, rng.randint(6, 18))
+        ts += len(words) / 2.5
+        events.append(
+            {
+                "ts": ts,
+                "stream_id": AGENT,
+                "text": " ".join(words).capitalize() + ". ",
+                "is_final": True,
+                "end_of_segment": ts >= seconds,
+            }
+        )
+    return events
+
+
+def cumulative_messages(events: list[dict]) -> list[dict]:
+    cache, out = {}, []
+    for e in events:
+        stream_id, text = e["stream_id"], e["text"]
+        if e["end_of_segment"]:
+            text = cache.pop(stream_id, "") + text
+        elif e["is_final"]:
+            text = cache.get(stream_id, "") + text
+            cache[stream_id] = text
+        out.append(message(e, text, {}))
+    return out
+
+
+def delta_messages(events: list[dict], snapshot_interval_ms: int) -> list[dict]:
+    clock = Clock()
+    encoder = TranscriptDeltaEncoder(snapshot_interval_ms, clock=clock)
+    out = []
+    for e in events:
+        clock.now = e["ts"]
+        update = encoder.update(
+            e["stream_id"], e["text"], e["is_final"], e["end_of_segment"]
+        )
+        if update is not None:
+            out.append(message(e, update.text, update.fields()))
+    return out
+
+
+def message(event: dict, text: str, fields: dict) -> dict:
+    return {
+        "is_final": event["end_of_segment"],
+        "stream_id": event["stream_id"],
+        "message_id": "1a2b3c4d",
+        "data_type": "transcribe",
+        "text_ts": int(event["ts"] * 1000),
+        "text": text,
+        **fields,
+    }
+
+
+def wire_bytes(messages: list[dict]) -> tuple[int, int]:
+    chunks = [c for m in messages for c in text_to_chunks(json.dumps(m), "1a2b3c4d")]
+    return len(chunks), sum(len(c) for c in chunks)
+
+
+def report(events: list[dict]) -> None:
+    duration = events[-1]["ts"] - events[0]["ts"]
+    text_bytes = sum(
+        len(e["text"].encode()) for e in events if e["is_final"] or e["end_of_segment"]
+    )
+    print(
+        f"{len(events)} text_data over {duration:.0f} s, "
+        f"{text_bytes} bytes of final text"
+    )
+
+    modes = [("cumulative", cumulative_messages)] + [
+        (f"delta {ms // 1000:>2}s", lambda e, ms=ms: delta_messages(e, ms))
+        for ms in (5000, 15000, 30000)
+    ]
+    for name, build in modes:
+        messages = build(events)
+        packets, size = wire_bytes(messages)
+        print(
+            f"  {name:<11} {len(messages):5d} messages {packets:5d} packets "
+            f"{size:9d} bytes  {size / duration / 1024:6.2f} KB/s"
+        )
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            report([json.loads(line) for line in f if line.strip()])
+        return
+
+    print("conversation:", end=" ")
+    report(synthetic_conversation())
+    print("monologue:", end=" ")
+    report(synthetic_monologue())
+
+
+if __name__ == "__main__":
+    main()
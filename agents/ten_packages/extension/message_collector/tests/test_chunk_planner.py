@@ -0,0 +1,104 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import base64
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from chunk_planner import (  # noqa: E402
+    FRAMING_BASE64,
+    FRAMING_RAW,
+    plan_parts,
+    text_to_chunks,
+)
+
+ALPHABET = 'abc xyz|?{}"\\\n' + "éß" + "你好世界" + "😀"
+
+
+def random_text(rng: random.Random, length: int) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def parse(chunk: bytes) -> tuple[str, int, int, bytes]:
+    msg_id, part, total, payload = bytes(chunk).split(b"|", 3)
+    return msg_id.decode(), int(part), int(total), payload
+
+
+def check_chunks(text, msg_id, max_size, framing):
+    chunks = text_to_chunks(text, msg_id, max_size, framing)
+    payload = text.encode()
+    if framing == FRAMING_BASE64:
+        payload = base64.b64encode(payload)
+
+    # Exact sizing: full chunks except the last one.
+    assert all(len(c) == max_size for c in chunks[:-1])
+    assert not chunks or 0 < len(chunks[-1]) <= max_size
+
+    parts = [parse(c) for c in chunks]
+    assert [p[0] for p in parts] == [msg_id] * len(chunks)
+    assert [p[1] for p in parts] == list(range(1, len(chunks) + 1))
+    assert {p[2] for p in parts} <= {len(chunks)}
+
+    joined = b"".join(p[3] for p in parts)
+    assert joined == payload
+    if framing == FRAMING_BASE64:
+        assert base64.b64decode(joined).decode() == text
+    else:
+        assert joined.decode() == text
+
+    # Minimal: one part less cannot carry the payload.
+    n = len(chunks)
+    if n > 1:
+        header = len(msg_id) + 3 + len(str(n - 1))
+        capacity = sum(max_size - header - len(str(i)) for i in range(1, n))
+        assert capacity < len(payload)
+
+
+@pytest.mark.parametrize("framing", [FRAMING_BASE64, FRAMING_RAW])
+def test_chunks_are_exact_and_reassemble(framing):
+    rng = random.Random(1234)
+    for _ in range(500):
+        max_size = rng.choice([20, 24, 64, 100, 1024])
+        msg_id = "".join(rng.choice("0123456789abcdef") for _ in range(8))
+        # Sizes around 9/10 and 99/100 parts for small max_size.
+        text = random_text(rng, rng.randint(0, 3000))
+        check_chunks(text, msg_id, max_size, framing)
+
+
+def test_counter_width_boundaries():
+    # 16 byte header with one digit counters, 4 bytes of payload per part.
+    for payload_len in range(1, 600):
+        sizes = plan_parts(payload_len, 8, 20)
+        total = len(sizes)
+        assert sum(sizes) == payload_len
+        for part, size in enumerate(sizes, 1):
+            header = 8 + 3 + len(str(part)) + len(str(total))
+            if part < total:
+                assert header + size == 20
+            else:
+                assert header + size <= 20
+
+
+def test_base64_default_matches_client_format():
+    chunks = text_to_chunks('{"text": "hello"}', "12345678")
+    assert chunks == [bytearray(b"12345678|1|1|eyJ0ZXh0IjogImhlbGxvIn0=")]
+
+
+def test_empty_text_has_no_chunks():
+    assert text_to_chunks("", "12345678") == []
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        text_to_chunks("x", "x" * 37)
+    with pytest.raises(ValueError):
+        text_to_chunks("x" * 100, "12345678", max_size=13)
+    with pytest.raises(ValueError):
+        text_to_chunks("x", "12345678", framing="hex")
@@ -0,0 +1,136 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from transcript_delta import (  # noqa: E402
+    OP_APPEND,
+    OP_FINAL,
+    OP_INTERIM,
+    OP_SNAPSHOT,
+    TranscriptDeltaEncoder,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Client:
+    """What a delta aware client keeps per stream."""
+
+    def __init__(self) -> None:
+        self.segment_id = None
+        self.seq = 0
+        self.committed = ""
+        self.interim = ""
+        self.finals = []
+        self.gaps = 0
+
+    def apply(self, update) -> None:
+        if update.segment_id != self.segment_id:
+            self.segment_id, self.seq, self.committed = update.segment_id, 0, ""
+        if update.op == OP_INTERIM:
+            self.interim = update.text
+            return
+        if update.seq != self.seq + 1 and update.op == OP_APPEND:
+            self.gaps += 1
+        self.seq = update.seq
+        self.interim = ""
+        if update.op == OP_APPEND:
+            self.committed += update.text
+        elif update.op == OP_SNAPSHOT:
+            self.committed = update.text
+        elif update.op == OP_FINAL:
+            self.finals.append(update.text)
+            self.committed = ""
+
+    @property
+    def display(self) -> str:
+        return self.committed + self.interim
+
+
+def cumulative(cache: dict, stream_id, text, final, end_of_segment) -> str:
+    # message_collector in cumulative mode.
+    if end_of_segment:
+        return cache.pop(stream_id, "") + text
+    if final:
+        cache[stream_id] = cache.get(stream_id, "") + text
+        return cache[stream_id]
+    return text
+
+
+def test_deltas_rebuild_the_cumulative_text():
+    encoder = TranscriptDeltaEncoder(snapshot_interval_ms=1_000_000)
+    client, cache = Client(), {}
+    fragments = [
+        ("Hel", False, False),
+        ("Hello.", True, False),
+        (" How", False, False),
+        (" How are you?", True, False),
+        ("", True, False),
+        (" Bye.", True, True),
+        ("Next.", True, False),
+        (" One.", True, True),
+    ]
+    for text, final, end_of_segment in fragments:
+        expected = cumulative(cache, 7, text, final, end_of_segment)
+        update = encoder.update(7, text, final, end_of_segment)
+        if update is None:
+            continue
+        client.apply(update)
+        assert update.is_final == end_of_segment
+        if end_of_segment:
+            assert client.finals[-1] == expected
+        elif final:
+            assert client.display == expected
+            assert update.text == text
+        else:
+            assert client.interim == expected
+    assert client.finals == ["Hello. How are you? Bye.", "Next. One."]
+    assert client.gaps == 0
+
+
+def test_seq_and_segments():
+    encoder = TranscriptDeltaEncoder()
+    a = encoder.update(1, "a", True, False)
+    i = encoder.update(1, "b", False, False)
+    b = encoder.update(1, "b", True, False)
+    other = encoder.update(2, "x", True, False)
+    f = encoder.update(1, "", True, True)
+    nxt = encoder.update(1, "c", True, False)
+
+    assert (a.op, a.seq) == (OP_APPEND, 1)
+    assert (i.op, i.seq, i.coalesce) == (OP_INTERIM, 1, True)
+    assert (b.op, b.seq, b.coalesce) == (OP_APPEND, 2, False)
+    assert (f.op, f.seq, f.text) == (OP_FINAL, 3, "ab")
+    assert other.segment_id not in (a.segment_id, nxt.segment_id)
+    assert nxt.segment_id != a.segment_id and nxt.seq == 1
+
+
+def test_periodic_snapshot():
+    clock = FakeClock()
+    encoder = TranscriptDeltaEncoder(snapshot_interval_ms=5000, clock=clock)
+    ops = []
+    for i in range(12):
+        clock.now = i
+        ops.append(encoder.update(1, f"{i} ", True, False))
+    snapshots = [u for u in ops if u.op == OP_SNAPSHOT]
+    assert [u.seq for u in snapshots] == [6, 11]
+    assert snapshots[0].text == "0 1 2 3 4 5 "
+    assert all(u.op == OP_APPEND for u in ops if u not in snapshots)
+
+    # A client joining late catches up from the next snapshot.
+    late = Client()
+    for update in ops[8:]:
+        late.apply(update)
+    assert late.display == "".join(f"{i} " for i in range(12))
@@ -21,21 +21,31 @@ from ten import (
     Data,
 )
 
+from .pacer import Pacer
+from .transcript_delta import MODE_DELTA, TranscriptDeltaEncoder
+
 TEXT_DATA_TEXT_FIELD = "text"
 TEXT_DATA_FINAL_FIELD = "is_final"
 TEXT_DATA_STREAM_ID_FIELD = "stream_id"
 TEXT_DATA_END_OF_SEGMENT_FIELD = "end_of_segment"
 
+PROPERTY_MAX_SEND_RATE = "max_send_rate"
+PROPERTY_MAX_SEND_BURST = "max_send_burst"
+PROPERTY_TRANSCRIPT_MODE = "transcript_mode"
+PROPERTY_TRANSCRIPT_SNAPSHOT_INTERVAL_MS = "transcript_snapshot_interval_ms"
+
+DEFAULT_MAX_SEND_RATE = 50
+DEFAULT_MAX_SEND_BURST = 10
+
 
 class MessageCollectorRTMExtension(AsyncExtension):
-    # Create the queue for message processing
     def __init__(self, name: str):
         super().__init__(name)
-        self.queue = asyncio.Queue()
+        self.pacer = None
+        self.transcript = None
         self.cached_text_map = {}
         self.loop = None
         self.ten_env = None
-        self.stopped = False
 
     async def on_init(self, ten_env: AsyncTenEnv) -> None:
         ten_env.log_info("MessageCollectorRTMExtension on_init")
@@ -44,12 +54,43 @@ class MessageCollectorRTMExtension(AsyncExtension):
         ten_env.log_info("MessageCollectorRTMExtension on_start")
         self.loop = asyncio.get_event_loop()
         self.ten_env = ten_env
-        self.loop.create_task(self._process_queue())
+
+        limits = {
+            PROPERTY_MAX_SEND_RATE: DEFAULT_MAX_SEND_RATE,
+            PROPERTY_MAX_SEND_BURST: DEFAULT_MAX_SEND_BURST,
+        }
+        for name in limits:
+            try:
+                limits[name] = await ten_env.get_property_int(name)
+            except Exception as err:
+                ten_env.log_warn(f"get {name} property failed, err: {err}")
+
+        transcript_mode = None
+        snapshot_interval_ms = 15000
+        try:
+            transcript_mode = await ten_env.get_property_string(
+                PROPERTY_TRANSCRIPT_MODE
+            )
+            snapshot_interval_ms = await ten_env.get_property_int(
+                PROPERTY_TRANSCRIPT_SNAPSHOT_INTERVAL_MS
+            )
+        except Exception as err:
+            ten_env.log_warn(f"get transcript properties failed, err: {err}")
+        if transcript_mode == MODE_DELTA:
+            self.transcript = TranscriptDeltaEncoder(snapshot_interval_ms)
+
+        self.pacer = Pacer(
+            self._send_message,
+            rate=limits[PROPERTY_MAX_SEND_RATE],
+            burst=limits[PROPERTY_MAX_SEND_BURST],
+        )
+        self.loop.create_task(self.pacer.run())
 
     async def on_stop(self, ten_env: AsyncTenEnv) -> None:
         ten_env.log_info("on_stop")
-        self.stopped = True
-        await self.queue.put(None)
+        if self.pacer:
+            ten_env.log_info(f"send metrics: {self.pacer.metrics()}")
+            self.pacer.close()
 
     async def on_deinit(self, ten_env: AsyncTenEnv) -> None:
         ten_env.log_info("MessageCollectorRTMExtension on_deinit")
@@ -133,9 +174,21 @@ class MessageCollectorRTMExtension(AsyncExtension):
             f"on_data {TEXT_DATA_TEXT_FIELD}: {text} {TEXT_DATA_FINAL_FIELD}: {final} {TEXT_DATA_STREAM_ID_FIELD}: {stream_id} {TEXT_DATA_END_OF_SEGMENT_FIELD}: {end_of_segment}"
         )
 
+        # A newer update of a stream's segment replaces the last one on the
+        # client, so one still queued can be replaced too.
+        coalesce = not end_of_segment
+        delta_fields = {}
+        if self.transcript:
+            # Only the appended text, see TranscriptDeltaEncoder.
+            update = self.transcript.update(stream_id, text, final, end_of_segment)
+            if update is None:
+                return
+            text = update.text
+            coalesce = update.coalesce
+            delta_fields = update.fields()
         # We cache all final text data and append the non-final text data to the cached data
         # until the end of the segment.
-        if end_of_segment:
+        elif end_of_segment:
             if stream_id in self.cached_text_map:
                 text = self.cached_text_map[stream_id] + text
                 del self.cached_text_map[stream_id]
@@ -156,8 +209,11 @@ class MessageCollectorRTMExtension(AsyncExtension):
             "type": "transcribe",
             "ts": int(time.time() * 1000),  # Convert to milliseconds
             "text": text,
+            **delta_fields,
         }
-        await self._queue_message("text_data", text_data)
+        await self._queue_message(
+            "text_data", text_data, key=stream_id, coalesce=coalesce
+        )
 
     async def on_rtm_message_event(self, data: Data) -> None:
         self.ten_env.log_debug("on_data rtm_message_event")
@@ -187,27 +243,18 @@ class MessageCollectorRTMExtension(AsyncExtension):
         except Exception as e:
             self.ten_env.log_error(f"handle_user_state_changed error: {e}")
 
-    async def _queue_message(self, data_type: str, data: dict):
-        await self.queue.put({"type": data_type, "data": data})
+    async def _queue_message(
+        self, data_type: str, data: dict, key=None, coalesce: bool = False
+    ):
+        self.pacer.put([{"type": data_type, "data": data}], key, coalesce)
 
-    async def _process_queue(self):
-        self.ten_env.log_info("start async loop")
-        while not self.stopped:
-            try:
-                item = await self.queue.get()
-                if item is None:
-                    break
-                data_type = item["type"]
-                data = item["data"]
-                # process data
-                if data_type == "text_data":
-                    await self._handle_text_data(data)
-                elif data_type == "user_state":
-                    await self._handle_user_state(data)
-                self.queue.task_done()
-                await asyncio.sleep(0.04)
-            except Exception as e:
-                self.ten_env.log_error(f"Failed to process queue: {e}")
+    async def _send_message(self, item: dict):
+        data_type = item["type"]
+        data = item["data"]
+        if data_type == "text_data":
+            await self._handle_text_data(data)
+        elif data_type == "user_state":
+            await self._handle_user_state(data)
 
     async def _handle_text_data(self, data: dict):
         try:
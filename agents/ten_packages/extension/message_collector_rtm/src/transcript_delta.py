@@ -0,0 +1,105 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import itertools
+import time
+from dataclasses import dataclass
+
+MODE_CUMULATIVE = "cumulative"
+MODE_DELTA = "delta"
+
+# Text appended to the segment.
+OP_APPEND = "append"
+# Replaces the previous interim text, nothing is committed.
+OP_INTERIM = "interim"
+# The whole segment so far, for clients that joined late or missed a seq.
+OP_SNAPSHOT = "snapshot"
+# The consolidated segment text at end_of_segment.
+OP_FINAL = "final"
+
+
+@dataclass(slots=True)
+class TranscriptUpdate:
+    op: str
+    text: str
+    segment_id: int
+    seq: int
+
+    @property
+    def is_final(self) -> bool:
+        return self.op == OP_FINAL
+
+    @property
+    def coalesce(self) -> bool:
+        """Whether a newer update may replace this one before it is sent."""
+        return self.op == OP_INTERIM
+
+    def fields(self) -> dict:
+        return {"op": self.op, "segment_id": self.segment_id, "seq": self.seq}
+
+
+class _Segment:
+    __slots__ = ("segment_id", "seq", "committed", "snapshot_at")
+
+    def __init__(self, segment_id: int, now: float) -> None:
+        self.segment_id = segment_id
+        self.seq = 0
+        self.committed: list[str] = []
+        self.snapshot_at = now
+
+
+class TranscriptDeltaEncoder:
+    """Turn text_data fragments into delta updates per stream.
+
+    Instead of resending the whole segment on every final fragment, only the
+    appended text goes out, numbered by seq within the segment. seq grows by
+    one for every append, snapshot and final update, so a client can tell it
+    missed one; interim updates carry the current seq and do not change it.
+    When snapshot_interval_ms has passed since the last snapshot the next
+    final fragment is sent as a snapshot of the whole segment instead.
+    """
+
+    def __init__(self, snapshot_interval_ms: int = 15000, clock=time.monotonic):
+        self.snapshot_interval = snapshot_interval_ms / 1000
+        self._clock = clock
+        self._segments: dict[int, _Segment] = {}
+        self._segment_ids = itertools.count(1)
+
+    def update(
+        self, stream_id: int, text: str, final: bool, end_of_segment: bool
+    ) -> TranscriptUpdate | None:
+        segment = self._segments.get(stream_id)
+        if segment is None:
+            segment = _Segment(next(self._segment_ids), self._clock())
+            self._segments[stream_id] = segment
+
+        if end_of_segment:
+            del self._segments[stream_id]
+            segment.committed.append(text)
+            return TranscriptUpdate(
+                OP_FINAL,
+                "".join(segment.committed),
+                segment.segment_id,
+                segment.seq + 1,
+            )
+
+        if not final:
+            return TranscriptUpdate(OP_INTERIM, text, segment.segment_id, segment.seq)
+
+        if not text:
+            return None
+        segment.committed.append(text)
+        segment.seq += 1
+
+        now = self._clock()
+        if now - segment.snapshot_at >= self.snapshot_interval:
+            segment.snapshot_at = now
+            return TranscriptUpdate(
+                OP_SNAPSHOT,
+                "".join(segment.committed),
+                segment.segment_id,
+                segment.seq,
+            )
+        return TranscriptUpdate(OP_APPEND, text, segment.segment_id, segment.seq)
@@ -16,6 +16,8 @@ from ten import (
 )
 from .util import duration_in_ms, duration_in_ms_since, Role
 from .chat_memory import ChatMemory
+from .audio_out_writer import AudioOutWriter
+from .sse_decoder import aiter_sse
 from dataclasses import dataclass, fields
 import builtins
 import httpx
@@ -24,7 +26,6 @@ import aiofiles
 import asyncio
 from typing import List, Dict, Tuple, Any
 import base64
-import json
 
 
 @dataclass
@@ -42,6 +43,8 @@ class MinimaxV2VConfig:
     greeting: str = ""
     max_memory_length: int = 10
     dump: bool = False
+    # 0 forwards audio as it arrives, 10/20/40 coalesces it into fixed frames
+    audio_frame_ms: int = 0
 
     async def read_from_property(self, ten_env: AsyncTenEnv):
         for field in fields(self):
@@ -78,6 +81,7 @@ class MinimaxV2VExtension(AsyncExtension):
         self.memory = ChatMemory(self.config.max_memory_length)
         self.remote_stream_id = 0
         self.ten_env = None
+        self.audio_writer = AudioOutWriter(self.config.out_sample_rate)
 
         # able to cancel
         self.curr_task = None
@@ -91,6 +95,11 @@ class MinimaxV2VExtension(AsyncExtension):
         ten_env.log_info(f"config: {self.config}")
 
         self.memory = ChatMemory(self.config.max_memory_length)
+        self.audio_writer = AudioOutWriter(
+            self.config.out_sample_rate,
+            frame_ms=self.config.audio_frame_ms,
+            dump_path="minimax_v2v_out.pcm" if self.config.dump else "",
+        )
         self.ten_env = ten_env
 
     async def on_start(self, ten_env: AsyncTenEnv) -> None:
@@ -106,6 +115,7 @@ class MinimaxV2VExtension(AsyncExtension):
             self.process_input_task.cancel()
             await asyncio.gather(self.process_input_task, return_exceptions=True)
             self.process_input_task = None
+        self.audio_writer.close()
 
     async def on_deinit(self, ten_env: AsyncTenEnv) -> None:
         ten_env.log_debug("on_deinit")
@@ -242,9 +252,10 @@ class MinimaxV2VExtension(AsyncExtension):
                 )
 
                 response.raise_for_status()  # check response
+                self.audio_writer.reset()
 
                 i = 0
-                async for line in response.aiter_lines():
+                async for event in aiter_sse(response.aiter_bytes()):
                     # ten_env.log_info(f"-> line {line}")
                     # if self._need_interrupt(ts):
                     #     ten_env.log_warn(f"trace-id: {trace_id}, interrupted")
@@ -254,12 +265,9 @@ class MinimaxV2VExtension(AsyncExtension):
                     #         self._send_transcript("", "assistant", True)
                     #     break
 
-                    if not line.startswith("data:"):
-                        ten_env.log_debug(f"ignore line {len(line)}")
-                        continue
                     i += 1
 
-                    resp = json.loads(line.strip("data:"))
+                    resp = event.json()
                     if resp.get("choices") and resp["choices"][0].get("delta"):
                         delta = resp["choices"][0]["delta"]
                         if delta.get("role") == "assistant":
@@ -305,11 +313,12 @@ class MinimaxV2VExtension(AsyncExtension):
 
                                 # send out
                                 base64_str = delta["audio_content"]
-                                buff = base64.b64decode(base64_str)
-                                await self._dump_audio_if_need(buff, "out")
-                                await self._send_audio_frame(
-                                    ten_env=ten_env, audio_data=buff
-                                )
+                                for frame in self.audio_writer.write_base64(
+                                    base64_str
+                                ):
+                                    await self._send_audio_frame(
+                                        ten_env=ten_env, audio_data=frame
+                                    )
 
                             # tool calls
                             if delta.get("tool_calls"):
@@ -341,6 +350,10 @@ class MinimaxV2VExtension(AsyncExtension):
                                     end_of_segment=True,
                                 )
 
+                # emit the tail the writer held back for a full frame
+                for frame in self.audio_writer.flush():
+                    await self._send_audio_frame(ten_env=ten_env, audio_data=frame)
+
         except httpx.TimeoutException:
             ten_env.log_warn("http timeout")
         except httpx.HTTPStatusError as e:
@@ -418,15 +431,16 @@ class MinimaxV2VExtension(AsyncExtension):
         return (headers, payload)
 
     async def _send_audio_frame(
-        self, ten_env: AsyncTenEnv, audio_data: bytearray
+        self, ten_env: AsyncTenEnv, audio_data: bytearray | memoryview
     ) -> None:
+        writer = self.audio_writer
         try:
             f = AudioFrame.create("pcm_frame")
-            f.set_sample_rate(self.config.out_sample_rate)
-            f.set_bytes_per_sample(2)
-            f.set_number_of_channels(1)
+            f.set_sample_rate(writer.sample_rate)
+            f.set_bytes_per_sample(writer.bytes_per_sample)
+            f.set_number_of_channels(writer.number_of_channels)
             f.set_data_fmt(AudioFrameDataFmt.INTERLEAVE)
-            f.set_samples_per_channel(len(audio_data) // 2)
+            f.set_samples_per_channel(writer.samples_per_channel(audio_data))
             f.alloc_buf(len(audio_data))
             buff = f.lock_buf()
             buff[:] = audio_data
@@ -475,6 +489,8 @@ class MinimaxV2VExtension(AsyncExtension):
             await asyncio.gather(self.curr_task, return_exceptions=True)
             self.curr_task = None
 
+        self.audio_writer.reset()
+
     async def _dump_audio_if_need(self, buf: bytearray, suffix: str) -> None:
         if not self.config.dump:
             return
@@ -0,0 +1,160 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Callable
+
+try:
+    import orjson
+
+    JSON_BACKEND = "orjson"
+    json_loads: Callable[[bytes], Any] = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+
+        JSON_BACKEND = "msgspec"
+        json_loads = msgspec.json.decode
+    except ImportError:
+        JSON_BACKEND = "json"
+        json_loads = json.loads
+
+
+@dataclass(slots=True)
+class SSEEvent:
+    data: bytes
+    event: str = "message"
+    id: str = ""
+
+    def json(self) -> Any:
+        return json_loads(self.data)
+
+
+class SSEDecoder:
+    """Incremental decoder for text/event-stream bodies.
+
+    feed() accepts the body in arbitrary byte chunks, as they come off the
+    socket, and returns the events completed by that chunk. Lines may end
+    with LF, CRLF or CR, a CRLF may be split across two chunks, and several
+    data lines of one event are joined with LF, as the SSE spec requires.
+    Lines are never decoded to str; the data payload stays bytes so it can go
+    straight to orjson/msgspec when one of them is installed.
+    """
+
+    def __init__(self) -> None:
+        self._tail = b""
+        self._pending_cr = False
+        self._data: list[bytes] = []
+        self._event = ""
+
+        self.last_event_id = ""
+        self.retry: int | None = None
+
+    def feed(self, chunk: bytes) -> list[SSEEvent]:
+        events: list[SSEEvent] = []
+        if self._pending_cr:
+            self._pending_cr = False
+            if chunk[:1] == b"\n":
+                chunk = chunk[1:]
+
+        buf = self._tail + chunk if self._tail else chunk
+        cut = max(buf.rfind(b"\n"), buf.rfind(b"\r"))
+        if cut < 0:
+            self._tail = buf
+            return events
+
+        self._tail = buf[cut + 1 :]
+        if buf[cut] == 0x0D and not self._tail:
+            # Might be the first half of a CRLF.
+            self._pending_cr = True
+
+        for line in buf[: cut + 1].splitlines():
+            self._line(line, events)
+        return events
+
+    def flush(self) -> list[SSEEvent]:
+        """Finish the stream, dispatching an event left without blank line."""
+        events: list[SSEEvent] = []
+        if self._tail:
+            self._line(self._tail, events)
+            self._tail = b""
+        self._line(b"", events)
+        self._pending_cr = False
+        return events
+
+    def _line(self, line: bytes, events: list[SSEEvent]) -> None:
+        # By far the most common line, checked first.
+        if line[:5] == b"data:":
+            value = line[5:]
+            self._data.append(value[1:] if value[:1] == b" " else value)
+            return
+
+        if not line:
+            if self._data:
+                data = self._data[0] if len(self._data) == 1 else b"\n".join(self._data)
+                events.append(
+                    SSEEvent(data, self._event or "message", self.last_event_id)
+                )
+                self._data = []
+            self._event = ""
+            return
+
+        if line[:1] == b":":
+            return  # comment / keep-alive
+
+        name, _, value = line.partition(b":")
+        if value[:1] == b" ":
+            value = value[1:]
+        match name:
+            case b"event":
+                self._event = value.decode("utf-8", "replace")
+            case b"id":
+                if b"\0" not in value:
+                    self.last_event_id = value.decode("utf-8", "replace")
+            case b"retry":
+                if value.isdigit():
+                    self.retry = int(value)
+            case b"data":
+                self._data.append(b"")
+
+
+async def aiter_sse(chunks: AsyncIterable[bytes]) -> AsyncIterator[SSEEvent]:
+    """Decode an async stream of body chunks into SSE events."""
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        for event in decoder.feed(chunk):
+            yield event
+    for event in decoder.flush():
+        yield event
+
+
+class ChunkView:
+    """Read-only view of an OpenAI style chat.completion.chunk dict.
+
+    Gives the fields the streaming loop looks at on every chunk without
+    validating the whole chunk into pydantic models first.
+    """
+
+    __slots__ = ("delta", "finish_reason", "usage")
+
+    def __init__(self, chunk: dict) -> None:
+        choices = chunk.get("choices")
+        choice = choices[0] if choices else None
+        if choice:
+            self.delta: dict = choice.get("delta") or {}
+            self.finish_reason: str | None = choice.get("finish_reason")
+        else:
+            self.delta = {}
+            self.finish_reason = None
+        self.usage: dict | None = chunk.get("usage")
+
+    @property
+    def content(self) -> str | None:
+        return self.delta.get("content")
+
+    @property
+    def tool_calls(self) -> list[dict]:
+        return self.delta.get("tool_calls") or []
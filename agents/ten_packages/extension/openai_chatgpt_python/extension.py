@@ -36,7 +36,7 @@ from ten_ai_base.types import (
 )
 from ten_ai_base.llm import AsyncLLMBaseExtension
 
-from .helper import parse_sentences
+from .sentence_segmenter import SentenceSegmenter
 from .openai import OpenAIChatGPT, OpenAIChatGPTConfig
 from ten import (
     Cmd,
@@ -62,7 +62,7 @@ class OpenAIChatGPTExtension(AsyncLLMBaseExtension):
         self.memory_cache = []
         self.config = None
         self.client = None
-        self.sentence_fragment = ""
+        self.segmenter = SentenceSegmenter()
         self.tool_task_future: asyncio.Future | None = None
         self.users_count = 0
         self.last_reasoning_ts = 0
@@ -76,6 +76,9 @@ class OpenAIChatGPTExtension(AsyncLLMBaseExtension):
         await super().on_start(async_ten_env)
 
         self.config = await OpenAIChatGPTConfig.create_async(ten_env=async_ten_env)
+        self.segmenter = SentenceSegmenter(
+            first_chunk_min_len=self.config.first_chunk_min_len
+        )
 
         # Mandatory properties
         if not self.config.api_key:
@@ -220,7 +223,7 @@ class OpenAIChatGPTExtension(AsyncLLMBaseExtension):
                     tools.append(self._convert_tools_to_dict(tool))
                     async_ten_env.log_info(f"tool: {tool}")
 
-            self.sentence_fragment = ""
+            self.segmenter.reset()
 
             # Create an asyncio.Event to signal when content is finished
             content_finished_event = asyncio.Event()
@@ -304,10 +307,7 @@ class OpenAIChatGPTExtension(AsyncLLMBaseExtension):
                     if item.get("role") == "assistant":
                         item["content"] = item["content"] + content
                         break
-                sentences, self.sentence_fragment = parse_sentences(
-                    self.sentence_fragment, content
-                )
-                for s in sentences:
+                for s in self.segmenter.push(content):
                     self.send_text_output(async_ten_env, s, False)
 
             async def handle_reasoning_update(think: str):
@@ -348,11 +348,17 @@ class OpenAIChatGPTExtension(AsyncLLMBaseExtension):
             )
         except asyncio.CancelledError:
             async_ten_env.log_info(f"Task cancelled: {messages}")
+            self.segmenter.reset()
         except Exception:
             async_ten_env.log_error(
                 f"Error in chat_completion: {traceback.format_exc()} for input text: {messages}"
             )
         finally:
+            # The last sentence may still be held back, "42." could have
+            # been the start of a decimal.
+            held = self.segmenter.flush()
+            if held:
+                self.send_text_output(async_ten_env, held, False)
             self.send_text_output(async_ten_env, "", True)
             # always append the memory
             for m in self.memory_cache:
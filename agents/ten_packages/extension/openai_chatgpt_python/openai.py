@@ -39,6 +39,9 @@ class OpenAIChatGPTConfig(BaseConfig):
     vendor: str = "openai"
     azure_endpoint: str = ""
     azure_api_version: str = ""
+    # Release the first sentence of a turn at a space once it is this long,
+    # 0 waits for punctuation
+    first_chunk_min_len: int = 0
 
 
 class ReasoningMode(str, Enum):
@@ -0,0 +1,107 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Replay token streams through SentenceSegmenter and the legacy splitter.
+
+Usage:
+    python tests/bench_sentence_segmenter.py [recorded.jsonl]
+
+Each line of the optional recording is a JSON array holding the content
+deltas of one LLM reply, in arrival order. Without a recording a few
+synthetic replies are tokenized into 1-4 character deltas.
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sentence_segmenter import SentenceSegmenter  # noqa: E402
+
+
+def legacy_parse_sentences(sentence_fragment, content):
+    sentences = []
+    current_sentence = sentence_fragment
+    for char in content:
+        current_sentence += char
+        if char in [",", "，", ".", "。", "?", "？", "!", "！"]:
+            if any(c.isalnum() for c in current_sentence):
+                sentences.append(current_sentence)
+            current_sentence = ""
+    return sentences, current_sentence
+
+
+SAMPLES = [
+    "Sure, here is a quick overview. The Realtime API streams audio and text "
+    "deltas, so the agent can speak while it is still thinking! Does that help?",
+    "当然可以。我们先看一下配置，然后再启动服务。如果有问题，请告诉我！",
+    # A long run without punctuation, e.g. a code block or a list of names.
+    " ".join(["token"] * 2000) + ".",
+]
+
+
+def synthetic_streams(rounds: int = 50) -> list[list[str]]:
+    rng = random.Random(7)
+    streams = []
+    for _ in range(rounds):
+        for text in SAMPLES:
+            deltas, i = [], 0
+            while i < len(text):
+                n = rng.randint(1, 4)
+                deltas.append(text[i : i + n])
+                i += n
+            streams.append(deltas)
+    return streams
+
+
+def load_streams(path: str) -> list[list[str]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def run_legacy(streams) -> tuple[float, int]:
+    count = 0
+    start = time.perf_counter()
+    for deltas in streams:
+        fragment = ""
+        for delta in deltas:
+            sentences, fragment = legacy_parse_sentences(fragment, delta)
+            count += len(sentences)
+    return time.perf_counter() - start, count
+
+
+def run_segmenter(streams, **kwargs) -> tuple[float, int]:
+    count = 0
+    start = time.perf_counter()
+    for deltas in streams:
+        segmenter = SentenceSegmenter(**kwargs)
+        for delta in deltas:
+            count += len(segmenter.push(delta))
+    return time.perf_counter() - start, count
+
+
+def main() -> None:
+    streams = load_streams(sys.argv[1]) if len(sys.argv) > 1 else synthetic_streams()
+    deltas = sum(len(s) for s in streams)
+    chars = sum(len(d) for s in streams for d in s)
+    print(f"{len(streams)} streams, {deltas} deltas, {chars} chars")
+
+    for name, fn in [
+        ("legacy parse_sentences", lambda: run_legacy(streams)),
+        ("SentenceSegmenter", lambda: run_segmenter(streams, decimals=False)),
+        ("SentenceSegmenter(en)", lambda: run_segmenter(streams, language="en")),
+    ]:
+        elapsed, count = fn()
+        print(
+            f"{name:<24} {elapsed * 1000:8.1f} ms  "
+            f"{deltas / elapsed:12.0f} deltas/s  {count} sentences"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sentence_segmenter import SentenceSegmenter  # noqa: E402
+
+
+def split(*deltas: str) -> list:
+    segmenter = SentenceSegmenter("en-US")
+    sentences = []
+    for delta in deltas:
+        sentences += segmenter.push(delta)
+    assert segmenter.flush() == ""
+    return sentences
+
+
+def test_no_and_i_end_sentences():
+    assert split("The answer is no.") == ["The answer is no."]
+    assert split("Yes, so do I.") == ["Yes,", " so do I."]
+    assert split("The answer is no. Yes, so do I. Good.") == [
+        "The answer is no.",
+        " Yes,",
+        " so do I.",
+        " Good.",
+    ]
+
+
+def test_initials_and_abbreviations_do_not_end_sentences():
+    expected = ["Written by J. R. R. Tolkien.", " Mr. Smith read it."]
+    assert split("Written by J. R. R. Tolkien. Mr. Smith read it.") == expected
+    assert split("Written by J.", " R", ". R. Tol", "kien. Mr. Smith read it.") == (
+        expected
+    )
+    assert split("Use e.", "g. apples. It was plan b. Then pears.") == [
+        "Use e.g. apples.",
+        " It was plan b.",
+        " Then pears.",
+    ]
+    assert split("It is 3.", "14. Yes.") == ["It is 3.14.", " Yes."]
+
+
+def test_end_of_turn_releases_the_held_sentence():
+    segmenter = SentenceSegmenter("en-US")
+    # "42." might still become "42.5", so push holds it back.
+    assert segmenter.push("The total is 42.") == []
+    assert segmenter.flush() == "The total is 42."
+    # The next turn starts clean.
+    assert segmenter.push("Next one.") == ["Next one."]
@@ -0,0 +1,67 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+
+
+class AudioInBuffer:
+    """Accumulate input PCM frames into fixed-size chunks for the model.
+
+    Frames are copied into a ring preallocated at construction time, so
+    appending a 10ms frame never reallocates or copies the audio already
+    pending, unlike `self.buff += frame` on bytes. The ring holds a whole
+    number of chunks and chunks are always read at chunk-aligned offsets,
+    which means every chunk popped is a contiguous memoryview of the ring.
+
+    When the ring is full (e.g. while the connection is still being set up)
+    the oldest chunk is dropped and counted in `dropped`, keeping the backlog
+    bounded instead of growing for as long as the model is unreachable.
+
+    A popped view is only valid until the next write(), so it must be
+    encoded or copied right away.
+    """
+
+    def __init__(self, chunk_bytes: int = 5120, max_chunks: int = 64) -> None:
+        self.chunk_bytes = chunk_bytes
+        self.capacity = chunk_bytes * max_chunks
+        self._buf = bytearray(self.capacity)
+        self._view = memoryview(self._buf)
+        self._read = 0
+        self._size = 0
+
+        # Bytes discarded because the ring overflowed.
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """Bytes written but not popped yet."""
+        return self._size
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        src = memoryview(data)
+        n = len(src)
+        offset = 0
+        while offset < n:
+            if self._size == self.capacity:
+                self._read = (self._read + self.chunk_bytes) % self.capacity
+                self._size -= self.chunk_bytes
+                self.dropped += self.chunk_bytes
+            pos = (self._read + self._size) % self.capacity
+            count = min(n - offset, self.capacity - self._size, self.capacity - pos)
+            self._view[pos : pos + count] = src[offset : offset + count]
+            offset += count
+            self._size += count
+
+    def pop(self) -> memoryview | None:
+        """Return the oldest complete chunk, or None if there is none yet."""
+        if self._size < self.chunk_bytes:
+            return None
+        chunk = self._view[self._read : self._read + self.chunk_bytes]
+        self._read = (self._read + self.chunk_bytes) % self.capacity
+        self._size -= self.chunk_bytes
+        return chunk
+
+    def clear(self) -> None:
+        self._read = 0
+        self._size = 0
@@ -0,0 +1,80 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+from collections import OrderedDict
+
+
+class InterruptionState:
+    """Interruption bookkeeping for a realtime session.
+
+    Tracks the response being generated, the item/content index to truncate
+    when the user barges in, and the ids of responses that were interrupted
+    so late deltas belonging to them can be dropped.
+
+    Interrupted ids are kept in an LRU of at most max_flushed entries: the
+    server stops streaming an interrupted response within a few events, so
+    only the most recent ids ever matter, and an hours-long session no longer
+    grows the set without bound. Membership and eviction are both O(1).
+    """
+
+    def __init__(self, max_flushed: int = 64) -> None:
+        self.max_flushed = max_flushed
+        self.response_id = ""
+        self.item_id = ""
+        self.content_index = 0
+
+        self._flushed: OrderedDict[str, None] = OrderedDict()
+
+        # Metrics
+        self.interruptions = 0
+        self.evictions = 0
+
+    @property
+    def size(self) -> int:
+        return len(self._flushed)
+
+    def is_flushed(self, response_id: str) -> bool:
+        return response_id in self._flushed
+
+    def on_response_created(self, response_id: str) -> None:
+        self.response_id = response_id
+
+    def on_response_done(self, response_id: str) -> None:
+        if response_id == self.response_id:
+            self.response_id = ""
+
+    def on_item(self, item_id: str) -> bool:
+        """Record the item being played, return True if it is a new one."""
+        if item_id == self.item_id:
+            return False
+        self.item_id = item_id
+        return True
+
+    def interrupt(self) -> None:
+        """Drop the rest of the ongoing response and forget the played item."""
+        if self.response_id:
+            # a barge-in repeated during one response counts once
+            if self.response_id not in self._flushed:
+                self.interruptions += 1
+            self._flushed[self.response_id] = None
+            self._flushed.move_to_end(self.response_id)
+            if len(self._flushed) > self.max_flushed:
+                self._flushed.popitem(last=False)
+                self.evictions += 1
+        self.item_id = ""
+
+    def reset(self) -> None:
+        """Forget everything, e.g. when a new connection is made."""
+        self.response_id = ""
+        self.item_id = ""
+        self.content_index = 0
+        self._flushed.clear()
+
+    def metrics(self) -> dict:
+        return {
+            "flushed_size": self.size,
+            "flushed_evictions": self.evictions,
+            "interruptions": self.interruptions,
+        }
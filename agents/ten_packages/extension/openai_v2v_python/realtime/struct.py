@@ -1,4 +1,6 @@
+import base64
 import json
+import re
 
 from dataclasses import dataclass, asdict, field, is_dataclass
 from typing import Any, Dict, Literal, Optional, List, Set, Union
@@ -264,63 +266,63 @@ class EventType(str, Enum):
 
 
 # Base class for all ServerToClientMessages
-@dataclass
+@dataclass(slots=True)
 class ServerToClientMessage:
     event_id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class ErrorMessage(ServerToClientMessage):
     error: RealtimeError
     type: str = EventType.ERROR
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionCreated(ServerToClientMessage):
     session: Session
     type: str = EventType.SESSION_CREATED
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionUpdated(ServerToClientMessage):
     session: Session
     type: str = EventType.SESSION_UPDATED
 
 
-@dataclass
+@dataclass(slots=True)
 class InputAudioBufferCommitted(ServerToClientMessage):
     item_id: str
     type: str = EventType.INPUT_AUDIO_BUFFER_COMMITTED
     previous_item_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class InputAudioBufferCleared(ServerToClientMessage):
     type: str = EventType.INPUT_AUDIO_BUFFER_CLEARED
 
 
-@dataclass
+@dataclass(slots=True)
 class InputAudioBufferSpeechStarted(ServerToClientMessage):
     audio_start_ms: int
     item_id: str
     type: str = EventType.INPUT_AUDIO_BUFFER_SPEECH_STARTED
 
 
-@dataclass
+@dataclass(slots=True)
 class InputAudioBufferSpeechStopped(ServerToClientMessage):
     audio_end_ms: int
     type: str = EventType.INPUT_AUDIO_BUFFER_SPEECH_STOPPED
     item_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemCreated(ServerToClientMessage):
     item: ItemParam
     type: str = EventType.ITEM_CREATED
     previous_item_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemTruncated(ServerToClientMessage):
     item_id: str
     content_index: int
@@ -328,7 +330,7 @@ class ItemTruncated(ServerToClientMessage):
     type: str = EventType.ITEM_TRUNCATED
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemDeleted(ServerToClientMessage):
     item_id: str
     type: str = EventType.ITEM_DELETED
@@ -416,19 +418,19 @@ class Response:
     metadata: Optional[Dict[str, Any]] = None  # Additional metadata for the response
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseCreated(ServerToClientMessage):
     response: Response
     type: str = EventType.RESPONSE_CREATED
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseDone(ServerToClientMessage):
     response: Response
     type: str = EventType.RESPONSE_DONE
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseTextDelta(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -438,7 +440,7 @@ class ResponseTextDelta(ServerToClientMessage):
     type: str = EventType.RESPONSE_TEXT_DELTA
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseTextDone(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -448,7 +450,7 @@ class ResponseTextDone(ServerToClientMessage):
     type: str = EventType.RESPONSE_TEXT_DONE
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseAudioTranscriptDelta(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -458,7 +460,7 @@ class ResponseAudioTranscriptDelta(ServerToClientMessage):
     type: str = EventType.RESPONSE_AUDIO_TRANSCRIPT_DELTA
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseAudioTranscriptDone(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -468,7 +470,7 @@ class ResponseAudioTranscriptDone(ServerToClientMessage):
     type: str = EventType.RESPONSE_AUDIO_TRANSCRIPT_DONE
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseAudioDelta(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -478,7 +480,7 @@ class ResponseAudioDelta(ServerToClientMessage):
     type: str = EventType.RESPONSE_AUDIO_DELTA
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseAudioDone(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -487,7 +489,7 @@ class ResponseAudioDone(ServerToClientMessage):
     type: str = EventType.RESPONSE_AUDIO_DONE
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseFunctionCallArgumentsDelta(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -497,7 +499,7 @@ class ResponseFunctionCallArgumentsDelta(ServerToClientMessage):
     type: str = EventType.RESPONSE_FUNCTION_CALL_ARGUMENTS_DELTA
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseFunctionCallArgumentsDone(ServerToClientMessage):
     response_id: str
     item_id: str
@@ -516,13 +518,13 @@ class RateLimitDetails:
     reset_seconds: float  # The number of seconds until the rate limit resets
 
 
-@dataclass
+@dataclass(slots=True)
 class RateLimitsUpdated(ServerToClientMessage):
     rate_limits: List[RateLimitDetails]
     type: str = EventType.RATE_LIMITS_UPDATED
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseOutputItemAdded(ServerToClientMessage):
     response_id: str  # The ID of the response
     output_index: int  # Index of the output item in the response
@@ -532,7 +534,7 @@ class ResponseOutputItemAdded(ServerToClientMessage):
     type: str = EventType.RESPONSE_OUTPUT_ITEM_ADDED  # Fixed event type
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseContentPartAdded(ServerToClientMessage):
     response_id: str  # The ID of the response
     item_id: str  # The ID of the item to which the content part was added
@@ -543,7 +545,7 @@ class ResponseContentPartAdded(ServerToClientMessage):
     type: str = EventType.RESPONSE_CONTENT_PART_ADDED  # Fixed event type
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseContentPartDone(ServerToClientMessage):
     response_id: str  # The ID of the response
     item_id: str  # The ID of the item to which the content part belongs
@@ -554,7 +556,7 @@ class ResponseContentPartDone(ServerToClientMessage):
     type: str = EventType.RESPONSE_CONTENT_PART_ADDED  # Fixed event type
 
 
-@dataclass
+@dataclass(slots=True)
 class ResponseOutputItemDone(ServerToClientMessage):
     response_id: str  # The ID of the response
     output_index: int  # Index of the output item in the response
@@ -562,7 +564,7 @@ class ResponseOutputItemDone(ServerToClientMessage):
     type: str = EventType.RESPONSE_OUTPUT_ITEM_DONE  # Fixed event type
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemInputAudioTranscriptionCompleted(ServerToClientMessage):
     item_id: str  # The ID of the item for which transcription was completed
     content_index: int  # Index of the content part that was transcribed
@@ -570,7 +572,7 @@ class ItemInputAudioTranscriptionCompleted(ServerToClientMessage):
     type: str = EventType.ITEM_INPUT_AUDIO_TRANSCRIPTION_COMPLETED  # Fixed event type
 
 
-@dataclass
+@dataclass(slots=True)
 class ItemInputAudioTranscriptionFailed(ServerToClientMessage):
     item_id: str  # The ID of the item for which transcription failed
     content_index: int  # Index of the content part that failed to transcribe
@@ -737,113 +739,170 @@ ClientToServerMessages = Union[
 ]
 
 
+# Per-class decoding plans: a tuple of (field name, nested dataclass or None,
+# element type for list values or None). Built once per class instead of
+# re-reading __dataclass_fields__ on every message.
+_FIELD_PLANS: Dict[type, tuple] = {}
+
+
+def _field_plan(data_class) -> tuple:
+    plan = _FIELD_PLANS.get(data_class)
+    if plan is None:
+        entries = []
+        for f in data_class.__dataclass_fields__.values():
+            nested = f.type if is_dataclass(f.type) else None
+            args = getattr(f.type, "__args__", None)
+            item_type = args[0] if args and is_dataclass(args[0]) else None
+            entries.append((f.name, nested, item_type))
+        plan = tuple(entries)
+        _FIELD_PLANS[data_class] = plan
+    return plan
+
+
 def from_dict(data_class, data):
     """Recursively convert a dictionary to a dataclass instance."""
     if is_dataclass(data_class):  # Check if the target class is a dataclass
-        fieldtypes = {f.name: f.type for f in data_class.__dataclass_fields__.values()}
-        # Filter out keys that are not in the dataclass fields
-        valid_data = {f: data[f] for f in fieldtypes if f in data}
-        return data_class(
-            **{f: from_dict(fieldtypes[f], valid_data[f]) for f in valid_data}
-        )
+        kwargs = {}
+        # Keys that are not in the dataclass fields are ignored
+        for name, nested, item_type in _field_plan(data_class):
+            if name not in data:
+                continue
+            value = data[name]
+            if nested is not None:
+                value = from_dict(nested, value)
+            elif item_type is not None and isinstance(value, list):
+                value = [from_dict(item_type, item) for item in value]
+            kwargs[name] = value
+        return data_class(**kwargs)
     elif isinstance(data, list):  # Handle lists of nested dataclass objects
         return [from_dict(data_class.__args__[0], item) for item in data]
     else:  # For primitive types (str, int, float, etc.), return the value as-is
         return data
 
 
+CLIENT_MESSAGE_TYPES: Dict[str, type] = {
+    EventType.INPUT_AUDIO_BUFFER_APPEND: InputAudioBufferAppend,
+    EventType.INPUT_AUDIO_BUFFER_COMMIT: InputAudioBufferCommit,
+    EventType.INPUT_AUDIO_BUFFER_CLEAR: InputAudioBufferClear,
+    EventType.ITEM_CREATE: ItemCreate,
+    EventType.ITEM_TRUNCATE: ItemTruncate,
+    EventType.ITEM_DELETE: ItemDelete,
+    EventType.RESPONSE_CREATE: ResponseCreate,
+    EventType.RESPONSE_CANCEL: ResponseCancel,
+    EventType.UPDATE_CONVERSATION_CONFIG: UpdateConversationConfig,
+    EventType.SESSION_UPDATE: SessionUpdate,
+}
+
+SERVER_MESSAGE_TYPES: Dict[str, type] = {
+    EventType.ERROR: ErrorMessage,
+    EventType.SESSION_CREATED: SessionCreated,
+    EventType.SESSION_UPDATED: SessionUpdated,
+    EventType.INPUT_AUDIO_BUFFER_COMMITTED: InputAudioBufferCommitted,
+    EventType.INPUT_AUDIO_BUFFER_CLEARED: InputAudioBufferCleared,
+    EventType.INPUT_AUDIO_BUFFER_SPEECH_STARTED: InputAudioBufferSpeechStarted,
+    EventType.INPUT_AUDIO_BUFFER_SPEECH_STOPPED: InputAudioBufferSpeechStopped,
+    EventType.ITEM_CREATED: ItemCreated,
+    EventType.ITEM_TRUNCATED: ItemTruncated,
+    EventType.ITEM_DELETED: ItemDeleted,
+    EventType.RESPONSE_CREATED: ResponseCreated,
+    EventType.RESPONSE_DONE: ResponseDone,
+    EventType.RESPONSE_TEXT_DELTA: ResponseTextDelta,
+    EventType.RESPONSE_TEXT_DONE: ResponseTextDone,
+    EventType.RESPONSE_AUDIO_TRANSCRIPT_DELTA: ResponseAudioTranscriptDelta,
+    EventType.RESPONSE_AUDIO_TRANSCRIPT_DONE: ResponseAudioTranscriptDone,
+    EventType.RESPONSE_AUDIO_DELTA: ResponseAudioDelta,
+    EventType.RESPONSE_AUDIO_DONE: ResponseAudioDone,
+    EventType.RESPONSE_FUNCTION_CALL_ARGUMENTS_DELTA: ResponseFunctionCallArgumentsDelta,
+    EventType.RESPONSE_FUNCTION_CALL_ARGUMENTS_DONE: ResponseFunctionCallArgumentsDone,
+    EventType.RATE_LIMITS_UPDATED: RateLimitsUpdated,
+    EventType.RESPONSE_OUTPUT_ITEM_ADDED: ResponseOutputItemAdded,
+    EventType.RESPONSE_CONTENT_PART_ADDED: ResponseContentPartAdded,
+    EventType.RESPONSE_CONTENT_PART_DONE: ResponseContentPartDone,
+    EventType.RESPONSE_OUTPUT_ITEM_DONE: ResponseOutputItemDone,
+    EventType.ITEM_INPUT_AUDIO_TRANSCRIPTION_COMPLETED: ItemInputAudioTranscriptionCompleted,
+    EventType.ITEM_INPUT_AUDIO_TRANSCRIPTION_FAILED: ItemInputAudioTranscriptionFailed,
+}
+
+# EventType is a str enum, so plain string keys hash and compare the same way.
+_CLIENT_MESSAGE_TYPES = {str(k.value): v for k, v in CLIENT_MESSAGE_TYPES.items()}
+_SERVER_MESSAGE_TYPES = {str(k.value): v for k, v in SERVER_MESSAGE_TYPES.items()}
+
+
 def parse_client_message(unparsed_string: str) -> ClientToServerMessage:
     data = json.loads(unparsed_string)
 
-    # Dynamically select the correct message class based on the `type` field, using from_dict
-    if data["type"] == EventType.INPUT_AUDIO_BUFFER_APPEND:
-        return from_dict(InputAudioBufferAppend, data)
-    elif data["type"] == EventType.INPUT_AUDIO_BUFFER_COMMIT:
-        return from_dict(InputAudioBufferCommit, data)
-    elif data["type"] == EventType.INPUT_AUDIO_BUFFER_CLEAR:
-        return from_dict(InputAudioBufferClear, data)
-    elif data["type"] == EventType.ITEM_CREATE:
-        return from_dict(ItemCreate, data)
-    elif data["type"] == EventType.ITEM_TRUNCATE:
-        return from_dict(ItemTruncate, data)
-    elif data["type"] == EventType.ITEM_DELETE:
-        return from_dict(ItemDelete, data)
-    elif data["type"] == EventType.RESPONSE_CREATE:
-        return from_dict(ResponseCreate, data)
-    elif data["type"] == EventType.RESPONSE_CANCEL:
-        return from_dict(ResponseCancel, data)
-    elif data["type"] == EventType.UPDATE_CONVERSATION_CONFIG:
-        return from_dict(UpdateConversationConfig, data)
-    elif data["type"] == EventType.SESSION_UPDATE:
-        return from_dict(SessionUpdate, data)
-
-    raise ValueError(f"Unknown message type: {data['type']}")
-
-
-# Assuming all necessary classes and enums (EventType, ServerToClientMessages, etc.) are imported
-# Here’s how you can dynamically parse a server-to-client message based on the `type` field:
+    message_class = _CLIENT_MESSAGE_TYPES.get(data["type"])
+    if message_class is None:
+        raise ValueError(f"Unknown message type: {data['type']}")
+    return from_dict(message_class, data)
+
+
+_AUDIO_DELTA_TYPE_RE = re.compile(r'"type"\s*:\s*"response\.audio\.delta"')
+_DELTA_KEY_RE = re.compile(r'"delta"\s*:\s*"')
+
+
+def _audio_delta_fields() -> tuple:
+    fields = []
+    for name, f in ResponseAudioDelta.__dataclass_fields__.items():
+        if name in ("type", "delta"):
+            continue
+        if f.type is int:
+            pattern = re.compile(r'"' + name + r'"\s*:\s*(-?\d+)')
+            fields.append((name, pattern, int))
+        else:
+            pattern = re.compile(r'"' + name + r'"\s*:\s*"([^"\\]*)"')
+            fields.append((name, pattern, None))
+    return tuple(fields)
+
+
+_AUDIO_DELTA_FIELDS = _audio_delta_fields()
+
+
+def parse_audio_delta(unparsed_string: str) -> Optional[ResponseAudioDelta]:
+    """Decode a response.audio.delta event without json.loads.
+
+    Audio deltas are by far the most frequent and the largest server events.
+    The base64 payload never contains quotes or escapes, so it can be sliced
+    straight out of the raw text. Returns None when the message is not an
+    audio delta or does not have the expected shape, in which case the caller
+    should fall back to parse_server_message.
+    """
+    if not _AUDIO_DELTA_TYPE_RE.search(unparsed_string, 0, 256):
+        return None
+
+    m = _DELTA_KEY_RE.search(unparsed_string)
+    if m is None:
+        return None
+    start = m.end()
+    end = unparsed_string.find('"', start)
+    if end < 0:
+        return None
+
+    # The short fields live either before or after the payload; searching the
+    # two sides separately avoids scanning the base64 text.
+    head = unparsed_string[: m.start()]
+    tail = unparsed_string[end + 1 :]
+    kwargs = {"delta": unparsed_string[start:end]}
+    for name, pattern, convert in _AUDIO_DELTA_FIELDS:
+        fm = pattern.search(head) or pattern.search(tail)
+        if fm is None:
+            return None
+        value = fm.group(1)
+        kwargs[name] = convert(value) if convert else value
+    return ResponseAudioDelta(**kwargs)
 
 
 def parse_server_message(unparsed_string: str) -> ServerToClientMessage:
+    message = parse_audio_delta(unparsed_string)
+    if message is not None:
+        return message
+
     data = json.loads(unparsed_string)
 
-    # Dynamically select the correct message class based on the `type` field, using from_dict
-    if data["type"] == EventType.ERROR:
-        return from_dict(ErrorMessage, data)
-    elif data["type"] == EventType.SESSION_CREATED:
-        return from_dict(SessionCreated, data)
-    elif data["type"] == EventType.SESSION_UPDATED:
-        return from_dict(SessionUpdated, data)
-    elif data["type"] == EventType.INPUT_AUDIO_BUFFER_COMMITTED:
-        return from_dict(InputAudioBufferCommitted, data)
-    elif data["type"] == EventType.INPUT_AUDIO_BUFFER_CLEARED:
-        return from_dict(InputAudioBufferCleared, data)
-    elif data["type"] == EventType.INPUT_AUDIO_BUFFER_SPEECH_STARTED:
-        return from_dict(InputAudioBufferSpeechStarted, data)
-    elif data["type"] == EventType.INPUT_AUDIO_BUFFER_SPEECH_STOPPED:
-        return from_dict(InputAudioBufferSpeechStopped, data)
-    elif data["type"] == EventType.ITEM_CREATED:
-        return from_dict(ItemCreated, data)
-    elif data["type"] == EventType.ITEM_TRUNCATED:
-        return from_dict(ItemTruncated, data)
-    elif data["type"] == EventType.ITEM_DELETED:
-        return from_dict(ItemDeleted, data)
-    elif data["type"] == EventType.RESPONSE_CREATED:
-        return from_dict(ResponseCreated, data)
-    elif data["type"] == EventType.RESPONSE_DONE:
-        return from_dict(ResponseDone, data)
-    elif data["type"] == EventType.RESPONSE_TEXT_DELTA:
-        return from_dict(ResponseTextDelta, data)
-    elif data["type"] == EventType.RESPONSE_TEXT_DONE:
-        return from_dict(ResponseTextDone, data)
-    elif data["type"] == EventType.RESPONSE_AUDIO_TRANSCRIPT_DELTA:
-        return from_dict(ResponseAudioTranscriptDelta, data)
-    elif data["type"] == EventType.RESPONSE_AUDIO_TRANSCRIPT_DONE:
-        return from_dict(ResponseAudioTranscriptDone, data)
-    elif data["type"] == EventType.RESPONSE_AUDIO_DELTA:
-        return from_dict(ResponseAudioDelta, data)
-    elif data["type"] == EventType.RESPONSE_AUDIO_DONE:
-        return from_dict(ResponseAudioDone, data)
-    elif data["type"] == EventType.RESPONSE_FUNCTION_CALL_ARGUMENTS_DELTA:
-        return from_dict(ResponseFunctionCallArgumentsDelta, data)
-    elif data["type"] == EventType.RESPONSE_FUNCTION_CALL_ARGUMENTS_DONE:
-        return from_dict(ResponseFunctionCallArgumentsDone, data)
-    elif data["type"] == EventType.RATE_LIMITS_UPDATED:
-        return from_dict(RateLimitsUpdated, data)
-    elif data["type"] == EventType.RESPONSE_OUTPUT_ITEM_ADDED:
-        return from_dict(ResponseOutputItemAdded, data)
-    elif data["type"] == EventType.RESPONSE_CONTENT_PART_ADDED:
-        return from_dict(ResponseContentPartAdded, data)
-    elif data["type"] == EventType.RESPONSE_CONTENT_PART_DONE:
-        return from_dict(ResponseContentPartDone, data)
-    elif data["type"] == EventType.RESPONSE_OUTPUT_ITEM_DONE:
-        return from_dict(ResponseOutputItemDone, data)
-    elif data["type"] == EventType.ITEM_INPUT_AUDIO_TRANSCRIPTION_COMPLETED:
-        return from_dict(ItemInputAudioTranscriptionCompleted, data)
-    elif data["type"] == EventType.ITEM_INPUT_AUDIO_TRANSCRIPTION_FAILED:
-        return from_dict(ItemInputAudioTranscriptionFailed, data)
-
-    raise ValueError(f"Unknown message type: {data['type']}")
+    message_class = _SERVER_MESSAGE_TYPES.get(data["type"])
+    if message_class is None:
+        raise ValueError(f"Unknown message type: {data['type']}")
+    return from_dict(message_class, data)
 
 
 def to_json(obj: Union[ClientToServerMessage, ServerToClientMessage]) -> str:
@@ -851,3 +910,28 @@ def to_json(obj: Union[ClientToServerMessage, ServerToClientMessage]) -> str:
     return json.dumps(
         asdict(obj, dict_factory=lambda x: {k: v for (k, v) in x if v is not None})
     )
+
+
+# to_json(InputAudioBufferAppend(...)) split around the two variable fields.
+_APPEND_HEAD = '{"event_id": "'
+_APPEND_MID = '", "audio": "'
+_APPEND_TAIL = '", "type": "' + EventType.INPUT_AUDIO_BUFFER_APPEND.value + '"}'
+
+
+def input_audio_buffer_append_json(
+    audio: bytes | bytearray | memoryview, event_id: str = ""
+) -> str:
+    """Serialize an input_audio_buffer.append event for raw PCM.
+
+    Produces the same text as to_json(InputAudioBufferAppend(audio=...)), but
+    splices the base64 payload into a constant template instead of going
+    through asdict() and json.dumps(), which copy and escape-scan the whole
+    payload for every chunk. uuid and base64 output never need escaping.
+    """
+    return (
+        _APPEND_HEAD
+        + (event_id or generate_event_id())
+        + _APPEND_MID
+        + base64.b64encode(audio).decode("ascii")
+        + _APPEND_TAIL
+    )
@@ -0,0 +1,77 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Compare AudioInBuffer + templated append JSON with the former input path.
+
+Usage:
+    python tests/bench_audio_in_buffer.py [seconds_of_audio]
+
+10ms 24kHz mono frames are accumulated into 5120 byte chunks and serialized
+as input_audio_buffer.append events, once with `buff += frame` and
+to_json(InputAudioBufferAppend(...)), once with AudioInBuffer and
+input_audio_buffer_append_json().
+"""
+
+import base64
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from audio_in_buffer import AudioInBuffer  # noqa: E402
+from realtime.struct import (  # noqa: E402
+    InputAudioBufferAppend,
+    input_audio_buffer_append_json,
+    to_json,
+)
+
+FRAME_BYTES = 480
+THRESHOLD = 5120
+
+
+def run_legacy(frames: list[bytes]) -> tuple[float, int]:
+    sent = 0
+    start = time.perf_counter()
+    buff = b""
+    for frame in frames:
+        buff += frame
+        if len(buff) >= THRESHOLD:
+            audio = base64.b64encode(buff).decode("utf-8")
+            sent += len(to_json(InputAudioBufferAppend(audio=audio)))
+            buff = b""
+    return time.perf_counter() - start, sent
+
+
+def run_ring(frames: list[bytes]) -> tuple[float, int]:
+    sent = 0
+    start = time.perf_counter()
+    audio_in = AudioInBuffer(THRESHOLD)
+    for frame in frames:
+        audio_in.write(frame)
+        while (chunk := audio_in.pop()) is not None:
+            sent += len(input_audio_buffer_append_json(chunk))
+    return time.perf_counter() - start, sent
+
+
+def main() -> None:
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    frame = os.urandom(FRAME_BYTES)
+    frames = [frame] * (seconds * 100)
+    print(f"{seconds}s of audio, {len(frames)} frames")
+
+    for name, fn in [
+        ("bytes += / to_json", run_legacy),
+        ("AudioInBuffer / template", run_ring),
+    ]:
+        elapsed, sent = fn(frames)
+        print(
+            f"{name:<26} {elapsed * 1e6 / seconds:8.1f} us/s-audio  "
+            f"{sent} bytes sent"
+        )
+
+
+if __name__ == "__main__":
+    main()
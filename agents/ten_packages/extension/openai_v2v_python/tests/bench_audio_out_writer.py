@@ -0,0 +1,101 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Compare AudioOutWriter with the former decode/concatenate/copy path.
+
+Usage:
+    python tests/bench_audio_out_writer.py [seconds_of_audio]
+
+Synthetic 24kHz mono deltas of uneven, sometimes odd, sizes are replayed
+through both paths. Besides wall time per second of audio, the number of
+intermediate buffers each path allocates is counted (the AudioFrame copy
+itself is the same for both and left out).
+"""
+
+import base64
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from audio_out_writer import AudioOutWriter  # noqa: E402
+
+SAMPLE_RATE = 24000
+SAMPLE_BYTES = 2
+
+
+def synthetic_deltas(seconds: int) -> list[str]:
+    rng = random.Random(7)
+    total = SAMPLE_RATE * SAMPLE_BYTES * seconds
+    deltas, sent = [], 0
+    while sent < total:
+        n = min(rng.randint(1001, 9601), total - sent)
+        deltas.append(base64.b64encode(os.urandom(n)).decode())
+        sent += n
+    return deltas
+
+
+def run_legacy(deltas: list[str], frame_ms: int) -> tuple[float, int, int]:
+    frame_bytes = SAMPLE_RATE * frame_ms // 1000 * SAMPLE_BYTES
+    out = bytearray(max(frame_bytes, 16384))
+    leftover = b""
+    allocations = frames = 0
+    start = time.perf_counter()
+    for delta in deltas:
+        data = base64.b64decode(delta)
+        allocations += 1
+        if leftover:
+            data = leftover + data
+            allocations += 1
+        size = frame_bytes or len(data) - len(data) % SAMPLE_BYTES
+        offset = 0
+        while size and offset + size <= len(data):
+            chunk = data[offset : offset + size]
+            allocations += 1
+            out[: len(chunk)] = chunk
+            offset += size
+            frames += 1
+            if not frame_bytes:
+                break
+        leftover = data[offset:]
+        allocations += 1
+    return time.perf_counter() - start, allocations, frames
+
+
+def run_writer(deltas: list[str], frame_ms: int) -> tuple[float, int, int]:
+    writer = AudioOutWriter(SAMPLE_RATE, frame_ms=frame_ms)
+    out = bytearray(max(writer.frame_bytes, 16384))
+    frames = 0
+    start = time.perf_counter()
+    for delta in deltas:
+        for frame in writer.write_base64(delta):
+            out[: len(frame)] = frame
+            frames += 1
+    for frame in writer.flush():
+        out[: len(frame)] = frame
+        frames += 1
+    # One decoded bytes object per delta plus the pool itself.
+    return time.perf_counter() - start, len(deltas) + writer.allocations, frames
+
+
+def main() -> None:
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+    deltas = synthetic_deltas(seconds)
+    print(f"{seconds}s of audio, {len(deltas)} deltas")
+
+    for frame_ms in (0, 10, 20, 40):
+        for name, fn in [("legacy", run_legacy), ("AudioOutWriter", run_writer)]:
+            elapsed, allocations, frames = fn(deltas, frame_ms)
+            print(
+                f"frame_ms={frame_ms:<3} {name:<15} "
+                f"{elapsed * 1e6 / seconds:8.1f} us/s-audio  "
+                f"{allocations:8d} buffers  {frames:7d} frames"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Measure Realtime API server event parsing throughput.
+
+Usage:
+    python tests/bench_parse_server_message.py [session.jsonl]
+
+The optional session log holds one raw server event (JSON text) per line, as
+received on the websocket. Without a log a synthetic session is generated
+with the event mix of a typical voice conversation.
+"""
+
+import base64
+import json
+import os
+import sys
+import time
+from dataclasses import is_dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from realtime import struct  # noqa: E402
+
+
+def legacy_from_dict(data_class, data):
+    if is_dataclass(data_class):
+        fieldtypes = {f.name: f.type for f in data_class.__dataclass_fields__.values()}
+        valid_data = {f: data[f] for f in fieldtypes if f in data}
+        return data_class(
+            **{f: legacy_from_dict(fieldtypes[f], valid_data[f]) for f in valid_data}
+        )
+    elif isinstance(data, list):
+        return [legacy_from_dict(data_class.__args__[0], item) for item in data]
+    else:
+        return data
+
+
+# Same order as the former if/elif chain.
+_LEGACY_CHAIN = list(struct.SERVER_MESSAGE_TYPES.items())
+
+
+def legacy_parse_server_message(unparsed_string: str):
+    data = json.loads(unparsed_string)
+    for event_type, message_class in _LEGACY_CHAIN:
+        if data["type"] == event_type:
+            return legacy_from_dict(message_class, data)
+    raise ValueError(f"Unknown message type: {data['type']}")
+
+
+def synthetic_session(turns: int = 200) -> list[str]:
+    audio = base64.b64encode(os.urandom(4800)).decode()  # 100 ms @ 24 kHz
+    events = [
+        {
+            "type": "session.created",
+            "event_id": "ev_0",
+            "session": {"id": "sess_1", "model": "gpt-4o", "expires_at": 0},
+        }
+    ]
+    for t in range(turns):
+        rid, iid = f"resp_{t}", f"item_{t}"
+        common = {"response_id": rid, "item_id": iid, "output_index": 0}
+        events.append(
+            {
+                "type": "input_audio_buffer.speech_started",
+                "event_id": "e",
+                "audio_start_ms": 0,
+                "item_id": f"in_{t}",
+            }
+        )
+        events.append(
+            {
+                "type": "input_audio_buffer.speech_stopped",
+                "event_id": "e",
+                "audio_end_ms": 900,
+                "item_id": f"in_{t}",
+            }
+        )
+        events.append(
+            {
+                "type": "response.created",
+                "event_id": "e",
+                "response": {"id": rid, "status": "in_progress", "output": []},
+            }
+        )
+        for i in range(30):
+            events.append(
+                {
+                    "type": "response.audio.delta",
+                    "event_id": f"e_{t}_{i}",
+                    **common,
+                    "content_index": 0,
+                    "delta": audio,
+                }
+            )
+            if i % 3 == 0:
+                events.append(
+                    {
+                        "type": "response.audio_transcript.delta",
+                        "event_id": "e",
+                        **common,
+                        "content_index": 0,
+                        "delta": "word ",
+                    }
+                )
+        events.append(
+            {
+                "type": "response.audio.done",
+                "event_id": "e",
+                **common,
+                "content_index": 0,
+            }
+        )
+        events.append(
+            {
+                "type": "response.done",
+                "event_id": "e",
+                "response": {
+                    "id": rid,
+                    "status": "completed",
+                    "output": [],
+                    "usage": {"total_tokens": 10},
+                },
+            }
+        )
+    return [json.dumps(e) for e in events]
+
+
+def measure(parse, events, rounds: int = 3) -> float:
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for raw in events:
+            parse(raw)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(events) / best
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            events = [line.strip() for line in f if line.strip()]
+    else:
+        events = synthetic_session()
+    print(f"{len(events)} events, {sum(len(e) for e in events) / 1e6:.1f} MB")
+
+    before = measure(legacy_parse_server_message, events)
+    after = measure(struct.parse_server_message, events)
+    print(f"before: {before:10.0f} events/s")
+    print(f"after:  {after:10.0f} events/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
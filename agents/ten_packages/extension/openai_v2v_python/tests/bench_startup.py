@@ -0,0 +1,131 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Time from on_start to ready for the first user audio.
+
+Usage:
+    python tests/bench_startup.py [connect_ms] [retrieve_ms]
+
+A local aiohttp websocket server stands in for the Realtime API: the
+upgrade is answered after connect_ms (300 by default, TLS, upgrade and
+session set-up to a remote region) and session.created is sent right
+away. The retrieve cmd to the storage extension answers after retrieve_ms
+(60 by default, tsdb_firestore with its cmd hops).
+
+"sequential" is the former on_start: retrieve, then connect, then on
+session.created send session.update and one awaited conversation.item.create
+per history item. "parallel" connects while the history is retrieved,
+joins it on session.created and sends the items serialized up front.
+Ready is when the last item is written, audio is forwarded from then on.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from realtime.struct import (  # noqa: E402
+    AssistantMessageItemParam,
+    ContentType,
+    ItemCreate,
+    SessionUpdate,
+    SessionUpdateParams,
+    UserMessageItemParam,
+    to_json,
+)
+
+RUNS = 10
+
+
+async def serve(connect_ms: float) -> web.AppRunner:
+    async def handler(request):
+        await asyncio.sleep(connect_ms / 1000)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        await ws.send_str('{"type": "session.created", "session": {"id": "s"}}')
+        async for _ in ws:
+            pass
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/v1/realtime", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 8765).start()
+    return runner
+
+
+async def retrieve(retrieve_ms: float, count: int) -> list:
+    await asyncio.sleep(retrieve_ms / 1000)
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"history line {i}, a sentence or two the user or the assistant said",
+        }
+        for i in range(count)
+    ]
+
+
+def history_item(h: dict) -> ItemCreate:
+    content = [{"type": ContentType.InputText, "text": h["content"]}]
+    if h["role"] == "user":
+        return ItemCreate(item=UserMessageItemParam(content=content))
+    return ItemCreate(item=AssistantMessageItemParam(content=content))
+
+
+SESSION_UPDATE = SessionUpdate(session=SessionUpdateParams(instructions="be nice"))
+
+
+async def sequential(session, url, retrieve_ms, count) -> float:
+    start = time.perf_counter()
+    history = await retrieve(retrieve_ms, count)
+    async with session.ws_connect(url) as ws:
+        await ws.receive()  # session.created
+        await ws.send_str(to_json(SESSION_UPDATE))
+        for h in history:
+            await ws.send_str(to_json(history_item(h)))
+        return time.perf_counter() - start
+
+
+async def parallel(session, url, retrieve_ms, count) -> float:
+    start = time.perf_counter()
+    history_ready = asyncio.create_task(retrieve(retrieve_ms, count))
+    async with session.ws_connect(url) as ws:
+        await ws.receive()  # session.created
+        await ws.send_str(to_json(SESSION_UPDATE))
+        history = await history_ready
+        for message_str in [to_json(history_item(h)) for h in history]:
+            await ws.send_str(message_str)
+        return time.perf_counter() - start
+
+
+async def main() -> None:
+    connect_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 300
+    retrieve_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 60
+    print(f"connect {connect_ms:.0f} ms, retrieve {retrieve_ms:.0f} ms")
+    runner = await serve(connect_ms)
+    url = "http://127.0.0.1:8765/v1/realtime"
+    async with aiohttp.ClientSession() as session:
+        for count in (0, 20, 200):
+            for name, start_up in (("sequential", sequential), ("parallel", parallel)):
+                times = [
+                    await start_up(session, url, retrieve_ms, count)
+                    for _ in range(RUNS)
+                ]
+                print(
+                    f"{count:3d} items  {name:<10} ready after "
+                    f"{statistics.median(times) * 1000:6.1f} ms"
+                )
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from interruption_state import InterruptionState  # noqa: E402
+
+
+def _interrupt(state: InterruptionState, i: int) -> None:
+    state.on_response_created(f"resp_{i}")
+    state.on_item(f"item_{i}")
+    state.content_index = 0
+    state.interrupt()
+
+
+def test_interrupted_response_is_flushed():
+    state = InterruptionState(max_flushed=2)
+    state.on_response_created("a")
+    assert state.on_item("item_a")
+    assert not state.on_item("item_a")
+    state.interrupt()
+
+    assert state.is_flushed("a")
+    assert state.item_id == ""
+    assert state.response_id == "a"
+
+    state.on_response_done("a")
+    assert state.response_id == ""
+
+    # Interrupting while nothing is being generated flushes nothing.
+    state.interrupt()
+    assert state.size == 1
+    assert state.interruptions == 1
+
+
+def test_repeated_interrupt_counts_once():
+    state = InterruptionState()
+    state.on_response_created("a")
+    state.interrupt()
+    state.interrupt()
+    state.on_response_created("b")
+    state.interrupt()
+    assert state.metrics()["interruptions"] == 2
+
+
+def test_oldest_response_is_evicted():
+    state = InterruptionState(max_flushed=2)
+    for i in range(3):
+        _interrupt(state, i)
+
+    assert not state.is_flushed("resp_0")
+    assert state.is_flushed("resp_1")
+    assert state.is_flushed("resp_2")
+    assert state.metrics() == {
+        "flushed_size": 2,
+        "flushed_evictions": 1,
+        "interruptions": 3,
+    }
+
+
+def test_soak_100k_interruptions_memory_is_flat():
+    state = InterruptionState()
+    # Fill the LRU first so only steady-state behaviour is measured.
+    for i in range(state.max_flushed):
+        _interrupt(state, i)
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        for i in range(state.max_flushed, 100_000):
+            _interrupt(state, i)
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert state.size == state.max_flushed
+    assert state.interruptions == 100_000
+    assert state.evictions == 100_000 - state.max_flushed
+    # Only a handful of id strings may differ from the baseline.
+    assert current - baseline < 16 * 1024
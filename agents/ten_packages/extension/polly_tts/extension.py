@@ -41,7 +41,9 @@ class PollyTTSExtension(AsyncTTSBaseExtension):
         await super().on_stop(ten_env)
         ten_env.log_debug("on_stop")
 
-        # TODO: clean up resources
+        if self.client:
+            self.client.on_cancel_tts(ten_env)
+            self.client.close()
 
     async def on_deinit(self, ten_env: AsyncTenEnv) -> None:
         await super().on_deinit(ten_env)
@@ -1,3 +1,5 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import traceback
 import json
@@ -8,6 +10,8 @@ import boto3
 from botocore.exceptions import ClientError
 from contextlib import closing
 
+from .stream_bridge import ThreadedStream
+
 
 @dataclass
 class PollyTTSConfig(BaseConfig):
@@ -24,16 +28,42 @@ class PollyTTSConfig(BaseConfig):
     include_visemes: bool = False
     number_of_channels: int = 1
     audio_format: str = "pcm"
+    # Threads for blocking boto3 calls, two per request with visemes on
+    workers: int = 4
+    # PCM chunks read ahead of the extension, per request
+    chunk_queue_size: int = 32
+
+
+class _AudioChunks:
+    """Iterate a Polly AudioStream in frames; close() aborts a pending read."""
+
+    def __init__(self, body, chunk_size: int) -> None:
+        self.body = body
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        return self.body.iter_chunks(chunk_size=self.chunk_size)
+
+    def close(self) -> None:
+        self.body.close()
 
 
 class PollyTTS:
-    def __init__(self, config: PollyTTSConfig, ten_env: AsyncTenEnv) -> None:
+    def __init__(
+        self, config: PollyTTSConfig, ten_env: AsyncTenEnv, client=None
+    ) -> None:
         """
         :param config: A PollyConfig
+        :param client: A boto3 polly client, created from config if omitted
         """
         ten_env.log_info("startinit polly tts")
         self.config = config
-        if config.access_key and config.secret_key:
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.workers, thread_name_prefix="polly"
+        )
+        if client is not None:
+            self.client = client
+        elif config.access_key and config.secret_key:
             self.client = boto3.client(
                 service_name="polly",
                 region_name=config.region,
@@ -50,43 +80,52 @@ class PollyTTS:
             * self.config.bytes_per_sample
             / 100
         )
-        self.audio_stream = None
+        # Streams of the requests in progress, cancelled together
+        self.audio_streams: set[ThreadedStream] = set()
+
+    def _request_args(self, text: str) -> dict:
+        kwargs = {
+            "Engine": self.config.engine,
+            "OutputFormat": self.config.audio_format,
+            "Text": text,
+            "VoiceId": self.config.voice,
+        }
+        if self.config.lang_code is not None:
+            kwargs["LanguageCode"] = self.config.lang_code
+        return kwargs
 
-    def _synthesize(self, text, ten_env: AsyncTenEnv):
+    def _synthesize(self, text: str, ten_env: AsyncTenEnv) -> _AudioChunks:
         """
-        Synthesizes speech or speech marks from text, using the specified voice.
+        Synthesizes speech from text, using the specified voice. Blocking, runs
+        on the executor.
 
         :param text: The text to synthesize.
-        :return: The audio stream that contains the synthesized speech and a list
-                 of visemes that are associated with the speech audio.
+        :return: The audio stream that contains the synthesized speech.
         """
         try:
-            kwargs = {
-                "Engine": self.config.engine,
-                "OutputFormat": self.config.audio_format,
-                "Text": text,
-                "VoiceId": self.config.voice,
-            }
-            if self.config.lang_code is not None:
-                kwargs["LanguageCode"] = self.config.lang_code
-            response = self.client.synthesize_speech(**kwargs)
-            audio_stream = response["AudioStream"]
-            visemes = None
-            if self.config.include_visemes:
-                kwargs["OutputFormat"] = "json"
-                kwargs["SpeechMarkTypes"] = ["viseme"]
-                response = self.client.synthesize_speech(**kwargs)
-                visemes = [
-                    json.loads(v)
-                    for v in response["AudioStream"].read().decode().split()
-                    if v
-                ]
-                ten_env.log_debug("Got %s visemes.", len(visemes))
+            response = self.client.synthesize_speech(**self._request_args(text))
         except ClientError:
             ten_env.log_error("Couldn't get audio stream.")
             raise
-        else:
-            return audio_stream, visemes
+        return _AudioChunks(response["AudioStream"], self.frame_size)
+
+    def _synthesize_visemes(self, text: str, ten_env: AsyncTenEnv) -> list:
+        """
+        Synthesizes the visemes associated with the speech audio. Blocking, runs
+        on the executor next to the audio request.
+        """
+        kwargs = self._request_args(text)
+        kwargs["OutputFormat"] = "json"
+        kwargs["SpeechMarkTypes"] = ["viseme"]
+        try:
+            response = self.client.synthesize_speech(**kwargs)
+        except ClientError:
+            ten_env.log_error("Couldn't get visemes.")
+            raise
+        with closing(response["AudioStream"]) as stream:
+            visemes = [json.loads(v) for v in stream.read().split() if v]
+        ten_env.log_debug(f"Got {len(visemes)} visemes.")
+        return visemes
 
     async def text_to_speech_stream(
         self, ten_env: AsyncTenEnv, text: str, end_of_segment: bool
@@ -94,24 +133,49 @@ class PollyTTS:
         inputText = text
         if len(inputText) == 0:
             ten_env.log_warning("async_polly_handler: empty input detected.")
+
+        visemes = None
+        if self.config.include_visemes:
+            visemes = asyncio.get_running_loop().run_in_executor(
+                self.executor, self._synthesize_visemes, inputText, ten_env
+            )
+
+        stream = ThreadedStream(
+            lambda: self._synthesize(inputText, ten_env),
+            self.executor,
+            self.config.chunk_queue_size,
+        )
+        self.audio_streams.add(stream)
         try:
-            audio_stream, _ = self._synthesize(inputText, ten_env)
-            with closing(audio_stream) as stream:
-                for chunk in stream.iter_chunks(chunk_size=self.frame_size):
+            async with stream:
+                async for chunk in stream:
                     yield chunk
-                if end_of_segment:
-                    ten_env.log_debug("End of segment reached")
+            if stream.cancelled:
+                ten_env.log_debug("TTS cancelled mid stream")
+            elif end_of_segment:
+                ten_env.log_debug("End of segment reached")
+            if visemes is not None and not stream.cancelled:
+                # Nothing consumes the visemes yet, a failed request is
+                # still logged.
+                await visemes
         except Exception:
             ten_env.log_error(traceback.format_exc())
+        finally:
+            self.audio_streams.discard(stream)
+            if visemes is not None and not visemes.done():
+                visemes.cancel()
 
     def on_cancel_tts(self, ten_env: AsyncTenEnv) -> None:
         """
         Cancel ongoing TTS operation
         """
         try:
-            if hasattr(self, "audio_stream") and self.audio_stream:
-                self.audio_stream.close()
-                self.audio_stream = None
+            for stream in list(self.audio_streams):
+                stream.cancel()
+            if self.audio_streams:
                 ten_env.log_debug("TTS cancelled successfully")
         except Exception:
             ten_env.log_error(f"Failed to cancel TTS: {traceback.format_exc()}")
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
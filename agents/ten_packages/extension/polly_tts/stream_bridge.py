@@ -0,0 +1,137 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterator, Callable, Iterable
+
+_END = object()
+
+
+class _Error:
+    def __init__(self, exc: BaseException) -> None:
+        self.exc = exc
+
+
+class ThreadedStream:
+    """Consume a blocking iterator (e.g. a boto3 EventStream) from asyncio.
+
+    open_stream is called on an executor thread, so the blocking request
+    that opens the stream does not run on the event loop either. The worker
+    thread pushes items into a bounded asyncio.Queue; when the consumer falls
+    behind the worker blocks instead of buffering the whole response.
+
+    Leaving the `async with` block, including through task cancellation
+    (flush), or calling cancel() stops the worker: it is told to quit after
+    the current item and the stream is closed, which also unblocks a read
+    waiting on the socket. A consumer blocked in `async for` then finishes.
+
+        async with ThreadedStream(open_stream, executor) as stream:
+            async for event in stream:
+                ...
+    """
+
+    def __init__(
+        self,
+        open_stream: Callable[[], Iterable[Any]],
+        executor: concurrent.futures.Executor,
+        max_queue: int = 64,
+    ) -> None:
+        self._open_stream = open_stream
+        self._executor = executor
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue)
+        self._cancelled = threading.Event()
+        self._stream: Iterable[Any] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._future: asyncio.Future | None = None
+
+    async def __aenter__(self) -> "ThreadedStream":
+        self._loop = asyncio.get_running_loop()
+        self._future = self._loop.run_in_executor(self._executor, self._run)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        self.cancel()
+        return False
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._cancelled.is_set():
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is _END or self._cancelled.is_set():
+            raise StopAsyncIteration
+        if isinstance(item, _Error):
+            raise item.exc
+        return item
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Stop the stream, must be called on the loop's thread."""
+        if self._cancelled.is_set():
+            return
+        self._cancelled.set()
+        self._close()
+        # Wake up a consumer waiting for the next item.
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_END)
+
+    async def wait_closed(self) -> None:
+        """Wait for the worker thread to return, mostly useful in tests."""
+        if self._future is not None:
+            await asyncio.gather(self._future, return_exceptions=True)
+
+    def _run(self) -> None:
+        try:
+            self._stream = self._open_stream()
+            if self._cancelled.is_set():
+                # Cancelled while the request was in flight.
+                self._close()
+                return
+            for item in self._stream:
+                if self._cancelled.is_set() or not self._put(item):
+                    return
+        except BaseException as e:
+            if not self._cancelled.is_set():
+                self._put(_Error(e))
+            return
+        self._put(_END)
+
+    def _close(self) -> None:
+        close = getattr(self._stream, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def _put(self, item: Any) -> bool:
+        # Block this worker thread, never the loop, while the queue is full,
+        # but give up as soon as the consumer is gone.
+        put = self._queue.put(item)
+        try:
+            future = asyncio.run_coroutine_threadsafe(put, self._loop)
+        except RuntimeError:
+            # The loop is already closed.
+            put.close()
+            return False
+        while True:
+            try:
+                future.result(timeout=0.05)
+                return True
+            except concurrent.futures.TimeoutError:
+                if self._cancelled.is_set():
+                    future.cancel()
+                    return False
+            except (concurrent.futures.CancelledError, RuntimeError):
+                # Loop closed or put cancelled on shutdown.
+                return False
@@ -0,0 +1,127 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Time to first PCM chunk of PollyTTS under concurrent requests.
+
+Usage (ten_runtime_python and ten_ai_base must be importable):
+    python tests/bench_polly_ttfb.py
+
+A stub client replaces boto3: synthesize_speech blocks for REQUEST_LATENCY
+and the audio stream blocks CHUNK_LATENCY per 10ms frame, like a real
+response arriving over the network. The former implementation, which ran
+both on the event loop, is replayed for comparison.
+"""
+
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from polly_tts.polly_tts import PollyTTS, PollyTTSConfig  # noqa: E402
+
+REQUEST_LATENCY = 0.08
+CHUNK_LATENCY = 0.002
+AUDIO_SECONDS = 2
+
+
+class StubBody:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.closed = threading.Event()
+
+    def iter_chunks(self, chunk_size: int):
+        for i in range(0, len(self.data), chunk_size):
+            if self.closed.wait(CHUNK_LATENCY):
+                return
+            yield self.data[i : i + chunk_size]
+
+    def read(self) -> bytes:
+        time.sleep(CHUNK_LATENCY)
+        return self.data
+
+    def close(self) -> None:
+        self.closed.set()
+
+
+class StubPollyClient:
+    def synthesize_speech(self, **kwargs) -> dict:
+        time.sleep(REQUEST_LATENCY)
+        if kwargs["OutputFormat"] == "json":
+            marks = [
+                json.dumps(
+                    {"time": t * 50, "type": "viseme", "value": "p"},
+                    separators=(",", ":"),
+                )
+                for t in range(AUDIO_SECONDS * 20)
+            ]
+            return {"AudioStream": StubBody("\n".join(marks).encode())}
+        return {"AudioStream": StubBody(bytes(16000 * 2 * AUDIO_SECONDS))}
+
+
+class NullTenEnv:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+async def legacy_text_to_speech_stream(tts: PollyTTS, ten_env, text: str):
+    # Blocking requests and reads on the loop, as before.
+    kwargs = tts._request_args(text)
+    audio_stream = tts.client.synthesize_speech(**kwargs)["AudioStream"]
+    if tts.config.include_visemes:
+        kwargs["OutputFormat"] = "json"
+        kwargs["SpeechMarkTypes"] = ["viseme"]
+        response = tts.client.synthesize_speech(**kwargs)
+        [json.loads(v) for v in response["AudioStream"].read().decode().split()]
+    for chunk in audio_stream.iter_chunks(chunk_size=tts.frame_size):
+        yield chunk
+
+
+async def first_chunk_latency(stream, start: float) -> float:
+    ttfb = None
+    async for _ in stream:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+    return ttfb
+
+
+async def run(tts: PollyTTS, legacy: bool, concurrency: int) -> list[float]:
+    ten_env = NullTenEnv()
+    streams = [
+        (
+            legacy_text_to_speech_stream(tts, ten_env, "hello")
+            if legacy
+            else tts.text_to_speech_stream(ten_env, "hello", True)
+        )
+        for _ in range(concurrency)
+    ]
+    # All requests arrive together; measure from that moment.
+    start = time.perf_counter()
+    return await asyncio.gather(*(first_chunk_latency(s, start) for s in streams))
+
+
+def main() -> None:
+    for visemes in (False, True):
+        config = PollyTTSConfig(
+            include_visemes=visemes, workers=16, access_key="x", secret_key="x"
+        )
+        tts = PollyTTS(config, NullTenEnv(), client=StubPollyClient())
+        for concurrency in (1, 4, 8):
+            for name, legacy in (("legacy", True), ("worker pool", False)):
+                ttfb = asyncio.run(run(tts, legacy, concurrency))
+                print(
+                    f"visemes={visemes!s:<5} concurrency={concurrency} "
+                    f"{name:<12} ttfb p50 {statistics.median(ttfb) * 1000:7.1f} ms"
+                    f"  max {max(ttfb) * 1000:7.1f} ms"
+                )
+        tts.close()
+
+
+if __name__ == "__main__":
+    main()
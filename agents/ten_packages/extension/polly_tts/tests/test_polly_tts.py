@@ -0,0 +1,110 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+pytest.importorskip("boto3")
+
+from polly_tts.polly_tts import PollyTTS, PollyTTSConfig  # noqa: E402
+
+REQUEST_LATENCY = 0.05
+FRAME_LATENCY = 0.002
+
+
+class StubBody:
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self.read_chunks = 0
+        self.closed = threading.Event()
+
+    def iter_chunks(self, chunk_size: int):
+        for i in range(0, len(self.data), chunk_size):
+            if self.closed.wait(FRAME_LATENCY):
+                return
+            self.read_chunks += 1
+            yield self.data[i : i + chunk_size]
+
+    def read(self) -> bytes:
+        return self.data
+
+    def close(self) -> None:
+        self.closed.set()
+
+
+class StubPollyClient:
+    """Blocks like the boto3 client, REQUEST_LATENCY per request."""
+
+    def __init__(self, frames: int) -> None:
+        self.frames = frames
+        self.requests = []
+        self.bodies = []
+
+    def synthesize_speech(self, **kwargs) -> dict:
+        self.requests.append(kwargs)
+        time.sleep(REQUEST_LATENCY)
+        if kwargs["OutputFormat"] == "json":
+            mark = {"time": 0, "type": "viseme", "value": "p"}
+            return {"AudioStream": StubBody(json.dumps(mark).encode())}
+        body = StubBody(bytes(320 * self.frames))
+        self.bodies.append(body)
+        return {"AudioStream": body}
+
+
+class NullTenEnv:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+def create_tts(frames: int, **kwargs) -> PollyTTS:
+    config = PollyTTSConfig(access_key="x", secret_key="x", **kwargs)
+    return PollyTTS(config, NullTenEnv(), client=StubPollyClient(frames))
+
+
+def test_requests_run_on_the_worker_pool():
+    tts = create_tts(5, workers=4, include_visemes=True)
+
+    async def synthesize() -> list:
+        return [c async for c in tts.text_to_speech_stream(NullTenEnv(), "hi", True)]
+
+    async def run():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(synthesize() for _ in range(2)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run())
+    tts.close()
+    # 10 ms frames of 16 kHz 16-bit mono, in order.
+    assert [[len(c) for c in chunks] for chunks in results] == [[320] * 5] * 2
+    # Two audio and two viseme requests at once, not one after the other.
+    assert len(tts.client.requests) == 4
+    assert elapsed < 3 * REQUEST_LATENCY
+
+
+def test_cancel_stops_reading_the_audio_stream():
+    tts = create_tts(1000)
+
+    async def run():
+        received = 0
+        async for _ in tts.text_to_speech_stream(NullTenEnv(), "hi", True):
+            received += 1
+            if received == 3:
+                tts.on_cancel_tts(NullTenEnv())
+        return received
+
+    received = asyncio.run(run())
+    tts.close()
+    body = tts.client.bodies[0]
+    assert body.closed.is_set()
+    assert received < 1000
+    assert body.read_chunks < 1000
@@ -21,10 +21,12 @@ from firebase_admin import credentials
 from firebase_admin import firestore
 import datetime
 import asyncio
-import queue
 import threading
 import json
-from typing import List, Any
+from typing import List, Any, Dict
+
+from .history_store import FirestoreHistory
+from .write_behind import WriteBehindQueue
 
 DATA_IN_TEXT_DATA_PROPERTY_IS_FINAL = "is_final"
 DATA_IN_TEXT_DATA_PROPERTY_STREAM_ID = "stream_id"
@@ -35,8 +37,12 @@ PROPERTY_CREDENTIALS = "credentials"
 PROPERTY_CHANNEL_NAME = "channel_name"
 PROPERTY_COLLECTION_NAME = "collection_name"
 PROPERTY_TTL = "ttl"
+PROPERTY_WRITE_BATCH_SIZE = "write_batch_size"
+PROPERTY_WRITE_BATCH_DELAY_MS = "write_batch_delay_ms"
+PROPERTY_RETRIEVE_LIMIT = "retrieve_limit"
 
 RETRIEVE_CMD = "retrieve"
+CMD_IN_PROPERTY_LIMIT = "limit"
 CMD_OUT_PROPERTY_RESPONSE = "response"
 DOC_EXPIRE_PATH = "expireAt"
 DOC_CONTENTS_PATH = "contents"
@@ -45,6 +51,10 @@ CONTENT_TS_PATH = "ts"
 CONTENT_STREAM_ID_PATH = "stream_id"
 CONTENT_INPUT_PATH = "input"
 DEFAULT_TTL = 1  # days
+DEFAULT_WRITE_BATCH_SIZE = 20
+DEFAULT_WRITE_BATCH_DELAY_MS = 1000
+DEFAULT_RETRIEVE_LIMIT = 0  # all
+FLUSH_TIMEOUT = 5  # seconds
 
 
 def get_current_time():
@@ -55,40 +65,25 @@ def get_current_time():
     return unix_microseconds
 
 
+def to_response_content(content: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        CONTENT_ROLE_PATH: content[CONTENT_ROLE_PATH],
+        CONTENT_INPUT_PATH: content[CONTENT_INPUT_PATH],
+        CONTENT_STREAM_ID_PATH: content.get(CONTENT_STREAM_ID_PATH, 0),
+    }
+
+
 def order_by_ts(contents: List[str]) -> List[Any]:
     tmp = []
     for c in contents:
         tmp.append(json.loads(c))
     sorted_contents = sorted(tmp, key=lambda x: x[CONTENT_TS_PATH])
-    res = []
-    for sc in sorted_contents:
-        res.append(
-            {
-                CONTENT_ROLE_PATH: sc[CONTENT_ROLE_PATH],
-                CONTENT_INPUT_PATH: sc[CONTENT_INPUT_PATH],
-                CONTENT_STREAM_ID_PATH: sc.get(CONTENT_STREAM_ID_PATH, 0),
-            }
-        )
-    return res
-
-
-@firestore.transactional
-def update_in_transaction(transaction, doc_ref, content):
-    transaction.update(doc_ref, content)
-
-
-@firestore.transactional
-def read_in_transaction(transaction, doc_ref):
-    doc = doc_ref.get(transaction=transaction)
-    return doc.to_dict()
+    return [to_response_content(sc) for sc in sorted_contents]
 
 
 class TSDBFirestoreExtension(Extension):
     def __init__(self, name: str):
         super().__init__(name)
-        self.stopped = False
-        self.thread = None
-        self.queue = queue.Queue()
         self.stopEvent = asyncio.Event()
         self.cmd_thread = None
         self.loop = None
@@ -96,8 +91,18 @@ class TSDBFirestoreExtension(Extension):
         self.channel_name = ""
         self.collection_name = ""
         self.ttl = DEFAULT_TTL
+        self.write_batch_size = DEFAULT_WRITE_BATCH_SIZE
+        self.write_batch_delay_ms = DEFAULT_WRITE_BATCH_DELAY_MS
+        self.retrieve_limit = DEFAULT_RETRIEVE_LIMIT
         self.client = None
         self.document_ref = None
+        self.history = None
+        self.writer = None
+        # contents of the channel document, written before the entries
+        # subcollection, oldest first
+        self.legacy_contents = []
+        self.last_ts = 0
+        self.ts_lock = threading.Lock()
 
         self.current_stream_id = 0
         self.cache = ""
@@ -142,6 +147,18 @@ class TSDBFirestoreExtension(Extension):
             )
             return
 
+        for name in (
+            PROPERTY_WRITE_BATCH_SIZE,
+            PROPERTY_WRITE_BATCH_DELAY_MS,
+            PROPERTY_RETRIEVE_LIMIT,
+        ):
+            try:
+                setattr(self, name, ten_env.get_property_int(name))
+            except Exception as err:
+                ten_env.log_warn(
+                    f"GetProperty optional {name} failed, use default {getattr(self, name)}, err: {err}"
+                )
+
         # start firestore db
         cred = credentials.Certificate(json.loads(self.credentials))
         firebase_admin.initialize_app(cred)
@@ -152,8 +169,11 @@ class TSDBFirestoreExtension(Extension):
         )
         # update ttl
         expiration_time = datetime.datetime.now() + datetime.timedelta(days=self.ttl)
-        exists = self.document_ref.get().exists
-        if exists:
+        snapshot = self.document_ref.get()
+        if snapshot.exists:
+            self.legacy_contents = order_by_ts(
+                (snapshot.to_dict() or {}).get(DOC_CONTENTS_PATH, [])
+            )
             self.document_ref.update({DOC_EXPIRE_PATH: expiration_time})
             ten_env.log_info(
                 f"reset document ttl, {self.ttl} day(s), for the channel {self.channel_name}"
@@ -165,9 +185,18 @@ class TSDBFirestoreExtension(Extension):
                 f"create new document and set ttl, {self.ttl} day(s), for the channel {self.channel_name}"
             )
 
-        # start the loop to handle data in
-        self.thread = threading.Thread(target=self.async_handle, args=[ten_env])
-        self.thread.start()
+        # data in is appended in batches, one write for each
+        self.history = FirestoreHistory(
+            self.client, self.document_ref, DOC_EXPIRE_PATH, expiration_time
+        )
+        self.writer = WriteBehindQueue(
+            self.history.append,
+            max_batch=self.write_batch_size,
+            max_delay=self.write_batch_delay_ms / 1000,
+            on_error=lambda err, batch: ten_env.log_error(
+                f"Failed to store {len(batch)} chat contents, err: {err}"
+            ),
+        )
 
         # start the loop to handle cmd in
         self.cmd_thread = threading.Thread(
@@ -175,44 +204,16 @@ class TSDBFirestoreExtension(Extension):
         )
         self.cmd_thread.start()
 
-    def async_handle(self, ten_env: TenEnv) -> None:
-        while not self.stopped:
-            try:
-                value = self.queue.get()
-                if value is None:
-                    ten_env.log_info("exit handle loop")
-                    break
-                ts, input_path, role, stream_id = value
-                content_str = json.dumps(
-                    {
-                        CONTENT_ROLE_PATH: role,
-                        CONTENT_INPUT_PATH: input_path,
-                        CONTENT_TS_PATH: ts,
-                        CONTENT_STREAM_ID_PATH: stream_id,
-                    }
-                )
-                update_in_transaction(
-                    self.client.transaction(),
-                    self.document_ref,
-                    {DOC_CONTENTS_PATH: firestore.ArrayUnion([content_str])},
-                )
-                ten_env.log_info(
-                    f"append {content_str} to firestore document {self.channel_name}"
-                )
-            except Exception:
-                ten_env.log_error("Failed to store chat contents")
-
     def on_stop(self, ten_env: TenEnv) -> None:
         ten_env.log_info("TSDBFirestoreExtension on_stop")
 
-        # clear the queue and stop the thread to process data in
-        self.stopped = True
-        while not self.queue.empty():
-            self.queue.get()
-        self.queue.put(None)
-        if self.thread is not None:
-            self.thread.join()
-            self.thread = None
+        # write what is still buffered
+        if self.writer is not None:
+            self.writer.close()
+            ten_env.log_info(
+                f"stored {self.writer.entries} chat contents in {self.writer.batches} writes"
+            )
+            self.writer = None
 
         # stop the thread to process cmd in
         if self.cmd_thread is not None and self.cmd_thread.is_alive():
@@ -241,14 +242,26 @@ class TSDBFirestoreExtension(Extension):
 
     async def retrieve(self, ten_env: TenEnv, cmd: Cmd):
         try:
-            doc_dict = read_in_transaction(self.client.transaction(), self.document_ref)
-            if DOC_CONTENTS_PATH in doc_dict:
-                contents = doc_dict[DOC_CONTENTS_PATH]
+            limit = self.retrieve_limit
+            try:
+                limit = cmd.get_property_int(CMD_IN_PROPERTY_LIMIT)
+            except Exception:
+                pass  # not asked for, use the property
+
+            # read what was appended so far
+            if not self.writer.flush(FLUSH_TIMEOUT):
+                ten_env.log_warn("retrieve before buffered contents are written")
+            contents = [to_response_content(c) for c in self.history.tail(limit)]
+            if limit <= 0:
+                contents = self.legacy_contents + contents
+            elif len(contents) < limit:
+                missing = limit - len(contents)
+                contents = self.legacy_contents[-missing:] + contents
+
+            if contents:
                 ten_env.log_info(f"after retrieve {contents}")
                 ret = CmdResult.create(StatusCode.OK)
-                ret.set_property_string(
-                    CMD_OUT_PROPERTY_RESPONSE, json.dumps(order_by_ts(contents))
-                )
+                ret.set_property_string(CMD_OUT_PROPERTY_RESPONSE, json.dumps(contents))
                 ten_env.return_result(ret, cmd)
             else:
                 ten_env.log_info(f"no contents for the channel {self.channel_name} yet")
@@ -306,8 +319,21 @@ class TSDBFirestoreExtension(Extension):
             )
             return
 
-        ts = get_current_time()
-        self.queue.put((ts, input_text, role, stream_id))
+        # strictly increasing, entries are read back in ts order
+        with self.ts_lock:
+            ts = max(get_current_time(), self.last_ts + 1)
+            self.last_ts = ts
+        try:
+            self.writer.append(
+                {
+                    CONTENT_ROLE_PATH: role,
+                    CONTENT_INPUT_PATH: input_text,
+                    CONTENT_TS_PATH: ts,
+                    CONTENT_STREAM_ID_PATH: stream_id,
+                }
+            )
+        except Exception:
+            ten_env.log_error("Failed to store chat contents")
 
     def on_audio_frame(self, ten_env: TenEnv, audio_frame: AudioFrame) -> None:
         pass
@@ -0,0 +1,52 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+from typing import Any, Dict, List
+
+ENTRIES_COLLECTION = "entries"
+ENTRY_TS_FIELD = "ts"
+# a Firestore batched write takes at most 500 operations
+MAX_BATCH_WRITES = 500
+
+
+class FirestoreHistory:
+    """Chat lines of a channel, one document each in a subcollection.
+
+    The lines live in the `entries` subcollection of the channel document,
+    so appends do not rewrite a growing array and a read fetches the last
+    lines only, in ts order from the index. Each line carries the expire
+    field of the channel document for a TTL policy on the subcollection.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        document_ref: Any,
+        expire_field: str = "",
+        expire_at: Any = None,
+    ) -> None:
+        self.client = client
+        self.entries_ref = document_ref.collection(ENTRIES_COLLECTION)
+        self.expire_field = expire_field
+        self.expire_at = expire_at
+
+    def append(self, entries: List[Dict[str, Any]]) -> None:
+        """Write the entries, in one batched write per 500."""
+        for start in range(0, len(entries), MAX_BATCH_WRITES):
+            batch = self.client.batch()
+            for entry in entries[start : start + MAX_BATCH_WRITES]:
+                if self.expire_field:
+                    entry = {**entry, self.expire_field: self.expire_at}
+                batch.set(self.entries_ref.document(), entry)
+            batch.commit()
+
+    def tail(self, limit: int = 0) -> List[Dict[str, Any]]:
+        """The last limit entries, or all of them for 0, oldest first."""
+        query = self.entries_ref.order_by(ENTRY_TS_FIELD, direction="DESCENDING")
+        if limit > 0:
+            query = query.limit(limit)
+        entries = [snapshot.to_dict() for snapshot in query.stream()]
+        entries.reverse()
+        return entries
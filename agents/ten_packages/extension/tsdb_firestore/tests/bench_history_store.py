@@ -0,0 +1,151 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Transcript writes and retrieve, one transaction per line vs write-behind.
+
+Usage:
+    python tests/bench_history_store.py [stored_lines] [rtt_ms]
+
+Runs against the in-memory fake in tests/fake_firestore.py, every round
+trip sleeping rtt_ms (10 ms by default). "legacy" appends each line with a
+transaction (begin and commit, two round trips) doing an ArrayUnion on the
+channel document, and retrieve reads the whole document, parses and sorts
+every line. "write-behind" buffers lines into batched writes of 20 and
+retrieve reads the last 20 entries of the subcollection.
+
+Writes: 300 lines appended as fast as they come, time until all are
+stored. Retrieve: a channel with stored_lines (10000) lines; client time is
+what the extension spends parsing and sorting, latency adds the round trips
+and the bytes at 100 Mbit/s.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_firestore import FakeFirestore  # noqa: E402
+from history_store import FirestoreHistory  # noqa: E402
+from write_behind import WriteBehindQueue  # noqa: E402
+
+LIMIT = 20
+BANDWIDTH = 100e6 / 8
+
+
+def line(i: int) -> dict:
+    role = "user" if i % 2 == 0 else "assistant"
+    return {
+        "role": role,
+        "input": f"line {i} of the conversation, a sentence or two of transcript",
+        "ts": 1_700_000_000_000_000 + i,
+        "stream_id": 0,
+    }
+
+
+def legacy_append(db: FakeFirestore, doc, content: str) -> None:
+    db.round_trip()  # begin transaction
+    db.documents.setdefault(doc.path, {}).setdefault("contents", []).append(content)
+    db.round_trip()  # commit
+
+
+def legacy_retrieve(db: FakeFirestore, doc) -> list:
+    db.round_trip()  # begin transaction
+    contents = doc.get().to_dict()["contents"]
+    tmp = [json.loads(c) for c in contents]
+    tmp.sort(key=lambda x: x["ts"])
+    return [
+        {"role": c["role"], "input": c["input"], "stream_id": c.get("stream_id", 0)}
+        for c in tmp
+    ]
+
+
+def tail_retrieve(history: FirestoreHistory) -> list:
+    return [
+        {"role": c["role"], "input": c["input"], "stream_id": c.get("stream_id", 0)}
+        for c in history.tail(LIMIT)
+    ]
+
+
+def bench_writes(rtt: float, lines: int = 300) -> None:
+    db = FakeFirestore(rtt)
+    doc = db.collection("chats").document("channel")
+    start = time.perf_counter()
+    for i in range(lines):
+        legacy_append(db, doc, json.dumps(line(i)))
+    elapsed = time.perf_counter() - start
+    print(
+        f"legacy       writes {lines / elapsed:8.0f} lines/s  "
+        f"{db.rpcs:4d} round trips for {lines} lines"
+    )
+
+    db = FakeFirestore(rtt)
+    history = FirestoreHistory(db, db.collection("chats").document("channel"))
+    start = time.perf_counter()
+    writer = WriteBehindQueue(history.append, max_batch=20, max_delay=1.0)
+    for i in range(lines):
+        writer.append(line(i))
+    writer.close()
+    elapsed = time.perf_counter() - start
+    print(
+        f"write-behind writes {lines / elapsed:8.0f} lines/s  "
+        f"{db.rpcs:4d} round trips for {lines} lines"
+    )
+
+
+def measure(db: FakeFirestore, retrieve, runs: int = 20) -> dict:
+    clients, latencies = [], []
+    for _ in range(runs):
+        db.rpcs = db.docs_read = db.bytes_read = 0
+        db.server_time = 0.0
+        start = time.perf_counter()
+        result = retrieve()
+        elapsed = time.perf_counter() - start
+        client = elapsed - db.server_time - db.rpcs * db.rtt
+        clients.append(client)
+        latencies.append(client + db.rpcs * db.rtt + db.bytes_read / BANDWIDTH)
+    return {
+        "client": statistics.median(clients),
+        "latency": statistics.median(latencies),
+        "lines": len(result),
+        "docs": db.docs_read,
+        "bytes": db.bytes_read,
+    }
+
+
+def report(name: str, r: dict) -> None:
+    print(
+        f"{name:<12} retrieve {r['lines']:5d} lines  client {r['client'] * 1000:6.2f} ms  "
+        f"latency {r['latency'] * 1000:6.1f} ms  "
+        f"{r['docs']:2d} docs {r['bytes'] / 1024:7.1f} KiB read"
+    )
+
+
+def bench_retrieve(stored: int, rtt: float) -> None:
+    db = FakeFirestore()
+    doc = db.collection("chats").document("channel")
+    for i in range(stored):
+        legacy_append(db, doc, json.dumps(line(i)))
+    db.rtt = rtt
+    report("legacy", measure(db, lambda: legacy_retrieve(db, doc)))
+
+    db = FakeFirestore()
+    history = FirestoreHistory(db, db.collection("chats").document("channel"))
+    history.append([line(i) for i in range(stored)])
+    db.rtt = rtt
+    report("write-behind", measure(db, lambda: tail_retrieve(history)))
+
+
+def main() -> None:
+    stored = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rtt = (float(sys.argv[2]) if len(sys.argv) > 2 else 10) / 1000
+    bench_writes(rtt)
+    bench_retrieve(stored, rtt)
+
+
+if __name__ == "__main__":
+    main()
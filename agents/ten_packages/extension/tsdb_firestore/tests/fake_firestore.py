@@ -0,0 +1,129 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""An in-memory stand-in for the Firestore client calls the extension makes.
+
+Every call that is a round trip to Firestore counts in `rpcs` and sleeps
+`rtt` seconds; the documents it sends back count in `docs_read` and, as
+JSON, in `bytes_read`. Time spent in the fake itself, standing in for the
+server, adds up in `server_time`.
+"""
+
+import copy
+import itertools
+import json
+import time
+
+
+class FakeFirestore:
+    def __init__(self, rtt: float = 0.0) -> None:
+        self.rtt = rtt
+        self.rpcs = 0
+        self.docs_read = 0
+        self.bytes_read = 0
+        self.server_time = 0.0
+        self.documents = {}  # path -> dict
+        self._ids = itertools.count()
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self, name)
+
+    def batch(self) -> "FakeBatch":
+        return FakeBatch(self)
+
+    def round_trip(self, docs=()) -> None:
+        start = time.perf_counter()
+        self.rpcs += 1
+        self.docs_read += len(docs)
+        self.bytes_read += sum(len(json.dumps(d, default=str)) for d in docs)
+        self.server_time += time.perf_counter() - start
+        if self.rtt:
+            time.sleep(self.rtt)
+
+
+class FakeDocument:
+    def __init__(self, db: FakeFirestore, path: str) -> None:
+        self.db = db
+        self.path = path
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self.db, f"{self.path}/{name}")
+
+    def set(self, data: dict) -> None:
+        self.db.documents[self.path] = copy.deepcopy(data)
+        self.db.round_trip()
+
+    def update(self, data: dict) -> None:
+        self.db.documents.setdefault(self.path, {}).update(copy.deepcopy(data))
+        self.db.round_trip()
+
+    def get(self) -> "FakeSnapshot":
+        start = time.perf_counter()
+        data = copy.deepcopy(self.db.documents.get(self.path))
+        self.db.server_time += time.perf_counter() - start
+        self.db.round_trip([data] if data is not None else [])
+        return FakeSnapshot(data)
+
+
+class FakeSnapshot:
+    def __init__(self, data) -> None:
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return self._data
+
+
+class FakeCollection:
+    def __init__(self, db: FakeFirestore, path: str) -> None:
+        self.db = db
+        self.path = path
+        self._order = None
+        self._limit = 0
+
+    def document(self, doc_id: str = "") -> FakeDocument:
+        doc_id = doc_id or f"{next(self.db._ids):020d}"
+        return FakeDocument(self.db, f"{self.path}/{doc_id}")
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "FakeCollection":
+        query = FakeCollection(self.db, self.path)
+        query._order = (field, direction == "DESCENDING")
+        return query
+
+    def limit(self, count: int) -> "FakeCollection":
+        self._limit = count
+        return self
+
+    def stream(self):
+        start = time.perf_counter()
+        prefix = self.path + "/"
+        docs = [
+            d
+            for p, d in self.db.documents.items()
+            if p.startswith(prefix) and "/" not in p[len(prefix) :]
+        ]
+        if self._order is not None:
+            field, descending = self._order
+            docs.sort(key=lambda d: d[field], reverse=descending)
+        if self._limit:
+            docs = docs[: self._limit]
+        docs = copy.deepcopy(docs)
+        self.db.server_time += time.perf_counter() - start
+        self.db.round_trip(docs)
+        return [FakeSnapshot(d) for d in docs]
+
+
+class FakeBatch:
+    def __init__(self, db: FakeFirestore) -> None:
+        self.db = db
+        self.writes = []
+
+    def set(self, document: FakeDocument, data: dict) -> None:
+        self.writes.append((document.path, copy.deepcopy(data)))
+
+    def commit(self) -> None:
+        for path, data in self.writes:
+            self.db.documents[path] = data
+        self.db.round_trip()
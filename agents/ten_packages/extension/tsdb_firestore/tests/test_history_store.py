@@ -0,0 +1,78 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fake_firestore import FakeFirestore  # noqa: E402
+from history_store import FirestoreHistory  # noqa: E402
+from write_behind import WriteBehindQueue  # noqa: E402
+
+
+def test_batches_by_size_and_delay():
+    batches = []
+    writer = WriteBehindQueue(batches.append, max_batch=3, max_delay=0.05)
+    for i in range(7):
+        writer.append(i)
+    time.sleep(0.2)
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    writer.close()
+
+
+def test_flush_and_close_write_everything():
+    batches = []
+    writer = WriteBehindQueue(batches.append, max_batch=100, max_delay=60)
+    writer.append("a")
+    assert writer.flush(1)
+    assert batches == [["a"]]
+    writer.append("b")
+    writer.append("c")
+    writer.close()
+    assert batches == [["a"], ["b", "c"]]
+    assert writer.entries == 3
+
+
+def test_failed_batch_goes_to_on_error():
+    failed = []
+    done = threading.Event()
+
+    def write(batch):
+        raise RuntimeError("unavailable")
+
+    def on_error(e, batch):
+        failed.append((str(e), batch))
+        done.set()
+
+    writer = WriteBehindQueue(write, max_batch=2, on_error=on_error)
+    writer.append(1)
+    writer.append(2)
+    assert done.wait(1)
+    writer.close()
+    assert failed == [("unavailable", [1, 2])]
+
+
+def test_tail_returns_last_entries_in_order():
+    db = FakeFirestore()
+    history = FirestoreHistory(db, db.collection("chats").document("channel"))
+    history.append([{"ts": ts, "input": str(ts)} for ts in (3, 1, 2)])
+    history.append([{"ts": 4, "input": "4"}])
+    assert db.rpcs == 2
+
+    assert [e["input"] for e in history.tail(2)] == ["3", "4"]
+    assert [e["input"] for e in history.tail()] == ["1", "2", "3", "4"]
+    assert db.docs_read == 6
+
+
+def test_entries_carry_expire_field():
+    db = FakeFirestore()
+    history = FirestoreHistory(
+        db, db.collection("chats").document("channel"), "expireAt", 42
+    )
+    history.append([{"ts": 1}])
+    assert history.tail() == [{"ts": 1, "expireAt": 42}]
@@ -0,0 +1,109 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Batched writes behind an append queue.
+
+The same module is copied in tsdb_firestore and tsdb_sqlite, keep them
+equal.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+_STOP = object()
+_TIMEOUT = object()
+
+
+class WriteBehindQueue:
+    """Appends go to a queue and are written in batches by a thread of its own.
+
+    A batch is written once it holds max_batch entries, or max_delay seconds
+    after its first entry, whichever comes first. flush() returns when
+    everything appended before it is written; close() flushes and stops the
+    thread. A batch that fails to write is passed to on_error and dropped.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[Any]], None],
+        max_batch: int = 50,
+        max_delay: float = 0.5,
+        on_error: Optional[Callable[[Exception, List[Any]], None]] = None,
+    ) -> None:
+        self.write = write
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.on_error = on_error
+        self.batches = 0
+        self.entries = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def append(self, entry: Any) -> None:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("write-behind queue closed")
+            self._queue.put(entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        done = threading.Event()
+        with self._lock:
+            if self._closed:
+                return True
+            self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self.thread.join()
+
+    def _run(self) -> None:
+        batch, waiters = [], []
+        deadline = 0.0
+        stopping = False
+        while not stopping:
+            timeout = None
+            if batch:
+                timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _TIMEOUT
+
+            if item is _STOP:
+                stopping = True
+            elif isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not _TIMEOUT:
+                if not batch:
+                    deadline = time.monotonic() + self.max_delay
+                batch.append(item)
+
+            if batch and (
+                len(batch) >= self.max_batch or item is _TIMEOUT or waiters or stopping
+            ):
+                self._write(batch)
+                batch = []
+            for done in waiters:
+                done.set()
+            waiters = []
+
+    def _write(self, batch: List[Any]) -> None:
+        try:
+            self.write(batch)
+            self.batches += 1
+            self.entries += len(batch)
+        except Exception as e:
+            if self.on_error is not None:
+                self.on_error(e, batch)
@@ -0,0 +1,103 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Sequence
+
+ROLE = "role"
+INPUT = "input"
+TS = "ts"
+STREAM_ID = "stream_id"
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS history (
+        channel TEXT NOT NULL,
+        ts INTEGER NOT NULL,
+        role TEXT NOT NULL,
+        input TEXT NOT NULL,
+        stream_id INTEGER NOT NULL DEFAULT 0
+    )""",
+    "CREATE INDEX IF NOT EXISTS history_channel_ts ON history (channel, ts)",
+)
+
+
+class ChatStore:
+    """Chat lines of channels in a SQLite database in WAL mode.
+
+    Each thread gets a connection of its own; with WAL a read does not wait
+    for a write in progress. A tail read walks the (channel, ts) index
+    backwards and stops after limit rows.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        with self._connection() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def append(self, channel: str, entries: Sequence[Dict[str, Any]]) -> None:
+        """Insert the entries in one transaction."""
+        rows = [
+            (channel, e[TS], e[ROLE], e[INPUT], e.get(STREAM_ID, 0)) for e in entries
+        ]
+        with self._connection() as conn:
+            conn.executemany(
+                "INSERT INTO history (channel, ts, role, input, stream_id)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def tail(self, channel: str, limit: int = 0) -> List[Dict[str, Any]]:
+        """The last limit entries of the channel, or all of them for 0,
+        oldest first."""
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT ts, role, input, stream_id FROM history WHERE channel = ?"
+                " ORDER BY ts DESC LIMIT ?",
+                (channel, limit if limit > 0 else -1),
+            )
+            .fetchall()
+        )
+        rows.reverse()
+        return [
+            {TS: ts, ROLE: role, INPUT: text, STREAM_ID: stream_id}
+            for ts, role, text, stream_id in rows
+        ]
+
+    def prune(self, before_ts: int) -> int:
+        """Delete the entries of every channel older than before_ts."""
+        with self._connection() as conn:
+            return conn.execute(
+                "DELETE FROM history WHERE ts < ?", (before_ts,)
+            ).rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # durable at the checkpoint, a power cut may lose the last lines
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
@@ -0,0 +1,251 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import concurrent.futures
+import datetime
+import json
+import os
+import tempfile
+import threading
+
+from ten import (
+    AudioFrame,
+    VideoFrame,
+    Extension,
+    TenEnv,
+    Cmd,
+    StatusCode,
+    CmdResult,
+    Data,
+)
+
+from .chat_store import INPUT, ROLE, STREAM_ID, TS, ChatStore
+from .write_behind import WriteBehindQueue
+
+DATA_IN_TEXT_DATA_PROPERTY_IS_FINAL = "is_final"
+DATA_IN_TEXT_DATA_PROPERTY_STREAM_ID = "stream_id"
+DATA_IN_TEXT_DATA_PROPERTY_TEXT = "text"
+DATA_IN_TEXT_DATA_PROPERTY_ROLE = "role"
+
+PROPERTY_PATH = "path"  # Optional, a file in the temp dir if empty
+PROPERTY_CHANNEL_NAME = "channel_name"
+PROPERTY_TTL = "ttl"  # Optional, days, 0 keeps everything
+PROPERTY_WRITE_BATCH_SIZE = "write_batch_size"
+PROPERTY_WRITE_BATCH_DELAY_MS = "write_batch_delay_ms"
+PROPERTY_RETRIEVE_LIMIT = "retrieve_limit"
+
+RETRIEVE_CMD = "retrieve"
+CMD_IN_PROPERTY_LIMIT = "limit"
+CMD_OUT_PROPERTY_RESPONSE = "response"
+DEFAULT_TTL = 0
+DEFAULT_WRITE_BATCH_SIZE = 20
+DEFAULT_WRITE_BATCH_DELAY_MS = 200
+DEFAULT_RETRIEVE_LIMIT = 0  # all
+FLUSH_TIMEOUT = 5  # seconds
+
+
+def get_current_time():
+    # microseconds since the Unix epoch, as tsdb_firestore
+    return int(datetime.datetime.now().timestamp() * 1_000_000)
+
+
+class TSDBSqliteExtension(Extension):
+    """The append data and retrieve cmd of tsdb_firestore, stored in a
+    SQLite database on this host."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.path = ""
+        self.channel_name = ""
+        self.ttl = DEFAULT_TTL
+        self.write_batch_size = DEFAULT_WRITE_BATCH_SIZE
+        self.write_batch_delay_ms = DEFAULT_WRITE_BATCH_DELAY_MS
+        self.retrieve_limit = DEFAULT_RETRIEVE_LIMIT
+        self.store = None
+        self.writer = None
+        # retrieve off the extension thread
+        self.executor = None
+        self.last_ts = 0
+        self.ts_lock = threading.Lock()
+
+    def on_init(self, ten_env: TenEnv) -> None:
+        ten_env.log_info("TSDBSqliteExtension on_init")
+        ten_env.on_init_done()
+
+    def on_start(self, ten_env: TenEnv) -> None:
+        ten_env.log_info("TSDBSqliteExtension on_start")
+
+        try:
+            self.channel_name = ten_env.get_property_string(PROPERTY_CHANNEL_NAME)
+        except Exception as err:
+            ten_env.log_error(
+                f"GetProperty required {PROPERTY_CHANNEL_NAME} failed, err: {err}"
+            )
+            return
+
+        try:
+            self.path = ten_env.get_property_string(PROPERTY_PATH)
+        except Exception as err:
+            ten_env.log_warn(f"GetProperty optional {PROPERTY_PATH} failed, err: {err}")
+        if not self.path:
+            self.path = os.path.join(tempfile.gettempdir(), "tsdb_sqlite", "history.db")
+
+        for name in (
+            PROPERTY_TTL,
+            PROPERTY_WRITE_BATCH_SIZE,
+            PROPERTY_WRITE_BATCH_DELAY_MS,
+            PROPERTY_RETRIEVE_LIMIT,
+        ):
+            try:
+                setattr(self, name, ten_env.get_property_int(name))
+            except Exception as err:
+                ten_env.log_warn(
+                    f"GetProperty optional {name} failed, use default {getattr(self, name)}, err: {err}"
+                )
+
+        self.store = ChatStore(self.path)
+        if self.ttl > 0:
+            before_ts = get_current_time() - self.ttl * 86400 * 1_000_000
+            pruned = self.store.prune(before_ts)
+            ten_env.log_info(f"pruned {pruned} contents older than {self.ttl} day(s)")
+
+        self.writer = WriteBehindQueue(
+            lambda entries: self.store.append(self.channel_name, entries),
+            max_batch=self.write_batch_size,
+            max_delay=self.write_batch_delay_ms / 1000,
+            on_error=lambda err, batch: ten_env.log_error(
+                f"Failed to store {len(batch)} chat contents, err: {err}"
+            ),
+        )
+        self.executor = concurrent.futures.ThreadPoolExecutor(1)
+        ten_env.log_info(f"chat contents of {self.channel_name} in {self.path}")
+        ten_env.on_start_done()
+
+    def on_stop(self, ten_env: TenEnv) -> None:
+        ten_env.log_info("TSDBSqliteExtension on_stop")
+
+        # write what is still buffered
+        if self.writer is not None:
+            self.writer.close()
+            ten_env.log_info(
+                f"stored {self.writer.entries} chat contents in {self.writer.batches} writes"
+            )
+            self.writer = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+        ten_env.on_stop_done()
+
+    def on_deinit(self, ten_env: TenEnv) -> None:
+        ten_env.log_info("TSDBSqliteExtension on_deinit")
+        ten_env.on_deinit_done()
+
+    def on_cmd(self, ten_env: TenEnv, cmd: Cmd) -> None:
+        try:
+            cmd_name = cmd.get_name()
+            ten_env.log_info(f"on_cmd name {cmd_name}")
+            if cmd_name == RETRIEVE_CMD:
+                self.executor.submit(self.retrieve, ten_env, cmd)
+            else:
+                ten_env.log_info(f"unknown cmd name {cmd_name}")
+                cmd_result = CmdResult.create(StatusCode.ERROR)
+                ten_env.return_result(cmd_result, cmd)
+        except Exception:
+            ten_env.return_result(CmdResult.create(StatusCode.ERROR), cmd)
+
+    def retrieve(self, ten_env: TenEnv, cmd: Cmd) -> None:
+        try:
+            limit = self.retrieve_limit
+            try:
+                limit = cmd.get_property_int(CMD_IN_PROPERTY_LIMIT)
+            except Exception:
+                pass  # not asked for, use the property
+
+            # read what was appended so far
+            if not self.writer.flush(FLUSH_TIMEOUT):
+                ten_env.log_warn("retrieve before buffered contents are written")
+            contents = [
+                {ROLE: c[ROLE], INPUT: c[INPUT], STREAM_ID: c[STREAM_ID]}
+                for c in self.store.tail(self.channel_name, limit)
+            ]
+
+            if contents:
+                ten_env.log_info(f"after retrieve {contents}")
+                ret = CmdResult.create(StatusCode.OK)
+                ret.set_property_string(CMD_OUT_PROPERTY_RESPONSE, json.dumps(contents))
+                ten_env.return_result(ret, cmd)
+            else:
+                ten_env.log_info(f"no contents for the channel {self.channel_name} yet")
+                ten_env.return_result(CmdResult.create(StatusCode.ERROR), cmd)
+        except Exception as err:
+            ten_env.log_error(
+                f"Failed to read the contents of the channel {self.channel_name}, err: {err}"
+            )
+            ten_env.return_result(CmdResult.create(StatusCode.ERROR), cmd)
+
+    def on_data(self, ten_env: TenEnv, data: Data) -> None:
+        ten_env.log_info("TSDBSqliteExtension on_data")
+
+        try:
+            is_final = data.get_property_bool(DATA_IN_TEXT_DATA_PROPERTY_IS_FINAL)
+            if not is_final:
+                ten_env.log_info("ignore non-final input")
+                return
+        except Exception as err:
+            ten_env.log_info(
+                f"OnData GetProperty {DATA_IN_TEXT_DATA_PROPERTY_IS_FINAL} failed, err: {err}"
+            )
+
+        stream_id = 0
+        try:
+            stream_id = data.get_property_int(DATA_IN_TEXT_DATA_PROPERTY_STREAM_ID)
+        except Exception as err:
+            ten_env.log_info(
+                f"OnData GetProperty {DATA_IN_TEXT_DATA_PROPERTY_STREAM_ID} failed, err: {err}"
+            )
+
+        try:
+            input_text = data.get_property_string(DATA_IN_TEXT_DATA_PROPERTY_TEXT)
+            if not input_text:
+                ten_env.log_info("ignore empty text")
+                return
+            ten_env.log_info(f"OnData input text: [{input_text}]")
+        except Exception as err:
+            ten_env.log_info(
+                f"OnData GetProperty {DATA_IN_TEXT_DATA_PROPERTY_TEXT} failed, err: {err}"
+            )
+            return
+
+        try:
+            role = data.get_property_string(DATA_IN_TEXT_DATA_PROPERTY_ROLE)
+            if not role:
+                ten_env.log_warn("ignore empty role")
+                return
+        except Exception as err:
+            ten_env.log_info(
+                f"OnData GetProperty {DATA_IN_TEXT_DATA_PROPERTY_ROLE} failed, err: {err}"
+            )
+            return
+
+        # strictly increasing, entries are read back in ts order
+        with self.ts_lock:
+            ts = max(get_current_time(), self.last_ts + 1)
+            self.last_ts = ts
+        try:
+            self.writer.append(
+                {ROLE: role, INPUT: input_text, TS: ts, STREAM_ID: stream_id}
+            )
+        except Exception:
+            ten_env.log_error("Failed to store chat contents")
+
+    def on_audio_frame(self, ten_env: TenEnv, audio_frame: AudioFrame) -> None:
+        pass
+
+    def on_video_frame(self, ten_env: TenEnv, video_frame: VideoFrame) -> None:
+        pass
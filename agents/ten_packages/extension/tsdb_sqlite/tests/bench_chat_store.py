@@ -0,0 +1,135 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+"""Session resume and writes, tsdb_sqlite vs the tsdb_firestore path.
+
+Usage:
+    python tests/bench_chat_store.py [lines_per_channel] [rtt_ms]
+
+The Firestore side is tsdb_firestore's FirestoreHistory on its in-memory
+fake (tsdb_firestore/tests/fake_firestore.py), every round trip sleeping
+rtt_ms (10 ms by default). Both sides write through the same write-behind
+queue, 20 lines per batch; "sqlite per line" commits each line on its own.
+
+Writes: 2000 lines appended as fast as they come, time until all are
+stored. Resume: 10 channels of lines_per_channel (10000) lines each; a
+resume opens the store and retrieves the last 20 lines of a channel, as
+an extension starting for a returning user does.
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+FIRESTORE = os.path.join(os.path.dirname(__file__), "..", "..", "tsdb_firestore")
+sys.path.insert(1, os.path.join(FIRESTORE, "tests"))
+sys.path.insert(1, FIRESTORE)
+
+from chat_store import ChatStore  # noqa: E402
+from write_behind import WriteBehindQueue  # noqa: E402
+from fake_firestore import FakeFirestore  # noqa: E402
+from history_store import FirestoreHistory  # noqa: E402
+
+LIMIT = 20
+CHANNELS = 10
+BANDWIDTH = 100e6 / 8
+
+
+def line(i: int) -> dict:
+    return {
+        "role": "user" if i % 2 == 0 else "assistant",
+        "input": f"line {i} of the conversation, a sentence or two of transcript",
+        "ts": 1_700_000_000_000_000 + i,
+        "stream_id": 0,
+    }
+
+
+def timed_writes(write, batched: bool, lines: int) -> float:
+    start = time.perf_counter()
+    if batched:
+        writer = WriteBehindQueue(write, max_batch=20, max_delay=0.2)
+        for i in range(lines):
+            writer.append(line(i))
+        writer.close()
+    else:
+        for i in range(lines):
+            write([line(i)])
+    return lines / (time.perf_counter() - start)
+
+
+def bench_writes(root: str, rtt: float, lines: int = 2000) -> None:
+    store = ChatStore(os.path.join(root, "per_line.db"))
+    rate = timed_writes(lambda b: store.append("c", b), False, lines)
+    print(f"sqlite per line     writes {rate:8.0f} lines/s")
+    store.close()
+
+    store = ChatStore(os.path.join(root, "batched.db"))
+    rate = timed_writes(lambda b: store.append("c", b), True, lines)
+    print(f"sqlite write-behind writes {rate:8.0f} lines/s")
+    store.close()
+
+    db = FakeFirestore(rtt)
+    history = FirestoreHistory(db, db.collection("chats").document("c"))
+    rate = timed_writes(history.append, True, lines)
+    print(f"firestore write-b.  writes {rate:8.0f} lines/s")
+
+
+def report(name: str, latencies: list) -> None:
+    latencies = sorted(latencies)
+    print(
+        f"{name:<19} resume p50 {statistics.median(latencies) * 1000:6.2f} ms "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms"
+    )
+
+
+def bench_resume(root: str, per_channel: int, rtt: float, runs: int = 200) -> None:
+    path = os.path.join(root, "resume.db")
+    store = ChatStore(path)
+    for channel in range(CHANNELS):
+        entries = [line(i) for i in range(per_channel)]
+        store.append(f"channel-{channel}", entries)
+    store.close()
+
+    latencies = []
+    for run in range(runs):
+        start = time.perf_counter()
+        store = ChatStore(path)
+        contents = store.tail(f"channel-{run % CHANNELS}", LIMIT)
+        latencies.append(time.perf_counter() - start)
+        store.close()
+    assert len(contents) == LIMIT
+    report("sqlite", latencies)
+
+    db = FakeFirestore()
+    histories = []
+    for channel in range(CHANNELS):
+        history = FirestoreHistory(db, db.collection("chats").document(f"{channel}"))
+        history.append([line(i) for i in range(per_channel)])
+        histories.append(history)
+    db.rtt = rtt
+    latencies = []
+    for run in range(runs // 10):
+        db.rpcs = db.bytes_read = 0
+        db.server_time = 0.0
+        start = time.perf_counter()
+        histories[run % CHANNELS].tail(LIMIT)
+        elapsed = time.perf_counter() - start - db.server_time
+        latencies.append(elapsed + db.bytes_read / BANDWIDTH)
+    report("firestore (fake)", latencies)
+
+
+def main() -> None:
+    per_channel = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rtt = (float(sys.argv[2]) if len(sys.argv) > 2 else 10) / 1000
+    with tempfile.TemporaryDirectory() as root:
+        bench_writes(root, rtt)
+        bench_resume(root, per_channel, rtt)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#
+# This file is part of TEN Framework, an open source project.
+# Licensed under the Apache License, Version 2.0.
+# See the LICENSE file for more information.
+#
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from chat_store import ChatStore  # noqa: E402
+
+
+def entry(ts: int) -> dict:
+    return {"ts": ts, "role": "user", "input": f"line {ts}", "stream_id": 0}
+
+
+def test_tail_per_channel_oldest_first(tmp_path):
+    store = ChatStore(str(tmp_path / "history.db"))
+    store.append("a", [entry(ts) for ts in (1, 3, 2)])
+    store.append("b", [entry(10)])
+
+    assert [e["ts"] for e in store.tail("a", 2)] == [2, 3]
+    assert [e["ts"] for e in store.tail("a")] == [1, 2, 3]
+    assert store.tail("b") == [entry(10)]
+    assert store.tail("c") == []
+    store.close()
+
+
+def test_reopen_and_prune(tmp_path):
+    path = str(tmp_path / "history.db")
+    store = ChatStore(path)
+    store.append("a", [entry(ts) for ts in range(5)])
+    store.close()
+
+    store = ChatStore(path)
+    assert store.prune(3) == 3
+    assert [e["ts"] for e in store.tail("a")] == [3, 4]
+    store.close()
+
+
+def test_read_from_another_thread(tmp_path):
+    store = ChatStore(str(tmp_path / "history.db"))
+    store.append("a", [entry(1)])
+    result = []
+    reader = threading.Thread(target=lambda: result.extend(store.tail("a")))
+    reader.start()
+    reader.join()
+    assert result == [entry(1)]
+    store.close()